@@ -1,13 +1,10 @@
 
 # code_llm_summarizer.py
 
+import argparse
 import asyncio
-import json
 from pathlib import Path
 import logging
-import ast
-import tokenize
-import io
 import tracemalloc
 
 from utils.project_manager import ProjectManager
@@ -16,11 +13,14 @@ from configs.llm_config import LLMConfig
 from utils.llm_client import LLMClient
 from utils.document_generator import DocumentGenerator
 from utils.config import PROJECT_PATH
+from utils.parse_cache import get_parse_cache
+from utils.async_io import DEFAULT_IO_WORKERS, DEFAULT_PREFETCH_DEPTH, configure_async_io, get_async_io
+from utils.pipeline import PipelineRunner, RunJournal, Stage
+from utils.code_preprocessor import MINIFY_LEVELS, CodePreprocessor, PreprocessOptions, preprocess_code
+from utils.path_keys import key_to_path, path_key
+from utils.artifact_graph import file_node
 from typing import Any, Dict, List, Optional
 
-# Enable tracemalloc for detailed traceback (optional)
-tracemalloc.start()
-
 def remove_comments(code: str) -> str:
     """
     Remove comments from Python code while preserving docstrings.
@@ -29,30 +29,21 @@ def remove_comments(code: str) -> str:
         code (str): The original Python code.
 
     Returns:
-        str: The code without comments.
+        str: The code without comments and runs of blank lines.
     """
-    try:
-        io_obj = io.StringIO(code)
-        out = ""
-        prev_toktype = tokenize.INDENT
-        for tok in tokenize.generate_tokens(io_obj.readline):
-            token_type, token_string, (start_line, start_col), (end_line, end_col), line = tok
-            if token_type == tokenize.COMMENT:
-                continue
-            elif token_type == tokenize.STRING:
-                if prev_toktype != tokenize.INDENT:
-                    # Likely a docstring; keep it
-                    out += token_string
-            else:
-                out += token_string
-            prev_toktype = token_type
-        return out
-    except Exception as e:
-        # In case of any parsing error, return the original code
-        return code
+    return preprocess_code(code, MINIFY_LEVELS['comments']).code
+
 
+# Stages in pipeline order; --stages selects a subset
+STAGE_NAMES = ['files', 'folders', 'project_summary', 'prd', 'system_design', 'task_list', 'sequence_diagram']
 
-async def main():
+
+async def main(stages: List[str] = None, resume: bool = False, max_concurrency: Optional[int] = None,
+               minify: str = 'comments', preprocess_workers: Optional[int] = None,
+               sequence_entries: Optional[List[str]] = None, annotate_sequence: bool = False,
+               embeddings: str = 'hashing', retrieval_top_k: int = 6, dedup_threshold: float = 0.9,
+               export_summaries: bool = False, io_workers: Optional[int] = None):
+    stages = stages or ['files']
     # Initialize ProjectManager
     project_path = PROJECT_PATH  # PROJECT_PATH is already a Path object
     ignored_dirs = ['tests', '__pycache__', 'migrations', 'dist','build','.ipynb_checkpoints','assets','unused' ]  # Example directories to ignore
@@ -63,13 +54,21 @@ async def main():
             project_path=project_path,
             ignored_dirs=ignored_dirs,
             ignored_files=ignored_files,
-            ignored_path_substrings=ignored_path_substrings
+            ignored_path_substrings=ignored_path_substrings,
+            export_summary_json=export_summaries
         )
 
     project_manager.initialize_logger()  # Initialize logger before workspace setup
+    # Blocking reads and writes of the stages run in this pool, off the event loop
+    async_io = configure_async_io(io_workers) if io_workers else get_async_io()
 
     project_manager.setup_workspace(clean_existing=False)  # Now it's safe to use self.logger in setup_workspace
 
+    analysis_folder = project_manager.get_analysis_folder()
+    folder_summaries_file = analysis_folder / "folder_summaries.json"
+    prd_file = analysis_folder / "PRD.json"
+    system_design_file = analysis_folder / "SystemDesign.json"
+
     # Define LLMConfigs (assuming LLMConfig and LLMClient are defined elsewhere)
     primary_llm_config = LLMConfig.get('ollama')       # Primary LLM configuration
     fallback_llm_config = LLMConfig.get('anthropic')  # Fallback LLM configuration
@@ -79,100 +78,242 @@ async def main():
                LLMClient(fallback_llm_config) as fallback_llm_client:
         # Initialize DocumentGenerator with both LLM clients
         generator = DocumentGenerator(primary_llm_client, fallback_llm_client, project_manager)
-        
-        
+        if embeddings == 'ollama':
+            from utils.summary_index import OllamaEmbedder, SummaryIndex
+            generator.summary_index = SummaryIndex(
+                analysis_folder / "summary_index", OllamaEmbedder(primary_llm_config.api_base_url), logger=generator.logger)
+        generator.retrieval_top_k = retrieval_top_k
+        generator.summary_packer.max_concurrency = max_concurrency
+        preprocessor = CodePreprocessor(PreprocessOptions.for_level(minify), workers=preprocess_workers,
+                                        logger=generator.logger)
 
-        async def file_summaries_gen():
+        def summary_done(relative_path, cleaned_code: str) -> bool:
+            # Only a summary built from this code counts: a failed regeneration leaves the stale one in place
+            return (generator.artifact_graph.is_fresh(file_node(relative_path),
+                                                      generator.summary_inputs_hash(cleaned_code))
+                    and project_manager.summary_store.has(relative_path))
+
+        async def file_summaries_gen(runner: PipelineRunner):
             # Generate summaries for all Python files in the project, excluding ignored patterns
-            python_files = project_manager.get_all_python_files(
+            python_files = await async_io.run(
+                project_manager.get_all_python_files,
                 ignored_dirs=ignored_dirs,
                 ignored_files=ignored_files,
                 ignored_path_substrings=ignored_path_substrings
             )
             generator.logger.info(f"Found {len(python_files)} Python files in the project.")
-            tasks = []
-            for py_file in python_files:
+            files = {path_key(project_manager.get_relative_path(py_file)): py_file for py_file in python_files}
+            parse_cache = get_parse_cache()
+
+            def read_source(key: str) -> Optional[str]:
+                # Read through the shared cache so later stages reuse the same source, AST and tokens
                 try:
-                    code = py_file.read_text(encoding='utf-8')
-                except UnicodeDecodeError:
-                    try:
-                        code = py_file.read_text(encoding='latin-1')  # Fallback encoding
-                        generator.logger.warning(f"Read {py_file} using 'latin-1' encoding due to UnicodeDecodeError with 'utf-8'.")
-                    except Exception as e:
-                        generator.logger.error(f"Failed to read {py_file} with both 'utf-8' and 'latin-1' encodings: {e}")
-                        continue  # Skip this file
-                
-                # Remove comments (excluding docstrings)
-                cleaned_code = remove_comments(code)
-
-                if len(cleaned_code) > 0:
-                    relative_path = project_manager.get_relative_path(py_file)
-                    tasks.append(generator.generate_summary(relative_path, cleaned_code)) # Generating summary using LLM
-            if tasks:
-                await asyncio.gather(*tasks)
+                    parsed = parse_cache.get(files[key])
+                except OSError as e:
+                    generator.logger.error(f"Failed to read {files[key]}: {e}")
+                    return None  # Skip this file
+                if parsed.encoding != 'utf-8':
+                    generator.logger.warning(f"Read {files[key]} using '{parsed.encoding}' encoding due to UnicodeDecodeError with 'utf-8'.")
+                return parsed.source
+
+            if not dedup_threshold:
+                # No file needs another's source, so each one is read and preprocessed in the I/O pool
+                # a bounded distance ahead of the summaries in flight rather than all before the first request
+                def load(key: str) -> str:
+                    source = read_source(key)
+                    return preprocessor.preprocess(key, source).code if source is not None else ''
+
+                prefetcher = async_io.prefetch(files, load, depth=max(DEFAULT_PREFETCH_DEPTH, 2 * (max_concurrency or 0)))
+
+                def streamed(key: str):
+                    async def summarize():
+                        cleaned_code = await prefetcher.get(key)
+                        if not cleaned_code.strip():
+                            return  # Nothing to summarize
+                        await generator.generate_summary(key_to_path(key), cleaned_code)
+                        if not await async_io.run(summary_done, key, cleaned_code):
+                            raise RuntimeError(f"No summary produced for {key}")
+                    return summarize
+
+                try:
+                    await run_file_items(runner, {key: streamed(key) for key in files}, {})
+                finally:
+                    prefetcher.cancel()
+                    generator.logger.info(preprocessor.report())
+                return
+
+            # Near-duplicate clustering compares every file, so all sources are read (in the I/O pool) up front;
+            # which files need an LLM summary is only known once every file has been compared
+            sources = {key: source for key, source in zip(files, await async_io.map(read_source, files))
+                       if source is not None}
+
+            # Remove comments (and, at higher --minify levels, docstrings and long literals) off the event loop
+            preprocessed = await asyncio.get_running_loop().run_in_executor(
+                None, preprocessor.preprocess_many, sources)
+            generator.logger.info(preprocessor.report())
+
+            cleaned_sources = {relative_path: result.code for relative_path, result in preprocessed.items()
+                               if len(result.code.strip()) > 0}
+
+            # Near-duplicate files are summarized once, by their cluster's representative
+            derived_from = {}
+            from utils.near_duplicates import NearDuplicateFinder
+            finder = NearDuplicateFinder(threshold=dedup_threshold)
+            clusters = await asyncio.get_running_loop().run_in_executor(None, finder.find, cleaned_sources)
+            for cluster in clusters:
+                for member, similarity in cluster.members.items():
+                    derived_from[member] = (cluster.representative, similarity)
+            generator.logger.info(finder.report())
+
+            work_items, derived_items = {}, {}
+            for relative_path, cleaned_code in cleaned_sources.items():
+                if relative_path in derived_from:
+                    representative, similarity = derived_from[relative_path]
+
+                    async def derive(relative_path=key_to_path(relative_path), cleaned_code=cleaned_code,
+                                     representative=key_to_path(representative), similarity=similarity):
+                        await generator.generate_derived_summary(relative_path, cleaned_code, representative,
+                                                                 cleaned_sources[path_key(representative)], similarity)
+                        if not await async_io.run(project_manager.summary_store.has, relative_path):
+                            raise RuntimeError(f"No summary produced for {relative_path}")
+
+                    derived_items[relative_path] = derive
+                    continue
+
+                async def summarize(relative_path=key_to_path(relative_path), cleaned_code=cleaned_code):
+                    await generator.generate_summary(relative_path, cleaned_code) # Generating summary using LLM
+                    if not await async_io.run(summary_done, relative_path, cleaned_code):
+                        raise RuntimeError(f"No summary produced for {relative_path}")
+
+                work_items[relative_path] = summarize
+            await run_file_items(runner, work_items, derived_items)
+
+        async def run_file_items(runner: PipelineRunner, work_items: Dict, derived_items: Dict):
+            if work_items or derived_items:
+                try:
+                    await runner.run_items('files', work_items)
+                    # Once every representative has its summary
+                    await runner.run_items('files', derived_items)
+                finally:
+                    generator.artifact_graph.save()
+                    # Replaced summaries leave free pages behind; reclaim them once they add up
+                    await async_io.run(project_manager.summary_store.compact)
             else:
                 generator.logger.info("No Python files with meaningful code found to summarize.")
 
-        async def folder_summaries_gen():
+        async def folder_summaries_gen(runner: PipelineRunner):
             generator.logger.info("********************Folder summaries started*******************")
             folder_summaries = await generator.summarize_folders()
-            folder_summaries_file = project_manager.get_analysis_folder() / "folder_summaries.json"
-
-            with open(folder_summaries_file, "w", encoding="utf-8") as f:
-                json.dump(folder_summaries, f, indent=2)
+            await async_io.write_json(folder_summaries_file, folder_summaries)
 
             generator.logger.info(f"Folder summaries written to {folder_summaries_file.resolve()}")
             generator.logger.info("********************Folder summaries Done*******************")
 
-        async def all_other_doc_gen():
-            # Load folder summaries
-            folder_summary={}
-            folder_summaries_file = project_manager.get_analysis_folder() / "folder_summaries.json"
-            with open(folder_summaries_file, 'r', encoding='utf-8') as f:
-                folder_summary = json.load(f)
-
-            # # Generate Project Summary
-            # project_summary = await generator.generate_project_summary(folder_summary)
-            # # Save Project Summary
-            # generator.save_project_summary(project_summary)
-            
-            # Generate PRD
-            # prd = await generator.generate_prd(folder_summary)
-            # # Save PRD
-            # generator.save_prd(prd)
-
-            prd_file = project_manager.get_analysis_folder() / "PRD.json"
-            with open(prd_file, 'r', encoding='utf-8') as f:
-                prd = json.load(f)
-
-
-            # Generate System Design Document
-            system_design = await generator.generate_system_design(folder_summary=prd)
-            # Save System Design Document
+        async def project_summary_gen(runner: PipelineRunner):
+            project_summary = await generator.generate_project_summary(await async_io.read_json(folder_summaries_file))
+            generator.save_project_summary(project_summary)
+
+        async def prd_gen(runner: PipelineRunner):
+            prd = await generator.generate_prd(await async_io.read_json(folder_summaries_file))
+            generator.save_prd(prd)
+
+        async def system_design_gen(runner: PipelineRunner):
+            system_design = await generator.generate_system_design(folder_summary=await async_io.read_json(prd_file))
             generator.save_system_design(system_design)
 
-            # # Generate Task List
-            # task_list = await generator.generate_task_list(system_design)
-            # # Save Task List
-            # generator.save_task_list(task_list)
+        async def task_list_gen(runner: PipelineRunner):
+            task_list = await generator.generate_task_list(await async_io.read_json(system_design_file))
+            generator.save_task_list(task_list)
 
-            # # Generate Sequence Diagram
-            # sequence_diagram = await generator.generate_sequence_diagram(folder_summary)
-            # # Save Sequence Diagram
-            # if sequence_diagram:
-            #     generator.save_sequence_diagram(sequence_diagram)
-            # else:
-            #     generator.logger.error("Sequence Diagram generation failed.")
+        async def sequence_diagram_gen(runner: PipelineRunner):
+            # Built from the call graph; folder summaries only give context to LLM annotations
+            folder_summary = await async_io.read_json(folder_summaries_file) if folder_summaries_file.exists() else None
+            sequence_diagram = await generator.generate_sequence_diagram(
+                folder_summary, entry_points=sequence_entries, annotate=annotate_sequence)
+            if sequence_diagram:
+                generator.save_sequence_diagram(sequence_diagram)
+            else:
+                raise RuntimeError("Sequence Diagram generation failed.")
 
-        await file_summaries_gen()
-        # await folder_summaries_gen()
-        # await all_other_doc_gen()
+        stage_functions = {
+            'files': file_summaries_gen,
+            'folders': folder_summaries_gen,
+            'project_summary': project_summary_gen,
+            'prd': prd_gen,
+            'system_design': system_design_gen,
+            'task_list': task_list_gen,
+            'sequence_diagram': sequence_diagram_gen,
+        }
+        runner = PipelineRunner(
+            stages=[Stage(name, stage_functions[name]) for name in STAGE_NAMES if name in stages],
+            journal=RunJournal(analysis_folder / "run_journal.jsonl"),
+            logger=generator.logger,
+            resume=resume,
+            max_concurrency=max_concurrency,
+        )
+        await runner.run()
+        generator.logger.info(generator.prompt_cache_stats.report())
+        generator.logger.info(generator.summary_packer.report())
+        generator.logger.info(generator.static_summarizer.report())
+        generator.logger.info(generator.code_skeletons.report())
 
     # Close the logger to release the log file
     project_manager.close_logger()
-# Run the main function
-if __name__ == "__main__":
-    asyncio.run(main())
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Summarize a Python project with LLMs.")
+    parser.add_argument(
+        '--stages', default='files',
+        help=f"Comma-separated stages to run, in pipeline order: {','.join(STAGE_NAMES)} (default: files)"
+    )
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue the previous run, skipping completed stages and work items")
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help="Maximum number of files summarized concurrently (default: unlimited)")
+    parser.add_argument('--minify', choices=list(MINIFY_LEVELS), default='comments',
+                        help="How much to strip from source before summarizing: comments (default), docstrings "
+                             "as well, aggressive (also long literals) or none")
+    parser.add_argument('--preprocess-workers', type=int, default=None,
+                        help="Processes used to preprocess large projects (default: CPU count; 1 disables)")
+    parser.add_argument('--sequence-entry', action='append', default=None,
+                        help="Entry point of a sequence diagram, e.g. main or pkg/cli.py:run (repeatable; "
+                             "default: every module-level main())")
+    parser.add_argument('--annotate-sequence', action='store_true',
+                        help="Ask the LLM for notes on the functions in the sequence diagrams")
+    parser.add_argument('--embeddings', choices=['hashing', 'ollama'], default='hashing',
+                        help="How summaries are embedded for retrieval when a large project's PRD prompt is scoped: "
+                             "local feature hashing (default) or the Ollama server's embedding model")
+    parser.add_argument('--retrieval-top-k', type=int, default=6,
+                        help="Summaries retrieved per PRD section on large projects (default: 6)")
+    parser.add_argument('--dedup-threshold', type=float, default=0.9,
+                        help="Similarity from which near-duplicate files share one LLM summary, annotated "
+                             "with their diff. Clustering reads every file before the first summary; 0 disables "
+                             "it and streams reads ahead of the summaries instead (default: 0.9)")
+    parser.add_argument('--export-summaries', action='store_true',
+                        help="Also write each file summary to code_summaries/<path>.json")
+    parser.add_argument('--io-workers', type=int, default=None,
+                        help=f"Threads reading and writing files off the event loop (default: {DEFAULT_IO_WORKERS})")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="Record allocation tracebacks with tracemalloc (slows the run)")
+    args = parser.parse_args()
+    stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    unknown = [s for s in stages if s not in STAGE_NAMES]
+    if unknown:
+        parser.error(f"Unknown stage(s): {', '.join(unknown)}")
+    if args.trace_memory:
+        tracemalloc.start()
+    return (stages, args.resume, args.concurrency, args.minify, args.preprocess_workers,
+            args.sequence_entry, args.annotate_sequence, args.embeddings, args.retrieval_top_k, args.dedup_threshold,
+            args.export_summaries, args.io_workers)
+
 
+# Run the main function
+if __name__ == "__main__":
+    (stages, resume, max_concurrency, minify, preprocess_workers, sequence_entries, annotate_sequence,
+     embeddings, retrieval_top_k, dedup_threshold, export_summaries, io_workers) = parse_args()
+    asyncio.run(main(stages=stages, resume=resume, max_concurrency=max_concurrency,
+                     minify=minify, preprocess_workers=preprocess_workers,
+                     sequence_entries=sequence_entries, annotate_sequence=annotate_sequence,
+                     embeddings=embeddings, retrieval_top_k=retrieval_top_k, dedup_threshold=dedup_threshold,
+                     export_summaries=export_summaries, io_workers=io_workers))
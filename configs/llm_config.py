@@ -2,8 +2,9 @@
 # utils/llm_config.py
 
 from dataclasses import dataclass
-from typing import Optional
-from utils.config import ANTHROPIC_API, OPENAI_API  # Ensure this path is correct
+from typing import Any, Dict, List, Optional
+from utils import config as settings  # Read on use; importing this module loads nothing
+from llm_clients.registry import is_registered
 
 @dataclass
 class LLMConfig:
@@ -22,6 +23,19 @@ class LLMConfig:
     stream: Optional[bool] = False
     proxy: Optional[str] = None
 
+    # Multi-endpoint Ollama (used instead of api_base_url when set)
+    api_base_urls: Optional[List[str]] = None
+    endpoint_models: Optional[Dict[str, str]] = None  # Pins a model per endpoint URL; defaults to `model`
+    load_balancing: str = 'least_outstanding'  # 'least_outstanding' or 'ewma_latency'
+    keep_alive: Optional[str] = None  # Ollama: how long the model stays loaded after a request, e.g. '30m'
+
+    # Shared per-key limits (see llm_clients/retry.py); None leaves pacing to the server's rate-limit replies
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+
+    # Backend-specific settings, e.g. the mock backend's latency and error injection
+    options: Optional[Dict[str, Any]] = None
+
     @classmethod
     def get(cls, llm_type: str) -> 'LLMConfig':
         """
@@ -39,7 +53,7 @@ class LLMConfig:
         llm_type = llm_type.lower()
         if llm_type == 'anthropic':
             return cls(
-                api_key=ANTHROPIC_API,
+                api_key=settings.ANTHROPIC_API,
                 api_base_url="https://api.anthropic.com",
                 model="claude-3-5-sonnet-20241022",  # Use a supported model
                 temperature=0.7,
@@ -50,7 +64,7 @@ class LLMConfig:
         elif llm_type == 'openai':
             return cls(
                 api_type="openai",
-                api_key=OPENAI_API,
+                api_key=settings.OPENAI_API,
                 api_base_url="https://api.openai.com/v1",
                 model="gpt-4o-mini",
                 temperature=0.7,
@@ -65,7 +79,20 @@ class LLMConfig:
                 model="qwen2.5-coder:14b",
                 temperature=0.7,
                 max_tokens=1024,
-                stream=True  # Enable streaming for Ollama if supported
+                stream=True,  # Enable streaming for Ollama if supported
+                keep_alive='30m'
+            )
+        elif llm_type == 'ollama_pool':
+            return cls(
+                api_type='ollama',
+                api_base_url=settings.OLLAMA_BASE_URLS[0],
+                api_base_urls=settings.OLLAMA_BASE_URLS,
+                model="qwen2.5-coder:14b",
+                temperature=0.7,
+                max_tokens=1024,
+                stream=True,
+                load_balancing='least_outstanding',
+                keep_alive='30m'
             )
         elif llm_type == 'ollama_qwen_7b':
             return cls(
@@ -75,7 +102,8 @@ class LLMConfig:
                 model="qwen2.5-coder:7b",
                 temperature=0.4,
                 max_tokens=1024,
-                stream=True  # Enable streaming for Ollama if supported
+                stream=True,  # Enable streaming for Ollama if supported
+                keep_alive='30m'
             )
         elif llm_type == 'ollama_llama_3.1_7b':
             return cls(
@@ -85,7 +113,18 @@ class LLMConfig:
                 model="llama3.1:latest",
                 temperature=0.4,
                 max_tokens=1024,
-                stream=True  # Enable streaming for Ollama if supported
+                stream=True,  # Enable streaming for Ollama if supported
+                keep_alive='30m'
+            )
+        elif llm_type == 'mock':
+            return cls(
+                api_type='mock',
+                api_base_url='mock://local',
+                model='mock',
+                temperature=0.0,
+                max_tokens=1024,
+                stream=False,
+                options={}
             )
         else:
             raise ValueError(f"Unsupported LLM type: {llm_type}")
@@ -94,6 +133,8 @@ class LLMConfig:
         """
         Post-initialization processing to validate fields.
         """
-        if self.api_type not in ['anthropic', 'ollama','openai']:
-            raise ValueError('api_type must be either "anthropic" or "ollama".')
+        if not is_registered(self.api_type):
+            raise ValueError(f'api_type "{self.api_type}" has no registered LLM backend.')
+        if self.load_balancing not in ['least_outstanding', 'ewma_latency']:
+            raise ValueError('load_balancing must be either "least_outstanding" or "ewma_latency".')
  
\ No newline at end of file
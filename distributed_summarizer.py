@@ -0,0 +1,103 @@
+# distributed_summarizer.py
+
+import argparse
+import asyncio
+import dataclasses
+from contextlib import AsyncExitStack
+
+from utils.project_manager import ProjectManager
+from utils.document_generator import DocumentGenerator
+from utils.llm_client import LLMClient
+from utils.summary_workers import SummaryCoordinator, SummaryWorker, default_queue_file
+from utils.work_queue import WorkQueue
+from utils.config import PROJECT_PATH
+from configs.llm_config import LLMConfig
+from code_llm_summarizer import remove_comments
+
+ignored_dirs = ['tests', '__pycache__', 'migrations', 'dist','build','.ipynb_checkpoints','assets','unused' ]  # Example directories to ignore
+ignored_files = ['setup.py', 'manage.py']             # Example files to ignore
+ignored_path_substrings = ['legacy', 'third_party','__pycache__']   # Example path substrings to ignore
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Summarize a project across several inference hosts. "
+                    "Run one coordinator and one worker per host, all on this machine."
+    )
+    parser.add_argument('--queue', default=None, help="Queue database (default: <analysis folder>/work_queue.sqlite)")
+    parser.add_argument('--lease-seconds', type=float, default=600.0, help="Lease length before a stalled job is reassigned")
+    parser.add_argument('--max-attempts', type=int, default=3, help="Claims allowed per job before it is marked failed")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    coordinator = subparsers.add_parser('coordinator', help="Enqueue stale files and collect results")
+    coordinator.add_argument('--no-wait', action='store_true', help="Enqueue and exit without waiting for workers")
+
+    worker = subparsers.add_parser('worker', help="Pull and summarize jobs")
+    worker.add_argument('--llm', default='ollama', help="LLMConfig name of the primary model (default: ollama)")
+    worker.add_argument('--api-base-url', default=None, help="Override the primary model's endpoint, e.g. http://gpu2:11434/api")
+    worker.add_argument('--model', default=None, help="Override the primary model name")
+    worker.add_argument('--fallback', default='anthropic', help="LLMConfig name of the fallback model, or 'none'")
+    worker.add_argument('--concurrency', type=int, default=1, help="Jobs in flight on this worker")
+    worker.add_argument('--keep-running', action='store_true', help="Keep polling after the queue drains")
+
+    subparsers.add_parser('status', help="Print job counts")
+    return parser.parse_args()
+
+
+def primary_config(args) -> LLMConfig:
+    config = LLMConfig.get(args.llm)
+    overrides = {}
+    if args.api_base_url:
+        overrides['api_base_url'] = args.api_base_url
+    if args.model:
+        overrides['model'] = args.model
+    return dataclasses.replace(config, **overrides)
+
+
+async def main(args):
+    project_manager = ProjectManager(
+            project_path=PROJECT_PATH,
+            ignored_dirs=ignored_dirs,
+            ignored_files=ignored_files,
+            ignored_path_substrings=ignored_path_substrings
+        )
+    project_manager.initialize_logger()
+    project_manager.setup_workspace(clean_existing=False)
+
+    queue = WorkQueue(args.queue or default_queue_file(project_manager),
+                      lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+
+    if args.command == 'status':
+        print(queue.counts())
+        for failed in queue.failed_jobs():
+            print(f"failed: {failed['key']} ({failed['attempts']} attempts): {failed['error']}")
+
+    elif args.command == 'coordinator':
+        # The coordinator never calls an LLM; it only needs the generator's artifact graph
+        generator = DocumentGenerator(None, None, project_manager)
+        coordinator = SummaryCoordinator(project_manager, generator, queue, preprocess=remove_comments)
+        coordinator.enqueue_project(
+            ignored_dirs=ignored_dirs,
+            ignored_files=ignored_files,
+            ignored_path_substrings=ignored_path_substrings
+        )
+        if not args.no_wait:
+            await coordinator.wait()
+        coordinator.collect()
+
+    elif args.command == 'worker':
+        async with AsyncExitStack() as stack:
+            primary_llm_client = await stack.enter_async_context(LLMClient(primary_config(args)))
+            fallback_llm_client = primary_llm_client
+            if args.fallback != 'none':
+                fallback_llm_client = await stack.enter_async_context(LLMClient(LLMConfig.get(args.fallback)))
+            generator = DocumentGenerator(primary_llm_client, fallback_llm_client, project_manager)
+            worker = SummaryWorker(project_manager, generator, queue, preprocess=remove_comments,
+                                   concurrency=args.concurrency, exit_when_idle=not args.keep_running)
+            await worker.run()
+
+    project_manager.close_logger()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -3,6 +3,9 @@
 import asyncio
 import anthropic
 from configs.llm_config import LLMConfig
+from utils.prompt_builder import Prompt
+from llm_clients.retry import call_with_retry, estimate_prompt_tokens, get_rate_limiter
+from llm_clients.streaming import StreamResponse
 from dataclasses import dataclass
 import logging
 
@@ -27,12 +30,14 @@ class AnthropicLLM:
         self.model = self.config.model
         self.api_key = self.config.api_key
         self.api_url = self.config.api_base_url
+        self.rate_limiter = get_rate_limiter(config)
         logger.info(f"AnthropicLLM initialized with model: {self.model}")
 
     async def __aenter__(self):
         # Initialize the asynchronous client
         try:
-            self.client = anthropic.AsyncAnthropic(api_key=self.api_key, base_url=self.api_url)
+            # Retries are handled by call_with_retry, under the key's shared limits
+            self.client = anthropic.AsyncAnthropic(api_key=self.api_key, base_url=self.api_url, max_retries=0)
             logger.info("Anthropic client session started.")
         except AttributeError:
             logger.error("Failed to initialize AsyncAnthropic. Please verify the Anthropic SDK version and client class name.")
@@ -43,53 +48,47 @@ class AnthropicLLM:
         await self.close()
         # logger.info("Anthropic client session closed.")
 
+    def _messages(self, prompt: str) -> list:
+        if isinstance(prompt, Prompt):
+            # Marks the static prefix so repeated requests read it from the prompt cache
+            return [{"role": "user", "content": prompt.to_anthropic_content()}]
+        return [{"role": "user", "content": prompt}]
+
     async def ask(self, prompt: str) -> tuple:
         """
         Send a prompt to Anthropic using the Messages API and receive the response along with token usage.
 
+        With config.stream set the response is streamed; usage then also holds
+        ttft_seconds and tokens_per_second.
+
         Args:
             prompt (str): The user prompt.
 
         Returns:
             tuple: (response_text, usage_dict)
         """
-        messages = [{"role": "user", "content": prompt}]
-        # No need for manual token counting as usage is provided
-
         try:
-            # logger.debug(f"Sending prompt to Anthropic: {prompt}")
+            if self.config.stream:
+                response_text, usage = await self.astream(prompt).collect()
+                logger.debug(f"Anthropic stream: TTFT {usage['ttft_seconds']}s, "
+                             f"{usage['tokens_per_second']:.1f} tokens/s")
+                return response_text, usage
 
-            # Send the messages to Anthropic
             response = await self.client.messages.create(
                 model=self.model,
                 max_tokens=self.config.max_tokens,
-                messages=messages,
+                messages=self._messages(prompt),
                 temperature=self.config.temperature,
-                stream=self.config.stream
             )
-
-            if self.config.stream:
-                # Handle streaming response
-                response_text = ""
-                async for chunk in response:
-                    if hasattr(chunk, 'content'):
-                        for content_block in chunk.content:
-                            if content_block.type == 'text':
-                                chunk_text = content_block.text
-                                response_text += chunk_text
-                                # print(chunk_text, end='', flush=True)  # Optional: Stream to console
-                # print()  # Newline after streaming
-            else:
-                # Handle non-streaming response
-                response_text = ''.join([block.text for block in response.content if block.type == 'text'])
-
-            # logger.debug(f"Received response from Anthropic: {response_text}")
+            response_text = ''.join([block.text for block in response.content if block.type == 'text'])
 
             # Extract usage statistics directly from the response
             usage = {
                 "input_tokens": response.usage.input_tokens,
                 "output_tokens": response.usage.output_tokens,
-                "total_tokens": response.usage.input_tokens + response.usage.output_tokens
+                "total_tokens": response.usage.input_tokens + response.usage.output_tokens,
+                "cache_read_input_tokens": getattr(response.usage, 'cache_read_input_tokens', 0) or 0,
+                "cache_creation_input_tokens": getattr(response.usage, 'cache_creation_input_tokens', 0) or 0,
             }
 
             return response_text.strip(), usage
@@ -101,37 +100,56 @@ class AnthropicLLM:
             logger.error(f"Unexpected error: {e}")
             raise
 
+    def astream(self, prompt: str) -> StreamResponse:
+        """
+        Stream a response from the Messages API.
+
+        Args:
+            prompt (str): The user prompt.
+
+        Returns:
+            StreamResponse: Async iterator of text deltas; text and usage are set once it is exhausted.
+        """
+        return StreamResponse(lambda usage: self._stream_deltas(prompt, usage))
+
+    async def _stream_deltas(self, prompt: str, usage: dict):
+        stream = await self.client.messages.create(
+            model=self.model,
+            max_tokens=self.config.max_tokens,
+            messages=self._messages(prompt),
+            temperature=self.config.temperature,
+            stream=True,
+        )
+        # Input and cache counts arrive with message_start, the output count with message_delta
+        async for event in stream:
+            if event.type == 'message_start':
+                message_usage = event.message.usage
+                usage["input_tokens"] = message_usage.input_tokens
+                usage["cache_read_input_tokens"] = getattr(message_usage, 'cache_read_input_tokens', 0) or 0
+                usage["cache_creation_input_tokens"] = getattr(message_usage, 'cache_creation_input_tokens', 0) or 0
+            elif event.type == 'content_block_delta' and event.delta.type == 'text_delta':
+                yield event.delta.text
+            elif event.type == 'message_delta' and event.usage is not None:
+                usage["output_tokens"] = event.usage.output_tokens
+        usage.setdefault("input_tokens", 0)
+        usage.setdefault("output_tokens", 0)
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+
     async def ask_with_retry(self, prompt: str, max_retries: int = 3, initial_delay: float = 1.0) -> tuple:
         """
-        Send a prompt with automatic retry mechanism for overloaded errors.
+        Send a prompt, retrying rate limits, overload and connection errors.
 
         Args:
             prompt (str): The user prompt.
-            max_retries (int): Maximum number of retry attempts.
-            initial_delay (float): Initial delay between retries in seconds.
+            max_retries (int): Maximum number of attempts.
+            initial_delay (float): Backoff before the first retry when the server gives no retry-after.
 
         Returns:
             tuple: (response_text, usage_dict)
         """
-        attempt = 0
-        delay = initial_delay
-
-        while attempt < max_retries:
-            try:
-                return await self.ask(prompt)
-            except anthropic.AnthropicError as e:
-                if hasattr(e, 'status_code') and e.status_code == 429:
-                    logger.warning(f"Anthropic API is overloaded. Retrying in {delay} seconds...")
-                    await asyncio.sleep(delay)
-                    attempt += 1
-                    delay *= 2  # Exponential backoff
-                else:
-                    logger.error(f"Non-retriable Anthropic API error: {e}")
-                    raise
-            except Exception as e:
-                logger.error(f"Unexpected error during ask_with_retry: {e}")
-                raise
-        raise Exception("Max retries exceeded for Anthropic API.")
+        return await call_with_retry(lambda: self.ask(prompt), self.rate_limiter,
+                                     estimated_tokens=estimate_prompt_tokens(prompt), max_retries=max_retries,
+                                     initial_delay=initial_delay, label="Anthropic")
 
     async def close(self):
         """
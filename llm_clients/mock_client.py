@@ -0,0 +1,194 @@
+# llm_clients/mock_client.py
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+from pathlib import PurePosixPath
+from typing import Dict, List, Optional
+
+from configs.llm_config import LLMConfig
+from llm_clients.retry import call_with_retry, estimate_prompt_tokens, get_rate_limiter
+from llm_clients.streaming import CHARS_PER_TOKEN, StreamResponse
+
+logger = logging.getLogger(__name__)
+
+FILE_NAME_PATTERN = re.compile(r"Python file `([^`]+)`")
+
+# config.options understood by the mock backend, with their defaults
+DEFAULT_OPTIONS = {
+    "latency_ms": 0.0,           # Median time to first token
+    "latency_distribution": "fixed",  # 'fixed', 'uniform' (0..2x median) or 'lognormal'
+    "latency_sigma": 0.5,        # Spread of the lognormal distribution
+    "tokens_per_second": 0.0,    # Output rate after the first token; 0 returns the whole text at once
+    "error_rate": 0.0,           # Fraction of requests that fail
+    "error_status": 503,         # Status of injected failures, e.g. 429 or 500
+    "retry_after": None,         # Seconds sent as retry-after with injected failures
+    "seed": 0,                   # Seed of the latency and error draws
+    "responses": {},             # Prompt substring -> canned response text, checked first
+}
+
+
+class MockAPIError(Exception):
+    """
+    An injected failure, shaped like the SDK errors llm_clients.retry classifies.
+    """
+
+    def __init__(self, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(f"Mock API error: {status_code}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def _file_summary(file_name: str) -> Dict:
+    name = PurePosixPath(file_name).name
+    stem = PurePosixPath(file_name).stem
+    return {
+        "file": file_name,
+        "purpose": f"Mock summary of {name}.",
+        "main_functionality": f"Provides the {stem} functionality.",
+        "dependencies": [],
+        "imports": [],
+        "functions": [{"name": f"{stem}_main", "description": "Mock function.", "signature": "()"}],
+        "classes": [],
+        "main": "No main block",
+        "notes": "Generated by the mock backend.",
+    }
+
+
+def canned_response(prompt: str) -> str:
+    """
+    A deterministic response in the shape each of our prompts asks for.
+    """
+    file_names = FILE_NAME_PATTERN.findall(prompt)
+    if "JSON array" in prompt and file_names:
+        return "```json\n" + json.dumps([_file_summary(name) for name in file_names], indent=2) + "\n```"
+    if file_names:
+        return "```json\n" + json.dumps(_file_summary(file_names[-1]), indent=2) + "\n```"
+    if "PlantUML" in prompt:
+        return "@startuml\nactor User\nUser -> System: request\nSystem --> User: response\n@enduml"
+    if "json" in prompt.lower():
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        document = {
+            "purpose": "Mock document.",
+            "main_functionality": "Generated by the mock backend.",
+            "files": [],
+            "functions": [],
+            "subfolders": [],
+            "interrelationships": "",
+            "notes": f"prompt {digest}",
+        }
+        return "```json\n" + json.dumps(document, indent=2) + "\n```"
+    return "Mock response generated without a model."
+
+
+class MockLLM:
+    def __init__(self, config: LLMConfig):
+        """
+        In-process backend that answers without a model.
+
+        Responses depend only on the prompt, so pipelines produce the same
+        documents on every run. Latency, output token rate and injected
+        errors are configured through config.options (see DEFAULT_OPTIONS)
+        and drawn from a seeded generator. With the defaults every request
+        completes immediately, which makes the mock suitable for measuring
+        client-side overhead and load-testing DocumentGenerator offline.
+
+        Args:
+            config (LLMConfig): Configuration with api_type 'mock'.
+        """
+        self.config = config
+        self.model = config.model
+        self.options = {**DEFAULT_OPTIONS, **(config.options or {})}
+        self.random = random.Random(self.options["seed"])
+        self.rate_limiter = get_rate_limiter(config)
+        self.requests = 0
+        self.errors = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def _first_token_delay(self) -> float:
+        median = self.options["latency_ms"] / 1000
+        distribution = self.options["latency_distribution"]
+        if median <= 0:
+            return 0.0
+        if distribution == "uniform":
+            return self.random.uniform(0, 2 * median)
+        if distribution == "lognormal":
+            return self.random.lognormvariate(math.log(median), self.options["latency_sigma"])
+        return median
+
+    def _respond(self, prompt: str) -> str:
+        for marker, response in self.options["responses"].items():
+            if marker in prompt:
+                return response
+        return canned_response(prompt)
+
+    def _start_request(self) -> float:
+        self.requests += 1
+        if self.options["error_rate"] and self.random.random() < self.options["error_rate"]:
+            self.errors += 1
+            raise MockAPIError(self.options["error_status"], self.options["retry_after"])
+        return self._first_token_delay()
+
+    def _usage(self, prompt: str, text: str) -> Dict:
+        input_tokens = estimate_prompt_tokens(prompt)
+        output_tokens = len(text) // CHARS_PER_TOKEN + 1
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens}
+
+    async def ask(self, prompt: str) -> tuple:
+        """
+        Answer a prompt after the configured latency.
+
+        Returns:
+            tuple: (response_text, usage_dict)
+        """
+        delay = self._start_request()
+        text = self._respond(prompt)
+        usage = self._usage(prompt, text)
+        if self.options["tokens_per_second"]:
+            delay += usage["output_tokens"] / self.options["tokens_per_second"]
+        if delay:
+            await asyncio.sleep(delay)
+        return text, usage
+
+    def astream(self, prompt: str) -> StreamResponse:
+        """
+        Stream the response one word at a time at the configured token rate.
+        """
+        return StreamResponse(lambda usage: self._stream_deltas(prompt, usage))
+
+    async def _stream_deltas(self, prompt: str, usage: Dict):
+        delay = self._start_request()
+        text = self._respond(prompt)
+        if delay:
+            await asyncio.sleep(delay)
+        rate = self.options["tokens_per_second"]
+        for delta in self._split(text):
+            yield delta
+            if rate:
+                await asyncio.sleep(max(1, len(delta) // CHARS_PER_TOKEN) / rate)
+        usage.update(self._usage(prompt, text))
+
+    @staticmethod
+    def _split(text: str) -> List[str]:
+        # Words with their leading whitespace; joined they give back the text exactly
+        return re.findall(r"\s*\S+|\s+$", text)
+
+    async def ask_with_retry(self, prompt: str, max_retries: int = 3, initial_delay: float = 1.0) -> tuple:
+        return await call_with_retry(lambda: self.ask(prompt), self.rate_limiter, max_retries=max_retries,
+                                     initial_delay=initial_delay, label="Mock")
+
+    async def count_tokens(self, text, system: Optional[str] = None) -> int:
+        return estimate_prompt_tokens(str(text) + (system or ""))
+
+    async def close(self):
+        pass
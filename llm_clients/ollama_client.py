@@ -4,6 +4,9 @@ import asyncio
 import json
 import aiohttp
 from configs.llm_config import LLMConfig
+from utils.prompt_builder import Prompt
+from llm_clients.retry import call_with_retry, get_rate_limiter, retry_after_from_headers
+from llm_clients.streaming import StreamResponse
 from datetime import datetime
 import re
 import logging
@@ -17,12 +20,17 @@ formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(messag
 handler.setFormatter(formatter)
 logger.addHandler(handler)
 
+# OllamaAPIError statuses for failures without an HTTP response: only network failures are worth retrying
+NETWORK_ERROR_STATUS = -1
+UNEXPECTED_ERROR_STATUS = -2
+
 class OllamaAPIError(Exception):
     """Custom exception for Ollama API errors."""
-    def __init__(self, status, message):
+    def __init__(self, status, message, retry_after=None):
         super().__init__(f"Ollama API error: {status} - {message}")
         self.status = status
         self.message = message
+        self.retry_after = retry_after  # Seconds, from a Retry-After header
 
 class OllamaLLM:
     def __init__(self, config: LLMConfig):
@@ -31,6 +39,7 @@ class OllamaLLM:
         self.model = config.model
         self.stream = config.stream
         self.session = None  # Will be initialized in __aenter__
+        self.rate_limiter = get_rate_limiter(config)
 
         logger.info(f"OllamaLLM initialized with base URL: {self.base_url}, Model: {self.model}")
 
@@ -54,16 +63,7 @@ class OllamaLLM:
             tuple: (response_text, usage_dict)
         """
         url = f"{self.base_url}/generate"
-        payload = {
-            "model": self.model,
-            "prompt": prompt,
-            "options": {
-                "temperature": self.config.temperature,
-                "max_tokens": self.config.max_tokens,
-                "stream": self.stream
-            }
-        }
-
+        payload = self._payload(prompt, self.stream)
         headers = {
             "Content-Type": "application/json"
         }
@@ -76,79 +76,128 @@ class OllamaLLM:
 
             return response_text, usage
 
-        except aiohttp.ClientError as e:
+        except OllamaAPIError:
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             logger.error(f"Network error: {e}")
-            raise OllamaAPIError(-1, f"Network error: {e}") from e
+            raise OllamaAPIError(NETWORK_ERROR_STATUS, f"Network error: {e}") from e
         except Exception as e:
+            # E.g. an unexpected response shape: retrying or failing over would not help
             logger.error(f"Unexpected error: {e}")
-            raise OllamaAPIError(-1, f"Unexpected error: {e}") from e
+            raise OllamaAPIError(UNEXPECTED_ERROR_STATUS, f"Unexpected error: {e}") from e
+
+    def _payload(self, prompt: str, stream: bool) -> dict:
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            # Ollama streams unless told otherwise
+            "stream": stream,
+            "options": {
+                "temperature": self.config.temperature,
+                "max_tokens": self.config.max_tokens,
+                "stream": stream
+            }
+        }
+        if isinstance(prompt, Prompt) and prompt.cacheable_prefix:
+            # An identical system preamble on every request lets the server reuse its KV cache
+            payload["system"] = prompt.cacheable_prefix
+            payload["prompt"] = prompt.variable_text
+        if self.config.keep_alive:
+            # Keep the model (and its cached prefix) loaded between requests
+            payload["keep_alive"] = self.config.keep_alive
+        return payload
 
     async def _standard_request(self, url, payload, headers):
         async with self.session.post(url, json=payload, headers=headers) as response:
             if response.status != 200:
                 error_text = await response.text()
                 logger.error(f"Ollama API error: {response.status} - {error_text}")
-                raise OllamaAPIError(response.status, error_text)
+                raise OllamaAPIError(response.status, error_text, retry_after_from_headers(response.headers))
 
             data = await response.json()
             response_text = data.get("response", "")
-            usage = data.get("usage", {})
+            usage = self._reported_usage(data) or data.get("usage", {})
             return response_text, usage
 
+    @staticmethod
+    def _reported_usage(data: dict) -> dict:
+        """
+        Token counts and prefill time from Ollama's final response object, if present.
+        """
+        if "prompt_eval_count" not in data and "eval_count" not in data:
+            return {}
+        input_tokens = data.get("prompt_eval_count", 0)
+        output_tokens = data.get("eval_count", 0)
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            # Drops sharply when the prompt prefix is served from the KV cache
+            "prefill_seconds": data.get("prompt_eval_duration", 0) / 1e9,
+        }
+
     async def _stream_request(self, url, payload, headers):
-        async with self.session.post(url, json=payload, headers=headers) as response:
-            if response.status != 200:
-                error_text = await response.text()
-                logger.error(f"Ollama API error: {response.status} - {error_text}")
-                raise OllamaAPIError(response.status, error_text)
+        stream = StreamResponse(lambda usage: self._stream_deltas(url, payload, headers, usage))
+        async for _ in stream:
+            pass
+        return stream.text, stream.usage
 
-            collected_content = []
-            input_tokens = await self.count_tokens(payload['prompt'])
-            total_output_tokens = 0
-            usage = {"input_tokens": input_tokens, "output_tokens": 0, "total_tokens": input_tokens}
+    def astream(self, prompt: str) -> StreamResponse:
+        """
+        Stream a response from /generate.
 
-            async for line in response.content:
-                if line:
+        Args:
+            prompt (str): The user prompt.
+
+        Returns:
+            StreamResponse: Async iterator of text deltas; text and usage are set once it is exhausted.
+        """
+        url = f"{self.base_url}/generate"
+        headers = {"Content-Type": "application/json"}
+        return StreamResponse(lambda usage: self._stream_deltas(url, self._payload(prompt, True), headers, usage))
+
+    async def _stream_deltas(self, url, payload, headers, usage: dict):
+        collected_content = []
+        try:
+            async with self.session.post(url, json=payload, headers=headers) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    logger.error(f"Ollama API error: {response.status} - {error_text}")
+                    raise OllamaAPIError(response.status, error_text, retry_after_from_headers(response.headers))
+
+                async for line in response.content:
                     line = line.decode('utf-8').strip()
-                    if line:
-                        try:
-                            data = json.loads(line)
-                            if "response" in data:
-                                collected_content.append(data["response"])
-                                total_output_tokens += await self.count_tokens(data["response"])
-                            if "usage" in data:
-                                usage = data["usage"]
-                        except json.JSONDecodeError:
-                            logger.warning(f"Failed to decode JSON line: {line}")
-                            continue
-
-            if "usage" not in usage:
-                # If usage wasn't provided by the API, calculate it
-                usage = {
-                    "input_tokens": input_tokens,
-                    "output_tokens": total_output_tokens,
-                    "total_tokens": input_tokens + total_output_tokens
-                }
-
-            response_text = ''.join(collected_content)
-            return response_text, usage
+                    if not line:
+                        continue
+                    try:
+                        data = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Failed to decode JSON line: {line}")
+                        continue
+                    if data.get("response"):
+                        collected_content.append(data["response"])
+                        yield data["response"]
+                    if "usage" in data:
+                        usage.update(data["usage"])
+                    if data.get("done"):
+                        usage.update(self._reported_usage(data))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Network error: {e}")
+            raise OllamaAPIError(NETWORK_ERROR_STATUS, f"Network error: {e}") from e
+
+        if "input_tokens" not in usage:
+            # If usage wasn't provided by the API, calculate it
+            input_tokens = await self.count_tokens(payload.get('system', '') + payload['prompt'])
+            output_tokens = await self.count_tokens(''.join(collected_content))
+            usage.update({
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens
+            })
 
     async def ask_with_retry(self, prompt: str, max_retries: int = 3, initial_delay: float = 1.0) -> tuple:
-        attempt = 0
-        delay = initial_delay
-        while attempt < max_retries:
-            try:
-                return await self.ask(prompt)
-            except OllamaAPIError as e:
-                if e.status in [429, 500, 502, 503, 504]:  # Retriable status codes
-                    logger.warning(f"Ollama API is overloaded or server error. Retrying in {delay} seconds... (Attempt {attempt + 1})")
-                    await asyncio.sleep(delay)
-                    attempt += 1
-                    delay *= 2  # Exponential backoff
-                else:
-                    logger.error(f"Non-retriable Ollama API error: {e}")
-                    raise e
-        raise Exception("Max retries exceeded for Ollama API.")
+        return await call_with_retry(lambda: self.ask(prompt), self.rate_limiter, max_retries=max_retries,
+                                     initial_delay=initial_delay, label="Ollama")
 
     async def count_tokens(self, text: str) -> int:
         encoding = tiktoken.get_encoding("cl100k_base")  # Replace with appropriate encoding
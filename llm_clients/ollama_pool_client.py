@@ -0,0 +1,268 @@
+# llm_clients/ollama_pool_client.py
+
+import asyncio
+import dataclasses
+import logging
+import time
+from typing import List, Optional
+
+import aiohttp
+
+from configs.llm_config import LLMConfig
+from llm_clients.ollama_client import NETWORK_ERROR_STATUS, OllamaLLM, OllamaAPIError
+from llm_clients.retry import call_with_retry, get_rate_limiter
+from llm_clients.streaming import StreamResponse
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest sample in the latency moving average
+EWMA_ALPHA = 0.3
+
+
+def is_endpoint_failure(error: OllamaAPIError) -> bool:
+    """
+    Whether an error means the endpoint itself is unreachable or broken.
+
+    Other errors, such as a rejected request or an unexpected response shape,
+    would fail the same way on every endpoint, so they are raised instead of
+    ejecting endpoints one after another.
+    """
+    return error.status == NETWORK_ERROR_STATUS or error.status >= 500
+
+
+class OllamaEndpoint:
+    """
+    One Ollama server in the pool, with its own client and load statistics.
+    """
+
+    def __init__(self, config: LLMConfig):
+        self.url = config.api_base_url.rstrip('/')
+        self.model = config.model
+        self.client = OllamaLLM(config)
+        self.outstanding = 0
+        self.ewma_latency: Optional[float] = None
+        self.healthy = True
+        self.ejected_until = 0.0
+
+    def record_success(self, latency: float):
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency = EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.ewma_latency
+
+    def __repr__(self):
+        return f"OllamaEndpoint({self.url}, model={self.model}, outstanding={self.outstanding}, healthy={self.healthy})"
+
+
+class OllamaPoolLLM:
+    def __init__(self, config: LLMConfig, eject_seconds: float = 30.0, health_timeout: float = 5.0):
+        """
+        Ollama backend that spreads requests over several servers.
+
+        Each endpoint serves a single pinned model (config.endpoint_models, or
+        config.model) so servers never swap models between requests. Requests go
+        to the healthy endpoint with the fewest requests in flight, or with the
+        lowest moving-average latency when config.load_balancing is 'ewma_latency'.
+        An endpoint that errors is ejected for eject_seconds and re-admitted once
+        its /tags health check passes again.
+
+        Args:
+            config (LLMConfig): Configuration with api_base_urls set.
+            eject_seconds (float): How long a failing endpoint is skipped.
+            health_timeout (float): Timeout of a health check in seconds.
+        """
+        self.config = config
+        self.model = config.model
+        self.stream = config.stream
+        self.eject_seconds = eject_seconds
+        self.health_timeout = health_timeout
+        urls = config.api_base_urls or [config.api_base_url]
+        endpoint_models = config.endpoint_models or {}
+        self.endpoints: List[OllamaEndpoint] = [
+            OllamaEndpoint(dataclasses.replace(
+                config,
+                api_base_url=url,
+                api_base_urls=None,
+                model=endpoint_models.get(url, config.model),
+            ))
+            for url in urls
+        ]
+        self.session = None
+        self.rate_limiter = get_rate_limiter(config)
+
+        logger.info(f"OllamaPoolLLM initialized with {len(self.endpoints)} endpoints ({config.load_balancing}).")
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession()
+        for endpoint in self.endpoints:
+            await endpoint.client.__aenter__()
+        await asyncio.gather(*(self._refresh_health(endpoint) for endpoint in self.endpoints))
+        healthy = [endpoint.url for endpoint in self.endpoints if endpoint.healthy]
+        logger.info(f"Healthy Ollama endpoints: {healthy or 'none'}")
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        for endpoint in self.endpoints:
+            await endpoint.client.__aexit__(exc_type, exc_value, traceback)
+        if self.session:
+            await self.session.close()
+
+    async def check_health(self, endpoint: OllamaEndpoint) -> bool:
+        """
+        Check that an endpoint answers /tags and has its pinned model.
+        """
+        try:
+            timeout = aiohttp.ClientTimeout(total=self.health_timeout)
+            async with self.session.get(f"{endpoint.url}/tags", timeout=timeout) as response:
+                if response.status != 200:
+                    return False
+                data = await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            return False
+        models = {model.get("name") for model in data.get("models", [])}
+        if endpoint.model not in models and f"{endpoint.model}:latest" not in models:
+            logger.warning(f"Ollama endpoint {endpoint.url} does not have model {endpoint.model}.")
+            return False
+        return True
+
+    async def _refresh_health(self, endpoint: OllamaEndpoint):
+        if await self.check_health(endpoint):
+            if not endpoint.healthy:
+                logger.info(f"Ollama endpoint {endpoint.url} is healthy again.")
+            endpoint.healthy = True
+        else:
+            self._eject(endpoint, "health check failed")
+
+    def _eject(self, endpoint: OllamaEndpoint, reason: str):
+        endpoint.healthy = False
+        endpoint.ejected_until = time.monotonic() + self.eject_seconds
+        logger.warning(f"Ejecting Ollama endpoint {endpoint.url} for {self.eject_seconds}s: {reason}")
+
+    async def _candidates(self) -> List[OllamaEndpoint]:
+        now = time.monotonic()
+        due = [e for e in self.endpoints if not e.healthy and e.ejected_until <= now]
+        if due:
+            await asyncio.gather(*(self._refresh_health(endpoint) for endpoint in due))
+        return [e for e in self.endpoints if e.healthy]
+
+    def _score(self, endpoint: OllamaEndpoint):
+        if self.config.load_balancing == 'ewma_latency':
+            # Expected wait: latency times the requests ahead. Endpoints without a sample
+            # yet are assumed to be as fast as the pool average.
+            known = [e.ewma_latency for e in self.endpoints if e.ewma_latency is not None]
+            default = sum(known) / len(known) if known else 1.0
+            latency = endpoint.ewma_latency if endpoint.ewma_latency is not None else default
+            return latency * (endpoint.outstanding + 1)
+        return endpoint.outstanding
+
+    async def pick_endpoint(self, exclude=()) -> OllamaEndpoint:
+        """
+        Choose the endpoint for the next request.
+
+        Raises:
+            OllamaAPIError: If no endpoint is healthy.
+        """
+        candidates = [e for e in await self._candidates() if e not in exclude]
+        if not candidates:
+            raise OllamaAPIError(503, "No healthy Ollama endpoint available")
+        return min(candidates, key=self._score)
+
+    async def ask(self, prompt: str) -> tuple:
+        """
+        Send a prompt to the best endpoint, failing over to the others on errors.
+
+        Args:
+            prompt (str): The user prompt.
+
+        Returns:
+            tuple: (response_text, usage_dict)
+        """
+        tried = []
+        last_error = None
+        while len(tried) < len(self.endpoints):
+            try:
+                endpoint = await self.pick_endpoint(exclude=tried)
+            except OllamaAPIError as e:
+                raise last_error or e
+            tried.append(endpoint)
+            endpoint.outstanding += 1
+            start = time.monotonic()
+            try:
+                response_text, usage = await endpoint.client.ask(prompt)
+            except OllamaAPIError as e:
+                last_error = e
+                if e.status == 429:
+                    logger.info(f"Ollama endpoint {endpoint.url} is busy; trying another.")
+                    continue
+                if is_endpoint_failure(e):
+                    self._eject(endpoint, str(e))
+                    continue
+                raise
+            finally:
+                endpoint.outstanding -= 1
+            endpoint.record_success(time.monotonic() - start)
+            usage = dict(usage or {})
+            usage["endpoint"] = endpoint.url
+            return response_text, usage
+        raise last_error
+
+    def astream(self, prompt: str) -> StreamResponse:
+        """
+        Stream a response from the best endpoint.
+
+        Failing over is only possible before the first delta; an endpoint that
+        fails mid-stream is ejected and the error is raised to the caller.
+
+        Args:
+            prompt (str): The user prompt.
+
+        Returns:
+            StreamResponse: Async iterator of text deltas; usage includes the endpoint URL.
+        """
+        return StreamResponse(lambda usage: self._stream_deltas(prompt, usage))
+
+    async def _stream_deltas(self, prompt: str, usage: dict):
+        tried = []
+        last_error = None
+        while len(tried) < len(self.endpoints):
+            try:
+                endpoint = await self.pick_endpoint(exclude=tried)
+            except OllamaAPIError as e:
+                raise last_error or e
+            tried.append(endpoint)
+            endpoint.outstanding += 1
+            start = time.monotonic()
+            started = False
+            try:
+                stream = endpoint.client.astream(prompt)
+                async for delta in stream:
+                    started = True
+                    yield delta
+            except OllamaAPIError as e:
+                last_error = e
+                if is_endpoint_failure(e):
+                    self._eject(endpoint, str(e))
+                if started or not (e.status == 429 or is_endpoint_failure(e)):
+                    raise
+                continue
+            finally:
+                endpoint.outstanding -= 1
+            endpoint.record_success(time.monotonic() - start)
+            usage.update(stream.usage)
+            usage["endpoint"] = endpoint.url
+            return
+        raise last_error
+
+    async def ask_with_retry(self, prompt: str, max_retries: int = 3, initial_delay: float = 1.0) -> tuple:
+        # ask() already fails over between endpoints; this retries when every endpoint was busy or failing
+        return await call_with_retry(lambda: self.ask(prompt), self.rate_limiter, max_retries=max_retries,
+                                     initial_delay=initial_delay, label="Ollama pool")
+
+    async def count_tokens(self, text: str) -> int:
+        return await self.endpoints[0].client.count_tokens(text)
+
+    async def close(self):
+        for endpoint in self.endpoints:
+            await endpoint.client.close()
+        if self.session and not self.session.closed:
+            await self.session.close()
@@ -1,6 +1,8 @@
 import asyncio
 import openai
 from configs.llm_config import LLMConfig
+from llm_clients.retry import call_with_retry, estimate_prompt_tokens, get_rate_limiter
+from llm_clients.streaming import StreamResponse
 from dataclasses import dataclass
 import logging
 from openai import APIConnectionError, AsyncOpenAI, AsyncStream
@@ -37,6 +39,7 @@ class OpenAILLM:
         self.model = self.config.model
         self.api_key = self.config.api_key
         self.api_url = self.config.api_base_url
+        self.rate_limiter = get_rate_limiter(config)
         logger.info(f"OpenAILLM initialized with model: {self.model}")
 
     async def __aenter__(self):
@@ -59,6 +62,9 @@ class OpenAILLM:
         """
         Send a prompt to OpenAI using the chat API and receive the response along with token usage.
 
+        With config.stream set the response is streamed; usage then also holds
+        ttft_seconds and tokens_per_second.
+
         Args:
             prompt (str): The user prompt.
 
@@ -66,6 +72,12 @@ class OpenAILLM:
             tuple: (response_text, usage_dict)
         """
         try:
+            if self.config.stream:
+                response_text, usage = await self.astream(prompt).collect()
+                logger.debug(f"OpenAI stream: TTFT {usage['ttft_seconds']}s, "
+                             f"{usage['tokens_per_second']:.1f} tokens/s")
+                return response_text, usage
+
             # Prepare the messages for the OpenAI API
             messages = [{"role": "user", "content": prompt}]
             response = await self.aclient.chat.completions.create(
@@ -78,11 +90,7 @@ class OpenAILLM:
             response_text = response.choices[0].message.content
 
             print(f"response_text: {response_text}")
-            usage = {
-                "input_tokens": response.usage.prompt_tokens,
-                "output_tokens":  response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens
-            }
+            usage = self._usage(response.usage)
             print(f"Usage: {usage}")
 
             return response_text.strip(), usage
@@ -94,35 +102,66 @@ class OpenAILLM:
             logger.error(f"Unexpected error: {e}")
             raise
 
+    @staticmethod
+    def _usage(completion_usage) -> dict:
+        # OpenAI caches long prompt prefixes automatically; report the hits the
+        # same way as Anthropic, with input_tokens counting only uncached tokens
+        details = getattr(completion_usage, 'prompt_tokens_details', None)
+        cached_tokens = (getattr(details, 'cached_tokens', 0) or 0) if details else 0
+        return {
+            "input_tokens": completion_usage.prompt_tokens - cached_tokens,
+            "output_tokens": completion_usage.completion_tokens,
+            "total_tokens": completion_usage.total_tokens,
+            "cache_read_input_tokens": cached_tokens,
+        }
+
+    def astream(self, prompt: str) -> StreamResponse:
+        """
+        Stream a response from the chat API.
+
+        Args:
+            prompt (str): The user prompt.
+
+        Returns:
+            StreamResponse: Async iterator of text deltas; text and usage are set once it is exhausted.
+        """
+        return StreamResponse(lambda usage: self._stream_deltas(prompt, usage))
+
+    async def _stream_deltas(self, prompt: str, usage: dict):
+        stream = await self.aclient.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=self.config.max_tokens,
+            temperature=self.config.temperature,
+            stream=True,
+            # Token counts come in a final chunk with no choices
+            stream_options={"include_usage": True},
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            if chunk.usage is not None:
+                usage.update(self._usage(chunk.usage))
+
     async def ask_with_retry(self, prompt: str, max_retries: int = 3, initial_delay: float = 1.0) -> tuple:
         """
-        Send a prompt with automatic retry mechanism for overloaded errors.
+        Send a prompt, retrying rate limits, server and connection errors.
 
         Args:
             prompt (str): The user prompt.
-            max_retries (int): Maximum number of retry attempts.
-            initial_delay (float): Initial delay between retries in seconds.
+            max_retries (int): Maximum number of attempts.
+            initial_delay (float): Backoff before the first retry when the server gives no retry-after.
 
         Returns:
             tuple: (response_text, usage_dict)
         """
-        attempt = 0
-        delay = initial_delay
+        return await call_with_retry(lambda: self.ask(prompt), self.rate_limiter,
+                                     estimated_tokens=estimate_prompt_tokens(prompt), max_retries=max_retries,
+                                     initial_delay=initial_delay, label="OpenAI")
 
-        while attempt < max_retries:
-            try:
-                return await self.ask(prompt)
-            except APIConnectionError:
-                logger.warning(f"OpenAI API is overloaded. Retrying in {delay} seconds...")
-                await asyncio.sleep(delay)
-                attempt += 1
-                delay *= 2  # Exponential backoff
-            except Exception as e:
-                logger.error(f"Unexpected error during ask_with_retry: {e}")
-                raise
-        raise Exception("Max retries exceeded for OpenAI API.")
     def _make_client_kwargs(self) -> dict:
-        kwargs = {"api_key": self.config.api_key, "base_url": self.config.api_base_url}
+        # Retries are handled by call_with_retry, under the key's shared limits
+        kwargs = {"api_key": self.config.api_key, "base_url": self.config.api_base_url, "max_retries": 0}
 
         # to use proxy, openai v1 needs http_client
         if proxy_params := self._get_proxy_params():
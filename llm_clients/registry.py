@@ -0,0 +1,104 @@
+# llm_clients/registry.py
+
+import importlib
+import logging
+from typing import Dict, List, Union
+
+logger = logging.getLogger(__name__)
+
+# Backend classes by name, as "module:Class". A provider's SDK is imported
+# only when a client of that type is created, so commands that never talk
+# to an LLM do not pay for anthropic, openai, httpx or aiohttp at startup.
+BACKENDS: Dict[str, Union[str, type]] = {
+    'anthropic': 'llm_clients.anthropic_client:AnthropicLLM',
+    'openai': 'llm_clients.openai_client:OpenAILLM',
+    'ollama': 'llm_clients.ollama_client:OllamaLLM',
+    'ollama_pool': 'llm_clients.ollama_pool_client:OllamaPoolLLM',
+    'mock': 'llm_clients.mock_client:MockLLM',
+}
+
+# Installed packages can add backends under this entry point group, e.g.
+#   [project.entry-points."reverse_engineering.llm_backends"]
+#   vllm = "my_package.vllm_client:VLLMClient"
+ENTRY_POINT_GROUP = 'reverse_engineering.llm_backends'
+
+_loaded: Dict[str, type] = {}
+_entry_points_loaded = False
+
+
+def register_backend(name: str, backend: Union[str, type], replace: bool = False):
+    """
+    Make a backend available as an api_type.
+
+    A backend is a class taking an LLMConfig, used as an async context manager
+    and providing ask(), ask_with_retry() and count_tokens(); astream() is optional.
+
+    Args:
+        name (str): The api_type that selects it.
+        backend (str | type): The class, or its "module:Class" path to import on first use.
+        replace (bool): Allow replacing an existing backend of the same name.
+
+    Raises:
+        ValueError: If the name is taken and replace is False.
+    """
+    if name in BACKENDS and not replace:
+        raise ValueError(f"An LLM backend named '{name}' is already registered.")
+    BACKENDS[name] = backend
+    _loaded.pop(name, None)
+
+
+def _load_entry_points():
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    from importlib import metadata
+    for entry_point in metadata.entry_points(group=ENTRY_POINT_GROUP):
+        if entry_point.name in BACKENDS:
+            logger.warning(f"Ignoring entry point for LLM backend '{entry_point.name}': name already registered.")
+            continue
+        BACKENDS[entry_point.name] = entry_point.value
+
+
+def is_registered(name: str) -> bool:
+    if name not in BACKENDS:
+        _load_entry_points()
+    return name in BACKENDS
+
+
+def available_backends() -> List[str]:
+    _load_entry_points()
+    return sorted(BACKENDS)
+
+
+def backend_name(config) -> str:
+    """
+    Name of the backend serving a configuration.
+
+    Raises:
+        ValueError: If config.api_type has no registered backend.
+    """
+    if config.api_type == 'ollama' and config.api_base_urls:
+        # Several servers: balance requests across them
+        return 'ollama_pool'
+    if not is_registered(config.api_type):
+        raise ValueError(f"Unsupported LLM type: {config.api_type}")
+    return config.api_type
+
+
+def load_backend(name: str) -> type:
+    """
+    Import and return a backend class.
+
+    Raises:
+        ValueError: If no backend is registered under the name.
+    """
+    if name not in _loaded:
+        if not is_registered(name):
+            raise ValueError(f"Unsupported LLM type: {name}")
+        backend = BACKENDS[name]
+        if isinstance(backend, str):
+            module_name, class_name = backend.split(':')
+            backend = getattr(importlib.import_module(module_name), class_name)
+        _loaded[name] = backend
+    return _loaded[name]
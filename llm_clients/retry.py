@@ -0,0 +1,283 @@
+# llm_clients/retry.py
+
+import asyncio
+import email.utils
+import hashlib
+import logging
+import random
+import re
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from llm_clients.streaming import CHARS_PER_TOKEN
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying: timeouts, rate limits, overload and server errors (529 is Anthropic's "overloaded")
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504, 529}
+# Transport failures raised by the SDKs and aiohttp, matched by class name so no SDK has to be imported
+CONNECTION_ERROR_NAMES = {'APIConnectionError', 'APITimeoutError', 'ClientConnectionError', 'ServerDisconnectedError'}
+# (remaining, reset) header pairs; a reset only applies once its limit is used up
+RATE_LIMIT_HEADERS = [
+    ('anthropic-ratelimit-requests-remaining', 'anthropic-ratelimit-requests-reset'),
+    ('anthropic-ratelimit-tokens-remaining', 'anthropic-ratelimit-tokens-reset'),
+    ('anthropic-ratelimit-input-tokens-remaining', 'anthropic-ratelimit-input-tokens-reset'),
+    ('anthropic-ratelimit-output-tokens-remaining', 'anthropic-ratelimit-output-tokens-reset'),
+    ('x-ratelimit-remaining-requests', 'x-ratelimit-reset-requests'),
+    ('x-ratelimit-remaining-tokens', 'x-ratelimit-reset-tokens'),
+]
+DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+
+def parse_reset(value: str) -> Optional[float]:
+    """
+    Seconds until a rate-limit reset.
+
+    Accepts plain seconds ("2", "0.5"), Go-style durations as sent by OpenAI
+    ("20ms", "6m0s"), RFC 3339 timestamps as sent by Anthropic and HTTP dates.
+
+    Returns:
+        float: Seconds from now (never negative), or None if the value is not understood.
+    """
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = DURATION_PART.findall(value)
+    if parts and ''.join(number + unit for number, unit in parts) == value:
+        return sum(float(number) * DURATION_UNITS[unit] for number, unit in parts)
+    try:
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            moment = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+
+
+def retry_after_from_headers(headers) -> Optional[float]:
+    """
+    How long the server asks us to wait, from retry-after or exhausted rate-limit headers.
+    """
+    if not headers:
+        return None
+    headers = {str(key).lower(): value for key, value in headers.items()}
+    if 'retry-after-ms' in headers:
+        try:
+            return max(0.0, float(headers['retry-after-ms']) / 1000)
+        except ValueError:
+            pass
+    if 'retry-after' in headers:
+        seconds = parse_reset(headers['retry-after'])
+        if seconds is not None:
+            return seconds
+    waits = []
+    for remaining, reset in RATE_LIMIT_HEADERS:
+        if headers.get(remaining) == '0' and reset in headers:
+            seconds = parse_reset(headers[reset])
+            if seconds is not None:
+                waits.append(seconds)
+    return max(waits) if waits else None
+
+
+def classify_error(error: Exception) -> Tuple[bool, Optional[float]]:
+    """
+    Decide whether an error from any client is worth retrying.
+
+    Returns:
+        tuple: (retryable, retry_after_seconds or None)
+    """
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(error, 'status', None)
+    retry_after = getattr(error, 'retry_after', None)
+    if retry_after is None:
+        retry_after = retry_after_from_headers(getattr(getattr(error, 'response', None), 'headers', None))
+
+    if isinstance(status, int) and status != -1:
+        return status in RETRYABLE_STATUSES, retry_after
+    if status == -1:  # Ollama's code for network failures; other errors without a response are -2
+        return True, retry_after
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if names & CONNECTION_ERROR_NAMES or isinstance(error, (ConnectionError, asyncio.TimeoutError)):
+        return True, retry_after
+    return False, None
+
+
+def estimate_prompt_tokens(prompt: str) -> int:
+    return len(prompt) // CHARS_PER_TOKEN + 1
+
+
+def backoff_delay(attempt: int, initial_delay: float = 1.0, max_delay: float = 60.0) -> float:
+    """
+    Jittered exponential backoff: uniform between half and all of initial_delay * 2**(attempt - 1).
+
+    The jitter keeps clients that failed together from retrying together.
+    """
+    ceiling = min(max_delay, initial_delay * 2 ** (attempt - 1))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+class TokenBucket:
+    """
+    Continuously refilled bucket, the model providers use for their own limits.
+
+    reserve() takes the amount immediately, letting the balance go negative,
+    and returns how long the caller must wait for it. Waiters are therefore
+    served in order without a lock or a polling loop.
+    """
+
+    def __init__(self, rate_per_minute: Optional[float], capacity: Optional[float] = None):
+        """
+        Args:
+            rate_per_minute (float, optional): Refill rate; None means unlimited.
+            capacity (float, optional): Largest burst; defaults to one minute's worth.
+        """
+        self.rate = rate_per_minute / 60 if rate_per_minute else None
+        self.capacity = capacity or rate_per_minute or 0
+        self.balance = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.balance = min(self.capacity, self.balance + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        if self.rate is None:
+            return 0.0
+        self._refill()
+        self.balance -= min(amount, self.capacity)
+        return max(0.0, -self.balance / self.rate)
+
+    def try_take(self, amount: float = 1) -> bool:
+        if self.rate is None:
+            return True
+        self._refill()
+        if self.balance < amount:
+            return False
+        self.balance -= amount
+        return True
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of requests so failures cannot multiply traffic.
+
+    Every request deposits `ratio` retries, every retry withdraws one; a small
+    per-minute allowance keeps retries possible when traffic is light. When
+    the budget is empty errors are raised instead of retried.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries_per_minute: int = 10):
+        self.ratio = ratio
+        self.max_deposits = max(1.0, ratio * 100)
+        self.deposits = 0.0
+        self.allowance = TokenBucket(min_retries_per_minute)
+
+    def record_request(self):
+        self.deposits = min(self.max_deposits, self.deposits + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        if self.deposits >= 1:
+            self.deposits -= 1
+            return True
+        return self.allowance.try_take(1)
+
+
+class RateLimiter:
+    """
+    Shared limits for every request made with one API key (or to one server).
+
+    Requests wait for the request and token buckets and for any pause a
+    server asked for, so a 429 slows down every in-flight caller instead of
+    each one retrying on its own.
+    """
+
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None,
+                 retry_budget: Optional[RetryBudget] = None):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.retry_budget = retry_budget or RetryBudget()
+        self.paused_until = 0.0
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self, tokens: int = 0):
+        wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        pause = self.paused_until - time.monotonic()
+        if pause > 0:
+            # Spread the callers released by the same reset
+            wait = max(wait, pause + random.uniform(0, min(1.0, pause / 10)))
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+
+
+def get_rate_limiter(config) -> RateLimiter:
+    """
+    The process-wide limiter for a configuration's API key, or its server when there is no key.
+    """
+    identity = config.api_key or config.api_base_url or ''
+    key = f"{config.api_type}:{hashlib.sha256(identity.encode('utf-8')).hexdigest()[:16]}"
+    if key not in _rate_limiters:
+        _rate_limiters[key] = RateLimiter(config.requests_per_minute, config.tokens_per_minute)
+    return _rate_limiters[key]
+
+
+async def call_with_retry(call: Callable[[], Awaitable[Any]], limiter: RateLimiter, estimated_tokens: int = 0,
+                          max_retries: int = 3, initial_delay: float = 1.0, max_delay: float = 60.0,
+                          label: str = "LLM") -> Any:
+    """
+    Run an LLM request under the shared rate limits, retrying transient failures.
+
+    Waits the server's retry-after (pausing the whole key) when one is given,
+    otherwise a jittered exponential backoff. Retries stop after max_retries
+    attempts or when the key's retry budget is spent; the last error is raised.
+
+    Args:
+        call (callable): Makes one attempt.
+        limiter (RateLimiter): Limits of the key the request is made with.
+        estimated_tokens (int): Tokens taken from the token bucket per attempt.
+        max_retries (int): Maximum number of attempts.
+        initial_delay (float): Backoff before the first retry, in seconds.
+        max_delay (float): Longest backoff, in seconds.
+        label (str): Name used in log messages.
+
+    Returns:
+        The call's result.
+    """
+    limiter.retry_budget.record_request()
+    attempt = 0
+    while True:
+        await limiter.acquire(estimated_tokens)
+        try:
+            return await call()
+        except Exception as e:
+            retryable, retry_after = classify_error(e)
+            attempt += 1
+            if not retryable:
+                logger.error(f"Non-retriable {label} API error: {e}")
+                raise
+            if attempt >= max_retries:
+                logger.error(f"{label} API failed after {attempt} attempts: {e}")
+                raise
+            if not limiter.retry_budget.try_withdraw():
+                logger.error(f"{label} retry budget exhausted; not retrying: {e}")
+                raise
+            if retry_after is not None:
+                logger.warning(f"{label} API asked to wait {retry_after:.1f}s (attempt {attempt}): {e}")
+                limiter.pause(retry_after)
+            else:
+                delay = backoff_delay(attempt, initial_delay, max_delay)
+                logger.warning(f"{label} API error; retrying in {delay:.1f}s (attempt {attempt}): {e}")
+                await asyncio.sleep(delay)
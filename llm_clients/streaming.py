@@ -0,0 +1,94 @@
+# llm_clients/streaming.py
+
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+# Used for tokens/s when a provider does not report output tokens
+CHARS_PER_TOKEN = 4
+
+
+class StreamResponse:
+    """
+    A streamed completion.
+
+    Iterating it yields the text deltas as they arrive; the full text and the
+    usage dict are available once the stream is exhausted. Deltas are kept in
+    a list and joined once, so long responses are not rebuilt chunk by chunk.
+
+    The usage dict holds the provider's token counts plus the latency of the
+    request: ttft_seconds (time to first token), generation_seconds (first
+    to last token) and tokens_per_second (output tokens over generation time).
+    """
+
+    def __init__(self, deltas: Callable[[Dict], AsyncIterator[str]]):
+        """
+        Args:
+            deltas (callable): Takes the usage dict to fill in and returns an
+                async iterator of text deltas. The request is sent on first iteration.
+        """
+        self.usage: Dict = {}
+        self._deltas = deltas
+        self._chunks: List[str] = []
+        self.started_at: Optional[float] = None
+        self.first_token_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def __aiter__(self):
+        if self.started_at is not None:
+            raise RuntimeError("A StreamResponse can only be iterated once.")
+        return self._iterate()
+
+    async def _iterate(self):
+        self.started_at = time.monotonic()
+        async for delta in self._deltas(self.usage):
+            if not delta:
+                continue
+            if self.first_token_at is None:
+                self.first_token_at = time.monotonic()
+            self._chunks.append(delta)
+            yield delta
+        self.finished_at = time.monotonic()
+        self.usage.update(self.timing())
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    async def collect(self) -> tuple:
+        """
+        Consume the whole stream.
+
+        Returns:
+            tuple: (response_text, usage_dict), like the clients' ask().
+        """
+        async for _ in self:
+            pass
+        return self.text.strip(), self.usage
+
+    def timing(self) -> Dict:
+        if self.started_at is None or self.first_token_at is None:
+            return {"ttft_seconds": None, "generation_seconds": 0.0, "tokens_per_second": 0.0}
+        finished_at = self.finished_at or time.monotonic()
+        generation_seconds = finished_at - self.first_token_at
+        output_tokens = self.usage.get("output_tokens") or len(self.text) // CHARS_PER_TOKEN
+        return {
+            "ttft_seconds": self.first_token_at - self.started_at,
+            "generation_seconds": generation_seconds,
+            "tokens_per_second": output_tokens / generation_seconds if generation_seconds > 0 else 0.0,
+        }
+
+
+def astream_from(llm, prompt: str) -> StreamResponse:
+    """
+    Stream from any client: its own astream() if it has one, otherwise its
+    ask_with_retry() answer as a single delta.
+    """
+    if hasattr(llm, 'astream'):
+        return llm.astream(prompt)
+
+    async def single_delta(usage):
+        response_text, response_usage = await llm.ask_with_retry(prompt)
+        usage.update(response_usage)
+        yield response_text
+
+    return StreamResponse(single_delta)
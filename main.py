@@ -6,6 +6,7 @@ from configs.llm_config import LLMConfig
 from utils.llm_client import LLMClient
 from utils.code_parser import CodeParser
 from utils.document_generator import DocumentGenerator
+from utils.config import PROJECT_PATH
 from roles.product_manager import ProductManager
 from roles.architect import Architect
 from roles.project_manager import ProjectManager
@@ -19,7 +20,7 @@ async def main():
     print(f"API Key length: {len(llm_config.api_key)} characters")
     
     async with LLMClient(llm_config) as llm_client:
-        project_path = Path(r"C:\StandApp\SeisTransform")  # Update this path as needed
+        project_path = PROJECT_PATH  # Set the PROJECT_PATH environment variable (or .env) per host
         project_type = None  # Set to 'python', 'javascript', 'react', 'laravel', etc., or leave as None to auto-detect
     
         # Initialize utilities and roles
@@ -0,0 +1,51 @@
+# query_summaries.py
+
+import argparse
+import asyncio
+import json
+
+from utils.project_manager import ProjectManager
+from utils.summary_index import OllamaEmbedder, SummaryIndex
+from utils.config import PROJECT_PATH
+from configs.llm_config import LLMConfig
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Ask where something lives in the summarized project, e.g. \"where is retry logic\". "
+                    "Run code_llm_summarizer.py first; the index is brought up to date on every query."
+    )
+    parser.add_argument('question', help="What to look for")
+    parser.add_argument('-k', type=int, default=8, help="Number of results (default: 8)")
+    parser.add_argument('--kind', choices=['file', 'folder'], default=None, help="Only files or only folders")
+    parser.add_argument('--embeddings', choices=['hashing', 'ollama'], default='hashing',
+                        help="Local feature hashing (default) or the Ollama server's embedding model")
+    return parser.parse_args()
+
+
+async def main(args):
+    project_manager = ProjectManager(project_path=PROJECT_PATH)
+    project_manager.initialize_logger()
+    project_manager.setup_workspace(clean_existing=False)
+    analysis_folder = project_manager.get_analysis_folder()
+
+    embedder = OllamaEmbedder(LLMConfig.get('ollama').api_base_url) if args.embeddings == 'ollama' else None
+    index = SummaryIndex(analysis_folder / "summary_index", embedder, logger=project_manager.logger)
+    folder_summaries_file = analysis_folder / "folder_summaries.json"
+    folder_summaries = None
+    if folder_summaries_file.exists():
+        with open(folder_summaries_file, 'r', encoding='utf-8') as f:
+            folder_summaries = json.load(f)
+    await index.build(project_manager.summary_store, folder_summaries)
+
+    for hit in await index.search(args.question, k=args.k, kind=args.kind):
+        purpose = " ".join(str(hit["summary"].get("purpose", "")).split())
+        print(f"{hit['score']:.3f}  {hit['kind']:<6}  {hit['path']}")
+        if purpose:
+            print(f"        {purpose[:160]}")
+
+    project_manager.close_logger()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
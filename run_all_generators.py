@@ -46,6 +46,8 @@ async def main():
         diagram_generator = DiagramGenerator(project_data, project_manager)
         class_diagram_output = project_manager.get_analysis_folder() / "class_diagram.puml"
         diagram_generator.generate_class_diagram(class_diagram_output)
+        shards = diagram_generator.generate_sharded_class_diagrams()
+        diagram_generator.render_images(shards["scripts"])
         print("Class diagram generated.")
 
         # Generate the sequence diagram
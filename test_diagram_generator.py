@@ -15,7 +15,8 @@ async def main():
 
     # Initialize the DependencyAnalyzer and analyze the project
     from utils.dependency_analyzer import DependencyAnalyzer
-    analyzer = DependencyAnalyzer(project_manager=project_manager)
+    # Class diagrams only need names, methods and bases
+    analyzer = DependencyAnalyzer(project_manager=project_manager, profile='symbols')
     analyzer.analyze_project()
 
     # Write the project data to JSON
@@ -33,6 +34,10 @@ async def main():
     output_file = project_manager.get_analysis_folder() / "class_diagram.puml"
     generator.generate_class_diagram(output_file)
 
+    # Per-package diagrams and an index, which PlantUML can render for large projects too
+    shards = generator.generate_sharded_class_diagrams()
+    generator.render_images(shards["scripts"])
+
     # Instructions to render the diagram
     print("To render the diagram, install PlantUML and run:")
     print(f"plantuml {output_file.resolve()}")
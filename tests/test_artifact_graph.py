@@ -0,0 +1,69 @@
+# tests/test_artifact_graph.py
+
+import json
+import pytest
+from utils.artifact_graph import ArtifactGraph, hash_value
+from utils.document_generator import DocumentGenerator
+from utils.project_manager import ProjectManager
+
+
+class CountingLLMClient:
+    class config:
+        model = "counting-model"
+
+    def __init__(self):
+        self.prompts = []
+
+    async def ask_with_retry(self, prompt, *args, **kwargs):
+        self.prompts.append(prompt)
+        summary = {"purpose": f"summary #{len(self.prompts)}"}
+        return f"```json\n{json.dumps(summary)}\n```", {"input_tokens": 1, "output_tokens": 1}
+
+
+@pytest.fixture
+def project_manager(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    project_manager = ProjectManager(tmp_path / "project")
+    project_manager.initialize_logger()
+    project_manager.setup_workspace()
+    project_manager.summary_store.put_many({
+        relative_path: {"file_path": relative_path, "purpose": "v1"}
+        for relative_path in ["main.py", "pkg/a.py", "pkg/sub/b.py", "other/c.py"]
+    })
+    yield project_manager
+    project_manager.close_logger()
+
+
+def test_dependents_follow_recorded_edges(tmp_path):
+    graph = ArtifactGraph(tmp_path / "graph.json")
+    graph.record("folder:pkg", hash_value("p1"), depends_on=["file:pkg/a.py"])
+    graph.record("folder:.", hash_value("p2"), depends_on=["folder:pkg"])
+    graph.record("PRD", hash_value("p3"), depends_on=["folder:."])
+    graph.save()
+
+    reloaded = ArtifactGraph(tmp_path / "graph.json")
+    assert reloaded.dependents(["file:pkg/a.py"]) == {"folder:pkg", "folder:.", "PRD"}
+    assert reloaded.is_fresh("PRD", hash_value("p3"))
+    assert not reloaded.is_fresh("PRD", hash_value("changed"))
+
+
+@pytest.mark.asyncio
+async def test_only_the_changed_folder_is_resummarized(project_manager):
+    llm_client = CountingLLMClient()
+    generator = DocumentGenerator(llm_client, llm_client, project_manager)
+
+    await generator.summarize_folders()
+    first_run_calls = len(llm_client.prompts)
+    assert first_run_calls == 4  # ., pkg, pkg/sub and other
+
+    project_manager.summary_store.put("pkg/sub/b.py", {"file_path": "pkg/sub/b.py", "purpose": "v2"})
+
+    # A fresh generator reloads the graph from disk, as a new pipeline run would
+    generator = DocumentGenerator(llm_client, llm_client, project_manager)
+    summary = await generator.summarize_folders()
+
+    assert len(llm_client.prompts) == first_run_calls + 1
+    assert '"v2"' in llm_client.prompts[-1]
+    sub = summary["subfolders"][0]["subfolders"][0] if summary["subfolders"][0]["name"] == "pkg" \
+        else summary["subfolders"][1]["subfolders"][0]
+    assert sub["purpose"] == f"summary #{first_run_calls + 1}"
@@ -0,0 +1,47 @@
+# tests/test_async_io.py
+
+import asyncio
+import threading
+import pytest
+from utils.async_io import AsyncFileIO
+
+
+@pytest.mark.asyncio
+async def test_file_io_runs_off_the_event_loop(tmp_path):
+    io = AsyncFileIO(max_workers=2)
+    loop_thread = threading.get_ident()
+    await io.write_json(tmp_path / "out" / "data.json", {"a": [1, 2]})
+    assert await io.read_json(tmp_path / "out" / "data.json") == {"a": [1, 2]}
+    assert await io.run(threading.get_ident) != loop_thread
+    assert await io.map(lambda n: n * n, range(5)) == [0, 1, 4, 9, 16]
+    io.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_prefetcher_reads_a_bounded_distance_ahead():
+    io = AsyncFileIO(max_workers=4)
+    loaded = []
+
+    def load(key):
+        loaded.append(key)
+        if key == 5:
+            raise OSError("unreadable")
+        return key * 10
+
+    keys = list(range(20))
+    prefetcher = io.prefetch(keys, load, depth=3)
+    assert await prefetcher.get(0) == 0
+    await asyncio.sleep(0.05)
+    assert sorted(loaded) == [0, 1, 2, 3]  # Nothing beyond the depth is read yet
+    assert [await prefetcher.get(key) for key in (1, 2, 3)] == [10, 20, 30]
+    with pytest.raises(OSError):
+        await prefetcher.get(5)
+
+    # Keys nobody asked for (4) are dropped once the consumers are well past them
+    assert await prefetcher.get(12) == 120
+    assert prefetcher.outstanding <= 2 * 3 + 1 and 4 not in prefetcher._pending
+    assert await prefetcher.get(4) == 40  # Loaded on demand
+    assert await prefetcher.get(30) == 300  # Outside the sequence
+    prefetcher.cancel()
+    assert prefetcher.outstanding == 0
+    io.shutdown()
@@ -0,0 +1,118 @@
+# tests/test_code_preprocessor.py
+
+import ast
+import pytest
+from code_llm_summarizer import remove_comments
+from utils.code_preprocessor import CodePreprocessor, PreprocessOptions, preprocess_code
+
+SOURCE = (
+    "#!/usr/bin/env python\n"
+    '"""Module docstring."""\n'
+    "\n"
+    "import os  # operating system\n"
+    "\n"
+    "\n"
+    "# A section comment\n"
+    "\n"
+    "TEXT = '''keep\n"
+    "\n"
+    "\n"
+    "# not a comment\n"
+    "'''\n"
+    "\n"
+    "def f(x):\n"
+    '    """Doc of f."""\n'
+    "    # inside\n"
+    "    return x  # result\n"
+    "\n"
+    "class C:\n"
+    '    """Only a docstring."""\n'
+    "\n"
+    "def g():\n"
+    "    name = 'é' * 3  # non-ASCII before a comment\n"
+    "    return name\n"
+)
+
+
+def test_comments_level_keeps_docstrings_and_strings():
+    result = preprocess_code(SOURCE, PreprocessOptions.for_level('comments'))
+    ast.parse(result.code)
+    assert '"""Doc of f."""' in result.code
+    assert '"""Only a docstring."""' in result.code
+    assert "TEXT = '''keep\n\n\n# not a comment\n'''" in result.code  # String contents are untouched
+    assert "operating system" not in result.code and "# inside" not in result.code
+    assert "    return x\n" in result.code
+    assert "    name = 'é' * 3\n" in result.code
+    assert "\n\n\ndef" not in result.code
+    assert remove_comments(SOURCE) == result.code
+    assert 0 < result.tokens_after < result.tokens_before
+
+
+def test_docstrings_level_keeps_bodies_valid():
+    code = preprocess_code(SOURCE, PreprocessOptions.for_level('docstrings')).code
+    tree = ast.parse(code)
+    assert "Doc of f" not in code and "Module docstring" not in code
+    assert "class C:\n    ...\n" in code
+    assert [node.name for node in tree.body if isinstance(node, (ast.FunctionDef, ast.ClassDef))] == ['f', 'C', 'g']
+
+
+def test_none_level_is_identity():
+    assert preprocess_code(SOURCE, PreprocessOptions.for_level('none')).code == SOURCE
+    with pytest.raises(ValueError):
+        PreprocessOptions.for_level('extreme')
+
+
+def test_long_literals_are_elided():
+    source = (
+        "TABLE = [" + ", ".join(str(i) for i in range(100)) + "]\n"
+        "BLOB = b'" + "x" * 300 + "'\n"
+        "SHORT = (1, 2)\n"
+        "MESSAGE = f\"{SHORT} " + "y" * 300 + "\"\n"
+    )
+    code = preprocess_code(source, PreprocessOptions(elide_literals_over=50)).code
+    ast.parse(code)
+    assert "TABLE = [...]\n" in code
+    assert "BLOB = b'...'\n" in code
+    assert "SHORT = (1, 2)\n" in code
+    assert "y" * 300 in code  # f-strings are left alone
+
+
+def test_untokenizable_code_is_reported_not_hidden():
+    result = preprocess_code("x = '''unterminated\n")
+    assert result.code == "x = '''unterminated\n"
+    assert result.error
+
+    # Code that tokenizes but does not parse still has its comments removed
+    assert preprocess_code("x = = 1  # comment\n").code == "x = = 1\n"
+
+
+def test_pool_matches_inline():
+    sources = {f"module_{i}.py": SOURCE.replace("f(", f"f{i}(") for i in range(8)}
+    sources["bad.py"] = "x = '''unterminated\n"
+    inline = CodePreprocessor(workers=1)
+    pooled = CodePreprocessor(workers=2, min_files_for_pool=1)
+    assert pooled.preprocess_many(sources) == inline.preprocess_many(sources)
+    assert pooled.failed == inline.failed == 1
+    assert pooled.tokens_before - pooled.tokens_after > 0
+    assert "1 sent unchanged after errors" in pooled.report()
+
+
+@pytest.mark.parametrize("level", ['comments', 'docstrings', 'aggressive'])
+def test_cr_only_line_endings(level):
+    result = preprocess_code('def f():\r    """d"""\r    return 1\r', PreprocessOptions.for_level(level))
+    assert result.error is None
+    ast.parse(result.code)
+    assert preprocess_code('x = 1\r# c\ry = 2\r', PreprocessOptions.for_level(level)).code == 'x = 1\ry = 2\r'
+    if level != 'comments':
+        assert '"""d"""' not in result.code
+
+
+def test_processing_errors_fall_back_to_the_source(monkeypatch):
+    import utils.code_preprocessor as code_preprocessor
+
+    def broken(*args):
+        raise IndexError("list index out of range")
+
+    monkeypatch.setattr(code_preprocessor, "_minify", broken)
+    results = CodePreprocessor(workers=1).preprocess_many({"a.py": "x = 1  # c\n"})
+    assert results["a.py"].code == "x = 1  # c\n" and "IndexError" in results["a.py"].error
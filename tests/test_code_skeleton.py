@@ -0,0 +1,166 @@
+# tests/test_code_skeleton.py
+
+import ast
+import json
+import pytest
+from pathlib import Path
+from utils.code_skeleton import CodeSkeletonBuilder, SkeletonPolicy
+from utils.document_generator import DocumentGenerator
+from utils.project_manager import ProjectManager
+from utils.summary_packer import estimate_tokens
+
+MODULE = '''"""Order processing."""
+import logging
+from shop.db import Database
+
+logger = logging.getLogger(__name__)
+
+
+class OrderService(BaseService, metaclass=Registry):
+    """Places and cancels orders.
+
+    Longer description that is not needed for a summary.
+    """
+    retries = 3
+
+    @retry(times=2)
+    async def place(self, order: dict, *, notify: bool = True) -> int:
+        """Store an order and return its id."""
+        logger.info("placing %s", order)
+        items = []
+        for line in order["lines"]:
+            items.append(self.db.lookup(line["sku"]))
+        if not items:
+            raise ValueError("empty order")
+        order_id = await self.db.insert(items)
+        if notify:
+            send_email(order["customer"], order_id)
+        return order_id
+
+    def history(self, customer):
+        for row in self.db.query(customer):
+            yield row
+
+
+if __name__ == "__main__":
+    OrderService().run()
+'''
+
+
+def test_skeleton_keeps_signatures_and_call_sites():
+    skeleton = CodeSkeletonBuilder().build(MODULE)
+    ast.parse(skeleton)
+    assert "'Order processing.'" in skeleton
+    assert "from shop.db import Database" in skeleton
+    assert "class OrderService(BaseService, metaclass=Registry):" in skeleton
+    assert "    'Places and cancels orders.'" in skeleton and "Longer description" not in skeleton
+    assert "    @retry(times=2)\n    async def place(self, order: dict, *, notify: bool=True) -> int:" in skeleton
+    assert "# calls: self.db.lookup, self.db.insert, send_email" in skeleton  # Logging and list methods are dropped
+    assert "# raises: ValueError" in skeleton
+    assert "    def history(self, customer):\n        # calls: self.db.query\n        # yields\n        ..." in skeleton
+    assert "if __name__ == '__main__':\n    # calls: OrderService.run, OrderService\n    ..." in skeleton
+    assert "order_id = " not in skeleton
+
+
+def test_policy_uses_skeletons_only_for_large_parseable_files():
+    large = MODULE + "".join(
+        f"\n\ndef handler_{i}(event, total=0):\n" + "".join(
+            f"    value = event.payload[{j}] * {j} + total\n"
+            f"    if value > {j * 10}:\n"
+            f"        total += normalize(value, scale={j})\n"
+            for j in range(15)
+        ) + "    return total\n"
+        for i in range(20)
+    )
+    policy = SkeletonPolicy(threshold_tokens=1000)
+
+    assert policy.prepare(Path("small.py"), MODULE) == MODULE
+    assert policy.prepare(Path("broken.py"), "def broken(:\n" + "x = 1\n" * 1000).startswith("def broken(:")
+    skeleton = policy.prepare(Path("large.py"), large)
+    assert "def handler_19(event, total=0):" in skeleton
+    assert estimate_tokens(large) >= 5 * estimate_tokens(skeleton)
+    assert policy.files == 1 and "1 large files" in policy.report()
+    assert SkeletonPolicy(threshold_tokens=None).prepare(Path("large.py"), large) == large
+
+
+NESTED_BLOCKS = '''import sys
+
+
+class C:
+    try:
+        import foo
+    except ImportError:
+        foo = None
+    else:
+        bar = foo.bar
+    finally:
+        done = True
+
+
+if sys.platform == "win32":
+    try:
+        import nt
+    except* ImportError:
+        nt = None
+
+
+class Dispatch:
+    match sys.platform:
+        case "linux":
+            kind = probe()
+        case _:
+            kind = None
+'''
+
+
+def test_try_and_match_below_module_level_still_parse():
+    skeleton = CodeSkeletonBuilder().build(NESTED_BLOCKS)
+    ast.parse(skeleton)
+    assert "    try:\n        import foo\n    except ImportError:\n        foo = None\n    else:" in skeleton
+    assert "    finally:\n        done = True" in skeleton
+    assert "    except* ImportError:" in skeleton
+    assert "    match sys.platform:\n        case _:\n            # calls: probe\n            ..." in skeleton
+
+
+def test_skeletons_that_do_not_parse_fall_back_to_the_full_source(monkeypatch):
+    policy = SkeletonPolicy(threshold_tokens=10)
+    monkeypatch.setattr(policy.builder, "build", lambda code, tree=None: "class C:\n    try:\n        ...\n")
+    assert policy.prepare(Path("large.py"), MODULE) == MODULE and policy.files == 0
+    assert policy.skeleton(MODULE) is None
+
+
+class RecordingLLMClient:
+    class config:
+        model = "recording"
+        max_tokens = 1024
+
+    def __init__(self):
+        self.prompts = []
+
+    async def ask_with_retry(self, prompt, *args, **kwargs):
+        self.prompts.append(str(prompt))
+        return '```json\n{"purpose": "Orders."}\n```', {}
+
+
+@pytest.mark.asyncio
+async def test_large_files_are_summarized_from_their_skeleton(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    project_manager = ProjectManager(tmp_path)
+    project_manager.initialize_logger()
+    project_manager.setup_workspace()
+    client = RecordingLLMClient()
+    generator = DocumentGenerator(client, client, project_manager)
+    full_hash = generator.summary_inputs_hash(MODULE)
+    generator.code_skeletons.threshold_tokens = 100
+
+    await generator.generate_summary(Path("orders.py"), MODULE)
+
+    assert "Skeleton view" in client.prompts[0] and "order_id = " not in client.prompts[0]
+    summary = project_manager.summary_store.get(Path("orders.py"))
+    assert summary["purpose"] == "Orders."
+    # Summaries built from a skeleton are not mistaken for ones built from the full source
+    assert generator.summary_inputs_hash(MODULE) != full_hash
+    # ...but when the skeleton is not used, the hash is that of the full source
+    monkeypatch.setattr(generator.code_skeletons, "skeleton", lambda code, relative_path=None: None)
+    assert generator.summary_inputs_hash(MODULE) == full_hash
+    project_manager.close_logger()
@@ -0,0 +1,98 @@
+# tests/test_dependency_analyzer.py
+
+import ast
+import pytest
+from pathlib import Path
+from utils.project_manager import ProjectManager
+from utils.dependency_analyzer import AnalysisProfile, DependencyAnalyzer, DependencyVisitor
+
+SAMPLE_CODE = '''
+import requests
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+class Base:
+    """Base class."""
+
+
+class Service(Base):
+    def fetch(self, url):
+        response = requests.get(url)
+        return response.json()
+
+    async def close(self):
+        pass
+
+
+def helper(value: int) -> int:
+    return value + 1
+'''
+
+
+@pytest.fixture
+def sample_project(tmp_path):
+    (tmp_path / "service.py").write_text(SAMPLE_CODE, encoding="utf-8")
+    return ProjectManager(tmp_path)
+
+
+def analyze(project_manager, profile):
+    analyzer = DependencyAnalyzer(project_manager, profile=profile)
+    analyzer.analyze_project()
+    return analyzer, analyzer.project_data["service.py"]
+
+
+def test_symbols_profile_collects_names_and_bases_only(sample_project):
+    analyzer, file_info = analyze(sample_project, 'symbols')
+
+    service = file_info["classes"]["Service"]
+    assert service["bases"] == ["Base"]
+    assert set(service["methods"]) == {"fetch", "close"}
+    assert "docstring" not in service
+    assert "calls" not in service["methods"]["fetch"]
+    assert "parameters" not in file_info["functions"]["helper"]
+    # Imports guarded by a module-level try block are still found
+    assert file_info["imports"] == ["requests", "yaml"]
+    assert analyzer.items_missing_docstrings == []
+
+
+def test_structure_profile_adds_signatures_without_bodies(sample_project):
+    _, file_info = analyze(sample_project, 'structure')
+
+    helper = file_info["functions"]["helper"]
+    assert helper["parameters"] == [{"name": "value", "annotation": "int"}]
+    assert helper["returns"] == "int"
+    assert helper["docstring"] is None
+    assert "calls" not in helper
+    assert "variables" not in helper
+
+
+def test_full_profiles_differ_only_in_source_segments(sample_project):
+    full_analyzer, full_info = analyze(sample_project, 'full')
+    source_analyzer, source_info = analyze(sample_project, AnalysisProfile.get('full_with_source'))
+
+    assert full_info == source_info
+    assert full_info["classes"]["Service"]["methods"]["fetch"]["calls"] == ["requests.get", "response.json"]
+    assert all("code" not in item for item in full_analyzer.items_missing_docstrings)
+    helper_item = next(i for i in source_analyzer.items_missing_docstrings if i["name"] == "helper")
+    assert helper_item["code"].startswith("def helper(value: int) -> int:")
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError) as exc_info:
+        AnalysisProfile.get('everything')
+
+    assert "Unsupported analysis profile" in str(exc_info.value)
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n", "\r"])
+def test_source_segments_follow_ast_line_numbers(tmp_path, newline):
+    source = newline.join(["x = 1", "\x0c", "def f():", "    return 1", ""])
+    visitor = DependencyVisitor(tmp_path / "m.py", set(), tmp_path)
+    visitor.analyze_source_code(source)
+    function = ast.parse(source).body[1]
+    assert visitor._get_source_segment(function) == ast.get_source_segment(source, function)
+    assert visitor._get_source_segment(function) == newline.join(["def f():", "    return 1"])
@@ -0,0 +1,115 @@
+# tests/test_diagram_generator.py
+
+import pytest
+from pathlib import Path
+import utils.diagram_generator as diagram_generator
+from utils.diagram_generator import DiagramGenerator
+from utils.project_manager import ProjectManager
+
+
+def classes(**bases):
+    return {"classes": {name: {"methods": {"run": {}}, "bases": base_list} for name, base_list in bases.items()}}
+
+
+PROJECT_DATA = {
+    "shop/models.py": classes(Base=[], Order=["Base"], Invoice=["Base"]),
+    "shop/errors.py": classes(ShopError=["Exception"], PaymentError=["ShopError"]),
+    "shop/views.py": classes(View=[], OrderView=["View"], Mixin=[]),
+    "api/handlers.py": classes(Handler=[], OrderHandler=["Handler", "shop.models.Order"]),
+    "main.py": classes(App=[]),
+}
+
+
+@pytest.fixture
+def generator(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    project_manager = ProjectManager(tmp_path)
+    project_manager.initialize_logger()
+    project_manager.setup_workspace()
+    yield DiagramGenerator(dict(PROJECT_DATA), project_manager)
+    project_manager.close_logger()
+
+
+def test_packages_are_split_along_inheritance_components(generator):
+    partitions = {p["name"]: p for p in generator.partition_classes(max_classes=4)}
+    assert set(partitions) == {".", "api", "shop (1/2)", "shop (2/2)"}
+    shop_groups = [sorted(r["name"] for r in partitions[f"shop ({i}/2)"]["classes"]) for i in (1, 2)]
+    # Components stay whole: {Base, Order, Invoice}, {ShopError, PaymentError}, {View, OrderView}, {Mixin}
+    assert shop_groups == [["Base", "Invoice", "Mixin", "Order"], ["OrderView", "PaymentError", "ShopError", "View"]]
+
+    api = partitions["api"]
+    assert {(stub["name"], stub["where"]) for stub in api["external"]} == {("Order", "shop (1/2)")}
+    assert ("api_handlers_OrderHandler", "api_handlers_Handler") in api["edges"]
+    assert api["depends_on"] == ["shop (1/2)"]
+    errors = partitions["shop (2/2)"]
+    assert {(stub["name"], stub["where"]) for stub in errors["external"]} == {("Exception", "external")}
+
+
+def test_sharded_diagrams_are_only_rewritten_when_their_inputs_change(generator, tmp_path):
+    output_dir = tmp_path / "diagrams"
+    first = generator.generate_sharded_class_diagrams(output_dir, max_classes=4, workers=1)
+    assert len(first["written"]) == 5  # Four partitions and the index
+    index = (output_dir / "index.puml").read_text(encoding="utf-8")
+    assert "[[classes_api.svg]]" in index and "--> " in index
+    shard = (output_dir / "classes_api.puml").read_text(encoding="utf-8")
+    assert shard.startswith("@startuml") and shard.rstrip().endswith("@enduml")
+    assert 'class "Order" as shop_models_Order <<shop (1/2)>>' in shard
+
+    assert generator.generate_sharded_class_diagrams(output_dir, max_classes=4, workers=1)["written"] == []
+
+    generator.project_data["main.py"] = classes(App=[], Cli=["App"])
+    del generator.project_data["api/handlers.py"]
+    third = generator.generate_sharded_class_diagrams(output_dir, max_classes=4, workers=1)
+    assert {path.name for path in third["written"]} == {"classes_root.puml", "index.puml"}
+    assert [path.name for path in third["removed"]] == ["classes_api.puml"]
+    assert not (output_dir / "classes_api.puml").exists()
+
+
+def test_pool_rendering_matches_inline(generator, tmp_path):
+    inline = generator.generate_sharded_class_diagrams(tmp_path / "inline", max_classes=4, workers=1)
+    pooled = generator.generate_sharded_class_diagrams(tmp_path / "pooled", max_classes=4, workers=2,
+                                                       min_partitions_for_pool=1)
+    for path in inline["written"]:
+        assert (tmp_path / "pooled" / path.name).read_text(encoding="utf-8") == path.read_text(encoding="utf-8")
+    assert len(pooled["written"]) == len(inline["written"])
+
+
+def test_colliding_package_slugs_get_distinct_shards(generator, tmp_path):
+    generator.project_data = {
+        "a/b/models.py": classes(Model=[]),
+        "a_b/models.py": classes(Model=[]),
+        "root/models.py": classes(Model=[]),
+        "main.py": classes(App=[]),
+    }
+    partitions = generator.partition_classes()
+    files = [partition["file"] for partition in partitions]
+    assert len(set(files)) == len(files) == 4  # 'a/b' vs 'a_b' and 'root' vs the project root
+    aliases = [record["alias"] for partition in partitions for record in partition["classes"]]
+    assert len(set(aliases)) == len(aliases)
+    result = generator.generate_sharded_class_diagrams(tmp_path / "diagrams", workers=1)
+    assert len(result["written"]) == 5 and len(result["scripts"]) == 5
+
+
+def test_stale_images_are_removed_and_missing_ones_rendered(generator, tmp_path, monkeypatch):
+    class Completed:
+        returncode = 0
+        stderr = ""
+
+    def fake_run(command, **kwargs):
+        script = Path(command[-1])
+        script.with_suffix('.svg').write_text("<svg/>", encoding="utf-8")
+        return Completed()
+
+    monkeypatch.setattr(diagram_generator.shutil, "which", lambda name: "/usr/bin/plantuml")
+    monkeypatch.setattr(diagram_generator.subprocess, "run", fake_run)
+    output_dir = tmp_path / "diagrams"
+    first = generator.generate_sharded_class_diagrams(output_dir, max_classes=4, workers=1)
+    assert len(generator.render_images(first["scripts"], workers=1)) == 5
+    (output_dir / "classes_root.svg").unlink()
+    second = generator.generate_sharded_class_diagrams(output_dir, max_classes=4, workers=1)
+    assert second["written"] == []
+    assert generator.render_images(second["scripts"], workers=1) == [output_dir / "classes_root.puml"]
+
+    del generator.project_data["api/handlers.py"]
+    generator.generate_sharded_class_diagrams(output_dir, max_classes=4, workers=1)
+    assert not (output_dir / "classes_api.svg").exists()
@@ -0,0 +1,151 @@
+# tests/test_document_stream.py
+
+import asyncio
+import json
+import pytest
+import utils.document_generator as document_generator
+from llm_clients.streaming import StreamResponse
+from utils.document_generator import DocumentGenerator
+from utils.document_stream import PartialFileWriter, PartialJSONParser
+from utils.project_manager import ProjectManager
+
+
+class StreamingClient:
+    def __init__(self, text, chunk_size=16):
+        self.text = text
+        self.chunk_size = chunk_size
+        self.calls = 0
+
+    def astream(self, prompt):
+        self.calls += 1
+
+        async def deltas(usage):
+            for start in range(0, len(self.text), self.chunk_size):
+                await asyncio.sleep(0)
+                yield self.text[start:start + self.chunk_size]
+            usage.update({"input_tokens": 10, "output_tokens": len(self.text) // 4})
+
+        return StreamResponse(deltas)
+
+
+@pytest.fixture
+def project_manager(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    project_manager = ProjectManager(tmp_path)
+    project_manager.initialize_logger()
+    project_manager.setup_workspace()
+    yield project_manager
+    project_manager.close_logger()
+
+
+def test_partial_json_parser_closes_open_structures():
+    parser = PartialJSONParser(min_new_chars=1)
+    assert parser.feed('Sure:\n```json\n{"title": "Sto') == {"title": "Sto"}
+    assert parser.feed('re", "features": [{"name": "a"},') == {"title": "Store", "features": [{"name": "a"}]}
+    assert parser.feed(' {"na') is None  # Cut inside a key
+    assert parser.feed('me": "b"}]}\n``` done') == {"title": "Store", "features": [{"name": "a"}, {"name": "b"}]}
+    assert parser.feed(' {"ignored": 1}') is None
+
+
+@pytest.mark.asyncio
+async def test_stream_prd_writes_progressively_and_saves_final_document(project_manager):
+    prd = {"title": "Store", "features": [{"name": f"feature {i}", "description": "x" * 40} for i in range(20)]}
+    client = StreamingClient("```json\n" + json.dumps(prd) + "\n```")
+    generator = DocumentGenerator(client, client, project_manager)
+    partial_file = project_manager.get_analysis_folder() / "PRD.json.partial"
+
+    events = []
+    async for event in generator.stream_prd({"name": "root"}):
+        events.append(event)
+        if event.kind == 'delta' and len(events) == 3:
+            assert partial_file.read_text(encoding="utf-8") == "".join(e.text for e in events)
+
+    kinds = [event.kind for event in events]
+    assert kinds[0] == 'delta' and kinds[-1] == 'done' and 'partial' in kinds
+    partials = [event.data for event in events if event.kind == 'partial']
+    assert len(partials[0].get("features", [])) < len(prd["features"])
+    assert events[-1].data == prd and events[-1].usage["ttft_seconds"] is not None
+    assert json.loads((project_manager.get_analysis_folder() / "PRD.json").read_text(encoding="utf-8")) == prd
+    assert not partial_file.exists()
+
+    # Unchanged inputs are served from the artifact graph without a request
+    events = [event async for event in generator.stream_prd({"name": "root"})]
+    assert [event.kind for event in events] == ['done'] and events[0].data == prd
+    assert client.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_invalid_stream_keeps_partial_text_and_reports_error(project_manager):
+    client = StreamingClient("no diagram here")
+    generator = DocumentGenerator(client, client, project_manager)
+
+    events = [event async for event in generator.stream_sequence_diagram({"name": "root"})]
+
+    assert events[-1].kind == 'error' and events[-1].data == ""
+    analysis_folder = project_manager.get_analysis_folder()
+    assert (analysis_folder / "SequenceDiagram.puml.partial").read_text(encoding="utf-8") == "no diagram here"
+    assert not (analysis_folder / "SequenceDiagram.puml").exists()
+
+
+class FlakyStreamingClient(StreamingClient):
+    """Drops the connection after the first chunk for the first `failures` requests."""
+
+    def __init__(self, text, failures=1, chunk_size=16):
+        super().__init__(text, chunk_size)
+        self.failures = failures
+
+    def astream(self, prompt):
+        self.calls += 1
+        fail = self.calls <= self.failures
+
+        async def deltas(usage):
+            yield self.text[:self.chunk_size]
+            if fail:
+                raise ConnectionError("connection reset")
+            yield self.text[self.chunk_size:]
+
+        return StreamResponse(deltas)
+
+
+@pytest.mark.asyncio
+async def test_stream_retries_dropped_connections_then_falls_back(project_manager, monkeypatch):
+    monkeypatch.setattr(document_generator, "backoff_delay", lambda attempt: 0)
+    diagram = "@startuml\nA -> B : call()\n@enduml"
+    primary = FlakyStreamingClient(diagram)
+    generator = DocumentGenerator(primary, StreamingClient("unused"), project_manager)
+
+    events = [event async for event in generator.stream_sequence_diagram({"name": "root"})]
+    assert [event.kind for event in events].count('retry') == 1 and primary.calls == 2
+    assert events[-1].kind == 'done' and events[-1].data == diagram
+    assert (project_manager.get_analysis_folder() / "SequenceDiagram.puml").read_text(encoding="utf-8") == diagram
+
+    # An unusable document from the primary LLM is generated again by the fallback LLM
+    fallback = StreamingClient(diagram)
+    generator = DocumentGenerator(StreamingClient("no diagram here"), fallback, project_manager)
+    events = [event async for event in generator.stream_sequence_diagram({"name": "root"})]
+    assert events[-1].kind == 'done' and events[-1].data == diagram and fallback.calls == 1
+    assert 'retry' in [event.kind for event in events]
+    assert not (project_manager.get_analysis_folder() / "SequenceDiagram.puml.partial").exists()
+
+
+@pytest.mark.asyncio
+async def test_abandoned_stream_closes_its_partial_file(project_manager, monkeypatch):
+    closed = []
+
+    class RecordingWriter(PartialFileWriter):
+        def close(self, keep=False):
+            closed.append(keep)
+            super().close(keep)
+
+    monkeypatch.setattr(document_generator, "PartialFileWriter", RecordingWriter)
+    client = StreamingClient("@startuml\n" + "A -> B : call()\n" * 20 + "@enduml")
+    generator = DocumentGenerator(client, client, project_manager)
+
+    stream = generator.stream_sequence_diagram({"name": "root"})
+    received = [(await stream.__anext__()).text for _ in range(3)]
+    await stream.aclose()
+
+    assert closed == [True]  # Closed once, keeping the text generated so far
+    partial_file = project_manager.get_analysis_folder() / "SequenceDiagram.puml.partial"
+    assert partial_file.read_text(encoding="utf-8") == "".join(received)
+    assert not (project_manager.get_analysis_folder() / "SequenceDiagram.puml").exists()
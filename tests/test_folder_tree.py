@@ -0,0 +1,47 @@
+# tests/test_folder_tree.py
+
+from pathlib import Path, PureWindowsPath
+from utils.folder_tree import FolderTree
+from utils.summary_store import SummaryStore
+
+
+def test_tree_indexes_folders_by_posix_path():
+    tree = FolderTree.from_files({
+        "main.py": 10,
+        Path("pkg") / "a.py": 20,
+        PureWindowsPath(r"pkg\b.py"): 5,
+        "./pkg/sub/deep/c.py": 7,
+    })
+    assert len(tree) == 4 and "pkg/sub" in tree and tree.get("missing") is None
+    assert tree.get(Path("pkg")).file_names() == ["a.py", "b.py"]
+    assert tree.get("pkg/sub/deep").parent is tree.get("pkg/sub")
+
+    assert [node.path for node in tree.walk()] == [".", "pkg", "pkg/sub", "pkg/sub/deep"]
+    assert [node.path for node in tree.walk("pkg", bottom_up=True)] == ["pkg/sub/deep", "pkg/sub", "pkg"]
+
+    assert tree.to_dict("pkg/sub") == {
+        "name": "sub", "path": "pkg/sub", "files": [],
+        "subfolders": [{"name": "deep", "path": "pkg/sub/deep", "files": ["c.py"], "subfolders": []}],
+    }
+
+
+def test_stats_are_aggregated_and_invalidated_on_change():
+    tree = FolderTree.from_files({"main.py": 10, "pkg/a.py": 20, "pkg/sub/c.py": 7})
+    assert tree.stats() == {"folders": 3, "files": 3, "tokens": 37}
+    assert tree.stats("pkg") == {"folders": 2, "files": 2, "tokens": 27}
+
+    tree.add_file("pkg/sub/d.py", 3)
+    tree.add_file("pkg/a.py", 30)
+    assert tree.stats() == {"folders": 3, "files": 4, "tokens": 50}
+    assert tree.remove_file("main.py") and not tree.remove_file("main.py")
+    tree.add_folder("docs")
+    assert tree.stats() == {"folders": 4, "files": 3, "tokens": 40}
+    assert tree.stats("missing") == {"folders": 0, "files": 0, "tokens": 0}
+
+
+def test_tree_is_built_from_summary_sizes(tmp_path):
+    store = SummaryStore(tmp_path / "summaries.sqlite")
+    store.put_many({"main.py": {"purpose": "entry"}, "pkg/a.py": {"purpose": "x" * 400}})
+    tree = FolderTree.from_files(store.sizes())
+    assert tree.get("pkg").files == {"a.py": len('{"purpose": "' + "x" * 400 + '"}')}
+    assert tree.stats()["files"] == len(store)
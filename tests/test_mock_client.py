@@ -0,0 +1,105 @@
+# tests/test_mock_client.py
+
+import asyncio
+import json
+import time
+import pytest
+from pathlib import Path
+from configs.llm_config import LLMConfig
+from llm_clients.mock_client import MockLLM
+from llm_clients.registry import BACKENDS, register_backend
+from utils.document_generator import DocumentGenerator
+from utils.llm_client import LLMClient
+from utils.project_manager import ProjectManager
+from utils.prompt_builder import build_file_summary_prompt
+from utils.prompts import generate_sequence_diagram_prompt
+from utils.summary_packer import PackItem, build_packed_file_summary_prompt
+
+
+def mock_config(name, **options):
+    config = LLMConfig.get('mock')
+    config.api_base_url = f"mock://{name}"  # Own rate limiter and retry budget per test
+    config.options = options
+    return config
+
+
+@pytest.mark.asyncio
+async def test_mock_answers_each_prompt_in_the_shape_it_asks_for():
+    async with LLMClient(mock_config("shapes")) as client:
+        text, usage = await client.ask(build_file_summary_prompt("pkg/models.py", "x = 1"))
+        packed, _ = await client.ask(build_packed_file_summary_prompt(
+            [PackItem(Path("a.py"), "a = 1", 2), PackItem(Path("pkg/b.py"), "b = 2", 2)]))
+        diagram, _ = await client.ask(generate_sequence_diagram_prompt.format(project_data="{}"))
+        stream = client.astream(build_file_summary_prompt("pkg/models.py", "x = 1"))
+        deltas = [delta async for delta in stream]
+
+    summary = json.loads(text.split("```json")[1].split("```")[0])
+    assert summary["file"] == "pkg/models.py" and usage["output_tokens"] > 0
+    assert [item["file"] for item in json.loads(packed.split("```json")[1].split("```")[0])] == ["a.py", "pkg/b.py"]
+    assert diagram.startswith("@startuml") and diagram.endswith("@enduml")
+    assert len(deltas) > 1 and "".join(deltas) == text
+    assert stream.usage["ttft_seconds"] is not None
+
+
+@pytest.mark.asyncio
+async def test_injected_errors_are_seeded_and_retried():
+    async def run(name):
+        mock = MockLLM(mock_config(name, error_rate=0.3, error_status=429, retry_after=0, seed=7))
+        results = [await mock.ask_with_retry(f"prompt {i}", max_retries=5) for i in range(10)]
+        return mock, results
+
+    first, results = await run("errors-1")
+    second, _ = await run("errors-2")
+    assert all(text for text, _ in results)
+    assert first.errors > 0 and first.errors == second.errors
+    assert first.requests == 10 + first.errors
+
+
+def test_latency_follows_the_configured_distribution():
+    mock = MockLLM(mock_config("latency", latency_ms=100, latency_distribution="lognormal", latency_sigma=0.5))
+    delays = sorted(mock._first_token_delay() for _ in range(2001))
+    assert 0.09 < delays[1000] < 0.11
+    assert delays[0] < 0.05 and delays[-1] > 0.3
+    assert MockLLM(mock_config("fixed", latency_ms=20))._first_token_delay() == 0.02
+
+
+@pytest.mark.asyncio
+async def test_registered_backends_can_be_configured_by_api_type():
+    class EchoLLM(MockLLM):
+        async def ask(self, prompt):
+            return prompt.upper(), {}
+
+    register_backend('echo', EchoLLM)
+    try:
+        with pytest.raises(ValueError):
+            register_backend('echo', EchoLLM)
+        config = LLMConfig(api_type='echo', model='echo', api_base_url='echo://')
+        async with LLMClient(config) as client:
+            assert await client.ask("hi") == ("HI", {})
+            assert client.llm_type is None
+    finally:
+        BACKENDS.pop('echo')
+    with pytest.raises(ValueError):
+        LLMConfig(api_type='echo')
+
+
+@pytest.mark.asyncio
+async def test_document_generator_runs_offline_against_the_mock(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    project_manager = ProjectManager(tmp_path)
+    project_manager.initialize_logger()
+    project_manager.setup_workspace()
+    files = {Path(f"pkg/module_{i}.py"): f"def function_{i}(value):\n    return value * {i}\n" for i in range(300)}
+
+    async with LLMClient(mock_config("pipeline")) as client:
+        generator = DocumentGenerator(client, client, project_manager)
+        start = time.monotonic()
+        await asyncio.gather(*(generator.generate_summary(path, code) for path, code in files.items()))
+        elapsed = time.monotonic() - start
+
+    summary = project_manager.summary_store.get(Path("pkg/module_7.py"))
+    assert summary["purpose"] == "Mock summary of module_7.py."
+    assert all(project_manager.summary_store.has(path) for path in files)
+    assert client.llm.requests < len(files)  # Small files were packed
+    assert elapsed < 10
+    project_manager.close_logger()
@@ -0,0 +1,88 @@
+# tests/test_near_duplicates.py
+
+import json
+import pytest
+from pathlib import Path
+from utils.document_generator import DocumentGenerator
+from utils.near_duplicates import NearDuplicateFinder, shingle_hashes
+from utils.project_manager import ProjectManager
+
+CLIENT = "\n".join(
+    f"def get_{name}(session, item_id, timeout=30):\n"
+    f"    response = session.get(f'/api/{name}/{{item_id}}', timeout=timeout)\n"
+    f"    response.raise_for_status()\n"
+    f"    return response.json()['{name}']\n"
+    for name in ("users", "orders", "invoices", "products", "shipments", "payments", "refunds", "carts")
+)
+OTHER = "\n".join(
+    f"class Report{index}:\n"
+    f"    def render(self, rows):\n"
+    f"        return '\\n'.join(str(row[{index}]) for row in rows if row)\n"
+    for index in range(10)
+)
+
+
+def test_near_duplicates_cluster_around_a_representative():
+    sources = {
+        "clients/a.py": CLIENT,
+        "clients/b.py": CLIENT.replace("timeout=30", "timeout=60"),
+        "clients/c.py": CLIENT + "\n\ndef ping(session):\n    return session.get('/ping').ok\n",
+        "reports.py": OTHER,
+        "pkg/__init__.py": "from .a import *\n",
+        "other/__init__.py": "from .a import *\n",  # Identical, but too small to cluster
+    }
+    finder = NearDuplicateFinder(threshold=0.8)
+    clusters = finder.find(sources)
+
+    assert len(clusters) == 1
+    cluster = clusters[0]
+    assert {cluster.representative, *cluster.members} == {"clients/a.py", "clients/b.py", "clients/c.py"}
+    assert cluster.representative == "clients/a.py"  # Closest to both variants
+    assert all(0.8 <= similarity < 1.0 for similarity in cluster.members.values())
+    assert "2 of 6 files" in finder.report()
+    assert len(shingle_hashes(CLIENT)) == len(shingle_hashes(CLIENT + "\n\n"))
+
+
+class RecordingLLMClient:
+    class config:
+        model = "recording"
+        max_tokens = 1024
+
+    def __init__(self):
+        self.prompts = []
+
+    async def ask_with_retry(self, prompt, *args, **kwargs):
+        self.prompts.append(str(prompt))
+        return ('```json\n{"purpose": "REST client.", "main_functionality": "Fetches records.", '
+                '"dependencies": [], "imports": [], "functions": [], "classes": [], "main": ""}\n```', {})
+
+
+@pytest.mark.asyncio
+async def test_derived_summary_reuses_the_representative_without_an_llm(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    project_manager = ProjectManager(tmp_path)
+    project_manager.initialize_logger()
+    project_manager.setup_workspace()
+    client = RecordingLLMClient()
+    generator = DocumentGenerator(client, client, project_manager)
+    generator.summary_packer.is_small = lambda code: False
+    variant = CLIENT.replace("timeout=30", "timeout=60")
+
+    await generator.generate_summary(Path("clients/a.py"), CLIENT)
+    assert len(client.prompts) == 1
+    assert await generator.generate_derived_summary(Path("clients/b.py"), variant, Path("clients/a.py"), CLIENT, 0.92) == 1
+    assert len(client.prompts) == 1
+
+    summary = project_manager.summary_store.get(Path("clients/b.py"))
+    assert summary["purpose"] == "REST client." and summary["file_path"] == "clients/b.py"
+    assert summary["derived_from"]["file_path"] == "clients/a.py"
+    assert summary["derived_from"]["similarity"] == 0.92
+    assert "+def get_users(session, item_id, timeout=60):" in summary["derived_from"]["diff"]
+
+    assert await generator.generate_derived_summary(Path("clients/b.py"), variant, Path("clients/a.py"), CLIENT, 0.92) == 0
+    # A file that is no longer a near-duplicate gets its own summary
+    assert not generator.summary_is_current(Path("clients/b.py"), variant)
+    # Without a representative summary the file is summarized directly
+    await generator.generate_derived_summary(Path("clients/d.py"), variant, Path("clients/missing.py"), CLIENT, 0.9)
+    assert len(client.prompts) == 2
+    project_manager.close_logger()
@@ -55,3 +55,32 @@ async def test_ollama_llm_api_error():
                 await client.ask(prompt)
 
             assert "Ollama API error" in str(exc_info.value)
+
+
+@pytest.mark.asyncio
+async def test_only_network_errors_are_retried(monkeypatch):
+    import aiohttp
+    from llm_clients.ollama_client import NETWORK_ERROR_STATUS, UNEXPECTED_ERROR_STATUS
+    from llm_clients.retry import classify_error
+    client = OllamaLLM(LLMConfig.get('ollama'))
+    client.stream = False
+    monkeypatch.setattr("llm_clients.retry.backoff_delay", lambda *args: 0)
+    calls = []
+
+    async def failing_request(*args):
+        calls.append(1)
+        raise error
+
+    monkeypatch.setattr(client, "_standard_request", failing_request)
+
+    error = KeyError("response")  # A local bug, e.g. an unexpected response shape
+    with pytest.raises(OllamaAPIError) as exc_info:
+        await client.ask_with_retry("Hello", max_retries=3)
+    assert exc_info.value.status == UNEXPECTED_ERROR_STATUS and len(calls) == 1
+    assert classify_error(exc_info.value) == (False, None)
+
+    calls.clear()
+    error = aiohttp.ClientConnectionError("refused")
+    with pytest.raises(OllamaAPIError) as exc_info:
+        await client.ask_with_retry("Hello", max_retries=3)
+    assert exc_info.value.status == NETWORK_ERROR_STATUS and len(calls) == 3
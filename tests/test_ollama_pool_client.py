@@ -0,0 +1,136 @@
+# tests/test_ollama_pool_client.py
+
+import asyncio
+import json
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from configs.llm_config import LLMConfig
+from llm_clients.ollama_client import OllamaAPIError, UNEXPECTED_ERROR_STATUS
+from llm_clients.ollama_pool_client import OllamaPoolLLM
+
+
+class FakeOllamaServer:
+    def __init__(self, name, model, delay=0.02):
+        self.name = name
+        self.model = model
+        self.delay = delay
+        self.failing = False
+        self.malformed = False
+        self.requests = 0
+        self.models_requested = set()
+        self.runner = None
+        self.url = None
+
+    async def tags(self, request):
+        if self.failing:
+            return web.Response(status=500, text="down")
+        return web.json_response({"models": [{"name": self.model}]})
+
+    async def generate(self, request):
+        payload = await request.json()
+        self.requests += 1
+        self.models_requested.add(payload["model"])
+        await asyncio.sleep(self.delay)
+        if self.failing:
+            return web.Response(status=500, text="down")
+        if self.malformed:
+            return web.json_response([self.name])
+        if payload.get("stream"):
+            response = web.StreamResponse()
+            await response.prepare(request)
+            for part in [self.name, "!"]:
+                await response.write((json.dumps({"response": part, "done": False}) + "\n").encode())
+            await response.write((json.dumps({"response": "", "done": True, "prompt_eval_count": 4,
+                                              "eval_count": 2, "prompt_eval_duration": 0}) + "\n").encode())
+            await response.write_eof()
+            return response
+        return web.json_response({"response": self.name, "usage": {"input_tokens": 1, "output_tokens": 1}})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/api/tags", self.tags)
+        app.router.add_post("/api/generate", self.generate)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/api"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+@pytest_asyncio.fixture
+async def servers():
+    servers = [FakeOllamaServer("a", "qwen:14b"), FakeOllamaServer("b", "qwen:14b"), FakeOllamaServer("c", "llama:8b")]
+    for server in servers:
+        await server.start()
+    yield servers
+    for server in servers:
+        await server.stop()
+
+
+def pool_config(servers, **kwargs):
+    config = LLMConfig.get('ollama')
+    config.stream = False
+    config.model = "qwen:14b"
+    config.api_base_urls = [server.url for server in servers]
+    config.endpoint_models = {servers[2].url: "llama:8b"}
+    for key, value in kwargs.items():
+        setattr(config, key, value)
+    return config
+
+
+@pytest.mark.asyncio
+async def test_requests_spread_across_endpoints_with_pinned_models(servers):
+    async with OllamaPoolLLM(pool_config(servers)) as pool:
+        results = await asyncio.gather(*(pool.ask("hi") for _ in range(9)))
+
+    assert {text for text, _ in results} == {"a", "b", "c"}
+    assert [server.requests for server in servers] == [3, 3, 3]
+    assert servers[2].models_requested == {"llama:8b"}
+    assert servers[0].models_requested == {"qwen:14b"}
+
+
+@pytest.mark.asyncio
+async def test_failing_endpoint_is_ejected_and_readmitted(servers):
+    async with OllamaPoolLLM(pool_config(servers, load_balancing='ewma_latency'), eject_seconds=0.05) as pool:
+        servers[0].failing = True
+        results = await asyncio.gather(*(pool.ask("hi") for _ in range(6)))
+        assert "a" not in {text for text, _ in results}
+        assert not pool.endpoints[0].healthy
+
+        servers[0].failing = False
+        await asyncio.sleep(0.06)
+        await pool.pick_endpoint()
+        assert pool.endpoints[0].healthy
+
+
+@pytest.mark.asyncio
+async def test_stream_fails_over_before_the_first_delta(servers):
+    async with OllamaPoolLLM(pool_config(servers)) as pool:
+        servers[0].failing = True
+        pool.endpoints[1].outstanding = pool.endpoints[2].outstanding = 1  # Make the failing endpoint first choice
+        stream = pool.astream("hi")
+        deltas = [delta async for delta in stream]
+        pool.endpoints[1].outstanding = pool.endpoints[2].outstanding = 0
+
+    assert deltas in (["b", "!"], ["c", "!"])
+    assert stream.usage["output_tokens"] == 2
+    assert stream.usage["endpoint"] in (servers[1].url, servers[2].url)
+    assert not pool.endpoints[0].healthy
+
+
+@pytest.mark.asyncio
+async def test_unexpected_errors_are_raised_without_ejecting_endpoints(servers):
+    async with OllamaPoolLLM(pool_config(servers)) as pool:
+        for server in servers:
+            server.malformed = True
+        with pytest.raises(OllamaAPIError) as exc_info:
+            await pool.ask("hi")
+
+    assert exc_info.value.status == UNEXPECTED_ERROR_STATUS
+    assert sum(server.requests for server in servers) == 1
+    assert all(endpoint.healthy for endpoint in pool.endpoints)
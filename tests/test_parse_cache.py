@@ -0,0 +1,82 @@
+# tests/test_parse_cache.py
+
+import ast
+import pytest
+from utils.parse_cache import ParseCache
+
+
+def test_file_and_source_lookups_share_one_entry(tmp_path):
+    module_file = tmp_path / "module.py"
+    module_file.write_text("def f():\n    return 1\n", encoding="utf-8")
+    cache = ParseCache()
+
+    from_file = cache.get(module_file)
+    from_source = cache.get_source(module_file.read_text(encoding="utf-8"))
+
+    assert from_file is from_source
+    assert from_file.tree is from_source.tree
+    assert isinstance(from_file.tree.body[0], ast.FunctionDef)
+    assert cache.misses == 1
+    assert cache.hits == 1
+
+
+def test_changed_file_is_reparsed(tmp_path):
+    module_file = tmp_path / "module.py"
+    module_file.write_text("x = 1\n", encoding="utf-8")
+    cache = ParseCache()
+    first = cache.get(module_file)
+
+    module_file.write_text("x = 2\ny = 3\n", encoding="utf-8")
+    second = cache.get(module_file)
+
+    assert second is not first
+    assert len(second.tree.body) == 2
+
+
+def test_lru_eviction_by_size():
+    cache = ParseCache(max_bytes=100)
+    first = cache.get_source("a = 1\n" * 10)
+    cache.get_source("b = 2\n" * 10)
+
+    # Materializing the AST of the newest entry pushes the cache over budget
+    cache.get_source("c = 3\n" * 10).tree
+
+    assert len(cache) == 1
+    assert cache.evictions == 2
+    assert cache.get_source("a = 1\n" * 10) is not first
+
+
+def test_syntax_errors_are_cached_and_reraised():
+    cache = ParseCache()
+    entry = cache.get_source("def broken(:\n")
+
+    with pytest.raises(SyntaxError):
+        entry.tree
+    with pytest.raises(SyntaxError):
+        cache.get_source("def broken(:\n").tree
+
+
+def test_pickled_asts_are_reused_across_caches(tmp_path):
+    source = "class A:\n    pass\n"
+    ParseCache(cache_dir=tmp_path).get_source(source).tree
+
+    assert len(list(tmp_path.glob("*.ast.pickle"))) == 1
+    tree = ParseCache(cache_dir=tmp_path).get_source(source).tree
+    assert tree.body[0].name == "A"
+
+
+def test_source_entries_learn_their_path_and_can_be_invalidated(tmp_path):
+    module_file = tmp_path / "module.py"
+    source = "name = 'café'\n"
+    module_file.write_text(source, encoding="utf-8")
+    cache = ParseCache()
+
+    entry = cache.get_source(source)
+    assert entry.path is None and entry.source_bytes == len(source.encode("utf-8")) == len(source) + 1
+    assert cache.get_source(source, path=module_file) is entry and entry.path == module_file
+    assert cache.total_bytes == entry.nbytes
+
+    assert cache.invalidate(module_file) == 1
+    assert len(cache) == 0 and cache.total_bytes == 0
+    assert cache.invalidate(module_file) == 0
+    assert cache.get(module_file) is not entry
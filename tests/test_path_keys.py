@@ -0,0 +1,66 @@
+# tests/test_path_keys.py
+
+import json
+import os
+import sqlite3
+from pathlib import Path, PurePosixPath, PureWindowsPath
+from utils.artifact_graph import ArtifactGraph, file_node, folder_node
+from utils.atomic_io import atomic_write_json
+from utils.path_keys import PATH_KEY_VERSION, is_canonical, key_to_path, parent_key, path_key
+from utils.summary_store import SummaryStore
+
+
+def test_path_keys_are_the_same_on_every_host():
+    assert path_key(PureWindowsPath(r"pkg\sub\a.py")) == "pkg/sub/a.py"
+    assert path_key(r".\pkg\sub\a.py", windows=True) == path_key("./pkg//sub/a.py") == path_key(Path("pkg/sub/a.py"))
+    assert path_key("") == path_key(".") == "."
+    assert parent_key(PureWindowsPath(r"pkg\a.py")) == "pkg" and parent_key("main.py") == "."
+    assert key_to_path("pkg/a.py") == Path("pkg") / "a.py"
+    assert is_canonical("pkg/a.py") and not is_canonical("./pkg/a.py")
+    assert file_node(PureWindowsPath(r"pkg\a.py")) == file_node(Path("pkg/a.py")) == "file:pkg/a.py"
+    assert folder_node(".") == "folder:."
+
+
+def test_backslashes_in_posix_names_are_kept():
+    assert path_key(PurePosixPath(r"pkg/odd\name.py")) == r"pkg/odd\name.py"
+    assert path_key(r"odd\name.py", windows=False) == r"odd\name.py"
+    assert parent_key(PurePosixPath(r"pkg/odd\name.py")) == "pkg"
+    if os.sep == '/':
+        assert path_key(r"odd\name.py") == r"odd\name.py" and is_canonical(r"odd\name.py")
+
+
+def test_windows_workspaces_are_migrated_on_open(tmp_path):
+    db_file = tmp_path / "summaries.sqlite"
+    store = SummaryStore(db_file)
+    # Rows as written by a Windows host before path keys were canonical
+    with sqlite3.connect(db_file) as conn:
+        conn.execute("PRAGMA user_version = 0")
+        conn.executemany("INSERT INTO summaries (path, folder, summary, updated) VALUES (?, ?, ?, ?)", [
+            ("pkg\\a.py", "pkg", json.dumps({"file_path": "pkg\\a.py", "purpose": "old"}), 1.0),
+            ("pkg/a.py", "pkg", json.dumps({"file_path": "pkg/a.py", "purpose": "new"}), 2.0),
+            ("pkg\\sub\\b.py", "pkg\\sub", json.dumps({
+                "file_path": "pkg\\sub\\b.py", "derived_from": {"file_path": "pkg\\a.py", "similarity": 0.9}}), 1.0),
+        ])
+
+    store = SummaryStore(db_file)
+    assert store.paths() == ["pkg/a.py", "pkg/sub/b.py"] and store.folders() == ["pkg", "pkg/sub"]
+    assert store.get(PureWindowsPath(r"pkg\a.py")) == {"file_path": "pkg/a.py", "purpose": "new"}
+    assert store.get("pkg/sub/b.py")["derived_from"] == {"file_path": "pkg/a.py", "similarity": 0.9}
+    assert store.migrate_keys() == 0
+
+    graph_file = tmp_path / "artifact_graph.json"
+    atomic_write_json(graph_file, {"nodes": {
+        "file:pkg\\a.py": {"inputs": "x", "output": None, "depends_on": []},
+        "folder:pkg": {"inputs": "y", "output": None, "depends_on": ["file:pkg\\a.py", "folder:pkg\\sub"]},
+        "PRD": {"inputs": "z", "output": None, "depends_on": ["folder:."]},
+    }})
+    graph = ArtifactGraph(graph_file)
+    assert graph.is_fresh(file_node(Path("pkg/a.py")), "x")
+    assert graph.nodes["folder:pkg"]["depends_on"] == ["file:pkg/a.py", "folder:pkg/sub"]
+    assert graph.dependents([file_node("pkg/a.py")]) == {"folder:pkg"}
+
+    # Saved graphs are in the current format and are not migrated again
+    graph.nodes[file_node(PurePosixPath(r"odd\name.py"))] = {"inputs": "w", "output": None, "depends_on": []}
+    graph.save()
+    assert json.loads(graph_file.read_text(encoding="utf-8"))["key_version"] == PATH_KEY_VERSION
+    assert ArtifactGraph(graph_file).is_fresh(file_node(PurePosixPath(r"odd\name.py")), "w")
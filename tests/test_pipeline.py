@@ -0,0 +1,103 @@
+# tests/test_pipeline.py
+
+import asyncio
+import json
+import logging
+from pathlib import Path
+from utils.atomic_io import atomic_write_json
+from utils.pipeline import PipelineRunner, RunJournal, Stage, DONE, FAILED, IN_FLIGHT, STAGE_ITEM
+
+logger = logging.getLogger("test_pipeline")
+
+
+def make_runner(journal_file, calls, fail=(), resume=False):
+    async def files(runner):
+        async def work(key):
+            calls.append(key)
+            if key in fail:
+                raise RuntimeError(f"{key} broke")
+
+        await runner.run_items('files', {key: (lambda key=key: work(key)) for key in ['a.py', 'b.py', 'c.py']})
+
+    async def folders(runner):
+        calls.append('folders')
+
+    stages = [Stage('files', files), Stage('folders', folders)]
+    return PipelineRunner(stages, RunJournal(journal_file), logger, resume=resume, max_concurrency=2)
+
+
+def test_resume_retries_only_failed_items(tmp_path):
+    journal_file = tmp_path / "run_journal.jsonl"
+
+    calls = []
+    asyncio.run(make_runner(journal_file, calls, fail={'b.py'}).run())
+    assert sorted(calls) == ['a.py', 'b.py', 'c.py', 'folders']
+
+    journal = RunJournal(journal_file)
+    journal.open(resume=True)
+    journal.close()
+    assert journal.state('files') == FAILED
+    assert journal.state('files', 'b.py') == FAILED
+    assert journal.state('folders') == DONE
+
+    calls = []
+    asyncio.run(make_runner(journal_file, calls, resume=True).run())
+    # Only the failed item is retried; the completed folders stage is skipped
+    assert calls == ['b.py']
+
+
+def test_resume_after_crash_reruns_in_flight_items(tmp_path):
+    journal_file = tmp_path / "run_journal.jsonl"
+    journal = RunJournal(journal_file)
+    journal.open()
+    journal.mark('files', STAGE_ITEM, IN_FLIGHT)
+    journal.mark_many('files', ['a.py', 'b.py', 'c.py'], IN_FLIGHT)
+    journal.mark('files', 'a.py', DONE)
+    journal.close()
+    # Simulate a crash in the middle of appending a line
+    with open(journal_file, 'a', encoding='utf-8') as f:
+        f.write('{"stage": "files", "item": "b.py", "sta')
+
+    calls = []
+    asyncio.run(make_runner(journal_file, calls, resume=True).run())
+    assert sorted(calls) == ['b.py', 'c.py', 'folders']
+
+    journal = RunJournal(journal_file)
+    journal.open(resume=True)
+    journal.close()
+    assert journal.state('files', 'b.py') == DONE
+    assert journal.state('folders') == DONE
+
+
+def test_concurrent_marks_are_group_committed_before_returning(tmp_path, monkeypatch):
+    journal_file = tmp_path / "run_journal.jsonl"
+    fsyncs = []
+    monkeypatch.setattr("utils.pipeline.os.fsync", lambda fd: fsyncs.append(fd))
+
+    async def main():
+        journal = RunJournal(journal_file)
+        journal.open()
+
+        async def mark(key):
+            await journal.amark('files', key, DONE)
+            # Durable (written and fsynced) by the time amark returns
+            assert f'"item": "{key}", "state": "done"' in journal_file.read_text(encoding='utf-8')
+
+        await asyncio.gather(*(mark(f"{i}.py") for i in range(50)))
+        await journal.drain()
+        journal.close()
+
+    asyncio.run(main())
+    assert 1 <= len(fsyncs) < 50
+    journal = RunJournal(journal_file)
+    journal.open(resume=True)
+    journal.close()
+    assert len(journal.items_in_state('files', DONE)) == 50
+
+
+def test_atomic_write_json_leaves_no_temp_files(tmp_path):
+    target = tmp_path / "summary.json"
+    atomic_write_json(target, {"purpose": "first"})
+    atomic_write_json(target, {"purpose": "second"})
+    assert json.loads(target.read_text(encoding='utf-8')) == {"purpose": "second"}
+    assert [p.name for p in tmp_path.iterdir()] == ["summary.json"]
@@ -0,0 +1,66 @@
+# tests/test_project_watcher.py
+
+import asyncio
+import pytest
+from utils.project_manager import ProjectManager
+from utils.dependency_analyzer import DependencyAnalyzer
+from utils.project_watcher import ProjectWatcher
+from utils.artifact_graph import ArtifactGraph
+
+
+class RecordingGenerator:
+    def __init__(self, graph_file):
+        self.artifact_graph = ArtifactGraph(graph_file)
+        self.summarized = []
+        self.refreshed = []
+
+    async def generate_summary(self, relative_path, code, overwrite=False):
+        self.summarized.append((str(relative_path), overwrite))
+        return 1
+
+    async def refresh_folder_summary(self, folder_summaries, folder_path):
+        self.refreshed.append(str(folder_path))
+        return folder_summaries
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    project_path = tmp_path / "project"
+    (project_path / "pkg").mkdir(parents=True)
+    (project_path / "pkg" / "a.py").write_text("def a():\n    return 1\n", encoding="utf-8")
+    (project_path / "tests").mkdir()
+    project_manager = ProjectManager(project_path, ignored_dirs=["tests"])
+    project_manager.initialize_logger()
+    project_manager.setup_workspace()
+    (project_manager.get_analysis_folder() / "folder_summaries.json").write_text(
+        '{"name": ".", "files": [], "subfolders": []}', encoding="utf-8"
+    )
+    yield project_manager
+    project_manager.close_logger()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_inotify", [True, False])
+async def test_watcher_resummarizes_only_touched_files(project, use_inotify):
+    generator = RecordingGenerator(project.get_analysis_folder() / "artifact_graph.json")
+    analyzer = DependencyAnalyzer(project)
+    watcher = ProjectWatcher(project, generator, analyzer, debounce_seconds=0.2,
+                             poll_interval=0.1, use_inotify=use_inotify)
+    run_task = asyncio.create_task(watcher.run())
+    await asyncio.sleep(0.3)
+
+    project_path = project.get_project_folder()
+    (project_path / "pkg" / "b.py").write_text("def b():\n    return 2\n", encoding="utf-8")
+    (project_path / "tests" / "test_b.py").write_text("def test_b():\n    pass\n", encoding="utf-8")
+
+    for _ in range(50):
+        if generator.refreshed:
+            break
+        await asyncio.sleep(0.1)
+    watcher.stop()
+    await run_task
+
+    assert generator.summarized == [("pkg/b.py", True)]
+    assert generator.refreshed == ["pkg"]
+    assert "pkg/b.py" in analyzer.project_data
@@ -0,0 +1,40 @@
+# tests/test_prompt_builder.py
+
+from utils.prompts import file_summary_prompt
+from utils.prompt_builder import Prompt, PromptSegment, PromptCacheStats, build_file_summary_prompt
+from llm_clients.ollama_client import OllamaLLM
+
+
+def test_file_summary_prompt_puts_shared_instructions_first():
+    first = build_file_summary_prompt("a.py", "x = 1")
+    second = build_file_summary_prompt("b.py", "def f():\n    return 2")
+
+    assert first == file_summary_prompt.format(python_file_name="a.py", code="x = 1")
+    assert first.cacheable_prefix == second.cacheable_prefix
+    assert "x = 1" not in first.cacheable_prefix
+    assert first.variable_text.endswith("x = 1\n```\n")
+
+    blocks = first.to_anthropic_content()
+    assert blocks[0]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in blocks[1]
+    assert "".join(block["text"] for block in blocks) == first
+
+
+def test_prompt_behaves_as_plain_string():
+    prompt = Prompt([PromptSegment("static ", cacheable=True), PromptSegment("dynamic")])
+    assert isinstance(prompt, str)
+    assert prompt + "!" == "static dynamic!"
+    assert Prompt([PromptSegment("only dynamic")]).to_anthropic_content() == [{"type": "text", "text": "only dynamic"}]
+
+
+def test_cache_stats_and_ollama_usage():
+    stats = PromptCacheStats()
+    stats.record({"input_tokens": 100, "cache_creation_input_tokens": 900})
+    stats.record({"input_tokens": 100, "cache_read_input_tokens": 900})
+    stats.record(OllamaLLM._reported_usage({"prompt_eval_count": 40, "eval_count": 10, "prompt_eval_duration": 5e8}))
+
+    assert stats.requests == 3
+    assert stats.prompt_tokens == 2040
+    assert stats.cache_read_tokens == 900
+    assert stats.prefill_seconds == 0.5
+    assert "900 read from cache" in stats.report()
@@ -0,0 +1,46 @@
+# tests/test_registry.py
+
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from configs.llm_config import LLMConfig
+from llm_clients.registry import backend_name, load_backend
+from utils.llm_client import LLMClient
+
+REPO_ROOT = Path(__file__).parent.parent
+HEAVY_MODULES = ['anthropic', 'openai', 'httpx', 'aiohttp', 'tiktoken', 'numpy']
+
+
+def run_python(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+
+
+def test_imports_do_not_load_provider_sdks_or_settings():
+    result = run_python(
+        "import sys\n"
+        "import utils.config, utils.llm_client, utils.document_generator, make_project_structure, code_llm_summarizer\n"
+        "from configs.llm_config import LLMConfig\n"
+        "from utils.llm_client import LLMClient\n"
+        "LLMClient(LLMConfig.get('anthropic'))\n"
+        f"print(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+        "print('tracemalloc' in sys.modules and __import__('tracemalloc').is_tracing())\n"
+    )
+    assert result.stdout.splitlines() == ["[]", "False"]
+    assert "Loaded PROJECT_PATH" not in result.stdout + result.stderr
+
+
+def test_settings_resolve_lazily_from_the_environment():
+    result = run_python("import os; os.environ['PROJECT_PATH'] = '/tmp/lazy'; from utils.config import PROJECT_PATH; print(PROJECT_PATH)")
+    assert result.stdout.strip() == str(Path('/tmp/lazy').resolve())
+
+
+def test_backends_are_chosen_by_config_and_imported_on_demand():
+    pool = LLMConfig.get('ollama')
+    pool.api_base_urls = ["http://a/api", "http://b/api"]
+    assert backend_name(LLMConfig.get('ollama')) == 'ollama'
+    assert backend_name(pool) == 'ollama_pool'
+    assert load_backend('ollama').__name__ == 'OllamaLLM'
+    assert LLMClient(LLMConfig.get('openai')).backend == 'openai'
+    with pytest.raises(ValueError):
+        load_backend('nonexistent')
@@ -0,0 +1,99 @@
+# tests/test_retry.py
+
+import asyncio
+import time
+import pytest
+from types import SimpleNamespace as NS
+from llm_clients.retry import (
+    RateLimiter, RetryBudget, TokenBucket, call_with_retry, classify_error, parse_reset,
+)
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = NS(headers=headers or {})
+
+
+class APIConnectionError(Exception):
+    pass
+
+
+def test_server_hints_are_read_from_each_provider_format():
+    assert classify_error(FakeAPIError(429, {"Retry-After": "2"})) == (True, 2.0)
+    assert classify_error(FakeAPIError(429, {"retry-after-ms": "250"})) == (True, 0.25)
+    openai_headers = {"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "1m30s",
+                      "x-ratelimit-remaining-tokens": "900", "x-ratelimit-reset-tokens": "20ms"}
+    assert classify_error(FakeAPIError(429, openai_headers)) == (True, 90.0)
+    assert classify_error(FakeAPIError(529)) == (True, None)
+    assert classify_error(FakeAPIError(400)) == (False, None)
+    assert classify_error(APIConnectionError("reset")) == (True, None)
+    assert classify_error(ValueError("bad")) == (False, None)
+    assert parse_reset("20ms") == 0.02
+    assert parse_reset("2099-01-01T00:00:00Z") > 0
+    assert parse_reset("soon") is None
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_every_caller_of_the_key():
+    limiter = RateLimiter()
+    calls = []
+
+    async def rate_limited_once():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise FakeAPIError(429, {"retry-after": "0.2"})
+        return "ok"
+
+    async def later_request():
+        await asyncio.sleep(0.05)  # Starts while the key is paused
+        return await call_with_retry(lambda: asyncio.sleep(0, "other"), limiter)
+
+    start = time.monotonic()
+    results = await asyncio.gather(call_with_retry(rate_limited_once, limiter), later_request())
+    elapsed = time.monotonic() - start
+
+    assert results == ["ok", "other"]
+    assert calls[1] - calls[0] >= 0.2
+    assert elapsed >= 0.2
+
+
+@pytest.mark.asyncio
+async def test_retry_budget_stops_retry_storms():
+    limiter = RateLimiter(retry_budget=RetryBudget(ratio=0.0, min_retries_per_minute=2))
+    attempts = 0
+
+    async def always_overloaded():
+        nonlocal attempts
+        attempts += 1
+        raise FakeAPIError(503, {"retry-after": "0"})
+
+    for _ in range(4):
+        with pytest.raises(FakeAPIError):
+            await call_with_retry(always_overloaded, limiter, max_retries=3)
+
+    # 4 first attempts plus the 2 retries the budget allowed, instead of 12 attempts
+    assert attempts == 6
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_errors_are_raised_at_once():
+    attempts = 0
+
+    async def bad_request():
+        nonlocal attempts
+        attempts += 1
+        raise FakeAPIError(400)
+
+    with pytest.raises(FakeAPIError):
+        await call_with_retry(bad_request, RateLimiter())
+    assert attempts == 1
+
+
+def test_token_bucket_spaces_requests_beyond_the_burst():
+    bucket = TokenBucket(rate_per_minute=600, capacity=2)
+    waits = [bucket.reserve(1) for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert 0.09 <= waits[2] <= 0.1 and 0.19 <= waits[3] <= 0.2
+    assert TokenBucket(None).reserve(10 ** 6) == 0.0
@@ -0,0 +1,154 @@
+# tests/test_sequence_diagram.py
+
+import pytest
+from utils.document_generator import DocumentGenerator
+from utils.project_manager import ProjectManager
+from utils.sequence_diagram import CallGraph, SequenceDiagramBuilder
+
+FILES = {
+    "app/cli.py": (
+        "import json\n"
+        "from .service import OrderService\n"
+        "from .util import load_config\n\n"
+        "def main():\n"
+        "    config = load_config()\n"
+        "    service = OrderService(config)\n"
+        "    service.place({})\n"
+        "    print(json.dumps(config))\n"
+    ),
+    "app/service.py": (
+        "class Base:\n"
+        "    def audit(self, event):\n"
+        "        return event\n\n"
+        "class OrderService(Base):\n"
+        "    def __init__(self, config):\n"
+        "        self.config = config\n\n"
+        "    def place(self, order):\n"
+        "        self.validate(order)\n"
+        "        self.audit('placed')\n"
+        "        return self.config.get('id')\n\n"
+        "    def validate(self, order):\n"
+        "        if order.get('retry'):\n"
+        "            self.validate(order)\n"
+        "        return True\n"
+    ),
+    "app/util.py": "def load_config():\n    return {}\n",
+}
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    for relative_path, code in FILES.items():
+        (tmp_path / relative_path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / relative_path).write_text(code, encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    project_manager = ProjectManager(tmp_path)
+    project_manager.initialize_logger()
+    project_manager.setup_workspace()
+    yield project_manager
+    project_manager.close_logger()
+
+
+def graph_of(calls: dict, classes: dict = None) -> CallGraph:
+    return CallGraph({"m.py": {
+        "functions": {name: {"calls": called} for name, called in calls.items()},
+        "classes": classes or {},
+        "imports": [],
+    }})
+
+
+def test_calls_resolve_through_classes_imports_and_unique_names():
+    graph = CallGraph({
+        "app/cli.py": {"functions": {"main": {"calls": ["load_config", "OrderService", "service.place",
+                                                        "json.dumps", "print", "config.get"]}},
+                       "classes": {}, "imports": ["service.OrderService", "util.load_config"]},
+        "app/service.py": {"functions": {}, "imports": [], "classes": {
+            "Base": {"bases": [], "methods": {"audit": {"calls": []}}},
+            "OrderService": {"bases": ["Base"], "methods": {"__init__": {"calls": []},
+                                                            "place": {"calls": ["self.audit"]}}},
+        }},
+        "app/util.py": {"functions": {"load_config": {"calls": []}}, "classes": {}, "imports": []},
+    })
+    main = graph.functions["app.cli.main"]
+    resolved = {call: graph.resolve(main, call) for call in main["calls"]}
+    assert resolved == {
+        "load_config": "app.util.load_config",  # Through the (relative) import
+        "OrderService": "app.service.OrderService.__init__",
+        "service.place": "app.service.OrderService.place",  # Unique project-wide
+        "json.dumps": None,
+        "print": None,
+        "config.get": None,  # A dict method, not a project function
+    }
+    assert graph.resolve(graph.functions["app.service.OrderService.place"], "self.audit") == "app.service.Base.audit"
+    assert graph.find("app/cli.py:main") == graph.find("main") == "app.cli.main"
+    assert graph.entry_points() == ["app.cli.main"]
+
+
+def test_walk_respects_depth_breadth_and_recursion_limits():
+    graph = graph_of({
+        "main": ["a", "b", "c"],
+        "a": ["deep1", "a"],
+        "b": ["a"],
+        "c": [],
+        "deep1": ["deep2"],
+        "deep2": ["deep3"],
+        "deep3": [],
+    })
+    diagram = SequenceDiagramBuilder(graph, max_depth=2, max_calls_per_function=2).build(
+        "m.main", notes={"m.deep1": "Goes deeper"})
+    lines = diagram.splitlines()
+    assert lines[0] == "@startuml" and lines[-1] == "@enduml"
+    assert "[-> P0 : main()" in lines
+    assert lines.count("P0 -> P0 : a()") == 3  # From main, recursively from itself and, unexpanded, from b
+    assert "note right of P0 : recursive" in lines
+    assert "note right of P0 : Goes deeper" in lines
+    assert "note over P0 : 1 calls below the depth limit" in lines
+    assert "note over P0 : 1 more calls not shown" in lines  # c is past the breadth limit
+    assert "P0 -> P0 : c()" not in lines
+    assert lines.count("activate P0") == lines.count("deactivate P0")
+
+
+def test_same_named_classes_in_different_modules_are_separate_participants():
+    graph = CallGraph({
+        "cache/store.py": {"functions": {}, "imports": [], "classes": {
+            "Store": {"bases": [], "methods": {"get": {"calls": ["self.disk.flush"]}}}}},
+        "disk/store.py": {"functions": {}, "imports": [], "classes": {
+            "Store": {"bases": [], "methods": {"flush": {"calls": []}}}}},
+    })
+    lines = SequenceDiagramBuilder(graph).build("cache.store.Store.get").splitlines()
+    assert 'participant "cache.store.Store" as P0' in lines
+    assert 'participant "disk.store.Store" as P1' in lines
+    assert "P0 -> P1 : flush()" in lines
+
+
+class AnnotatingClient:
+    class config:
+        model = "annotator"
+        max_tokens = 1024
+
+    def __init__(self):
+        self.prompts = []
+
+    async def ask_with_retry(self, prompt, *args, **kwargs):
+        self.prompts.append(str(prompt))
+        return '```json\n{"app.service.OrderService.place": "Stores\\nthe order", "unknown.fn": "x"}\n```', {}
+
+
+@pytest.mark.asyncio
+async def test_generate_sequence_diagram_needs_no_llm_unless_annotating(project):
+    client = AnnotatingClient()
+    generator = DocumentGenerator(client, client, project)
+
+    diagram = await generator.generate_sequence_diagram()
+    assert client.prompts == []
+    assert diagram.startswith("@startuml") and diagram.rstrip().endswith("@enduml")
+    assert 'participant "OrderService"' in diagram
+    assert " : <<create>>" in diagram and " : place()" in diagram and " : audit()" in diagram
+
+    annotated = await generator.generate_sequence_diagram({"purpose": "Shop"}, entry_points=["app/cli.py:main"],
+                                                          annotate=True)
+    assert len(client.prompts) == 1 and "app.service.OrderService.validate" in client.prompts[0]
+    assert "note right of" in annotated and ": Stores the order" in annotated
+    assert "unknown.fn" not in annotated
+
+    assert await generator.generate_sequence_diagram(entry_points=["missing"]) == ""
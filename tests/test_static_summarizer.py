@@ -0,0 +1,105 @@
+# tests/test_static_summarizer.py
+
+import pytest
+from pathlib import Path
+from utils.document_generator import DocumentGenerator, SUMMARY_DEFAULT_VALUES
+from utils.project_manager import ProjectManager
+from utils.static_summarizer import StaticSummarizer
+
+FILES = {
+    "pkg/__init__.py": "from .models import Point, Color\n__all__ = ['Point', 'Color']\n",
+    "pkg/settings.py": (
+        '"""Runtime settings."""\n'
+        "import os\n"
+        "from pathlib import Path\n"
+        "BASE_DIR = Path(__file__).parent\n"
+        "DATA_DIR = BASE_DIR / 'data'\n"
+        "API_KEY = os.getenv('API_KEY')\n"
+        "RETRIES = 3\n"
+    ),
+    "pkg/models.py": (
+        "from dataclasses import dataclass\n"
+        "from enum import Enum\n\n"
+        "@dataclass(frozen=True)\n"
+        "class Point:\n"
+        '    """A point on the plane."""\n'
+        "    x: float\n"
+        "    y: float = 0.0\n\n"
+        "class Color(Enum):\n"
+        '    """Supported colors."""\n'
+        "    RED = 1\n"
+        "    BLUE = 2\n"
+    ),
+    "pkg/bare.py": "from dataclasses import dataclass\n\n@dataclass\nclass Bare:\n    value: int\n",
+    "pkg/logic.py": "def add(a, b):\n    return a + b\n",
+}
+
+
+@pytest.fixture
+def project(tmp_path):
+    for relative_path, code in FILES.items():
+        (tmp_path / relative_path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / relative_path).write_text(code, encoding="utf-8")
+    return tmp_path
+
+
+def test_trivial_files_are_summarized_and_others_are_left_to_the_llm(project):
+    summarizer = StaticSummarizer(project)
+
+    init = summarizer.summarize(Path("pkg/__init__.py"))
+    assert init["dependencies"] == ["models.Point", "models.Color"]
+    assert "Re-exports Point, Color" in init["purpose"]
+
+    settings = summarizer.summarize(Path("pkg/settings.py"))
+    assert settings["purpose"] == "Runtime settings."
+    assert "BASE_DIR, DATA_DIR, API_KEY, RETRIES" in settings["main_functionality"]
+    assert settings["imports"] == []  # os and pathlib are standard library
+
+    models = summarizer.summarize(Path("pkg/models.py"))
+    assert [c["name"] for c in models["classes"]] == ["Point", "Color"]
+    assert models["classes"][0]["attributes"]["x"] == {"type": "float", "description": ""}
+    assert models["classes"][1]["class_summary"] == "Supported colors."
+    assert set(SUMMARY_DEFAULT_VALUES) <= set(models)
+
+    # Undocumented data classes fall below the default threshold; real logic is never static
+    assert summarizer.summarize(Path("pkg/bare.py")) is None
+    assert summarizer.summarize(Path("pkg/logic.py")) is None
+    assert StaticSummarizer(project, confidence_threshold=0.7).summarize(Path("pkg/bare.py")) is not None
+
+    assert summarizer.metrics["synthesized"] == 3
+    assert summarizer.metrics["below_threshold"] == 1
+    assert summarizer.metrics["complex"] == 1
+    assert "3 of 5 files" in summarizer.report()
+
+
+def test_code_given_by_the_caller_is_summarized_instead_of_the_file(project):
+    summarizer = StaticSummarizer(project)
+    summary = summarizer.summarize(Path("pkg/not_on_disk.py"), '"""Limits."""\nRETRIES = 3\n')
+    assert summary["purpose"] == "Limits." and "RETRIES" in summary["main_functionality"]
+    # Dict unpacking depends on another value, so the module is not treated as plain constants
+    assert summarizer.summarize(Path("pkg/settings.py"), "BASE = {'a': 1}\nMERGED = {**BASE, 'b': 2}\n") is None
+
+
+class FailingLLMClient:
+    class config:
+        model = "unused"
+        max_tokens = 1024
+
+    async def ask_with_retry(self, prompt, *args, **kwargs):
+        raise AssertionError("no LLM call expected")
+
+
+@pytest.mark.asyncio
+async def test_generate_summary_skips_the_llm_for_trivial_files(project, monkeypatch):
+    monkeypatch.chdir(project)
+    project_manager = ProjectManager(project)
+    project_manager.initialize_logger()
+    project_manager.setup_workspace()
+    generator = DocumentGenerator(FailingLLMClient(), FailingLLMClient(), project_manager)
+
+    await generator.generate_summary(Path("pkg/settings.py"), FILES["pkg/settings.py"])
+
+    summary = project_manager.summary_store.get(Path("pkg/settings.py"))
+    assert summary["file_path"] == str(Path("pkg/settings.py"))
+    assert "static analysis" in summary["notes"]
+    project_manager.close_logger()
@@ -0,0 +1,84 @@
+# tests/test_streaming.py
+
+import asyncio
+import pytest
+from types import SimpleNamespace as NS
+from configs.llm_config import LLMConfig
+from llm_clients.anthropic_client import AnthropicLLM
+from llm_clients.openai_client import OpenAILLM
+
+
+async def delayed(events, first_delay=0.05):
+    await asyncio.sleep(first_delay)
+    for event in events:
+        yield event
+        await asyncio.sleep(0.01)
+
+
+class FakeCreate:
+    def __init__(self, events):
+        self.events = events
+        self.kwargs = None
+
+    async def __call__(self, **kwargs):
+        self.kwargs = kwargs
+        return delayed(self.events)
+
+
+def anthropic_events(texts):
+    usage = NS(input_tokens=12, cache_read_input_tokens=8, cache_creation_input_tokens=0)
+    events = [NS(type='message_start', message=NS(usage=usage)),
+              NS(type='content_block_start', index=0)]
+    events += [NS(type='content_block_delta', delta=NS(type='text_delta', text=text)) for text in texts]
+    events += [NS(type='content_block_stop', index=0),
+               NS(type='message_delta', usage=NS(output_tokens=len(texts))),
+               NS(type='message_stop')]
+    return events
+
+
+@pytest.mark.asyncio
+async def test_anthropic_stream_yields_deltas_and_reports_latency():
+    config = LLMConfig.get('anthropic')
+    config.stream = True
+    llm = AnthropicLLM(config)
+    create = FakeCreate(anthropic_events(["Hello", ", ", "world"]))
+    llm.client = NS(messages=NS(create=create))
+
+    stream = llm.astream("hi")
+    deltas = [delta async for delta in stream]
+
+    assert deltas == ["Hello", ", ", "world"]
+    assert stream.text == "Hello, world"
+    assert stream.usage["input_tokens"] == 12
+    assert stream.usage["cache_read_input_tokens"] == 8
+    assert stream.usage["output_tokens"] == 3
+    assert stream.usage["total_tokens"] == 15
+    assert 0.04 <= stream.usage["ttft_seconds"] < stream.usage["ttft_seconds"] + stream.usage["generation_seconds"]
+    assert stream.usage["tokens_per_second"] > 0
+    assert create.kwargs["stream"] is True
+
+    # ask() goes through the same path when config.stream is set
+    llm.client = NS(messages=NS(create=FakeCreate(anthropic_events(["a", "b"]))))
+    text, usage = await llm.ask("hi")
+    assert text == "ab" and usage["output_tokens"] == 2 and usage["ttft_seconds"] is not None
+
+
+@pytest.mark.asyncio
+async def test_openai_stream_reads_deltas_and_final_usage_chunk():
+    config = LLMConfig.get('openai')
+    config.stream = True
+    llm = OpenAILLM(config)
+    chunks = [NS(choices=[NS(delta=NS(content=text))], usage=None) for text in ["", "Hi", " there"]]
+    usage = NS(prompt_tokens=20, completion_tokens=2, total_tokens=22, prompt_tokens_details=NS(cached_tokens=16))
+    chunks.append(NS(choices=[], usage=usage))
+    create = FakeCreate(chunks)
+    llm.aclient = NS(chat=NS(completions=NS(create=create)))
+
+    text, usage = await llm.ask("hello")
+
+    assert text == "Hi there"
+    assert usage["input_tokens"] == 4
+    assert usage["cache_read_input_tokens"] == 16
+    assert usage["output_tokens"] == 2
+    assert usage["ttft_seconds"] >= 0.04
+    assert create.kwargs["stream_options"] == {"include_usage": True}
@@ -0,0 +1,97 @@
+# tests/test_summary_index.py
+
+import json
+import pytest
+from utils.summary_store import SummaryStore
+from utils.document_generator import DocumentGenerator
+from utils.project_manager import ProjectManager
+from utils.summary_index import HashingEmbedder, SummaryIndex, collect_documents, tokenize
+
+FILE_SUMMARIES = {
+    "llm_clients/retry.py": {"purpose": "Retries failed LLM requests with exponential backoff.",
+                             "functions": [{"name": "call_with_retry", "description": "Retry a call on overload."}]},
+    "llm_clients/ollama_client.py": {"purpose": "Client for the Ollama HTTP API.",
+                                     "functions": [{"name": "ask", "description": "Send a prompt."}]},
+    "utils/atomic_io.py": {"purpose": "Writes files atomically through a temporary file and rename."},
+    "utils/diagram_generator.py": {"purpose": "Renders PlantUML class diagrams of the project."},
+}
+FOLDER_SUMMARIES = {
+    "name": "project", "purpose": "Summarizes Python projects with LLMs.", "subfolders": [
+        {"name": "llm_clients", "purpose": "LLM provider clients.", "subfolders": []},
+        {"name": "utils", "purpose": "Shared helpers.", "subfolders": [
+            {"name": "deep", "purpose": "Rarely relevant internals.", "subfolders": []},
+        ]},
+    ],
+}
+
+
+def test_tokenize_splits_identifiers_and_stems():
+    assert tokenize("Where is callWithRetry retrying HTTPRequests?") == ["call", "retry", "retry", "http", "request"]
+
+
+@pytest.mark.asyncio
+async def test_index_finds_summaries_and_only_reembeds_what_changed(tmp_path):
+    store = SummaryStore(tmp_path / "summaries.sqlite")
+    store.put_many(FILE_SUMMARIES)
+    index = SummaryIndex(tmp_path / "index")
+    counts = await index.build(store, FOLDER_SUMMARIES)
+    assert counts == {"indexed": 8, "embedded": 8, "reused": 0, "removed": 0}
+    assert {d["id"] for d in collect_documents(store, FOLDER_SUMMARIES)} >= {
+        "folder:.", "folder:utils/deep", "file:llm_clients/retry.py"}
+
+    hits = await index.search("where is retry logic", k=3)
+    assert hits[0]["path"] == "llm_clients/retry.py" and hits[0]["score"] > hits[1]["score"]
+    assert [hit["path"] for hit in await index.search("LLM clients", k=1, kind="folder")] == ["llm_clients"]
+
+    # Reloaded from disk, only the changed summary is embedded again
+    store.put("utils/atomic_io.py", {"purpose": "Atomic writes with retries."})
+    store.delete("utils/diagram_generator.py")
+    reloaded = SummaryIndex(tmp_path / "index")
+    assert len(reloaded) == 8
+    assert await reloaded.build(store, FOLDER_SUMMARIES) == \
+        {"indexed": 7, "embedded": 1, "reused": 6, "removed": 1}
+    # An index built by another embedder is not reused
+    assert len(SummaryIndex(tmp_path / "index", HashingEmbedder(dimensions=64))) == 0
+
+    # The IVF index returns the same best match as the brute-force scan
+    ivf = SummaryIndex(tmp_path / "index", ivf_threshold=1, nprobe=3)
+    assert (await ivf.search("where is retry logic", k=1))[0]["path"] == "llm_clients/retry.py"
+
+
+class RecordingLLMClient:
+    class config:
+        model = "recording"
+        max_tokens = 1024
+
+    def __init__(self):
+        self.prompts = []
+
+    async def ask_with_retry(self, prompt, *args, **kwargs):
+        self.prompts.append(str(prompt))
+        return '```json\n{"Project Name": "Summarizer"}\n```', {}
+
+
+@pytest.mark.asyncio
+async def test_prd_of_a_large_project_is_built_from_retrieved_summaries(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    project_manager = ProjectManager(tmp_path)
+    project_manager.initialize_logger()
+    project_manager.setup_workspace()
+    project_manager.summary_store.put_many(FILE_SUMMARIES)
+    client = RecordingLLMClient()
+    generator = DocumentGenerator(client, client, project_manager)
+
+    assert await generator.generate_prd(FOLDER_SUMMARIES) == {"Project Name": "Summarizer"}
+    assert "relevant_summaries" not in client.prompts[0] and "Rarely relevant internals" in client.prompts[0]
+
+    generator.retrieval_threshold_tokens = 50
+    generator.retrieval_top_k = 1
+    await generator.generate_prd(FOLDER_SUMMARIES)
+    prompt = client.prompts[1]
+    assert "relevant_summaries" in prompt and "Retries failed LLM requests" in prompt
+    assert "Rarely relevant internals" not in prompt  # Below the top level and not retrieved
+    assert "Shared helpers." in prompt  # Top-level folders are always included
+    assert len(json.loads(
+        (project_manager.get_analysis_folder() / "summary_index" / "summary_index.json").read_text(encoding="utf-8")
+    )["documents"]) == 8
+    project_manager.close_logger()
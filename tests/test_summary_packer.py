@@ -0,0 +1,105 @@
+# tests/test_summary_packer.py
+
+import asyncio
+import json
+import re
+import pytest
+from pathlib import Path
+from utils.document_generator import DocumentGenerator
+from utils.project_manager import ProjectManager
+from utils.summary_packer import PackItem, parse_summary_array, split_packed_summaries
+
+REQUIRED_KEYS = ["file", "purpose", "main_functionality"]
+
+
+class PackingLLMClient:
+    class config:
+        model = "packing-model"
+        max_tokens = 1024
+
+    def __init__(self, skip=()):
+        self.prompts = []
+        self.skip = set(skip)
+
+    async def ask_with_retry(self, prompt, *args, **kwargs):
+        self.prompts.append(prompt)
+        files = re.findall(r"Python file `([^`]+)`", prompt)
+        summaries = [{"file": name, "purpose": f"purpose of {name}"} for name in files if name not in self.skip]
+        body = summaries if "JSON array" in prompt else summaries[0]
+        return f"```json\n{json.dumps(body)}\n```", {"input_tokens": 1, "output_tokens": 1}
+
+
+def items(*keys):
+    return [PackItem(Path(key), "x = 1", 3) for key in keys]
+
+
+def test_parse_summary_array_recovers_completed_elements_of_a_truncated_reply():
+    assert parse_summary_array('```json\n[{"file": "a.py"}, {"file": "b.py"}]\n```') == [{"file": "a.py"}, {"file": "b.py"}]
+    truncated = '```json\n[\n  {"file": "a.py", "purpose": "p"},\n  {"file": "b.py", "purp'
+    assert parse_summary_array(truncated) == [{"file": "a.py", "purpose": "p"}]
+    assert parse_summary_array("no json here") == []
+
+
+def test_split_packed_summaries_matches_by_name_then_position():
+    pack = items("pkg/__init__.py", "pkg/a.py", "other/__init__.py")
+    by_name = split_packed_summaries(
+        [{"file": "pkg/a.py", "purpose": "a"}, {"file": "other/__init__.py", "purpose": "o"}, {"file": "pkg/a.py", "purpose": ""}],
+        pack, REQUIRED_KEYS)
+    assert by_name == {"pkg/a.py": {"file": "pkg/a.py", "purpose": "a"},
+                       "other/__init__.py": {"file": "other/__init__.py", "purpose": "o"}}
+
+    by_position = split_packed_summaries(
+        [{"file": "?", "purpose": "1"}, {"file": "?", "purpose": "2"}, {"purpose": ""}], pack, REQUIRED_KEYS)
+    # The empty third summary is rejected so that file falls back to its own request
+    assert by_position == {"pkg/__init__.py": {"file": "pkg/__init__.py", "purpose": "1"},
+                           "pkg/a.py": {"file": "pkg/a.py", "purpose": "2"}}
+    # Bare names are matched when unambiguous, and recorded as the file's key
+    assert split_packed_summaries([{"file": "a.py", "purpose": "a"}], items("pkg/a.py", "pkg/b.py"), REQUIRED_KEYS) == \
+        {"pkg/a.py": {"file": "pkg/a.py", "purpose": "a"}}
+    assert split_packed_summaries([{"file": "pkg/a.py", "purpose": "a"}], pack, REQUIRED_KEYS) == \
+        {"pkg/a.py": {"file": "pkg/a.py", "purpose": "a"}}
+
+
+@pytest.mark.asyncio
+async def test_small_files_are_packed_and_missing_ones_fall_back(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    project_manager = ProjectManager(tmp_path / "project")
+    project_manager.initialize_logger()
+    project_manager.setup_workspace()
+    llm_client = PackingLLMClient(skip={"roles/e.py"})
+    generator = DocumentGenerator(llm_client, llm_client, project_manager)
+
+    paths = [Path(p) for p in ["a.py", "b.py", "c.py", "d.py", "roles/e.py", "roles/f.py"]]
+    await asyncio.gather(*(generator.generate_summary(path, f"def name():\n    return '{path}'\n") for path in paths))
+
+    # Two packs of at most four files (1024 output tokens), plus one retry for the skipped file
+    assert len(llm_client.prompts) == 3
+    assert generator.summary_packer.packed_files == 5
+    for path in paths:
+        summary = project_manager.summary_store.get(path)
+        assert summary["purpose"].endswith(path.name)
+        assert summary["file_path"] == str(path)
+        assert summary["classes"] == []
+    project_manager.close_logger()
+
+
+@pytest.mark.asyncio
+async def test_packs_do_not_wait_for_files_the_concurrency_limit_rules_out(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    project_manager = ProjectManager(tmp_path / "project")
+    project_manager.initialize_logger()
+    project_manager.setup_workspace()
+    llm_client = PackingLLMClient()
+    generator = DocumentGenerator(llm_client, llm_client, project_manager)
+    generator.summary_packer.linger_seconds = 60
+
+    generator.summary_packer.max_concurrency = 2
+    paths = [Path("a.py"), Path("b.py")]
+    await asyncio.wait_for(asyncio.gather(*(generator.generate_summary(path, f"def name():\n    return '{path}'\n") for path in paths)), 5)
+    assert len(llm_client.prompts) == 1 and generator.summary_packer.packed_files == 2
+
+    generator.summary_packer.max_concurrency = 1
+    assert not generator.summary_packer.is_small("def name():\n    return 'c'\n")
+    await asyncio.wait_for(generator.generate_summary(Path("c.py"), "def name():\n    return 'c'\n"), 5)
+    assert len(llm_client.prompts) == 2 and "JSON array" not in llm_client.prompts[-1]
+    project_manager.close_logger()
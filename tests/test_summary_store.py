@@ -0,0 +1,58 @@
+# tests/test_summary_store.py
+
+import json
+from pathlib import Path
+from utils.atomic_io import atomic_write_json
+from utils.summary_store import SummaryStore, folder_of
+
+
+def test_summaries_are_read_per_folder_and_lazily(tmp_path):
+    store = SummaryStore(tmp_path / "summaries.sqlite")
+    assert store.put_many({
+        "main.py": {"purpose": "entry"},
+        Path("pkg") / "a.py": {"purpose": "a"},
+        "pkg/b.py": {"purpose": "b"},
+        "pkg/sub/c.py": {"purpose": "c"},
+    }) == 4
+    assert len(store) == 4 and folder_of("main.py") == "."
+    assert store.folders() == [".", "pkg", "pkg/sub"]
+    assert store.paths("pkg") == ["pkg/a.py", "pkg/b.py"]
+    assert store.get(Path("pkg/sub/c.py")) == {"purpose": "c"} and store.get("missing.py") is None
+
+    rows = store.iter_folder("pkg")
+    assert next(rows) == ("pkg/a.py", {"purpose": "a"})
+    store.put("pkg/b.py", {"purpose": "b2"})  # Writers are not blocked by an open reader
+    rows.close()
+    assert [summary for _, summary in store.iter_folder("pkg")] == [{"purpose": "a"}, {"purpose": "b2"}]
+
+    assert store.delete("pkg/a.py") and not store.delete("pkg/a.py")
+    assert not store.has("pkg/a.py") and store.has("main.py")
+
+
+def test_legacy_json_is_imported_once_and_export_is_optional(tmp_path):
+    legacy = tmp_path / "code_summaries"
+    atomic_write_json(legacy / "pkg" / "a.json", {"purpose": "legacy"})
+    (legacy / "broken.json").write_text("{", encoding="utf-8")
+
+    store = SummaryStore(tmp_path / "summaries.sqlite", import_folder=legacy)
+    assert store.paths() == ["pkg/a.py"]
+    atomic_write_json(legacy / "pkg" / "b.json", {"purpose": "written later"})
+    assert SummaryStore(tmp_path / "summaries.sqlite", import_folder=legacy).paths() == ["pkg/a.py"]
+
+    exported = SummaryStore(tmp_path / "summaries.sqlite", export_folder=tmp_path / "export")
+    exported.put("pkg/c.py", {"purpose": "c"})
+    assert json.loads((tmp_path / "export" / "pkg" / "c.json").read_text(encoding="utf-8")) == {"purpose": "c"}
+    exported.delete("pkg/c.py")
+    assert not (tmp_path / "export" / "pkg" / "c.json").exists()
+    assert store.export_json(tmp_path / "full") == 1 and (tmp_path / "full" / "pkg" / "a.json").exists()
+
+
+def test_compaction_reclaims_space_of_replaced_summaries(tmp_path):
+    store = SummaryStore(tmp_path / "summaries.sqlite")
+    store.put_many({f"pkg/module_{i}.py": {"purpose": "x" * 4000} for i in range(200)})
+    for i in range(200):
+        store.delete(f"pkg/module_{i}.py")
+    size = (tmp_path / "summaries.sqlite").stat().st_size
+    assert store.compact()
+    assert (tmp_path / "summaries.sqlite").stat().st_size < size
+    assert not store.compact()  # Nothing left to reclaim
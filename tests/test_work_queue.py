@@ -0,0 +1,99 @@
+# tests/test_work_queue.py
+
+import asyncio
+import json
+import time
+import pytest
+from utils.document_generator import DocumentGenerator
+from utils.project_manager import ProjectManager
+from utils.summary_workers import SummaryCoordinator, SummaryWorker, default_queue_file
+from utils.work_queue import WorkQueue
+
+
+class SlowLLMClient:
+    class config:
+        model = "slow-model"
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+
+    async def ask_with_retry(self, prompt, *args, **kwargs):
+        await asyncio.sleep(0.01)
+        self.calls += 1
+        summary = {"purpose": f"summarized by {self.name}"}
+        return f"```json\n{json.dumps(summary)}\n```", {"input_tokens": 1, "output_tokens": 1}
+
+
+def test_claims_are_exclusive_and_lost_leases_cannot_complete(tmp_path):
+    queue = WorkQueue(tmp_path / "queue.sqlite", lease_seconds=0.05)
+    assert queue.enqueue({"a.py": {}, "b.py": {}}, {"a.py": "h1", "b.py": "h1"}) == 2
+
+    first = queue.claim("w1")
+    second = queue.claim("w2")
+    assert {first.key, second.key} == {"a.py", "b.py"}
+    assert queue.claim("w3") is None
+
+    time.sleep(0.1)
+    # w1 stalled; its job is handed to w3 and w1 can no longer commit it
+    stolen = queue.claim("w3")
+    assert stolen.key in {first.key, second.key}
+    original = first if stolen.key == first.key else second
+    commits = []
+    assert not queue.complete(original, {"by": "stale"}, commit=lambda: commits.append("stale"))
+    assert queue.complete(stolen, {"by": "w3"}, commit=lambda: commits.append("w3"))
+    assert commits == ["w3"]
+    assert queue.collect() == {stolen.key: {"by": "w3"}}
+    assert queue.collect() == {}
+
+
+def test_failed_jobs_retry_then_reset_when_inputs_change(tmp_path):
+    queue = WorkQueue(tmp_path / "queue.sqlite", max_attempts=2)
+    queue.enqueue({"a.py": {}}, {"a.py": "h1"})
+    for _ in range(2):
+        assert queue.fail(queue.claim("w1"), "boom")
+    assert queue.claim("w1") is None
+    assert queue.counts()["failed"] == 1
+
+    # Unchanged inputs do not reset a done job, changed ones do
+    assert queue.enqueue({"a.py": {}}, {"a.py": "h2"}) == 1
+    job = queue.claim("w1")
+    assert job.attempts == 1
+    assert queue.complete(job)
+    assert queue.enqueue({"a.py": {}}, {"a.py": "h2"}) == 0
+
+
+@pytest.mark.asyncio
+async def test_two_workers_summarize_each_file_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    project = tmp_path / "project"
+    for relative_path in ["main.py", "pkg/a.py", "pkg/b.py", "pkg/c.py", "other/d.py"]:
+        (project / relative_path).parent.mkdir(parents=True, exist_ok=True)
+        (project / relative_path).write_text(f"def f():\n    return '{relative_path}'\n", encoding="utf-8")
+    project_manager = ProjectManager(project)
+    project_manager.initialize_logger()
+    project_manager.setup_workspace()
+
+    queue = WorkQueue(default_queue_file(project_manager))
+    coordinator = SummaryCoordinator(project_manager, DocumentGenerator(None, None, project_manager), queue)
+    assert coordinator.enqueue_project() == 5
+
+    clients = [SlowLLMClient("gpu1"), SlowLLMClient("gpu2")]
+    workers = [
+        SummaryWorker(project_manager, DocumentGenerator(client, client, project_manager), queue,
+                      worker_id=client.name, concurrency=2, poll_interval=0.01)
+        for client in clients
+    ]
+    await asyncio.gather(*(worker.run() for worker in workers))
+
+    assert sum(worker.completed for worker in workers) == 5
+    assert sum(client.calls for client in clients) == 5
+    assert all(client.calls for client in clients)
+    assert coordinator.collect() == 5
+    for relative_path in ["main.py", "pkg/a.py", "other/d.py"]:
+        assert project_manager.summary_store.get(relative_path)["purpose"].startswith("summarized by gpu")
+
+    # Everything is current now, so a new coordinator run enqueues nothing
+    coordinator = SummaryCoordinator(project_manager, DocumentGenerator(None, None, project_manager), queue)
+    assert coordinator.enqueue_project() == 0
+    project_manager.close_logger()
@@ -0,0 +1,165 @@
+# utils/artifact_graph.py
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+from utils.atomic_io import atomic_write_json
+from utils.path_keys import PATH_KEY_VERSION, path_key
+
+
+def hash_value(value: Any) -> str:
+    """
+    Hash a string or JSON-serializable value for input/output tracking.
+
+    Args:
+        value (Any): A string, or anything json.dumps can serialize.
+
+    Returns:
+        str: Hex digest of the value.
+    """
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+def file_node(relative_path: Path) -> str:
+    return f"file:{path_key(relative_path)}"
+
+
+def folder_node(folder_path: Path) -> str:
+    return f"folder:{path_key(folder_path)}"
+
+
+def canonical_node_id(node_id: str, windows: Optional[bool] = None) -> str:
+    """
+    Node id with its path, if it has one, as a path key (see path_key for `windows`).
+    """
+    kind, separator, path = node_id.partition(':')
+    if separator and kind in ("file", "folder"):
+        return f"{kind}:{path_key(path, windows)}"
+    return node_id
+
+
+class ArtifactGraph:
+    """
+    Dependency-tracked record of generated artifacts.
+
+    Every node (file summary, folder summary, project summary, PRD, system design,
+    task list) stores the hash of the inputs it was built from, the hash of what it
+    produced, the nodes it depends on and, optionally, the produced value itself.
+    A node only needs regenerating when the hash of its current inputs differs from
+    the recorded one, so a change to one file invalidates its folder and the
+    project-level documents but leaves every other folder untouched.
+
+    Node ids are 'file:<path>', 'folder:<path>' and the document names
+    'project_summary', 'PRD', 'system_design' and 'task_list'.
+    """
+
+    def __init__(self, graph_file: Path):
+        self.graph_file = Path(graph_file)
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    def load(self):
+        if self.graph_file.exists():
+            with open(self.graph_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.nodes = data.get("nodes", {})
+            # Graphs written before the current path-key format
+            if data.get("key_version", 0) < PATH_KEY_VERSION:
+                self.migrate_keys()
+
+    def save(self):
+        """
+        Write the graph to disk atomically.
+        """
+        atomic_write_json(self.graph_file, {"key_version": PATH_KEY_VERSION, "nodes": self.nodes}, indent=1)
+
+    def migrate_keys(self) -> int:
+        """
+        Re-key file and folder nodes, and the edges to them, recorded with
+        non-canonical paths (e.g. by a Windows host). A node already present
+        under its canonical id is kept over the migrated one. Backslashes in the
+        recorded paths are read as Windows separators.
+
+        Returns:
+            int: Number of nodes re-keyed.
+        """
+        renamed = {node_id: canonical_node_id(node_id, windows=True) for node_id in self.nodes}
+        renamed = {old: new for old, new in renamed.items() if old != new}
+        if not renamed:
+            return 0
+        nodes = {}
+        for node_id, node in self.nodes.items():
+            new_id = renamed.get(node_id, node_id)
+            if new_id in nodes and node_id != new_id:
+                continue
+            nodes[new_id] = {**node, "depends_on": sorted({canonical_node_id(upstream, windows=True)
+                                                           for upstream in node.get("depends_on", [])})}
+        self.nodes = nodes
+        return len(renamed)
+
+    def has(self, node_id: str) -> bool:
+        return node_id in self.nodes
+
+    def is_fresh(self, node_id: str, inputs_hash: str) -> bool:
+        """
+        Check whether a node was built from exactly these inputs.
+        """
+        node = self.nodes.get(node_id)
+        return node is not None and node.get("inputs") == inputs_hash
+
+    def get_output(self, node_id: str) -> Optional[Any]:
+        """
+        Return the stored output value of a node, or None if none was stored.
+        """
+        node = self.nodes.get(node_id)
+        return node.get("value") if node else None
+
+    def record(self, node_id: str, inputs_hash: str, output: Any = None,
+               depends_on: Iterable[str] = (), store_output: bool = False):
+        """
+        Record that a node was (re)built.
+
+        Args:
+            node_id (str): Node identifier.
+            inputs_hash (str): Hash of everything the node was built from.
+            output (Any): The produced artifact, hashed for downstream comparison.
+            depends_on (iterable): Upstream node ids.
+            store_output (bool): Keep the output value itself so it can be reused.
+        """
+        node = {
+            "inputs": inputs_hash,
+            "output": hash_value(output) if output is not None else None,
+            "depends_on": sorted(set(depends_on)),
+        }
+        if store_output:
+            node["value"] = output
+        self.nodes[node_id] = node
+
+    def dependents(self, node_ids: Iterable[str]) -> Set[str]:
+        """
+        Return every node downstream of the given nodes.
+        """
+        reverse_edges: Dict[str, List[str]] = {}
+        for node_id, node in self.nodes.items():
+            for upstream in node.get("depends_on", []):
+                reverse_edges.setdefault(upstream, []).append(node_id)
+
+        result: Set[str] = set()
+        stack = list(node_ids)
+        while stack:
+            for downstream in reverse_edges.get(stack.pop(), []):
+                if downstream not in result:
+                    result.add(downstream)
+                    stack.append(downstream)
+        return result
+
+    def remove(self, node_id: str):
+        """
+        Forget a node whose artifact no longer exists. Downstream nodes are left in
+        place; their recorded input hashes no longer match and they are rebuilt on
+        their next run.
+        """
+        self.nodes.pop(node_id, None)
@@ -0,0 +1,180 @@
+# utils/async_io.py
+
+import asyncio
+import functools
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+from utils.atomic_io import atomic_write_json, atomic_write_text
+
+# Threads doing blocking file and database I/O for the event loop
+DEFAULT_IO_WORKERS = 8
+# Sources read ahead of the work items that need them
+DEFAULT_PREFETCH_DEPTH = 32
+
+
+class AsyncFileIO:
+    """
+    Blocking file and database I/O run in a bounded thread pool, so the event
+    loop keeps serving in-flight LLM requests while files are read and written.
+
+    The pool bounds how many reads and writes run at once; callers can still
+    await any number of them.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_IO_WORKERS):
+        """
+        Args:
+            max_workers (int): Threads doing I/O at the same time.
+        """
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='async-io')
+
+    async def run(self, function: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking function in the I/O pool and await its result.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(function, *args, **kwargs))
+
+    async def map(self, function: Callable, items: Iterable) -> List:
+        """
+        Apply a blocking function to every item in the I/O pool; results are in item order.
+        """
+        return list(await asyncio.gather(*(self.run(function, item) for item in items)))
+
+    async def read_text(self, path: Path, encoding: str = 'utf-8') -> str:
+        return await self.run(Path(path).read_text, encoding=encoding)
+
+    async def read_json(self, path: Path) -> Any:
+        return json.loads(await self.read_text(path))
+
+    async def write_text(self, path: Path, text: str):
+        """
+        Write text atomically (see utils.atomic_io).
+        """
+        await self.run(atomic_write_text, path, text)
+
+    async def write_json(self, path: Path, data: Any, **kwargs):
+        """
+        Write JSON atomically (see utils.atomic_io).
+        """
+        await self.run(atomic_write_json, path, data, **kwargs)
+
+    def prefetch(self, keys: Iterable[Hashable], load: Callable[[Hashable], Any],
+                 depth: int = DEFAULT_PREFETCH_DEPTH) -> 'Prefetcher':
+        return Prefetcher(self, keys, load, depth)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+class Prefetcher:
+    """
+    Loads values for a known sequence of keys in the I/O pool, ahead of the
+    consumers that ask for them.
+
+    Asking for a key starts loading every key up to `depth` positions after it,
+    so reading overlaps with the work done on earlier keys. Loads more than
+    `depth` positions behind the latest request are dropped (a late consumer
+    loads on demand), so keys nobody asks for, e.g. work skipped on resume, do
+    not pile up: at most about 2 * depth values are held at any time. Each
+    value is handed out once; load errors are raised to the consumer of that key.
+    """
+
+    def __init__(self, io: AsyncFileIO, keys: Iterable[Hashable], load: Callable[[Hashable], Any],
+                 depth: int = DEFAULT_PREFETCH_DEPTH):
+        """
+        Args:
+            io (AsyncFileIO): Pool the loads run in.
+            keys (iterable): Keys in the order consumers are expected to ask for them.
+            load (callable): Blocking function from a key to its value.
+            depth (int): How many keys to load ahead of the latest one asked for.
+        """
+        self.io = io
+        self.load = load
+        self.depth = max(0, depth)
+        self._keys = list(keys)
+        self._positions = {key: position for position, key in enumerate(self._keys)}
+        self._next = 0
+        self._dropped = 0
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self.loaded = 0
+
+    def _schedule_through(self, position: int):
+        while self._next < len(self._keys) and self._next <= position:
+            key = self._keys[self._next]
+            self._pending[key] = asyncio.ensure_future(self.io.run(self.load, key))
+            self._next += 1
+
+    def _drop_before(self, position: int):
+        while self._dropped < min(position, self._next):
+            future = self._pending.pop(self._keys[self._dropped], None)
+            if future is not None:
+                future.cancel()
+            self._dropped += 1
+
+    async def get(self, key: Hashable) -> Any:
+        """
+        The value of a key, loaded ahead if possible; keys outside the sequence are loaded on demand.
+        """
+        position = self._positions.get(key)
+        if position is not None:
+            self._schedule_through(position + self.depth)
+        future = self._pending.pop(key, None)
+        if position is not None:
+            self._drop_before(position - self.depth)
+        value = await future if future is not None else await self.io.run(self.load, key)
+        self.loaded += 1
+        return value
+
+    @property
+    def outstanding(self) -> int:
+        """
+        Loads started but not yet handed to a consumer.
+        """
+        return len(self._pending)
+
+    def cancel(self):
+        """
+        Cancel loads nobody asked for, e.g. when the consumers stopped early.
+        """
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+
+
+_default_io: Optional[AsyncFileIO] = None
+_default_io_lock = threading.Lock()
+
+
+def get_async_io() -> AsyncFileIO:
+    """
+    Return the process-wide I/O pool, creating it with default settings on first use.
+    """
+    global _default_io
+    with _default_io_lock:
+        if _default_io is None:
+            _default_io = AsyncFileIO()
+        return _default_io
+
+
+def configure_async_io(max_workers: int = DEFAULT_IO_WORKERS) -> AsyncFileIO:
+    """
+    Replace the process-wide I/O pool, e.g. to allow more concurrent reads.
+
+    Args:
+        max_workers (int): Threads doing I/O at the same time.
+
+    Returns:
+        AsyncFileIO: The new process-wide pool.
+    """
+    global _default_io
+    with _default_io_lock:
+        previous, _default_io = _default_io, AsyncFileIO(max_workers=max_workers)
+    if previous is not None:
+        previous.shutdown()
+    return _default_io
@@ -0,0 +1,73 @@
+# utils/atomic_io.py
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+
+def atomic_write_text(path: Path, text: str, encoding: str = 'utf-8'):
+    """
+    Write text to a file so readers only ever see the old or the new contents.
+
+    The text is written to a temporary file in the same directory, flushed to disk
+    and then renamed over the destination.
+
+    Args:
+        path (Path): Destination file.
+        text (str): Contents to write.
+        encoding (str): Text encoding.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding) as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_bytes(path: Path, data: bytes):
+    """
+    Write bytes to a file so readers only ever see the old or the new contents.
+
+    Args:
+        path (Path): Destination file.
+        data (bytes): Contents to write.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_json(path: Path, data: Any, indent: int = 2):
+    """
+    Serialize data as JSON and write it atomically.
+
+    Args:
+        path (Path): Destination file.
+        data (Any): JSON-serializable value.
+        indent (int): Indentation passed to json.dumps.
+    """
+    atomic_write_text(path, json.dumps(data, indent=indent))
@@ -9,11 +9,14 @@ from typing import List, Dict, Union
 import ast
 from pathlib import Path
 from typing import List, Dict, Union
+from utils.parse_cache import ParseCache, get_parse_cache
+from utils.path_keys import path_key
 
 
 class CodeParser:
-    def __init__(self, project_path: Path, project_type: str = None):
+    def __init__(self, project_path: Path, project_type: str = None, parse_cache: ParseCache = None):
         self.project_path = project_path
+        self.parse_cache = parse_cache or get_parse_cache()
         print(f"[DEBUG] Initialized CodeParser with project_path: {self.project_path.resolve()}")
         self.project_type = project_type
         self.excluded_dirs = {
@@ -68,11 +71,9 @@ class CodeParser:
                 print(f"[DEBUG] Skipping excluded directory: {py_file}")
                 continue  # Skip excluded directories
             try:
-                with open(py_file, "r", encoding="utf-8") as f:
-                    file_content = f.read()
-                tree = ast.parse(file_content)
+                tree = self.parse_cache.get(py_file).tree
                 symbols = self._extract_python_symbols_from_tree(tree)
-                relative_path = str(py_file.relative_to(self.project_path))
+                relative_path = path_key(py_file.relative_to(self.project_path))
                 code_symbols[relative_path] = symbols
                 print(f"[DEBUG] Extracted symbols from {relative_path}: {symbols}")
             except Exception as e:
@@ -104,7 +105,7 @@ class CodeParser:
             # Implement JavaScript parsing logic here
             # For simplicity, we'll collect file names
             print(f"Found JavaScript file {js_file}")
-            code_symbols[str(js_file.relative_to(self.project_path))] = ["JavaScript file parsed"]
+            code_symbols[path_key(js_file.relative_to(self.project_path))] = ["JavaScript file parsed"]
         return code_symbols
 
     # Implement other project types as needed
@@ -0,0 +1,336 @@
+# utils/code_preprocessor.py
+
+import ast
+import logging
+import os
+import re
+import threading
+import tokenize
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import repeat
+from typing import Dict, List, Optional, Set, Tuple
+
+from utils.parse_cache import get_parse_cache
+from utils.summary_packer import estimate_tokens
+
+# Node types whose first statement can be a docstring
+DOCSTRING_OWNERS = (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)
+# Replacement for an elided literal; each is still valid Python
+ELIDED = {ast.List: "[...]", ast.Tuple: "(...)", ast.Set: "{...}", ast.Dict: "{...}"}
+# Line breaks as ast sees them (tokenize reading lines only splits on '\n')
+LINE_BREAK = re.compile(r'\r\n|\r|\n')
+
+
+@dataclass(frozen=True)
+class PreprocessOptions:
+    strip_comments: bool = True
+    strip_docstrings: bool = False
+    collapse_blank_lines: bool = True
+    elide_literals_over: Optional[int] = None  # Literals longer than this many characters become ... / [...]
+
+    @classmethod
+    def for_level(cls, level: str) -> 'PreprocessOptions':
+        """
+        Options of a named minification level (see MINIFY_LEVELS).
+
+        Raises:
+            ValueError: If the level is unknown.
+        """
+        if level not in MINIFY_LEVELS:
+            raise ValueError(f"Unknown minification level '{level}'; expected one of {', '.join(MINIFY_LEVELS)}")
+        return MINIFY_LEVELS[level]
+
+
+MINIFY_LEVELS = {
+    'none': PreprocessOptions(strip_comments=False, collapse_blank_lines=False),
+    'comments': PreprocessOptions(),
+    'docstrings': PreprocessOptions(strip_docstrings=True),
+    'aggressive': PreprocessOptions(strip_docstrings=True, elide_literals_over=200),
+}
+
+
+@dataclass
+class PreprocessResult:
+    code: str
+    tokens_before: int
+    tokens_after: int
+    error: Optional[str] = None  # Set when the code could not be tokenized and was left unchanged
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+class _SourceLines:
+    """
+    Converts tokenize (character) and ast (UTF-8 byte) positions to offsets in the source.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.lines = source.split('\n')
+        self.starts = [0]
+        for line in self.lines[:-1]:
+            self.starts.append(self.starts[-1] + len(line) + 1)
+
+    def offset(self, row: int, col: int) -> int:
+        return self.starts[row - 1] + col
+
+    def node_offset(self, row: int, col_bytes: int) -> int:
+        prefix = self.lines[row - 1].encode('utf-8')[:col_bytes]
+        return self.starts[row - 1] + len(prefix.decode('utf-8', errors='ignore'))
+
+    def row_span(self, row: int) -> Tuple[int, int]:
+        """
+        Offsets of a whole line, including its newline.
+        """
+        end = self.starts[row] if row < len(self.starts) else len(self.source)
+        return self.starts[row - 1], end
+
+
+def _comment_spans(lines: _SourceLines, tokens: List[tokenize.TokenInfo], removed_rows: Set[int]) -> List[Tuple]:
+    spans = []
+    for token in tokens:
+        if token.type != tokenize.COMMENT:
+            continue
+        row, col = token.start
+        line_start, _ = lines.row_span(row)
+        start = lines.offset(row, col)
+        if not lines.source[line_start:start].strip():
+            # A comment-only line disappears entirely
+            spans.append((*lines.row_span(row), ''))
+            removed_rows.add(row)
+            continue
+        while start > line_start and lines.source[start - 1] in ' \t':
+            start -= 1
+        spans.append((start, lines.offset(*token.end), ''))
+    return spans
+
+
+def _docstring_nodes(tree: ast.Module) -> List[Tuple[ast.AST, ast.Expr]]:
+    owners = []
+    for node in ast.walk(tree):
+        if isinstance(node, DOCSTRING_OWNERS) and node.body:
+            first = node.body[0]
+            if isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant) \
+                    and isinstance(first.value.value, str):
+                owners.append((node, first))
+    return owners
+
+
+def _docstring_spans(lines: _SourceLines, tree: ast.Module, removed_rows: Set[int]) -> List[Tuple]:
+    spans = []
+    for owner, docstring in _docstring_nodes(tree):
+        start = lines.node_offset(docstring.lineno, docstring.col_offset)
+        end = lines.node_offset(docstring.end_lineno, docstring.end_col_offset)
+        if len(owner.body) == 1 and not isinstance(owner, ast.Module):
+            spans.append((start, end, '...'))  # The body cannot be empty
+            continue
+        first_line_start, _ = lines.row_span(docstring.lineno)
+        _, last_line_end = lines.row_span(docstring.end_lineno)
+        rest = lines.source[end:last_line_end].split('#')[0]
+        if lines.source[first_line_start:start].strip() or rest.strip():
+            continue  # Shares its line with code, e.g. `"doc"; x = 1`
+        spans.append((first_line_start, last_line_end, ''))
+        removed_rows.update(range(docstring.lineno, docstring.end_lineno + 1))
+    return spans
+
+
+def _is_literal(node: ast.AST) -> bool:
+    if isinstance(node, ast.Constant):
+        return True
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        return all(_is_literal(element) for element in node.elts)
+    if isinstance(node, ast.Dict):
+        return all(key is not None and _is_literal(key) for key in node.keys) \
+            and all(_is_literal(value) for value in node.values)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return _is_literal(node.operand)
+    return False
+
+
+def _literal_spans(lines: _SourceLines, tree: ast.Module, max_length: int) -> List[Tuple]:
+    docstrings = {id(docstring.value) for _, docstring in _docstring_nodes(tree)}
+    spans = []
+
+    def visit(node):
+        if isinstance(node, ast.JoinedStr):
+            return  # Parts of f-strings cannot be replaced on their own
+        if isinstance(node, (ast.Constant, *ELIDED)) and id(node) not in docstrings and _is_literal(node) \
+                and hasattr(node, 'end_lineno'):
+            start = lines.node_offset(node.lineno, node.col_offset)
+            end = lines.node_offset(node.end_lineno, node.end_col_offset)
+            if end - start > max_length:
+                if isinstance(node, ast.Constant):
+                    if isinstance(node.value, (str, bytes)):
+                        replacement = "b'...'" if isinstance(node.value, bytes) else "'...'"
+                        spans.append((start, end, replacement))
+                else:
+                    spans.append((start, end, ELIDED[type(node)]))
+                return
+        for child in ast.iter_child_nodes(node):
+            visit(child)
+
+    visit(tree)
+    return spans
+
+
+def _blank_line_spans(lines: _SourceLines, tokens: List[tokenize.TokenInfo], removed_rows: Set[int]) -> List[Tuple]:
+    # Blank lines inside strings produce no NL token, so string contents are never touched
+    blank_rows = {token.start[0] for token in tokens if token.type == tokenize.NL and not token.line.strip()}
+    spans = []
+    previous_blank = True  # Also drops leading blank lines
+    for row in range(1, len(lines.lines) + 1):
+        if row in removed_rows:
+            continue
+        if row in blank_rows:
+            if previous_blank:
+                spans.append((*lines.row_span(row), ''))
+            previous_blank = True
+        else:
+            previous_blank = False
+    return spans
+
+
+def _apply(source: str, spans: List[Tuple]) -> str:
+    parts = []
+    position = 0
+    for start, end, replacement in sorted(spans, key=lambda span: (span[0], -span[1])):
+        if start < position:
+            continue  # Inside a span already removed, e.g. a comment on a removed docstring line
+        parts.append(source[position:start])
+        parts.append(replacement)
+        position = end
+    parts.append(source[position:])
+    return ''.join(parts)
+
+
+def preprocess_code(code: str, options: PreprocessOptions = PreprocessOptions()) -> PreprocessResult:
+    """
+    Shrink source code before it is sent to an LLM, keeping its line structure.
+
+    Comments, docstrings, extra blank lines and long literals are located as
+    token and AST spans of the original source, and the output is assembled
+    from the text between them in one join. Code that does not parse only
+    has comments and blank lines removed; code that cannot be tokenized or
+    processed is returned unchanged with the error recorded, so one bad file
+    never stops a batch.
+
+    Args:
+        code (str): Python source.
+        options (PreprocessOptions): What to remove.
+
+    Returns:
+        PreprocessResult: The processed code and its estimated token counts.
+    """
+    tokens_before = estimate_tokens(code)
+    # Spans are computed on '\n' line breaks; a file's own style is restored afterwards when it has only one
+    line_breaks = set(LINE_BREAK.findall(code))
+    source = LINE_BREAK.sub('\n', code) if line_breaks - {'\n'} else code
+    parsed = get_parse_cache().get_source(source)
+    try:
+        tokens = parsed.tokens
+    except (tokenize.TokenError, SyntaxError) as e:
+        return PreprocessResult(code, tokens_before, tokens_before, error=f"{type(e).__name__}: {e}")
+    try:
+        tree = parsed.tree
+    except (SyntaxError, ValueError):
+        tree = None
+
+    try:
+        processed = _minify(source, tokens, tree, options)
+        if len(line_breaks) == 1 and source is not code:
+            processed = processed.replace('\n', line_breaks.pop())
+    except Exception as e:
+        return PreprocessResult(code, tokens_before, tokens_before, error=f"{type(e).__name__}: {e}")
+    return PreprocessResult(processed, tokens_before, estimate_tokens(processed))
+
+
+def _minify(code: str, tokens: List[tokenize.TokenInfo], tree: Optional[ast.Module], options: PreprocessOptions) -> str:
+    lines = _SourceLines(code)
+    removed_rows: Set[int] = set()
+    spans = []
+    if tree is not None and options.strip_docstrings:
+        spans += _docstring_spans(lines, tree, removed_rows)
+    if tree is not None and options.elide_literals_over:
+        spans += _literal_spans(lines, tree, options.elide_literals_over)
+    if options.strip_comments:
+        spans += _comment_spans(lines, tokens, removed_rows)
+    if options.collapse_blank_lines:
+        spans += _blank_line_spans(lines, tokens, removed_rows)
+
+    return _apply(code, spans) if spans else code
+
+
+class CodePreprocessor:
+    """
+    Preprocesses the files of a run and keeps totals of the tokens saved.
+
+    Large batches are spread over a process pool; small ones run inline,
+    where starting worker processes would cost more than it saves.
+    """
+
+    def __init__(self, options: PreprocessOptions = PreprocessOptions(), workers: Optional[int] = None,
+                 min_files_for_pool: int = 32, logger: Optional[logging.Logger] = None):
+        """
+        Args:
+            options (PreprocessOptions): What to remove.
+            workers (int, optional): Worker processes; defaults to the CPU count. 1 disables the pool.
+            min_files_for_pool (int): Smallest batch sent to the pool.
+            logger (logging.Logger, optional): Logger for per-file results.
+        """
+        self.options = options
+        self.workers = workers or os.cpu_count() or 1
+        self.min_files_for_pool = min_files_for_pool
+        self.logger = logger or logging.getLogger(__name__)
+        self.files = 0
+        self.failed = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self._lock = threading.Lock()  # Files may be preprocessed from several threads
+
+    def preprocess(self, key: str, code: str) -> PreprocessResult:
+        result = preprocess_code(code, self.options)
+        self._record(key, result)
+        return result
+
+    def preprocess_many(self, sources: Dict[str, str]) -> Dict[str, PreprocessResult]:
+        """
+        Preprocess several files.
+
+        Args:
+            sources (dict): Key (e.g. relative path) -> source code.
+
+        Returns:
+            dict: Key -> PreprocessResult.
+        """
+        keys = list(sources)
+        codes = [sources[key] for key in keys]
+        if self.workers > 1 and len(keys) >= self.min_files_for_pool:
+            chunksize = max(1, len(keys) // (self.workers * 4))
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(preprocess_code, codes, repeat(self.options), chunksize=chunksize))
+        else:
+            results = [preprocess_code(code, self.options) for code in codes]
+        for key, result in zip(keys, results):
+            self._record(key, result)
+        return dict(zip(keys, results))
+
+    def _record(self, key: str, result: PreprocessResult):
+        with self._lock:
+            self.files += 1
+            self.tokens_before += result.tokens_before
+            self.tokens_after += result.tokens_after
+            if result.error:
+                self.failed += 1
+        if result.error:
+            self.logger.warning(f"Could not preprocess {key}; sending it unchanged: {result.error}")
+        else:
+            self.logger.debug(f"Preprocessed {key}: {result.tokens_before} -> {result.tokens_after} estimated tokens")
+
+    def report(self) -> str:
+        saved = self.tokens_before - self.tokens_after
+        ratio = saved / self.tokens_before if self.tokens_before else 0.0
+        return (f"Preprocessing: {self.files} files, {self.tokens_before} -> {self.tokens_after} estimated tokens "
+                f"({saved} saved, {ratio:.1%}), {self.failed} sent unchanged after errors")
@@ -0,0 +1,308 @@
+# utils/code_skeleton.py
+
+import ast
+import builtins
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+from utils.dependency_analyzer import AnalysisProfile, DependencyVisitor
+from utils.parse_cache import get_parse_cache, hash_source
+from utils.summary_packer import estimate_tokens
+
+# Bumped whenever the rendering changes, so summaries built from skeletons are regenerated
+SKELETON_VERSION = 2
+# Files estimated above this many tokens are summarized from their skeleton
+DEFAULT_THRESHOLD_TOKENS = 4000
+# Builtins too common to say anything about what a function does
+IGNORED_CALLS = {name for name in dir(builtins) if not name[0].isupper()} - {'open', 'print', 'exec', 'eval'}
+# Container and string methods, equally uninformative whatever object they are called on
+IGNORED_METHODS = {
+    'append', 'extend', 'items', 'keys', 'values', 'setdefault', 'copy', 'join', 'split', 'rsplit', 'strip',
+    'lstrip', 'rstrip', 'format', 'startswith', 'endswith', 'lower', 'upper', 'encode', 'decode', 'splitlines',
+    'group', 'total_seconds',
+}
+# Logging calls say nothing about what a function does
+LOGGER_NAMES = {'logger', 'logging', 'log'}
+# Longest docstring summary kept, in characters
+MAX_DOCSTRING_CHARS = 200
+# Skeleton decisions remembered per source, so hashing and prompting a file build it once
+SKELETON_MEMO_SIZE = 64
+SKELETON_HEADER = "# Skeleton view: function bodies are replaced by the calls, raises and yields they contain.\n"
+
+
+class CodeSkeletonBuilder:
+    """
+    Renders a compressed stub view of a module.
+
+    Imports, short module and class-level statements, decorators, signatures
+    and the first paragraph of docstrings are kept; each function body is
+    replaced by comments listing what it calls, raises and whether it yields,
+    followed by `...`. Call names are resolved with DependencyVisitor, so
+    they match the names in the dependency graph.
+    """
+
+    def __init__(self, max_calls: int = 12, max_statement_chars: int = 120):
+        """
+        Args:
+            max_calls (int): Distinct calls listed per function.
+            max_statement_chars (int): Longer module and class-level statements are elided.
+        """
+        self.max_calls = max_calls
+        self.max_statement_chars = max_statement_chars
+        self._names = DependencyVisitor(Path('.'), set(), Path('.'), AnalysisProfile.get('symbols'))
+
+    def build(self, code: str, tree: Optional[ast.Module] = None) -> str:
+        """
+        Skeleton of the given source.
+
+        Raises:
+            SyntaxError: If the code does not parse.
+        """
+        if tree is None:
+            tree = ast.parse(code)
+        lines = self._render_body(tree.body, 0, docstring_allowed=True)
+        return SKELETON_HEADER + "\n".join(lines) + "\n"
+
+    def _render_body(self, body: List[ast.stmt], depth: int, docstring_allowed: bool = False) -> List[str]:
+        lines = []
+        for index, node in enumerate(body):
+            if index == 0 and docstring_allowed and self._is_docstring(node):
+                lines += self._docstring(node, depth)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                lines += self._function(node, depth)
+            elif isinstance(node, ast.ClassDef):
+                lines += self._class(node, depth)
+            elif isinstance(node, (ast.If, ast.With, ast.AsyncWith)) and depth == 0:
+                lines += self._block(node, depth)
+            elif self._is_try(node):
+                # A try needs its handlers to parse, so it is rendered in full at every depth
+                lines += self._block(node, depth)
+            elif type(node).__name__ == 'Match':
+                # A match needs a case to parse; the cases are summarized under a wildcard one
+                lines.append(self._indent(depth) + self._header(node))
+                lines += self._summarized("case _:", [node], depth + 1)
+            elif hasattr(node, 'body'):
+                lines += self._summarized(self._header(node), [node], depth)
+            else:
+                lines.append(self._indent(depth) + self._statement(node))
+        return lines
+
+    def _function(self, node, depth: int) -> List[str]:
+        prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+        returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+        lines = self._decorators(node, depth)
+        header = f"{prefix} {node.name}({ast.unparse(node.args)}){returns}:"
+        body = node.body
+        docstring = []
+        if body and self._is_docstring(body[0]):
+            docstring = self._docstring(body[0], depth + 1)
+            body = body[1:]
+        return lines + self._summarized(header, body, depth, docstring)
+
+    def _class(self, node: ast.ClassDef, depth: int) -> List[str]:
+        bases = [ast.unparse(base) for base in node.bases] + [ast.unparse(keyword) for keyword in node.keywords]
+        lines = self._decorators(node, depth)
+        lines.append(self._indent(depth) + f"class {node.name}" + (f"({', '.join(bases)})" if bases else "") + ":")
+        body = self._render_body(node.body, depth + 1, docstring_allowed=True)
+        return lines + (body or [self._indent(depth + 1) + "..."])
+
+    def _block(self, node, depth: int) -> List[str]:
+        """
+        Module-level if/with blocks and try statements, which often hold imports and definitions.
+        """
+        if isinstance(node, ast.If) and self._is_main_guard(node):
+            return self._summarized(self._header(node), node.body, depth)
+        lines = [self._indent(depth) + self._header(node)]
+        lines += self._render_body(node.body, depth + 1) or [self._indent(depth + 1) + "..."]
+        keyword = "except*" if type(node).__name__ == 'TryStar' else "except"
+        for handler in getattr(node, 'handlers', []):
+            name = f" {ast.unparse(handler.type)}" if handler.type else ""
+            alias = f" as {handler.name}" if handler.name else ""
+            lines.append(self._indent(depth) + f"{keyword}{name}{alias}:")
+            lines += self._render_body(handler.body, depth + 1) or [self._indent(depth + 1) + "..."]
+        if getattr(node, 'orelse', None):
+            lines.append(self._indent(depth) + "else:")
+            lines += self._render_body(node.orelse, depth + 1) or [self._indent(depth + 1) + "..."]
+        if getattr(node, 'finalbody', None):
+            lines.append(self._indent(depth) + "finally:")
+            lines += self._render_body(node.finalbody, depth + 1) or [self._indent(depth + 1) + "..."]
+        return lines
+
+    def _summarized(self, header: str, body: List[ast.stmt], depth: int, docstring: List[str] = None) -> List[str]:
+        """
+        A header followed by the call-site summary of its body.
+        """
+        inner = self._indent(depth + 1)
+        lines = [self._indent(depth) + header] + (docstring or [])
+        calls, raises, yields = self._effects(body)
+        if calls:
+            shown = calls[:self.max_calls]
+            more = f" (+{len(calls) - len(shown)} more)" if len(calls) > len(shown) else ""
+            lines.append(inner + "# calls: " + ", ".join(shown) + more)
+        if raises:
+            lines.append(inner + "# raises: " + ", ".join(raises))
+        if yields:
+            lines.append(inner + "# yields")
+        lines.append(inner + "...")
+        return lines
+
+    def _effects(self, body: List[ast.stmt]):
+        calls, raises, yields = [], [], False
+        raised = set()  # Exceptions constructed by a raise are listed under raises only
+        for statement in body:
+            for node in ast.walk(statement):
+                if isinstance(node, ast.Call) and id(node) not in raised:
+                    name = self._names._get_full_name(node.func)
+                    if name and not self._is_ignored_call(name) and name not in calls:
+                        calls.append(name)
+                elif isinstance(node, ast.Raise) and node.exc is not None:
+                    raised.add(id(node.exc))
+                    name = self._names._get_full_name(node.exc)
+                    if name and name not in raises:
+                        raises.append(name)
+                elif isinstance(node, (ast.Yield, ast.YieldFrom)):
+                    yields = True
+        return calls, raises, yields
+
+    @staticmethod
+    def _is_ignored_call(name: str) -> bool:
+        parts = name.split('.')
+        if len(parts) == 1:
+            return name in IGNORED_CALLS
+        return parts[-1] in IGNORED_METHODS or bool(LOGGER_NAMES & set(parts[:-1]))
+
+    def _statement(self, node: ast.stmt) -> str:
+        text = ast.unparse(node)
+        if isinstance(node, (ast.Import, ast.ImportFrom)) or ("\n" not in text and len(text) <= self.max_statement_chars):
+            return text
+        if isinstance(node, ast.Assign):
+            return " = ".join(ast.unparse(target) for target in node.targets) + " = ..."
+        if isinstance(node, ast.AnnAssign):
+            return f"{ast.unparse(node.target)}: {ast.unparse(node.annotation)} = ..."
+        if isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
+            return f"{self._names._get_full_name(node.value.func)}(...)"
+        return "..."
+
+    def _docstring(self, node: ast.Expr, depth: int) -> List[str]:
+        summary = node.value.value.strip().split("\n\n")[0]
+        summary = " ".join(line.strip() for line in summary.splitlines())
+        if len(summary) > MAX_DOCSTRING_CHARS:
+            summary = summary.split(". ")[0][:MAX_DOCSTRING_CHARS]
+        return [self._indent(depth) + repr(summary)]
+
+    def _decorators(self, node, depth: int) -> List[str]:
+        return [self._indent(depth) + "@" + ast.unparse(decorator) for decorator in node.decorator_list]
+
+    @staticmethod
+    def _header(node: ast.stmt) -> str:
+        if isinstance(node, ast.If):
+            return f"if {ast.unparse(node.test)}:"
+        if isinstance(node, (ast.With, ast.AsyncWith)):
+            prefix = "async with" if isinstance(node, ast.AsyncWith) else "with"
+            return f"{prefix} {', '.join(ast.unparse(item) for item in node.items)}:"
+        if CodeSkeletonBuilder._is_try(node):
+            return "try:"
+        if type(node).__name__ == 'Match':
+            return f"match {ast.unparse(node.subject)}:"
+        if isinstance(node, (ast.For, ast.AsyncFor)):
+            prefix = "async for" if isinstance(node, ast.AsyncFor) else "for"
+            return f"{prefix} {ast.unparse(node.target)} in {ast.unparse(node.iter)}:"
+        if isinstance(node, ast.While):
+            return f"while {ast.unparse(node.test)}:"
+        return ast.unparse(node).splitlines()[0]
+
+    @staticmethod
+    def _is_try(node: ast.stmt) -> bool:
+        return isinstance(node, ast.Try) or type(node).__name__ == 'TryStar'
+
+    @staticmethod
+    def _is_docstring(node: ast.stmt) -> bool:
+        return isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str)
+
+    @staticmethod
+    def _is_main_guard(node: ast.If) -> bool:
+        return "__name__" in ast.unparse(node.test)
+
+    @staticmethod
+    def _indent(depth: int) -> str:
+        return "    " * depth
+
+
+class SkeletonPolicy:
+    """
+    Decides which files are summarized from a skeleton instead of their full source.
+
+    Files estimated above threshold_tokens are replaced by their skeleton when
+    it parses and is smaller; everything else is sent as is. Keeps totals of
+    the tokens saved for the run report.
+    """
+
+    def __init__(self, threshold_tokens: Optional[int] = DEFAULT_THRESHOLD_TOKENS,
+                 builder: Optional[CodeSkeletonBuilder] = None, logger: Optional[logging.Logger] = None):
+        """
+        Args:
+            threshold_tokens (int, optional): Size above which skeletons are used; None disables them.
+            builder (CodeSkeletonBuilder, optional): Renders the skeletons.
+            logger (logging.Logger, optional): Logger for per-file results.
+        """
+        self.threshold_tokens = threshold_tokens
+        self.builder = builder or CodeSkeletonBuilder()
+        self.logger = logger or logging.getLogger(__name__)
+        self.files = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self._skeletons: 'OrderedDict[str, Optional[str]]' = OrderedDict()
+        self._lock = threading.Lock()  # Inputs are also hashed from I/O threads
+
+    def applies(self, code: str) -> bool:
+        return self.threshold_tokens is not None and estimate_tokens(code) > self.threshold_tokens
+
+    def skeleton(self, code: str, relative_path: Optional[Path] = None) -> Optional[str]:
+        """
+        The skeleton a file is summarized from, or None if it is sent in full: the policy
+        does not apply, or the skeleton does not parse or is not smaller.
+        """
+        if not self.applies(code):
+            return None
+        key = hash_source(code)
+        with self._lock:
+            if key in self._skeletons:
+                self._skeletons.move_to_end(key)
+                return self._skeletons[key]
+        skeleton = None
+        try:
+            skeleton = self.builder.build(code, get_parse_cache().get_source(code).tree)
+            ast.parse(skeleton)  # Never send the model code that does not parse
+        except (SyntaxError, ValueError) as e:
+            self.logger.warning(f"Could not build a skeleton of {relative_path or 'source'}; "
+                                f"sending the full source: {e}")
+            skeleton = None
+        if skeleton is not None and estimate_tokens(skeleton) >= estimate_tokens(code):
+            skeleton = None
+        with self._lock:
+            self._skeletons[key] = skeleton
+            if len(self._skeletons) > SKELETON_MEMO_SIZE:
+                self._skeletons.popitem(last=False)
+        return skeleton
+
+    def prepare(self, relative_path: Path, code: str) -> str:
+        """
+        The code to summarize a file from: its skeleton if one is used, else the code itself.
+        """
+        skeleton = self.skeleton(code, relative_path)
+        if skeleton is None:
+            return code
+        before, after = estimate_tokens(code), estimate_tokens(skeleton)
+        self.files += 1
+        self.tokens_before += before
+        self.tokens_after += after
+        self.logger.info(f"Summarizing {relative_path} from its skeleton: {before} -> {after} estimated tokens")
+        return skeleton
+
+    def report(self) -> str:
+        ratio = self.tokens_before / self.tokens_after if self.tokens_after else 0.0
+        return (f"Skeletons: {self.files} large files summarized from skeletons, "
+                f"{self.tokens_before} -> {self.tokens_after} estimated tokens ({ratio:.1f}x smaller)")
@@ -3,6 +3,7 @@
 import ast
 import logging
 from typing import Any, Dict, List, Optional
+from utils.parse_cache import get_parse_cache
 
 def has_meaningful_code(code: str, logger: Optional[logging.Logger] = None) -> bool:
     """
@@ -16,7 +17,7 @@ def has_meaningful_code(code: str, logger: Optional[logging.Logger] = None) -> b
         bool: True if there's executable code, False otherwise.
     """
     try:
-        tree = ast.parse(code)
+        tree = get_parse_cache().get_source(code).tree
         for node in ast.walk(tree):
             if isinstance(node, (
                 ast.FunctionDef,
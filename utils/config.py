@@ -1,16 +1,45 @@
 # utils/config.py
 
+import logging
 import os
+from functools import lru_cache
 from pathlib import Path
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-dotenv_path = Path(__file__).parent.parent / '.env'  # Adjust the path as needed
-load_dotenv(dotenv_path=dotenv_path)
+logger = logging.getLogger(__name__)
 
-# Retrieve the project path
-PROJECT_PATH = Path(os.getenv('PROJECT_PATH', './default_project')).resolve()
-ANTHROPIC_API = os.getenv('ANTHROPIC_API')
-OPENAI_API = os.getenv('OPENAI_API')
+# Loaded the first time a setting is read, so importing this module has no side effects
+DOTENV_PATH = Path(__file__).parent.parent / '.env'  # Adjust the path as needed
 
-print(f"[DEBUG] Loaded PROJECT_PATH: {PROJECT_PATH}")
+
+@lru_cache(maxsize=None)
+def load_settings() -> dict:
+    """
+    Read the settings from the environment, after loading the .env file.
+
+    Runs once, on first access to a setting such as PROJECT_PATH.
+
+    Returns:
+        dict: Setting name -> value.
+    """
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path=DOTENV_PATH)
+
+    settings = {
+        # Retrieve the project path
+        'PROJECT_PATH': Path(os.getenv('PROJECT_PATH', './default_project')).resolve(),
+        'ANTHROPIC_API': os.getenv('ANTHROPIC_API'),
+        'OPENAI_API': os.getenv('OPENAI_API'),
+        # Comma-separated Ollama endpoints for the load-balanced pool
+        'OLLAMA_BASE_URLS': [url.strip() for url in os.getenv('OLLAMA_BASE_URLS', 'http://localhost:11434/api').split(',')
+                             if url.strip()],
+    }
+    logger.debug(f"Loaded PROJECT_PATH: {settings['PROJECT_PATH']}")
+    return settings
+
+
+def __getattr__(name: str):
+    # Module attributes (PROJECT_PATH, ANTHROPIC_API, ...) resolve lazily
+    settings = load_settings()
+    if name in settings:
+        return settings[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
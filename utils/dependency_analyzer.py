@@ -1,15 +1,89 @@
 # utils/dependency_analyzer.py
 
 import ast
+import re
 import sys
 import os
 import json
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Union
+from typing import Dict, List, Tuple, Union
 from utils.project_manager import ProjectManager  # Import ProjectManager
+from utils.parse_cache import ParseCache, get_parse_cache
+from utils.atomic_io import atomic_write_json
+from utils.path_keys import path_key
+
+# Split after each line break the way ast numbers lines; str.splitlines also splits on form feeds and others
+LINE_ENDS = re.compile(r'(?<=\r\n)|(?<=\r)(?!\n)|(?<=\n)')
+
+
+@dataclass(frozen=True)
+class AnalysisProfile:
+    """
+    Selects how much detail DependencyVisitor collects for each file.
+
+    Profiles that do not need calls or variables never descend into function
+    bodies, which is where most AST nodes live.
+    """
+    name: str
+    collect_docstrings: bool = True
+    collect_signatures: bool = True
+    collect_calls: bool = True
+    collect_variables: bool = True
+    collect_source: bool = True
+    # Max variables recorded per function for bodies of <10, <50 and longer lines
+    variable_limits: Tuple[int, int, int] = (2, 5, 10)
+
+    @property
+    def visits_function_bodies(self) -> bool:
+        return self.collect_calls or self.collect_variables
+
+    @classmethod
+    def get(cls, profile_name: str) -> 'AnalysisProfile':
+        """
+        Factory method to retrieve a predefined analysis profile.
+
+        Args:
+            profile_name (str): One of 'symbols', 'structure', 'full' or 'full_with_source'.
+
+        Returns:
+            AnalysisProfile: The matching profile.
+
+        Raises:
+            ValueError: If an unknown profile name is provided.
+        """
+        profile_name = profile_name.lower()
+        if profile_name == 'symbols':
+            # Names, line ranges, bases and imports only
+            return cls(
+                name='symbols',
+                collect_docstrings=False,
+                collect_signatures=False,
+                collect_calls=False,
+                collect_variables=False,
+                collect_source=False,
+            )
+        elif profile_name == 'structure':
+            # Adds docstrings, decorators, parameters and return annotations
+            return cls(
+                name='structure',
+                collect_calls=False,
+                collect_variables=False,
+                collect_source=False,
+            )
+        elif profile_name == 'full':
+            return cls(name='full', collect_source=False)
+        elif profile_name == 'full_with_source':
+            return cls(name='full_with_source')
+        else:
+            raise ValueError(f"Unsupported analysis profile: {profile_name}")
+
+
 class DependencyAnalyzer:
-    def __init__(self, project_manager: ProjectManager, excluded_dirs: set = None, max_depth: int = None):
+    def __init__(self, project_manager: ProjectManager, excluded_dirs: set = None, max_depth: int = None,
+                 profile: Union[str, AnalysisProfile] = 'full_with_source', parse_cache: ParseCache = None):
         self.project_manager = project_manager
+        self.parse_cache = parse_cache or get_parse_cache()
         print(f"DependencyAnalyzer initiated")
         self.project_path = self.project_manager.get_project_folder()
         self.excluded_dirs = excluded_dirs or {
@@ -20,6 +94,7 @@ class DependencyAnalyzer:
         self.max_depth = max_depth  # For performance optimization
         self.standard_modules = self.get_standard_modules()
         self.items_missing_docstrings = []
+        self.profile = AnalysisProfile.get(profile) if isinstance(profile, str) else profile
 
     def get_standard_modules(self) -> set:
         """
@@ -42,18 +117,17 @@ class DependencyAnalyzer:
 
     def analyze_file(self, file_path: Path):
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                
-                file_content = f.read()
-            tree = ast.parse(file_content, filename=str(file_path))
-        except (SyntaxError, UnicodeDecodeError) as e:
+            parsed = self.parse_cache.get(file_path)
+            file_content = parsed.source
+            tree = parsed.tree
+        except (SyntaxError, ValueError, OSError) as e:
             print(f"Failed to parse {file_path}: {e}")
             return
 
         try:
-            visitor = DependencyVisitor(file_path, self.standard_modules, self.project_path)
-            visitor.analyze_source_code(file_content)
-            self.project_data[str(file_path.relative_to(self.project_path))] = visitor.file_info
+            visitor = DependencyVisitor(file_path, self.standard_modules, self.project_path, profile=self.profile)
+            visitor.analyze_source_code(file_content, tree=tree)
+            self.project_data[path_key(file_path.relative_to(self.project_path))] = visitor.file_info
             # Collect missing docstrings
             if visitor.items_missing_docstrings:
                 self.collect_missing_docstrings(visitor.items_missing_docstrings, file_path)
@@ -62,17 +136,18 @@ class DependencyAnalyzer:
 
 
     def write_to_json(self, output_file: Path):
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(self.project_data, f, indent=2)
+        atomic_write_json(output_file, self.project_data)
         print(f"Project structure written to {output_file.resolve()}")
     def collect_missing_docstrings(self, items, file_path):
         for item in items:
-            item['file_path'] = str(file_path.relative_to(self.project_path))
+            item['file_path'] = path_key(file_path.relative_to(self.project_path))
             self.items_missing_docstrings.append(item)
 
 class DependencyVisitor(ast.NodeVisitor):
-    def __init__(self, file_path: Path, standard_modules: set, project_path: Path):
+    def __init__(self, file_path: Path, standard_modules: set, project_path: Path,
+                 profile: AnalysisProfile = None):
         self.file_path = str(file_path)
+        self.profile = profile or AnalysisProfile.get('full_with_source')
         self.standard_modules = standard_modules
         self.project_path = project_path
         self.file_info = {
@@ -107,73 +182,134 @@ class DependencyVisitor(ast.NodeVisitor):
             "type": "class",
             "start_line": node.lineno,
             "end_line": getattr(node, 'end_lineno', None),
-            "docstring": ast.get_docstring(node),
             "methods": {},
             "bases": [self._get_name(base) for base in node.bases],
         }
-        if not class_info["docstring"]:
-            self.items_missing_docstrings.append({
-                "type": "class",
-                "name": node.name,
-                "start_line": node.lineno,
-                "end_line": getattr(node, 'end_lineno', None),
-                "code": ast.get_source_segment(self.source_code, node)
-            })
+        if self.profile.collect_docstrings:
+            class_info["docstring"] = ast.get_docstring(node)
+            if not class_info["docstring"]:
+                self._record_missing_docstring("class", node)
         self.file_info["classes"][node.name] = class_info
         self.current_class = node.name
         self.scope_stack.append(node.name)
-        self.generic_visit(node)
+        if self.profile.visits_function_bodies:
+            self.generic_visit(node)
+        else:
+            # Only the class body statements can hold method definitions
+            for child in node.body:
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    self.visit(child)
         self.scope_stack.pop()
         self.current_class = None
 
     def visit_FunctionDef(self, node):
         # Decide the level of detail based on function size
         function_size = node.end_lineno - node.lineno if hasattr(node, 'end_lineno') else 0
+        small_limit, medium_limit, large_limit = self.profile.variable_limits
         if function_size < 10:
-            variable_limit = 2
+            variable_limit = small_limit
         elif function_size < 50:
-            variable_limit = 5
+            variable_limit = medium_limit
         else:
-            variable_limit = 10
+            variable_limit = large_limit
 
         function_info = {
             "name": node.name,
             "type": "method" if self.current_class else "function",
             "start_line": node.lineno,
             "end_line": getattr(node, 'end_lineno', None),
-            "docstring": ast.get_docstring(node),
-            "calls": [],
-            "variables": {"used": [], "assigned": []},
-            "decorators": [self._get_full_name(dec) for dec in node.decorator_list],
-            "returns": self._get_annotation(node.returns),
-            "parameters": self._get_parameters(node.args),
         }
-        if not function_info["docstring"]:
-            self.items_missing_docstrings.append({
-                "type": "function",
-                "name": node.name,
-                "start_line": node.lineno,
-                "end_line": getattr(node, 'end_lineno', None),
-                "code": ast.get_source_segment(self.source_code, node)
-            })
+        if self.profile.collect_docstrings:
+            function_info["docstring"] = ast.get_docstring(node)
+        if self.profile.collect_calls:
+            function_info["calls"] = []
+        if self.profile.collect_variables:
+            function_info["variables"] = {"used": [], "assigned": []}
+        if self.profile.collect_signatures:
+            function_info["decorators"] = [self._get_full_name(dec) for dec in node.decorator_list]
+            function_info["returns"] = self._get_annotation(node.returns)
+            function_info["parameters"] = self._get_parameters(node.args)
+        if self.profile.collect_docstrings and not function_info["docstring"]:
+            self._record_missing_docstring("function", node)
         if self.current_class:
             self.file_info["classes"][self.current_class]["methods"][node.name] = function_info
         else:
             self.file_info["functions"][node.name] = function_info
 
+        if not self.profile.visits_function_bodies:
+            # Nothing below a def is needed for this profile; skip the whole subtree
+            return
         self.current_function = function_info
         self.scope_stack.append(node.name)
         self.variable_limit = variable_limit
         self.generic_visit(node)
         self.scope_stack.pop()
         self.current_function = None
-    def analyze_source_code(self, source_code: str):
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def _record_missing_docstring(self, item_type: str, node):
+        item = {
+            "type": item_type,
+            "name": node.name,
+            "start_line": node.lineno,
+            "end_line": getattr(node, 'end_lineno', None),
+        }
+        if self.profile.collect_source:
+            item["code"] = self._get_source_segment(node)
+        self.items_missing_docstrings.append(item)
+
+    def _get_source_segment(self, node) -> str:
+        """
+        Equivalent of ast.get_source_segment that splits the source only once per
+        file instead of once per node.
+        """
+        if self._source_lines is None:
+            self._source_lines = LINE_ENDS.split(self.source_code)
+        start, end = node.lineno - 1, node.end_lineno - 1
+        first = self._source_lines[start].encode('utf-8')
+        if start == end:
+            return first[node.col_offset:node.end_col_offset].decode('utf-8')
+        last = self._source_lines[end].encode('utf-8')
+        return ''.join([
+            first[node.col_offset:].decode('utf-8'),
+            *self._source_lines[start + 1:end],
+            last[:node.end_col_offset].decode('utf-8'),
+        ])
+
+    def analyze_source_code(self, source_code: str, tree: ast.AST = None):
+        """
+        Visit the given source, reusing an already parsed tree when one is supplied.
+        """
         self.source_code = source_code
-        tree = ast.parse(source_code)
-        self.visit(tree)
+        self._source_lines = None
+        if tree is None:
+            tree = ast.parse(source_code)
+        if self.profile.visits_function_bodies:
+            self.visit(tree)
+        else:
+            self._visit_definitions(tree.body)
+
+    def _visit_definitions(self, statements: list):
+        """
+        Visit only the definitions and imports in a statement list, descending into
+        module-level blocks such as `if TYPE_CHECKING:` or `try: import ...`
+        without walking any expressions.
+        """
+        for node in statements:
+            if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef,
+                                 ast.Import, ast.ImportFrom)):
+                self.visit(node)
+            elif isinstance(node, (ast.If, ast.Try, ast.With, ast.AsyncWith)):
+                self._visit_definitions(node.body)
+                self._visit_definitions(getattr(node, 'orelse', []))
+                self._visit_definitions(getattr(node, 'finalbody', []))
+                for handler in getattr(node, 'handlers', []):
+                    self._visit_definitions(handler.body)
+
     def visit_Call(self, node):
         func_name = self._get_full_name(node.func)
-        if self.current_function:
+        if self.current_function and self.profile.collect_calls:
             if func_name.startswith('builtins.'):
                 # Exclude built-in functions
                 pass
@@ -182,6 +318,8 @@ class DependencyVisitor(ast.NodeVisitor):
         self.generic_visit(node)
 
     def visit_Name(self, node):
+        if not self.profile.collect_variables:
+            return
         if isinstance(node.ctx, ast.Load):
             if self.current_function and node.id not in self.current_function["variables"]["used"]:
                 if not self._is_standard_name(node.id):
@@ -1,9 +1,93 @@
 # utils/diagram_generator.py
 
+import json
+import os
+import re
+import shutil
+import subprocess
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Optional
+from utils.artifact_graph import hash_value
+from utils.atomic_io import atomic_write_json, atomic_write_text
+from utils.path_keys import path_key
 from utils.project_manager import ProjectManager
-import json
+
+# Bumped whenever the rendered output changes, so every shard is rewritten
+DIAGRAM_VERSION = 1
+INDEX_FILE = "index.puml"
+MANIFEST_FILE = "diagram_manifest.json"
+# Images rendered next to the scripts, deleted along with a stale shard
+IMAGE_FORMATS = ('svg', 'png')
+
+
+def _alias(name: str) -> str:
+    return re.sub(r'\W', '_', name)
+
+
+def _slug(package: str) -> str:
+    return 'root' if package in ('', '.') else _alias(package)
+
+
+def _disambiguate(names: Dict[str, str]) -> Dict[str, str]:
+    """
+    Make generated names unique: a name shared by several keys (e.g. the slugs of
+    packages 'a/b' and 'a_b') gets a short hash of each key appended.
+    """
+    counts = Counter(names.values())
+    return {key: f"{name}_{hash_value(key)[:8]}" if counts[name] > 1 else name for key, name in names.items()}
+
+
+def _image_is_stale(script: Path, image_format: str) -> bool:
+    image = script.with_suffix(f'.{image_format}')
+    return not image.exists() or image.stat().st_mtime < script.stat().st_mtime
+
+
+def render_partition(partition: Dict) -> str:
+    """
+    PlantUML class diagram of one partition.
+
+    Bases defined in other partitions, or outside the project, are drawn as
+    attribute-less classes stereotyped with where they live, so every
+    inheritance edge of the partition is still visible.
+
+    Args:
+        partition (dict): A partition built by DiagramGenerator.partition_classes.
+
+    Returns:
+        str: The PlantUML script.
+    """
+    lines = ["@startuml", f"title {partition['name']}", "skinparam classAttributeIconSize 0"]
+    for record in partition["classes"]:
+        lines.append(f'class "{record["name"]}" as {record["alias"]} {{')
+        lines.extend(f"    + {method}()" for method in record["methods"])
+        lines.append("}")
+    for base in partition["external"]:
+        lines.append(f'class "{base["name"]}" as {base["alias"]} <<{base["where"]}>>')
+    for child, parent in partition["edges"]:
+        lines.append(f"{parent} <|-- {child}")
+    lines.append("@enduml")
+    return "\n".join(lines) + "\n"
+
+
+def render_index(partitions: List[Dict], links: Dict) -> str:
+    """
+    Overview diagram with one box per partition and the inheritance between them.
+
+    Each box links to the partition's rendered SVG.
+    """
+    ids = {partition["name"]: f"P{index}" for index, partition in enumerate(partitions)}
+    lines = ["@startuml", "title Class diagram index"]
+    for partition in partitions:
+        svg = Path(partition["file"]).with_suffix('.svg').name
+        lines.append(f'rectangle "{partition["name"]}\\n{len(partition["classes"])} classes" '
+                     f'as {ids[partition["name"]]} [[{svg}]]')
+    for (child, parent), count in sorted(links.items()):
+        lines.append(f"{ids[child]} --> {ids[parent]} : {count} inherit")
+    lines.append("@enduml")
+    return "\n".join(lines) + "\n"
+
 
 class DiagramGenerator:
     def __init__(self, project_data: Dict, project_manager: ProjectManager):
@@ -13,30 +97,26 @@ class DiagramGenerator:
         self.analysis_folder = self.project_manager.get_analysis_folder()
 
     def generate_class_diagram(self, output_file: Path):
+        """
+        Write a single class diagram of the whole project.
+
+        Large projects produce diagrams PlantUML cannot render; use
+        generate_sharded_class_diagrams for those.
+        """
         lines = ["@startuml", "skinparam classAttributeIconSize 0"]
         class_definitions = {}
+        relationships = []
 
-        # Collect class definitions
-        for file_info in self.project_data.values():
-            for class_name, class_info in file_info.get('classes', {}).items():
-                class_definition = [f"class {class_name} {{"]
-                # Add attributes and methods
-                methods = class_info.get('methods', {})
-                for method_name in methods.keys():
-                    class_definition.append(f"    + {method_name}()")
-                class_definition.append("}")
-                class_definitions[class_name] = "\n".join(class_definition)
-
-        # Add classes to lines
-        lines.extend(class_definitions.values())
-
-        # Handle relationships (inheritance)
-        for file_info in self.project_data.values():
-            for class_name, class_info in file_info.get('classes', {}).items():
-                bases = class_info.get('bases', [])
-                for base in bases:
-                    lines.append(f"{base} <|-- {class_name}")
+        # Collect class definitions and inheritance in one pass
+        for record in self.collect_classes():
+            class_definition = [f"class {record['name']} {{"]
+            class_definition.extend(f"    + {method}()" for method in record["methods"])
+            class_definition.append("}")
+            class_definitions[record["name"]] = "\n".join(class_definition)
+            relationships.extend(f"{base} <|-- {record['name']}" for base in record["bases"])
 
+        lines.extend(class_definitions.values())
+        lines.extend(relationships)
         lines.append("@enduml")
 
         # Write to output file
@@ -44,3 +124,235 @@ class DiagramGenerator:
             f.write("\n".join(lines))
         print(f"Class diagram PlantUML script written to {output_file.resolve()}")
 
+    def collect_classes(self) -> List[Dict]:
+        """
+        Every class in project_data, with its file, package (folder), methods and bases.
+        """
+        records = []
+        for file_path, file_info in self.project_data.items():
+            if not isinstance(file_info, dict):
+                continue
+            posix_path = path_key(file_path)
+            module = posix_path[:-3] if posix_path.endswith('.py') else posix_path
+            package = posix_path.rsplit('/', 1)[0] if '/' in posix_path else '.'
+            for class_name, class_info in file_info.get('classes', {}).items():
+                qualified_name = f"{module.replace('/', '.')}.{class_name}"
+                records.append({
+                    "id": qualified_name,
+                    "name": class_name,
+                    "file": posix_path,
+                    "package": package,
+                    "methods": list(class_info.get('methods', {})),
+                    "bases": [base for base in class_info.get('bases', []) if base],
+                })
+        aliases = _disambiguate({record["id"]: _alias(record["id"]) for record in records})
+        for record in records:
+            record["alias"] = aliases[record["id"]]
+        return records
+
+    @staticmethod
+    def _resolve_bases(records: List[Dict]) -> Dict[str, List]:
+        """
+        Match each base name to a project class: in the same file, then the same
+        package, then the only class of that name. Returns id -> [(base, matched id or None)].
+        """
+        by_name = defaultdict(list)
+        for record in records:
+            by_name[record["name"]].append(record)
+        resolved = {}
+        for record in records:
+            matches = []
+            for base in record["bases"]:
+                candidates = by_name.get(base.split('.')[-1], [])
+                match = next((c for c in candidates if c["file"] == record["file"]), None) \
+                    or next((c for c in candidates if c["package"] == record["package"]), None) \
+                    or (candidates[0] if len(candidates) == 1 else None)
+                matches.append((base, match["id"] if match else None))
+            resolved[record["id"]] = matches
+        return resolved
+
+    @staticmethod
+    def _split_by_inheritance(members: List[Dict], resolved: Dict, max_classes: int) -> List[List[Dict]]:
+        """
+        Split a package into groups of whole inheritance components, packed first-fit decreasing.
+
+        A component larger than max_classes stays in one group.
+        """
+        parent = {record["id"]: record["id"] for record in members}
+
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for record in members:
+            for _, match in resolved[record["id"]]:
+                if match in parent:
+                    parent[find(record["id"])] = find(match)
+        components = defaultdict(list)
+        for record in members:
+            components[find(record["id"])].append(record)
+
+        groups: List[List[Dict]] = []
+        for component in sorted(components.values(), key=len, reverse=True):
+            target = next((group for group in groups if len(group) + len(component) <= max_classes), None)
+            if target is None:
+                groups.append(list(component))
+            else:
+                target.extend(component)
+        return groups
+
+    def partition_classes(self, max_classes: int = 60) -> List[Dict]:
+        """
+        Partition the project's classes by package, splitting packages with more
+        than max_classes classes along inheritance connected components.
+
+        Returns:
+            list: Partitions with their name, file name, classes, the stubs of
+            bases defined elsewhere and the inheritance edges to draw.
+        """
+        records = self.collect_classes()
+        resolved = self._resolve_bases(records)
+        by_package = defaultdict(list)
+        for record in records:
+            by_package[record["package"]].append(record)
+
+        slugs = _disambiguate({package: _slug(package) for package in by_package})
+        partitions = []
+        for package in sorted(by_package):
+            members = by_package[package]
+            groups = [members] if len(members) <= max_classes else \
+                self._split_by_inheritance(members, resolved, max_classes)
+            for index, group in enumerate(groups, 1):
+                split = len(groups) > 1
+                partitions.append({
+                    "name": f"{package} ({index}/{len(groups)})" if split else package,
+                    "file": f"classes_{slugs[package]}" + (f"_{index}" if split else "") + ".puml",
+                    "classes": sorted(group, key=lambda record: (record["file"], record["name"])),
+                })
+
+        by_id = {record["id"]: record for record in records}
+        home = {record["id"]: partition["name"] for partition in partitions for record in partition["classes"]}
+        for partition in partitions:
+            external, edges = {}, []
+            for record in partition["classes"]:
+                for base, match in resolved[record["id"]]:
+                    if match is not None and home[match] == partition["name"]:
+                        edges.append((record["alias"], by_id[match]["alias"]))
+                        continue
+                    if match is not None:
+                        stub = {"alias": by_id[match]["alias"], "name": by_id[match]["name"], "where": home[match]}
+                    else:
+                        stub = {"alias": _alias(f"external.{base}"), "name": base, "where": "external"}
+                    external[stub["alias"]] = stub
+                    edges.append((record["alias"], stub["alias"]))
+            partition["external"] = sorted(external.values(), key=lambda stub: stub["alias"])
+            partition["edges"] = edges
+            partition["depends_on"] = sorted({home[match] for record in partition["classes"]
+                                              for _, match in resolved[record["id"]]
+                                              if match is not None and home[match] != partition["name"]})
+        return partitions
+
+    def generate_sharded_class_diagrams(self, output_dir: Path = None, max_classes: int = 60,
+                                        workers: Optional[int] = None, min_partitions_for_pool: int = 8) -> Dict:
+        """
+        Write one class diagram per partition (see partition_classes) plus an index diagram.
+
+        Each partition's inputs are hashed into a manifest in output_dir; a
+        partition whose inputs are unchanged since the last run is not
+        re-rendered, and shards of partitions that no longer exist are deleted
+        together with their rendered images.
+        Many changed partitions are rendered in a process pool.
+
+        Args:
+            output_dir (Path, optional): Defaults to <analysis folder>/class_diagrams.
+            max_classes (int): Largest partition before a package is split.
+            workers (int, optional): Worker processes; defaults to the CPU count. 1 disables the pool.
+            min_partitions_for_pool (int): Fewest changed partitions rendered in a pool.
+
+        Returns:
+            dict: 'index' (Path), the shard paths that were 'written', 'unchanged' and 'removed',
+            and every current script (shards and index) as 'scripts', e.g. for render_images.
+        """
+        output_dir = Path(output_dir or self.analysis_folder / "class_diagrams")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = output_dir / MANIFEST_FILE
+        previous = {}
+        if manifest_path.exists():
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+
+        partitions = self.partition_classes(max_classes)
+        links = Counter((partition["name"], home) for partition in partitions for home in partition["depends_on"])
+        manifest, changed, unchanged = {}, [], []
+        for partition in partitions:
+            manifest[partition["file"]] = hash_value([DIAGRAM_VERSION, partition])
+            path = output_dir / partition["file"]
+            if previous.get(partition["file"]) == manifest[partition["file"]] and path.exists():
+                unchanged.append(path)
+            else:
+                changed.append(partition)
+
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(changed) >= min_partitions_for_pool:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                scripts = list(pool.map(render_partition, changed))
+        else:
+            scripts = [render_partition(partition) for partition in changed]
+        written = []
+        for partition, script in zip(changed, scripts):
+            atomic_write_text(output_dir / partition["file"], script)
+            written.append(output_dir / partition["file"])
+
+        index_path = output_dir / INDEX_FILE
+        manifest[INDEX_FILE] = hash_value([DIAGRAM_VERSION, [(p["name"], p["file"], len(p["classes"])) for p in partitions],
+                                           sorted(links.items())])
+        if previous.get(INDEX_FILE) != manifest[INDEX_FILE] or not index_path.exists():
+            atomic_write_text(index_path, render_index(partitions, links))
+            written.append(index_path)
+
+        removed = []
+        for file_name in previous:
+            if file_name not in manifest and (output_dir / file_name).exists():
+                (output_dir / file_name).unlink()
+                removed.append(output_dir / file_name)
+                for image_format in IMAGE_FORMATS:
+                    image = (output_dir / file_name).with_suffix(f'.{image_format}')
+                    if image.exists():
+                        image.unlink()
+        atomic_write_json(manifest_path, manifest)
+
+        print(f"Class diagrams: {len(partitions)} partitions in {output_dir.resolve()} "
+              f"({len(written)} written, {len(unchanged)} unchanged, {len(removed)} removed)")
+        scripts = [output_dir / partition["file"] for partition in partitions] + [index_path]
+        return {"index": index_path, "written": written, "unchanged": unchanged, "removed": removed, "scripts": scripts}
+
+    @staticmethod
+    def render_images(scripts: List[Path], image_format: str = 'svg', workers: Optional[int] = None) -> List[Path]:
+        """
+        Render PlantUML scripts to images in parallel with the plantuml command, if it is installed.
+
+        Only scripts whose image is missing or older than the script are rendered,
+        so passing every shard also catches images lost or skipped in earlier runs.
+
+        Returns:
+            list: The scripts that rendered successfully.
+        """
+        scripts = [script for script in scripts if _image_is_stale(Path(script), image_format)]
+        if not scripts:
+            return []
+        plantuml = shutil.which('plantuml')
+        if plantuml is None:
+            print("plantuml is not installed; skipping image rendering.")
+            return []
+
+        def render(script: Path):
+            result = subprocess.run([plantuml, f'-t{image_format}', str(script)], capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"Failed to render {script}: {result.stderr.strip()}")
+                return None
+            return script
+
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+            return [script for script in pool.map(render, scripts) if script is not None]
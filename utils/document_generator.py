@@ -1,20 +1,36 @@
 # utils/document_generator.py
 
+import asyncio
+import copy
 import json
 import re, os
 from datetime import datetime
 from pathlib import Path
 import logging
-from typing import Dict, List, Union
-from collections import defaultdict
+from typing import AsyncIterator, Dict, List, Union
+from llm_clients.retry import backoff_delay, classify_error
+from llm_clients.streaming import astream_from
 from utils.logger import setup_logger
 from utils.project_manager import ProjectManager
+from utils.artifact_graph import ArtifactGraph, hash_value, file_node, folder_node
+from utils.async_io import get_async_io
+from utils.atomic_io import atomic_write_json, atomic_write_text
+from utils.code_skeleton import SKELETON_VERSION, SkeletonPolicy
+from utils.dependency_analyzer import DependencyAnalyzer
+from utils.folder_tree import FolderNode, FolderTree
+from utils.path_keys import path_key
+from utils.document_stream import StreamEvent, PartialJSONParser, PartialFileWriter
+from utils.prompt_builder import build_file_summary_prompt, PromptCacheStats
+from utils.sequence_diagram import CallGraph, SequenceDiagramBuilder
+from utils.static_summarizer import StaticSummarizer
+from utils.summary_packer import CHARS_PER_TOKEN, SummaryPacker, PackItem, build_packed_file_summary_prompt, estimate_tokens, parse_summary_array, split_packed_summaries
 from utils.prompts import (
     file_summary_prompt,
     generate_prd_prompt,
     generate_system_design_prompt,
     generate_task_list_prompt,
     generate_sequence_diagram_prompt,
+    annotate_sequence_diagram_prompt,
     folder_summary_prompt,
     generate_project_summary_prompt,
 )
@@ -89,6 +105,43 @@ def extract_selective_info(folder_summary: dict, fields_to_extract=None) -> dict
         
         # Apply the recursive filter to the entire structure
         return recursive_filter(folder_summary)
+# Keys every file summary carries, with the value used when the LLM omits one
+SUMMARY_DEFAULT_VALUES = {
+    'file': "",
+    'purpose': "",
+    'main_functionality': "",
+    'dependencies': [],
+    'imports': [],
+    'functions': [],
+    'classes': [],
+    'main': ""
+}
+
+# File each generated document is saved to, relative to the analysis folder
+DOCUMENT_FILES = {
+    "PRD": "PRD.json",
+    "system_design": "SystemDesign.json",
+    "task_list": "TaskList.json",
+    "sequence_diagram": "SequenceDiagram.puml",
+    "project_summary": "project_summary.txt",
+}
+
+# Bumped whenever derived (near-duplicate) summaries change shape, so they are all rebuilt
+DERIVED_SUMMARY_VERSION = 1
+
+# Past this many prompt tokens, the PRD is generated from summaries retrieved per section
+RETRIEVAL_THRESHOLD_TOKENS = 12000
+# What each PRD section needs to know about the code, as retrieval queries
+PRD_SECTION_QUERIES = {
+    "Project Summary": "overall purpose of the application, its entry points and main workflow",
+    "Product Goals": "main features and capabilities the project provides",
+    "User Stories": "user-facing commands, interfaces, inputs and outputs",
+    "Functional Requirements": "core business logic, data processing, storage and external services",
+    "Non-Functional Requirements": "performance, concurrency, caching, retry and error handling, logging, "
+                                   "configuration and security",
+}
+
+
 class DocumentGenerator:
     def __init__(self, primary_llm_client, fallback_llm_client, project_manager):
         """
@@ -106,7 +159,30 @@ class DocumentGenerator:
         self.analysis_folder = self.project_manager.get_analysis_folder()
         self.project_path = self.project_manager.get_project_folder()
         self.code_summary_folder = self.analysis_folder / "code_summaries"
+        self.summary_store = self.project_manager.summary_store
+        # Store reads and writes inside coroutines run here, off the event loop
+        self.async_io = get_async_io()
         self.logger = self.project_manager.logger
+        # Tracks what every generated artifact was built from, so unchanged ones are reused
+        self.artifact_graph = ArtifactGraph(self.analysis_folder / "artifact_graph.json")
+        # Cached-prompt savings across this run's LLM calls
+        self.prompt_cache_stats = PromptCacheStats()
+        # Trivial files (re-exports, constants, plain data classes) are summarized without an LLM
+        self.static_summarizer = StaticSummarizer(self.project_path, logger=self.logger)
+        # Large files are summarized from a skeleton of signatures, docstrings and call sites
+        self.code_skeletons = SkeletonPolicy(logger=self.logger)
+        # Large projects get a PRD prompt of the summaries relevant to each section instead of the whole tree.
+        # The index (and numpy) is only loaded once a PRD prompt is that large; see _scoped_prd_prompt.
+        self.summary_index = None
+        self.retrieval_threshold_tokens = RETRIEVAL_THRESHOLD_TOKENS
+        self.retrieval_top_k = 6
+        # Small files requested together are summarized in one packed request
+        primary_config = getattr(primary_llm_client, 'config', None)
+        self.summary_packer = SummaryPacker(
+            self._summarize_pack,
+            max_output_tokens=getattr(primary_config, 'max_tokens', None) or 1024,
+            logger=self.logger,
+        )
         self.logger.info(f"Started project creation for '{self.project_folder.name}'")
         self.logger.info("DocumentGenerator initialized.")
     def extract_json_from_text(self, text: str) -> str:
@@ -140,7 +216,12 @@ class DocumentGenerator:
 
         return None
 
-    async def json_main_query(self,prompt,doc_name="PRD"):
+    async def json_main_query(self,prompt,doc_name="PRD",depends_on=()):
+        inputs_hash = hash_value(prompt)
+        if self.artifact_graph.is_fresh(doc_name, inputs_hash) and self.artifact_graph.get_output(doc_name) is not None:
+            self.logger.info(f"{doc_name} inputs unchanged; reusing previous result.")
+            return self.artifact_graph.get_output(doc_name)
+
         start_time = datetime.now()
         self.logger.debug(f"LLM Request: Generate {doc_name}")
         res={'Not':'Successful'}
@@ -158,6 +239,8 @@ class DocumentGenerator:
                 try:
                     res = json.loads(json_text)
                     self.logger.info(f"Successfully parsed folder summary for folder summary using LLM.")
+                    self.artifact_graph.record(doc_name, inputs_hash, res, depends_on=depends_on, store_output=True)
+                    self.artifact_graph.save()
                     return res
                 except json.JSONDecodeError as e:
                     self.logger.error(f"Failed to parse folder summary as JSON using LLM: {e}")
@@ -170,64 +253,162 @@ class DocumentGenerator:
             self.logger.error(f"Failed to generate {doc_name}: {e}")
             return res
 
-    async def generate_prd(self, folder_summary: dict) -> dict:
-        # Extract PRD data
-        # Prepare the prompt
+    def _prd_prompt(self, folder_summary: dict, relevant: Dict[str, dict] = None) -> str:
         required_fields=["name ", "purpose", "main_functionality","functions","description","signature"]
+        if relevant is not None:
+            # The project and its top-level folders, then only the summaries retrieved for the PRD sections
+            folder_summary = {
+                **{key: value for key, value in folder_summary.items() if key != 'subfolders'},
+                "subfolders": [{key: value for key, value in subfolder.items() if key != 'subfolders'}
+                               for subfolder in folder_summary.get('subfolders', []) if isinstance(subfolder, dict)],
+            }
         required_prd_summary = extract_selective_info(folder_summary,required_fields)
+        if relevant is not None:
+            required_prd_summary["relevant_summaries"] = {
+                hit["path"]: extract_selective_info(hit["summary"], required_fields) for hit in relevant.values()
+            }
         folder_summary_str = json.dumps(required_prd_summary, indent=2)
+        return generate_prd_prompt.format(folder_summary=folder_summary_str)
 
-        prompt=generate_prd_prompt.format(folder_summary=folder_summary_str)
-        # print(f"prompt: {folder_summary_str[:200]}")
-        # Send to LLM
-        prd=json_main_query(prompt,doc_name="PRD")
-        return prd
-
-    async def generate_system_design(self, folder_summary: dict) -> dict:
+    async def _scoped_prd_prompt(self, folder_summary: dict) -> str:
+        """
+        The PRD prompt, built from the summaries retrieved for each PRD section when
+        the whole summary tree would take more than retrieval_threshold_tokens.
+        """
+        prompt = self._prd_prompt(folder_summary)
+        if self.retrieval_threshold_tokens is None or estimate_tokens(prompt) <= self.retrieval_threshold_tokens:
+            return prompt
+        try:
+            if self.summary_index is None:
+                from utils.summary_index import SummaryIndex
+                self.summary_index = SummaryIndex(self.analysis_folder / "summary_index", logger=self.logger)
+            await self.summary_index.build(self.summary_store, folder_summary)
+            relevant = await self.summary_index.search_many(PRD_SECTION_QUERIES.values(), k=self.retrieval_top_k)
+        except Exception as e:
+            self.logger.error(f"Summary retrieval failed; using the whole summary tree for the PRD: {e}")
+            return prompt
+        scoped_prompt = self._prd_prompt(folder_summary, relevant)
+        self.logger.info(f"PRD prompt scoped to {len(relevant)} retrieved summaries: "
+                         f"~{estimate_tokens(scoped_prompt)} tokens instead of ~{estimate_tokens(prompt)}")
+        return scoped_prompt
+
+    def _system_design_prompt(self, folder_summary: dict) -> str:
         required_fields=["name ", "purpose", "interrelationships","files"]
         required_prd_summary = extract_selective_info(folder_summary,required_fields)
         folder_summary_str = json.dumps(required_prd_summary, indent=2)
+        return generate_system_design_prompt.format(folder_summary=folder_summary_str)
+
+    def _task_list_prompt(self, system_design: dict) -> str:
+        system_design_str = json.dumps(system_design, indent=2)
+        return generate_task_list_prompt.format(system_design_document=system_design_str)
+
+    def _sequence_diagram_prompt(self, folder_summary: dict) -> str:
+        folder_summary_str = json.dumps(folder_summary, indent=2)
+        return generate_sequence_diagram_prompt.format(project_data=folder_summary_str)
+
+    def _project_summary_prompt(self, folder_summaries: dict) -> str:
+        folder_summaries_str = json.dumps(folder_summaries, indent=2)
+        return generate_project_summary_prompt.format(folder_summaries_str=folder_summaries_str)
 
-        prompt=generate_system_design_prompt.format(folder_summary=folder_summary_str)
-        # print(f"prompt: {folder_summary_str[:200]}")
+    async def generate_prd(self, folder_summary: dict) -> dict:
+        # Send to LLM
+        prd = await self.json_main_query(await self._scoped_prd_prompt(folder_summary), doc_name="PRD",
+                                         depends_on=[folder_node(Path('.'))])
+        return prd
+
+    async def generate_system_design(self, folder_summary: dict) -> dict:
         # Send to LLM
-        system_design = json_main_query(prompt,doc_name="system_design")
+        system_design = await self.json_main_query(self._system_design_prompt(folder_summary),
+                                                   doc_name="system_design", depends_on=["PRD"])
         return system_design
 
     async def generate_task_list(self, system_design: dict) -> dict:
-        # Prepare the prompt
-        system_design_str = json.dumps(system_design, indent=2)
-        prompt = generate_task_list_prompt.format(system_design_document=system_design_str)
-
-        task_list = json_main_query(prompt,doc_name="system_design")
+        task_list = await self.json_main_query(self._task_list_prompt(system_design), doc_name="task_list",
+                                               depends_on=["system_design"])
         return task_list
 
 
-    async def generate_sequence_diagram(self, folder_summary: dict) -> str:
-        # Prepare the prompt
-        folder_summary_str = json.dumps(folder_summary, indent=2)
-        prompt = generate_sequence_diagram_prompt.format(folder_summary=folder_summary_str)
-        # Send to LLM
+    async def generate_sequence_diagram(self, folder_summary: dict = None, entry_points: List[str] = None,
+                                        annotate: bool = False) -> str:
+        """
+        Generate sequence diagrams statically from the project's call graph.
+
+        The project is analyzed with DependencyAnalyzer and the recorded call
+        edges are walked from each entry point, so no LLM request is needed.
+        With annotate=True the primary LLM is asked for one-line notes on the
+        functions shown; the diagram itself never depends on its reply.
+
+        Args:
+            folder_summary (dict, optional): Folder summaries, used as context for annotations.
+            entry_points (list, optional): Entry point specs such as 'main' or 'pkg/cli.py:run'
+                (see CallGraph.find); defaults to every module-level main().
+            annotate (bool): Add LLM-written notes.
+
+        Returns:
+            str: One @startuml ... @enduml block per entry point, or "" if none was found.
+        """
         start_time = datetime.now()
-        self.logger.debug("LLM Request: Generate Sequence Diagram")
+        analyzer = DependencyAnalyzer(project_manager=self.project_manager, profile='full')
+        await self.async_io.run(analyzer.analyze_project)
+        graph = CallGraph(analyzer.project_data)
+        if entry_points:
+            entry_ids = [graph.find(spec) for spec in entry_points]
+            for spec, entry_id in zip(entry_points, entry_ids):
+                if entry_id is None:
+                    self.logger.warning(f"Sequence diagram entry point not found: {spec}")
+            entry_ids = [entry_id for entry_id in entry_ids if entry_id]
+        else:
+            entry_ids = graph.entry_points()
+        if not entry_ids:
+            self.logger.error("No entry point found for the Sequence Diagram.")
+            return ""
+
+        builder = SequenceDiagramBuilder(graph)
+        diagrams = []
+        for entry_id in entry_ids:
+            diagram = builder.build(entry_id)
+            if annotate:
+                notes = await self._sequence_diagram_notes(diagram, builder.functions_shown, folder_summary)
+                if notes:
+                    diagram = builder.build(entry_id, notes=notes)
+            diagrams.append(diagram)
+        duration = (datetime.now() - start_time).total_seconds()
+        self.logger.info(f"Generated {len(diagrams)} Sequence Diagram(s) from the call graph in {duration:.2f} seconds.")
+        return "\n".join(diagrams)
+
+    async def _sequence_diagram_notes(self, diagram: str, function_ids: List[str], folder_summary: dict = None) -> dict:
+        """
+        Ask the primary LLM for short notes on the functions in a diagram.
+
+        Returns:
+            dict: Function id -> note; empty if the request or its reply failed.
+        """
+        overview = extract_selective_info(folder_summary, ['purpose', 'main_functionality']) if folder_summary else {}
+        prompt = annotate_sequence_diagram_prompt.format(
+            project_overview=json.dumps(overview, indent=2),
+            diagram=diagram,
+            function_ids="\n".join(function_ids),
+        )
+        self.logger.debug("LLM Request: Annotate Sequence Diagram")
         try:
-            diagram_text, usage = await self.primary_llm_client.ask_with_retry(prompt)
-            end_time = datetime.now()
-            duration = (end_time - start_time).total_seconds()
-            self.logger.info(f"Generated Sequence Diagram successfully in {duration:.2f} seconds.")
-            # Check for @startuml and @enduml
-            if "@startuml" in diagram_text and "@enduml" in diagram_text:
-                return diagram_text
-            else:
-                self.logger.error("No valid PlantUML code found in LLM response for Sequence Diagram.")
-                return ""
+            response_text, usage = await self.primary_llm_client.ask_with_retry(prompt)
+            json_text = self.extract_json_from_text(response_text)
+            notes = json.loads(json_text) if json_text else {}
         except Exception as e:
-            self.logger.error(f"Failed to generate Sequence Diagram: {e}")
-            return ""
+            self.logger.error(f"Failed to annotate Sequence Diagram: {e}")
+            return {}
+        if not isinstance(notes, dict):
+            return {}
+        # Notes are single PlantUML lines
+        return {function_id: " ".join(str(note).split()) for function_id, note in notes.items()
+                if function_id in function_ids and str(note).strip()}
 
     async def generate_project_summary(self, folder_summaries: dict) -> str:
-        folder_summaries_str = json.dumps(folder_summaries, indent=2)
-        prompt = generate_project_summary_prompt.format(folder_summaries_str=folder_summaries_str)
+        prompt = self._project_summary_prompt(folder_summaries)
+        inputs_hash = hash_value(prompt)
+        if self.artifact_graph.is_fresh("project_summary", inputs_hash) and self.artifact_graph.get_output("project_summary"):
+            self.logger.info("Project summary inputs unchanged; reusing previous result.")
+            return self.artifact_graph.get_output("project_summary")
         start_time = datetime.now()
         self.logger.debug("LLM Request: Generate Project Summary")
         try:
@@ -236,6 +417,9 @@ class DocumentGenerator:
             duration = (end_time - start_time).total_seconds()
             self.logger.info(f"Generated project summary in {duration:.2f} seconds with {usage.get('input_tokens', 0)} input tokens, {usage.get('output_tokens', 0)} output tokens with LLM: {self.primary_llm_client.config.model}")
             project_summary = response_text.strip()
+            self.artifact_graph.record("project_summary", inputs_hash, project_summary,
+                                       depends_on=[folder_node(Path('.'))], store_output=True)
+            self.artifact_graph.save()
             return project_summary
         except Exception as e:
             self.logger.error(f"Failed to generate project summary: {e}")
@@ -243,44 +427,259 @@ class DocumentGenerator:
 
     # Methods to save the generated documents
     def save_prd(self, prd: dict):
-        prd_file = self.analysis_folder / "PRD.json"
-        with open(prd_file, "w", encoding="utf-8") as f:
-            json.dump(prd, f, indent=2)
+        prd_file = self.analysis_folder / DOCUMENT_FILES["PRD"]
+        atomic_write_json(prd_file, prd)
         self.logger.info(f"PRD saved to {prd_file}")
 
     def save_system_design(self, system_design: dict):
-        system_design_file = self.analysis_folder / "SystemDesign.json"
-        with open(system_design_file, "w", encoding="utf-8") as f:
-            json.dump(system_design, f, indent=2)
+        system_design_file = self.analysis_folder / DOCUMENT_FILES["system_design"]
+        atomic_write_json(system_design_file, system_design)
         self.logger.info(f"System Design saved to {system_design_file}")
 
     def save_task_list(self, task_list: dict):
-        task_list_file = self.analysis_folder / "TaskList.json"
-        with open(task_list_file, "w", encoding="utf-8") as f:
-            json.dump(task_list, f, indent=2)
+        task_list_file = self.analysis_folder / DOCUMENT_FILES["task_list"]
+        atomic_write_json(task_list_file, task_list)
         self.logger.info(f"Task List saved to {task_list_file}")
 
     def save_sequence_diagram(self, diagram_text: str):
-        diagram_file = self.analysis_folder / "SequenceDiagram.puml"
-        with open(diagram_file, "w", encoding="utf-8") as f:
-            f.write(diagram_text)
+        diagram_file = self.analysis_folder / DOCUMENT_FILES["sequence_diagram"]
+        atomic_write_text(diagram_file, diagram_text)
         self.logger.info(f"Sequence Diagram saved to {diagram_file}")
 
     def save_project_summary(self, project_summary: str):
-        summary_file = self.analysis_folder / "project_summary.txt"
-        with open(summary_file, "w", encoding="utf-8") as f:
-            f.write(project_summary)
+        summary_file = self.analysis_folder / DOCUMENT_FILES["project_summary"]
+        atomic_write_text(summary_file, project_summary)
         self.logger.info(f"Project summary saved to {summary_file}")
 
+    # Streaming variants: the same documents, delivered as they are generated
+    async def stream_prd(self, folder_summary: dict) -> AsyncIterator[StreamEvent]:
+        prompt = await self._scoped_prd_prompt(folder_summary)
+        async for event in self.stream_document("PRD", prompt, depends_on=[folder_node(Path('.'))]):
+            yield event
+
+    def stream_system_design(self, folder_summary: dict) -> AsyncIterator[StreamEvent]:
+        return self.stream_document("system_design", self._system_design_prompt(folder_summary), depends_on=["PRD"])
+
+    def stream_task_list(self, system_design: dict) -> AsyncIterator[StreamEvent]:
+        return self.stream_document("task_list", self._task_list_prompt(system_design), depends_on=["system_design"])
+
+    def stream_sequence_diagram(self, folder_summary: dict) -> AsyncIterator[StreamEvent]:
+        # An LLM-drafted diagram; generate_sequence_diagram builds one from the call graph instead
+        return self.stream_document("sequence_diagram", self._sequence_diagram_prompt(folder_summary))
+
+    def stream_project_summary(self, folder_summaries: dict) -> AsyncIterator[StreamEvent]:
+        return self.stream_document("project_summary", self._project_summary_prompt(folder_summaries),
+                                    depends_on=[folder_node(Path('.'))])
+
+    async def stream_document(self, doc_name: str, prompt: str, depends_on=None,
+                              max_retries: int = 3) -> AsyncIterator[StreamEvent]:
+        """
+        Generate a document, yielding events as the response streams in.
+
+        Text is appended to <destination>.partial as it arrives. When the response
+        is complete it is validated like the matching generate_* method, saved to
+        the save_* destination with an atomic write and recorded in the artifact
+        graph; an unchanged document is reused without an LLM call.
+
+        Transient request errors are retried with backoff, and when the primary
+        LLM fails or returns an unusable document the fallback LLM is streamed
+        instead. A 'retry' event tells the consumer to discard the text of an
+        attempt that failed part way through.
+
+        Args:
+            doc_name (str): Key of DOCUMENT_FILES, e.g. "PRD".
+            prompt (str): The prompt to send.
+            depends_on (list, optional): Artifact graph inputs. Documents without
+                dependencies (the sequence diagram) are always regenerated.
+            max_retries (int): Attempts per LLM at transient request errors.
+
+        Yields:
+            StreamEvent: 'delta', 'retry' and, for JSON documents, 'partial' events, then one 'done' or 'error' event.
+        """
+        is_json = DOCUMENT_FILES[doc_name].endswith('.json')
+        fallback = {'Not': 'Successful'} if is_json else ""
+        inputs_hash = hash_value(prompt)
+        if depends_on is not None and self.artifact_graph.is_fresh(doc_name, inputs_hash) \
+                and self.artifact_graph.get_output(doc_name):
+            self.logger.info(f"{doc_name} inputs unchanged; reusing previous result.")
+            result = self.artifact_graph.get_output(doc_name)
+            await self.async_io.run(self._save_document, doc_name, result)
+            yield StreamEvent(doc_name, 'done', data=result, usage={})
+            return
+
+        writer = PartialFileWriter(self.analysis_folder / DOCUMENT_FILES[doc_name])
+        saved = False
+        # The partial file is closed however the stream ends, including a consumer that stops early
+        try:
+            finished, error, restart = False, None, False
+            for llm_client, llm_label in self._document_llms():
+                for attempt in range(1, max_retries + 1):
+                    if restart:
+                        writer.restart()
+                        yield StreamEvent(doc_name, 'retry', text=str(error))
+                        restart = False
+                    parser = PartialJSONParser() if is_json else None
+                    self.logger.debug(f"LLM Request: Stream {doc_name} with {llm_label} LLM (Attempt {attempt})")
+                    try:
+                        stream = astream_from(llm_client, prompt)
+                        async for delta in stream:
+                            restart = True
+                            await self.async_io.run(writer.write, delta)
+                            yield StreamEvent(doc_name, 'delta', text=delta)
+                            partial = parser.feed(delta) if parser else None
+                            if partial is not None:
+                                yield StreamEvent(doc_name, 'partial', data=partial)
+                        usage = stream.usage
+                        self.logger.info(f"Streamed {doc_name} with {llm_label} LLM: first token after "
+                                         f"{usage.get('ttft_seconds') or 0:.2f}s, {usage.get('tokens_per_second', 0):.1f} tokens/s, "
+                                         f"{usage.get('input_tokens', 0)} input tokens, {usage.get('output_tokens', 0)} output tokens")
+                        result = self._finalize_document(doc_name, stream.text)
+                        finished = True
+                        break
+                    except Exception as e:
+                        error = e
+                        retryable, retry_after = classify_error(e)
+                        if not retryable or attempt == max_retries:
+                            self.logger.error(f"Failed to stream {doc_name} with {llm_label} LLM: {e}")
+                            break
+                        delay = retry_after if retry_after is not None else backoff_delay(attempt)
+                        self.logger.warning(f"Streaming {doc_name} failed; retrying in {delay:.1f}s (attempt {attempt}): {e}")
+                        await asyncio.sleep(delay)
+                if finished:
+                    break
+
+            if not finished:
+                self.logger.error(f"Failed to generate {doc_name}: {error}")
+                yield StreamEvent(doc_name, 'error', text=str(error), data=fallback)
+                return
+
+            await self.async_io.run(self._save_document, doc_name, result)
+            saved = True
+            if depends_on is not None:
+                self.artifact_graph.record(doc_name, inputs_hash, result, depends_on=depends_on, store_output=True)
+                self.artifact_graph.save()
+            yield StreamEvent(doc_name, 'done', data=result, usage=usage)
+        finally:
+            # The text generated so far is kept unless the document was saved
+            writer.close(keep=not saved)
+
+    def _document_llms(self) -> List[tuple]:
+        """
+        (client, label) pairs to try in order: the primary LLM, then the fallback LLM.
+        """
+        llms = [(self.primary_llm_client, 'primary')]
+        if self.fallback_llm_client is not None and self.fallback_llm_client is not self.primary_llm_client:
+            llms.append((self.fallback_llm_client, 'fallback'))
+        return llms
+
+    def _finalize_document(self, doc_name: str, text: str):
+        """
+        Validate a complete response the way the generate_* methods do.
+
+        Raises:
+            ValueError: If the response has no usable document.
+        """
+        if DOCUMENT_FILES[doc_name].endswith('.json'):
+            json_text = self.extract_json_from_text(text)
+            if not json_text:
+                raise ValueError(f"No valid JSON found in LLM response for {doc_name}.")
+            return json.loads(json_text)
+        if doc_name == "sequence_diagram" and not ("@startuml" in text and "@enduml" in text):
+            raise ValueError("No valid PlantUML code found in LLM response for Sequence Diagram.")
+        return text.strip()
+
+    def _save_document(self, doc_name: str, document):
+        savers = {
+            "PRD": self.save_prd,
+            "system_design": self.save_system_design,
+            "task_list": self.save_task_list,
+            "sequence_diagram": self.save_sequence_diagram,
+            "project_summary": self.save_project_summary,
+        }
+        savers[doc_name](document)
+
 #######################################################################################
     
-    async def generate_summary(self, relative_path: Path, code: str, max_retries: int = 4) -> dict:
+    def summary_inputs_hash(self, code: str) -> str:
+        """
+        Hash of everything a file summary is built from.
+        """
+        # Keyed on what is actually sent: a file whose skeleton is not used is hashed as full source
+        if self.code_skeletons.skeleton(code) is not None:
+            return hash_value([file_summary_prompt, code, f"skeleton-v{SKELETON_VERSION}"])
+        return hash_value([file_summary_prompt, code])
+
+    def summary_is_current(self, relative_path: Path, code: str) -> bool:
+        """
+        Check whether the stored summary of a file was built from this code.
+
+        A summary written before inputs were tracked is adopted as current.
+
+        Args:
+            relative_path (Path): File's relative path
+            code (str): File contents
+
+        Returns:
+            bool: True if the existing summary can be reused
+        """
+        return self._summary_is_current(relative_path, code, self.summary_store.has(relative_path))
+
+    def _summary_is_current(self, relative_path: Path, code: str, has_summary: bool) -> bool:
+        if not has_summary:
+            return False
+        node_id = file_node(relative_path)
+        inputs_hash = self.summary_inputs_hash(code)
+        if not self.artifact_graph.has(node_id):
+            # Summary from before inputs were tracked; adopt it as built from the current code
+            self.artifact_graph.record(node_id, inputs_hash)
+            return True
+        if not self.artifact_graph.is_fresh(node_id, inputs_hash):
+            self.logger.info(f"Source of {relative_path} changed since its summary was generated.")
+            return False
+        return True
+
+    async def build_summary(self, relative_path: Path, code: str, max_retries: int = 4, required_keys: list = None,
+                            allow_static: bool = True) -> dict:
+        """
+        Build a file summary without saving it: statically for trivial files,
+        otherwise by asking the primary LLM, then the fallback LLM. Files above
+        the skeleton threshold are sent as a skeleton instead of in full.
+
+        Args:
+            relative_path (Path): File's relative path
+            code (str): File contents
+            max_retries (int): Attempts with the primary LLM
+            required_keys (list, optional): Keys the summary must contain
+            allow_static (bool): Try the static fast path first
+
+        Returns:
+            dict: Structured summary, or an empty dict if both LLMs failed
+        """
+        required_keys = required_keys or list(SUMMARY_DEFAULT_VALUES.keys())
+        if allow_static:
+            summary = self._static_summary(relative_path, code, required_keys)
+            if summary:
+                return summary
+        prompt_code = self.code_skeletons.prepare(relative_path, code)
+        summary = await self._attempt_generate_summary(
+            relative_path, prompt_code, required_keys, max_retries, self.primary_llm_client, 'primary'
+        )
+        if not summary:
+            # If primary LLM fails, attempt with fallback LLM
+            self.logger.info(f"Primary LLM failed. Attempting to use fallback LLM for summarizing {relative_path}")
+            summary = await self._attempt_generate_summary(
+                relative_path, prompt_code, required_keys, 1, self.fallback_llm_client, 'fallback'
+            )
+        return summary
+
+    async def generate_summary(self, relative_path: Path, code: str, max_retries: int = 4, overwrite: bool = False) -> dict:
         """
         Generate a structured summary for a given Python file.
 
         Args:
             code (str): File contents
             relative_path (Path): File's relative path
+            overwrite (bool): Regenerate the summary even if one already exists
 
         Returns:
             dict: Structured summary of the file
@@ -288,50 +687,123 @@ class DocumentGenerator:
         python_file_name = relative_path.name
         # self.logger.info(f"Generating summary for: {python_file_name}")
 
-        default_values = {
-            'file': "",
-            'purpose': "",
-            'main_functionality': "",
-            'dependencies': [],
-            'imports': [],
-            'functions': [],
-            'classes': [],
-            'main': ""
-        }
-        required_keys = list(default_values.keys())
-
-        summary_file_path = self.code_summary_folder / relative_path.with_suffix('.json')
-
-        # Check if the summary file already exists
-        if not summary_file_path.exists():
+        required_keys = list(SUMMARY_DEFAULT_VALUES.keys())
 
+        node_id = file_node(relative_path)
+        inputs_hash = self.summary_inputs_hash(code)
 
-            summary = await self._attempt_generate_summary(
-                relative_path, code, required_keys, max_retries, self.primary_llm_client, 'primary'
-            )
+        if overwrite or not self._summary_is_current(
+                relative_path, code, await self.async_io.run(self.summary_store.has, relative_path)):
+            summary = self._static_summary(relative_path, code, required_keys)
+            if not summary and self.summary_packer.is_small(code):
+                summary = await self.summary_packer.submit(relative_path, code)
+                if summary:
+                    summary = self._complete_summary(relative_path, summary, required_keys)
             if not summary:
-                # If primary LLM fails, attempt with fallback LLM
-                self.logger.info(f"Primary LLM failed. Attempting to use fallback LLM for summarizing {relative_path}")
-                summary = await self._attempt_generate_summary(
-                    relative_path, code, required_keys, 1, self.fallback_llm_client, 'fallback'
-                )
+                summary = await self.build_summary(relative_path, code, max_retries, required_keys, allow_static=False)
 
             if summary:
-                # Save the summary to a file
-                # Remove relative_to call
-                summary_file_path = self.code_summary_folder / relative_path.with_suffix('.json')
-                summary_file_path.parent.mkdir(parents=True, exist_ok=True)
-                with open(summary_file_path, 'w', encoding='utf-8') as f:
-                    json.dump(summary, f, indent=2)
-                self.logger.info(f"Summary saved to {summary_file_path.resolve()}")
+                await self.async_io.run(self.summary_store.put, relative_path, summary)
+                self.artifact_graph.record(node_id, inputs_hash, summary)
+                self.logger.info(f"Summary of {relative_path} saved")
             else:
                 self.logger.error(f"Failed to generate summary for {relative_path}")
 
             return 1
-        self.logger.info(f"Summary Already present at {summary_file_path.resolve()}")
+        self.logger.info(f"Summary of {relative_path} already present")
         return 0
 
+    async def generate_derived_summary(self, relative_path: Path, code: str, representative_path: Path,
+                                       representative_code: str, similarity: float) -> int:
+        """
+        Summarize a near-duplicate file without an LLM: the summary of its cluster's
+        representative, annotated with the representative's path, their estimated
+        similarity and the diff between the two files.
+
+        The summary is rebuilt when the file, the representative or its summary
+        changes. Without a representative summary the file is summarized normally.
+
+        Args:
+            relative_path (Path): File's relative path
+            code (str): File contents
+            representative_path (Path): Relative path of the cluster's representative
+            representative_code (str): Representative's contents
+            similarity (float): Estimated Jaccard similarity of the two files
+
+        Returns:
+            int: 1 if a summary was written, 0 if the existing one is current
+        """
+        representative_summary = await self.async_io.run(self.summary_store.get, representative_path)
+        if representative_summary is None:
+            self.logger.warning(f"No summary of {representative_path} to derive {relative_path} from; summarizing it instead.")
+            return await self.generate_summary(relative_path, code)
+
+        node_id = file_node(relative_path)
+        inputs_hash = hash_value([DERIVED_SUMMARY_VERSION, self.summary_inputs_hash(code), path_key(representative_path),
+                                  representative_code, representative_summary])
+        if self.artifact_graph.is_fresh(node_id, inputs_hash) and \
+                await self.async_io.run(self.summary_store.has, relative_path):
+            return 0
+
+        summary = copy.deepcopy(representative_summary)
+        summary.pop("derived_from", None)
+        summary["file_path"] = path_key(relative_path)
+        from utils.near_duplicates import summary_diff  # Imported here so numpy is only loaded when dedup runs
+        summary["derived_from"] = {
+            "file_path": path_key(representative_path),
+            "similarity": similarity,
+            "diff": summary_diff(path_key(representative_path), representative_code, path_key(relative_path), code),
+        }
+        await self.async_io.run(self.summary_store.put, relative_path, summary)
+        self.artifact_graph.record(node_id, inputs_hash, summary, depends_on=[file_node(representative_path)])
+        self.logger.info(f"Summary of {relative_path} derived from near-duplicate {representative_path} "
+                         f"(similarity {similarity:.2f})")
+        return 1
+
     
+    def _static_summary(self, relative_path: Path, code: str, required_keys: list) -> dict:
+        """
+        Summary synthesized from static analysis, or an empty dict if the file needs an LLM.
+        """
+        summary = self.static_summarizer.summarize(relative_path, code)
+        return self._complete_summary(relative_path, summary, required_keys) if summary else {}
+
+    def _complete_summary(self, relative_path: Path, summary: dict, required_keys: list) -> dict:
+        """
+        Inject the file path and fill in any keys the LLM left out.
+        """
+        # Inject the file_path relative to the project folder
+        new_summary = {
+            "file_path": path_key(relative_path)
+        }
+        new_summary.update(summary)
+
+        # Fill in missing keys with default values
+        for key in required_keys:
+            if key not in new_summary:
+                new_summary[key] = copy.copy(SUMMARY_DEFAULT_VALUES.get(key, ""))
+
+        return new_summary
+
+    async def _summarize_pack(self, items: List[PackItem]) -> Dict[str, dict]:
+        """
+        Summarize several small files with one request to the primary LLM.
+
+        Args:
+            items (list): Files to summarize together.
+
+        Returns:
+            dict: File key -> summary for the files the reply covered validly.
+        """
+        prompt = build_packed_file_summary_prompt(items)
+        start_time = datetime.now()
+        response_text, usage = await self.primary_llm_client.ask_with_retry(prompt)
+        duration = (datetime.now() - start_time).total_seconds()
+        self.prompt_cache_stats.record(usage)
+        self.logger.info(f"Generated packed summary of {len(items)} files in {duration:.2f} seconds using primary LLM.")
+        self.logger.debug(f"Input Tokens: {usage.get('input_tokens', 0)} Output Tokens: {usage.get('output_tokens', 0)}")
+        return split_packed_summaries(parse_summary_array(response_text), items, list(SUMMARY_DEFAULT_VALUES.keys()))
+
     async def _attempt_generate_summary(self, relative_path: Path, code: str, required_keys: list, max_retries: int, llm_client, llm_label: str) -> dict:
         """
         Helper method to attempt generating summary with a specified LLM client.
@@ -340,7 +812,7 @@ class DocumentGenerator:
             relative_path (Path): File's relative path
             code (str): File contents
             required_keys (list): List of required keys in the summary
-            max_retries (int): Number of retry attempts
+            max_retries (int): Attempts at getting a usable response; request errors are retried by the client
             llm_client: The LLM client to use (primary or fallback)
             llm_label (str): Label for logging ('primary' or 'fallback')
 
@@ -349,7 +821,7 @@ class DocumentGenerator:
         """
         python_file_name = relative_path.name
         for attempt in range(max_retries):
-            prompt = file_summary_prompt.format(python_file_name=python_file_name, code=code)
+            prompt = build_file_summary_prompt(python_file_name, code)
             start_time = datetime.now()
             self.logger.debug(f"LLM Request: Summarize {relative_path} with {llm_label} LLM (Attempt {attempt + 1})")
 
@@ -357,9 +829,10 @@ class DocumentGenerator:
                 response_text, usage = await llm_client.ask_with_retry(prompt)
                 end_time = datetime.now()
                 duration = (end_time - start_time).total_seconds()
+                self.prompt_cache_stats.record(usage)
 
                 self.logger.debug(f"LLM Name: {llm_client.config.model}")
-                self.logger.debug(f"Input Tokens: {usage.get('input_tokens', 0)} Output Tokens: {usage.get('output_tokens', 0)}")
+                self.logger.debug(f"Input Tokens: {usage.get('input_tokens', 0)} Output Tokens: {usage.get('output_tokens', 0)} Cached Tokens: {usage.get('cache_read_input_tokens', 0)}")
                 self.logger.debug(f"Request Duration: {duration} seconds")
 
                 self.logger.info(f"Generated summary for {relative_path} in {duration:.2f} seconds using {llm_label} LLM.")
@@ -369,235 +842,168 @@ class DocumentGenerator:
                 if json_text:
                     try:
                         summary = json.loads(json_text)
-
-                        # Inject the file_path relative to the project folder
-                        new_summary = {
-                            "file_path": str(relative_path)
-                        }
-                        new_summary.update(summary)
-
-                        # Fill in missing keys with default values
-                        for key in required_keys:
-                            if key not in new_summary:
-                                new_summary[key] = default_values[key]
-
-                        return new_summary
+                        return self._complete_summary(relative_path, summary, required_keys)
                     except json.JSONDecodeError as e:
                         self.logger.error(f"Failed to parse summary as JSON using {llm_label} LLM: {e}")
                 else:
                     self.logger.warning(f"No valid JSON found in LLM response for {relative_path} using {llm_label} LLM. Retrying...")
             except Exception as e:
+                # The client has already retried within its budget; asking again would multiply retries
                 self.logger.error(f"Attempt {attempt + 1}: Failed to summarize {relative_path} with {llm_label} LLM: {e}")
+                break
 
-        self.logger.error(f"Failed to generate valid summary for {relative_path} with {llm_label} LLM after {max_retries} attempts.")
+        self.logger.error(f"Failed to generate valid summary for {relative_path} with {llm_label} LLM after {attempt + 1} attempts.")
         return {}
 
     async def summarize_folders(self) -> dict:
         """
-        Summarize relevant folders in the project by reading code summaries from self.code_summary_folder.
+        Summarize relevant folders in the project from the code summaries in the summary store.
+
+        Each folder's summaries are read from the store only while that folder is summarized.
 
         Returns:
             dict: A nested dictionary containing summaries of all relevant folders.
         """
-        self.logger.info("Starting folder summarization using code summaries in code_summaries folder.")
-
-        # Mapping from folder_path to list of file summaries
-        folder_to_files = defaultdict(list)
-
-        # Walk through code_summary_folder and build folder_to_files
-        for root, dirs, files in os.walk(self.code_summary_folder):
-            for file in files:
-                if file.endswith('.json'):
-                    summary_file_path = Path(root) / file
-                    # Load the code summary
-                    with open(summary_file_path, 'r', encoding='utf-8') as f:
-                        file_info = json.load(f)
-                    # Get the relative path from code_summary_folder
-                    relative_path_from_code_summaries = summary_file_path.relative_to(self.code_summary_folder)
-                    # The folder path is the parent of the file
-                    folder_path = relative_path_from_code_summaries.parent
-                    # Build folder_key
-                    if str(folder_path) != '.':
-                        folder_key = '.' + os.sep + str(folder_path)
-                        self.logger.debug(f"folder_path: {folder_path} File path: {relative_path_from_code_summaries}")
-                        folder_to_files[folder_key].append(file_info)
-                    else:
-                        folder_to_files[str(folder_path)].append(file_info)
-
-        self.logger.debug(f"folder_to_files: {folder_to_files.keys()}")
-
-        # Build the hierarchical folder structure
-        folder_tree = self.build_folder_tree(folder_to_files.keys(), folder_to_files)
-        self.logger.debug(f"Built folder_tree: {folder_tree}")
-
-        async def build_and_summarize(node):
+        self.logger.info("Starting folder summarization using code summaries in the summary store.")
+
+        folder_tree = await self.async_io.run(self.build_folder_tree)
+        stats = folder_tree.stats()
+        self.logger.info(f"Folder tree: {stats['folders']} folders, {stats['files']} files, "
+                         f"~{stats['tokens']} summary tokens")
+
+        async def build_and_summarize(node: FolderNode):
             """
             Recursively build summaries for each folder and its subfolders.
 
             Args:
-                node (dict): Current node in the folder tree.
+                node (FolderNode): Current folder in the folder tree.
 
             Returns:
                 dict: Summary of the current folder including subfolder summaries.
             """
-            folder_path = node['path']
-            folder_name = node['name']
-            files = node['files']
-            file_names = files  # Already a list of file names
+            folder_path = node.path
+            file_names = node.file_names()
 
             self.logger.info(f"Summarizing folder: {folder_path}")
 
-            # Determine the correct folder_key to match folder_to_files
-            if folder_path != '.':
-                folder_key = '.' + os.sep + folder_path
-            else:
-                folder_key = folder_path
-
-            self.logger.debug(f"Folder_key: {folder_key} folder_path: {folder_path}")
-            # file_infos = folder_to_files.get(folder_key, [])
-            # self.logger.debug(f"file_infos: {file_infos}")
-
-            folder_files_info = folder_to_files.get(folder_key, [])
-            # [
-            #     {
-            #         "file_path": file_info.get("file_path", ""),
-            #         "purpose": file_info.get("purpose", ""),
-            #         "main_functionality": file_info.get("main_functionality", ""),
-            #         "dependencies": file_info.get("dependencies", []),
-            #         "imports": file_info.get("imports", [])
-            #     }
-            #     for file_info in file_infos
-            # ]
-            self.logger.info(f"Folder files: {files}")
-
-            if folder_files_info:
-                # self.logger.debug(f"folder_files_info[0]: {folder_files_info[0]}")
-
-                # Convert folder_files_info to JSON string
-                folder_files_info_str = json.dumps(folder_files_info, indent=2)
-
-                # Prepare the prompt for the LLM
-                prompt = folder_summary_prompt.format(folder_files_info_str=folder_files_info_str)
-
-                # Generate summary for the folder
-                summary = await self.generate_folder_summary(folder_path, prompt, max_retries=2)
-                try:
-                    self.logger.info(f"Summary: {summary}")
-                except:
-                    self.logger.error(f"Summary: Failed")
-
-                # Initialize the folder summary object
-                folder_summary = {
-                    "name": folder_name,
-                    "files": file_names,
-                    "subfolders": [],
-                    **summary
-                    # "purpose": summary.get("purpose", ""),
-                    # "interrelationships": summary.get("interrelationships", ""),
-                    # "notes": summary.get("notes", "")
-                }
-
-                # Recursively summarize subfolders
-                for subfolder_node in node.get('subfolders', []):
-                    sub_summary = await build_and_summarize(subfolder_node)
-                    folder_summary["subfolders"].append(sub_summary)
-                return folder_summary
-            else:
-                # If there are no files, still summarize the folder
-                # Prepare the prompt for the LLM with empty folder_files_info
-                prompt = folder_summary_prompt.format(folder_files_info_str="[]")
-
-                # Generate summary for the folder
-                summary = await self.generate_folder_summary(folder_path, prompt, max_retries=2)
-                self.logger.info(f"Summary: {summary}")
-
-                # Initialize the folder summary object without files
-                folder_summary = {
-                    "name": folder_name,
-                    "files": [],
-                    "subfolders": [],
-                    **summary
-                    # "purpose": summary.get("purpose", ""),
-                    # "interrelationships": summary.get("interrelationships", ""),
-                    # "notes": summary.get("notes", "")
-                }
-
-                # Recursively summarize subfolders
-                for subfolder_node in node.get('subfolders', []):
-                    sub_summary = await build_and_summarize(subfolder_node)
-                    folder_summary["subfolders"].append(sub_summary)
-                return folder_summary
+            folder_files_info = await self.async_io.run(self.folder_file_summaries, folder_path)
+            self.logger.info(f"Folder files: {file_names}")
+
+            # Structural edges for the artifact graph: this folder's files and subfolders
+            depends_on = [file_node(f["file_path"]) for f in folder_files_info if "file_path" in f]
+            depends_on += [folder_node(subfolder.path) for subfolder in node.subfolders()]
+
+            # Folders without files are still summarized, from an empty file list
+            folder_files_info_str = json.dumps(folder_files_info, indent=2) if folder_files_info else "[]"
+            prompt = folder_summary_prompt.format(folder_files_info_str=folder_files_info_str)
+
+            # Generate summary for the folder
+            summary = await self._generate_tracked_folder_summary(folder_path, prompt, depends_on)
+            self.logger.info(f"Summary: {summary}")
+
+            folder_summary = {
+                "name": node.name,
+                "files": file_names,
+                "subfolders": [],
+                **summary
+            }
+
+            # Recursively summarize subfolders
+            for subfolder in node.subfolders():
+                folder_summary["subfolders"].append(await build_and_summarize(subfolder))
+            return folder_summary
 
         # Start summarization from the root node
-        summary = await build_and_summarize(folder_tree)
+        summary = await build_and_summarize(folder_tree.root)
+        self.artifact_graph.save()
 
         return summary
 
-    def build_folder_tree(self, folder_paths, folder_to_files):
+    async def _generate_tracked_folder_summary(self, folder_path: str, prompt: str, depends_on: list) -> dict:
         """
-        Build a hierarchical folder tree from a list of folder paths.
+        Generate a folder summary unless the artifact graph shows the previous one was
+        built from the same prompt, in which case the stored summary is returned.
 
         Args:
-            folder_paths (iterable): An iterable of folder path strings.
-            folder_to_files (dict): Mapping from folder path to list of files.
+            folder_path (str): Folder's relative path
+            prompt (str): The prompt to send to the LLM
+            depends_on (list): Upstream artifact graph nodes
 
         Returns:
-            dict: The root node representing the folder tree.
-        """
-        # Initialize the root node
-        root = {
-            "name": ".",
-            "path": ".",
-            "files": [Path(f.get("file_path", "")).name for f in folder_to_files.get('.', []) if "file_path" in f],
-            "subfolders": []
-        }
+            dict: Structured summary of the folder
+        """
+        node_id = folder_node(folder_path)
+        inputs_hash = hash_value(prompt)
+        previous = self.artifact_graph.get_output(node_id)
+        if previous is not None and self.artifact_graph.is_fresh(node_id, inputs_hash):
+            self.logger.info(f"Folder {folder_path} unchanged; reusing previous summary.")
+            return previous
+
+        summary = await self.generate_folder_summary(folder_path, prompt, max_retries=2)
+        if summary:
+            self.artifact_graph.record(node_id, inputs_hash, summary, depends_on=depends_on, store_output=True)
+        return summary
 
-        path_to_node = {".": root}
+    def build_folder_tree(self) -> FolderTree:
+        """
+        Build the folder tree of the summarized files, with each file weighted by
+        the estimated tokens of its summary.
+
+        Returns:
+            FolderTree: Folders indexed by POSIX path, rooted at '.'.
+        """
+        return FolderTree.from_files({
+            path: length // CHARS_PER_TOKEN + 1 for path, length in self.summary_store.sizes().items()
+        })
 
-        for path in folder_paths:
-            if path == '.':
-                continue  # Root already handled
+    def folder_file_summaries(self, folder_path: Union[str, Path]) -> List[dict]:
+        """
+        Summaries of the files directly in a folder, read from the summary store.
+        """
+        return [summary for _, summary in self.summary_store.iter_folder(path_key(folder_path))]
 
-            # Normalize path to use OS separator (handles Windows '\\' and Unix '/')
-            normalized_path = Path(path)
-            parts = normalized_path.parts
+    async def refresh_folder_summary(self, folder_summaries: dict, folder_path: Path) -> dict:
+        """
+        Re-summarize a single folder from its current code summaries and update it
+        in place inside a folder summary tree produced by summarize_folders.
 
-            current_node = root
-            current_path = "."
+        Only the folder itself is sent to the LLM: folder prompts are built from the
+        folder's own files, so ancestor entries stay valid and simply carry the
+        updated node in their "subfolders".
 
-            for part in parts:
-                # Build the new path incrementally
-                if current_path == ".":
-                    new_path = part
-                else:
-                    new_path = os.path.join(current_path, part)
+        Args:
+            folder_summaries (dict): Root of the folder summary tree.
+            folder_path (Path): Folder path relative to the project root ('.' for the root).
 
-                # Check if the subfolder already exists
-                existing = next((sf for sf in current_node["subfolders"] if sf["name"] == part), None)
-                if existing:
-                    current_node = existing
-                    current_path = new_path
-                else:
-                    # Construct the key used in folder_to_files
-                    folder_key = '.' + os.sep + new_path if current_path == "." else '.' + os.sep + new_path
-                    # Retrieve files for this folder, if any
-                    files = [Path(f.get("file_path", "")).name for f in folder_to_files.get(folder_key, []) if "file_path" in f]
-                    if files:
-                        self.logger.debug(f"Files found for folder '{folder_key}': {files}")
-                    else:
-                        self.logger.debug(f"No files found for folder '{folder_key}'.")
-
-                    new_node = {
-                        "name": part,
-                        "path": new_path,
-                        "files": files,
-                        "subfolders": []
-                    }
-                    current_node["subfolders"].append(new_node)
-                    current_node = new_node
-                    current_path = new_path
-
-        return root
+        Returns:
+            dict: The updated folder summary node.
+        """
+        node = folder_summaries
+        for part in Path(folder_path).parts:
+            subfolders = node.setdefault("subfolders", [])
+            child = next((sf for sf in subfolders if isinstance(sf, dict) and sf.get("name") == part), None)
+            if child is None:
+                child = {"name": part, "files": [], "subfolders": []}
+                subfolders.append(child)
+            node = child
+
+        folder_files_info = await self.async_io.run(self.folder_file_summaries, folder_path)
+
+        folder_files_info_str = json.dumps(folder_files_info, indent=2) if folder_files_info else "[]"
+        prompt = folder_summary_prompt.format(folder_files_info_str=folder_files_info_str)
+        depends_on = [file_node(f["file_path"]) for f in folder_files_info if "file_path" in f]
+        depends_on += [folder_node(Path(folder_path) / sf["name"])
+                       for sf in node.get("subfolders", []) if isinstance(sf, dict) and "name" in sf]
+        summary = await self._generate_tracked_folder_summary(str(folder_path), prompt, depends_on)
+        self.artifact_graph.save()
+
+        # Replace the generated fields but keep the tree structure intact
+        structural_fields = {"name", "files", "subfolders"}
+        for key in [k for k in node if k not in structural_fields]:
+            del node[key]
+        node["files"] = [Path(f.get("file_path", "")).name for f in folder_files_info if "file_path" in f]
+        node.update({k: v for k, v in summary.items() if k not in structural_fields})
+        return node
 
     async def generate_folder_summary(self, relative_path: str, prompt: str, max_retries: int = 2) -> dict:
         """
@@ -632,7 +1038,7 @@ class DocumentGenerator:
         Args:
             relative_path (str): Folder's relative path
             prompt (str): The prompt to send to the LLM
-            max_retries (int): Number of retry attempts
+            max_retries (int): Attempts at getting a usable response; request errors are retried by the client
             llm_client: The LLM client to use (primary or fallback)
             llm_label (str): Label for logging ('primary' or 'fallback')
 
@@ -647,6 +1053,7 @@ class DocumentGenerator:
                 response_text, usage = await llm_client.ask_with_retry(prompt)
                 end_time = datetime.now()
                 duration = (end_time - start_time).total_seconds()
+                self.prompt_cache_stats.record(usage)
 
                 self.logger.debug(f"LLM Name: {llm_client.config.model}")
                 self.logger.info(f"Input Tokens: {usage.get('input_tokens', 0)} Output Tokens: {usage.get('output_tokens', 0)}")
@@ -666,9 +1073,11 @@ class DocumentGenerator:
                 else:
                     self.logger.warning(f"No valid JSON found in LLM response for folder {relative_path} using {llm_label} LLM. Retrying...")
             except Exception as e:
+                # The client has already retried within its budget; asking again would multiply retries
                 self.logger.error(f"Attempt {attempt + 1}: Failed to summarize folder {relative_path} with {llm_label} LLM: {e}")
+                break
 
-        self.logger.error(f"Failed to generate valid folder summary for {relative_path} with {llm_label} LLM after {max_retries} attempts.")
+        self.logger.error(f"Failed to generate valid folder summary for {relative_path} with {llm_label} LLM after {attempt + 1} attempts.")
         return {}
     
     ####################################################################################
@@ -0,0 +1,165 @@
+# utils/document_stream.py
+
+import json
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Closing character for each opening bracket
+CLOSERS = {'{': '}', '[': ']'}
+
+
+@dataclass
+class StreamEvent:
+    """
+    One event from a DocumentGenerator.stream_* method.
+
+    kind is 'delta' (text holds newly generated text), 'partial' (data holds
+    the JSON parsed so far), 'retry' (text holds the reason; the text received
+    so far is discarded and generation starts over), 'done' (data holds the
+    final document, usage the request's token counts and latency) or 'error'
+    (text holds the reason, data the same fallback value the generate_* method
+    would return).
+    """
+    doc_name: str
+    kind: str
+    text: str = ""
+    data: Any = None
+    usage: Optional[Dict] = None
+
+
+class PartialJSONParser:
+    """
+    Best-effort parsing of a JSON object that is still being generated.
+
+    The parser tracks string and bracket state over each new delta only, so
+    closing the open structures costs O(depth). A parse is attempted after
+    every min_new_chars characters, which bounds the re-parsing cost of long
+    documents; deltas that end mid-key simply yield nothing until later.
+    """
+
+    def __init__(self, min_new_chars: int = 200):
+        self.min_new_chars = min_new_chars
+        self._chunks: List[str] = []
+        self._length = 0
+        self._start: Optional[int] = None
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._complete = False
+        self._end: Optional[int] = None
+        self._last_attempt = 0
+        self.last: Any = None
+
+    def feed(self, delta: str) -> Optional[Any]:
+        """
+        Add generated text.
+
+        Returns:
+            The parsed value if it changed since the last snapshot, else None.
+        """
+        offset = self._length
+        self._chunks.append(delta)
+        self._length += len(delta)
+        if self._complete:
+            return None
+        for index, char in enumerate(delta):
+            self._scan(char, offset + index)
+            if self._complete:
+                break
+        if self._start is None:
+            return None
+        if not self._complete and self._length - self._last_attempt < self.min_new_chars:
+            return None
+        self._last_attempt = self._length
+        return self._snapshot()
+
+    def _scan(self, char: str, position: int):
+        if self._start is None:
+            if char == '{':
+                self._start = position
+                self._stack.append('}')
+            return
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == '\\':
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+        elif char == '"':
+            self._in_string = True
+        elif char in CLOSERS:
+            self._stack.append(CLOSERS[char])
+        elif self._stack and char == self._stack[-1]:
+            self._stack.pop()
+            if not self._stack:
+                self._complete = True
+                self._end = position + 1
+
+    def _snapshot(self) -> Optional[Any]:
+        if self._complete:
+            candidate = "".join(self._chunks)[self._start:self._end]
+        else:
+            candidate = "".join(self._chunks)[self._start:] + ('"' if self._in_string else '')
+            candidate = candidate.rstrip()
+            if candidate.endswith(','):
+                candidate = candidate[:-1]
+            elif candidate.endswith(':'):
+                candidate += ' null'
+            candidate += ''.join(reversed(self._stack))
+        try:
+            value = json.loads(candidate)
+        except json.JSONDecodeError:
+            return None
+        if value == self.last:
+            return None
+        self.last = value
+        return value
+
+
+class PartialFileWriter:
+    """
+    Appends streamed text to <destination>.partial as it arrives.
+
+    The finished document is written to the destination itself with an
+    atomic write; the partial file is then removed. After a failure it is
+    kept, so the text generated so far is not lost. Writes may still be
+    running in an I/O thread when the stream is closed, so the file is only
+    touched under a lock and writes after close() are dropped.
+    """
+
+    def __init__(self, destination: Path):
+        self.path = Path(destination).with_name(Path(destination).name + '.partial')
+        self._file = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def write(self, text: str):
+        with self._lock:
+            if self._closed:
+                return
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, 'w', encoding='utf-8')
+            self._file.write(text)
+            self._file.flush()
+
+    def restart(self):
+        """
+        Start the partial file over with the next write, e.g. when generation is retried.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def close(self, keep: bool = False):
+        with self._lock:
+            self._closed = True
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if not keep:
+                self.path.unlink(missing_ok=True)
@@ -0,0 +1,165 @@
+# utils/folder_tree.py
+
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from utils.path_keys import path_key
+
+
+class FolderNode:
+    """
+    A folder in a FolderTree, with its direct files and subfolders.
+    """
+
+    __slots__ = ('name', 'path', 'parent', 'children', 'files', '_stats')
+
+    def __init__(self, name: str, path: str, parent: Optional['FolderNode'] = None):
+        self.name = name
+        self.path = path
+        self.parent = parent
+        self.children: Dict[str, 'FolderNode'] = {}
+        self.files: Dict[str, int] = {}  # File name -> token count
+        self._stats: Optional[Dict[str, int]] = None
+
+    def subfolders(self) -> List['FolderNode']:
+        return [self.children[name] for name in sorted(self.children)]
+
+    def file_names(self) -> List[str]:
+        return sorted(self.files)
+
+    def __repr__(self) -> str:
+        return f"FolderNode({self.path!r}, {len(self.files)} files, {len(self.children)} subfolders)"
+
+
+class FolderTree:
+    """
+    Folder hierarchy of a set of project files.
+
+    Folders are indexed by path key (see utils.path_keys) and children by name, so
+    adding a file or looking up a folder costs one dictionary access per
+    missing ancestor rather than a scan of every sibling. Aggregated stats
+    (folders, files and tokens under a folder) are cached per folder and
+    invalidated up the parent chain when the tree changes.
+    """
+
+    def __init__(self):
+        self.root = FolderNode('.', '.')
+        self._nodes: Dict[str, FolderNode] = {'.': self.root}
+
+    @classmethod
+    def from_files(cls, files: Union[Iterable[str], Dict[str, int]]) -> 'FolderTree':
+        """
+        Build a tree from project-relative file paths, or a mapping of file path to token count.
+        """
+        tree = cls()
+        token_counts = files if isinstance(files, dict) else dict.fromkeys(files, 0)
+        for file_path, tokens in token_counts.items():
+            tree.add_file(file_path, tokens)
+        return tree
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, path) -> bool:
+        return path_key(path) in self._nodes
+
+    def get(self, path: Union[str, Path]) -> Optional[FolderNode]:
+        """
+        The folder at a path, or None.
+        """
+        return self._nodes.get(path_key(path))
+
+    def add_folder(self, path: Union[str, Path]) -> FolderNode:
+        """
+        The folder at a path, created along with any missing ancestors.
+        """
+        key = path_key(path)
+        node = self._nodes.get(key)
+        if node is not None:
+            return node
+        parent_key, _, name = key.rpartition('/')
+        parent = self.add_folder(parent_key or '.')
+        node = FolderNode(name, key, parent)
+        parent.children[name] = node
+        self._nodes[key] = node
+        self._invalidate(parent)
+        return node
+
+    def add_file(self, path: Union[str, Path], tokens: int = 0) -> FolderNode:
+        """
+        Add (or update the token count of) a file; returns its folder.
+        """
+        folder, _, name = path_key(path).rpartition('/')
+        node = self.add_folder(folder or '.')
+        node.files[name] = tokens
+        self._invalidate(node)
+        return node
+
+    def remove_file(self, path: Union[str, Path]) -> bool:
+        """
+        Remove a file; its folder stays in the tree. Returns True if the file was present.
+        """
+        folder, _, name = path_key(path).rpartition('/')
+        node = self._nodes.get(folder or '.')
+        if node is None or name not in node.files:
+            return False
+        del node.files[name]
+        self._invalidate(node)
+        return True
+
+    @staticmethod
+    def _invalidate(node: Optional[FolderNode]):
+        # A folder's stats are only ever cached after its descendants', so the
+        # first folder without cached stats has no cached ancestors either
+        while node is not None and node._stats is not None:
+            node._stats = None
+            node = node.parent
+
+    def walk(self, path: Union[str, Path] = '.', bottom_up: bool = False) -> Iterator[FolderNode]:
+        """
+        Iterate over a folder and every folder below it.
+
+        Args:
+            path: Folder to start from.
+            bottom_up (bool): Yield every folder after all of its subfolders,
+                e.g. to summarize folders before their parents.
+        """
+        start = self.get(path)
+        if start is None:
+            return
+        if bottom_up:
+            yield from reversed(list(self.walk(start.path)))
+            return
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.subfolders()))
+
+    def stats(self, path: Union[str, Path] = '.') -> Dict[str, int]:
+        """
+        Number of folders (including this one), files and tokens at and below a folder.
+        """
+        for node in self.walk(path, bottom_up=True):
+            if node._stats is None:
+                stats = {"folders": 1, "files": len(node.files), "tokens": sum(node.files.values())}
+                for child in node.children.values():
+                    for key, value in child._stats.items():
+                        stats[key] += value
+                node._stats = stats
+        node = self.get(path)
+        return dict(node._stats) if node is not None else {"folders": 0, "files": 0, "tokens": 0}
+
+    def to_dict(self, path: Union[str, Path] = '.') -> Dict:
+        """
+        The tree below a folder as nested dicts of name, path, files and subfolders.
+        """
+        node = self.get(path)
+        if node is None:
+            return {}
+        return {
+            "name": node.name,
+            "path": node.path,
+            "files": node.file_names(),
+            "subfolders": [self.to_dict(child.path) for child in node.subfolders()],
+        }
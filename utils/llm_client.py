@@ -8,17 +8,15 @@ import json
 import logging
 
 from configs.llm_config import LLMConfig
-
-# Import your Ollama and Anthropic clients here
-from llm_clients.ollama_client import OllamaLLM
-from llm_clients.anthropic_client import AnthropicLLM
-from llm_clients.openai_client import OpenAILLM
+from llm_clients.registry import backend_name, load_backend
+from llm_clients.streaming import StreamResponse, astream_from
 
 
 class LLMType(Enum):
     ANTHROPIC = 'anthropic'
     OLLAMA = 'ollama'
     OPENAI = 'openai'
+    MOCK = 'mock'
 
 class LLMClient:
     def __init__(self, config: LLMConfig):
@@ -26,28 +24,16 @@ class LLMClient:
         self.llm: Optional[object] = None  # Initialize as None
         self.llm_type: Optional[LLMType] = None
 
-        # Determine LLM type based on the config
-        if self.config.api_type == 'anthropic':
-            self.llm_type = LLMType.ANTHROPIC
-        elif self.config.api_type == 'openai':
-            self.llm_type = LLMType.OPENAI
-        elif self.config.api_type == 'ollama':
-            self.llm_type = LLMType.OLLAMA
-        else:
-            raise ValueError(f"Unsupported LLM type: {self.config.api_type}")
+        # Validates the type now; the provider's SDK is only imported in __aenter__
+        self.backend = backend_name(self.config)
+        # Backends registered by plugins have no LLMType member
+        self.llm_type = LLMType(self.config.api_type) if self.config.api_type in LLMType._value2member_map_ else None
 
         # Handle streaming flag if present
         self.stream = self.config.stream if hasattr(self.config, 'stream') else False
 
     async def __aenter__(self):
-        if self.llm_type == LLMType.ANTHROPIC:
-            self.llm = AnthropicLLM(self.config)
-        elif self.llm_type == LLMType.OPENAI:
-            self.llm = OpenAILLM(self.config)
-        elif self.llm_type == LLMType.OLLAMA:
-            self.llm = OllamaLLM(self.config)
-        else:
-            raise ValueError(f"Unsupported LLM type: {self.llm_type}")
+        self.llm = load_backend(self.backend)(self.config)
 
         # Initialize the LLM client within its context
         await self.llm.__aenter__()
@@ -89,6 +75,23 @@ class LLMClient:
 
         return await self.llm.ask_with_retry(prompt, max_retries, initial_delay)
 
+    def astream(self, prompt: str) -> StreamResponse:
+        """
+        Stream the response to a prompt as text deltas.
+
+        Backends without a streaming path answer with a single delta.
+
+        Args:
+            prompt (str): The user prompt.
+
+        Returns:
+            StreamResponse: Async iterator of text deltas; text and usage are set once it is exhausted.
+        """
+        if not self.llm:
+            raise RuntimeError("LLMClient is not initialized. Use 'async with' to initialize it.")
+
+        return astream_from(self.llm, prompt)
+
     async def count_tokens(self, messages: list, system: Optional[str] = None) -> int:
         """
         Count tokens using the underlying LLM's token counting method.
@@ -0,0 +1,175 @@
+# utils/near_duplicates.py
+
+import difflib
+import re
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Mersenne prime of the shingle and permutation hashes; the product of two residues fits in uint64
+_PRIME = np.uint64((1 << 31) - 1)
+_SHINGLE_BASE = 1000003
+_TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+# Longest diff kept in a derived summary
+MAX_DIFF_LINES = 80
+
+
+def _tokens(code: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(code)
+
+
+def shingle_hashes(code: str, size: int = 5) -> np.ndarray:
+    """
+    Distinct hashes of the runs of `size` consecutive tokens in code.
+    """
+    return _shingle_hashes(_tokens(code), size)
+
+
+def _shingle_hashes(tokens: List[str], size: int) -> np.ndarray:
+    if not tokens:
+        return np.zeros(0, dtype=np.uint64)
+    ids = np.fromiter((zlib.crc32(token.encode('utf-8')) for token in tokens), dtype=np.uint64, count=len(tokens)) % _PRIME
+    if len(ids) < size:
+        size = len(ids)
+    count = len(ids) - size + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(size):
+        weight = np.uint64(pow(_SHINGLE_BASE, size - 1 - offset, int(_PRIME)))
+        hashes = (hashes + (ids[offset:offset + count] * weight) % _PRIME) % _PRIME
+    return np.unique(hashes)
+
+
+@dataclass
+class DuplicateCluster:
+    representative: str
+    # Every other member, with its estimated similarity to the representative
+    members: Dict[str, float] = field(default_factory=dict)
+
+
+class NearDuplicateFinder:
+    """
+    Groups near-identical files with MinHash signatures of token shingles and
+    LSH banding.
+
+    Files whose signatures agree on a whole band become candidates; a
+    candidate joins a cluster when its estimated Jaccard similarity reaches
+    the threshold. Each cluster's representative is its medoid, and members
+    less similar than the threshold to the representative (possible through
+    chains of similar files) are left out of the cluster.
+    """
+
+    def __init__(self, threshold: float = 0.9, num_permutations: int = 128, bands: int = 16,
+                 shingle_size: int = 5, min_tokens: int = 50, seed: int = 1, medoid_sample: int = 64):
+        """
+        Args:
+            threshold (float): Lowest estimated Jaccard similarity of a near-duplicate.
+            num_permutations (int): MinHash signature length; must be divisible by bands.
+            bands (int): LSH bands. More bands find less similar candidates.
+            shingle_size (int): Tokens per shingle.
+            min_tokens (int): Smaller files are never clustered.
+            seed (int): Seed of the permutation parameters, so runs agree.
+            medoid_sample (int): Members a representative is compared with in large clusters.
+        """
+        if num_permutations % bands:
+            raise ValueError("num_permutations must be divisible by bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.min_tokens = min_tokens
+        self.medoid_sample = medoid_sample
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), size=num_permutations, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=num_permutations, dtype=np.uint64)
+        self.files = 0
+        self.clusters: List[DuplicateCluster] = []
+
+    def signature(self, code: str) -> Optional[np.ndarray]:
+        """
+        MinHash signature of code, or None for files below min_tokens.
+        """
+        tokens = _tokens(code)
+        if len(tokens) < self.min_tokens:
+            return None
+        hashes = _shingle_hashes(tokens, self.shingle_size)
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1)
+
+    @staticmethod
+    def similarity(first: np.ndarray, second: np.ndarray) -> float:
+        return float(np.mean(first == second))
+
+    def find(self, sources: Dict[str, str]) -> List[DuplicateCluster]:
+        """
+        Clusters of near-duplicate files.
+
+        Args:
+            sources (dict): File key -> code.
+
+        Returns:
+            list: Clusters of two or more files, largest first.
+        """
+        keys = sorted(sources)
+        signatures = {key: self.signature(sources[key]) for key in keys}
+        keys = [key for key in keys if signatures[key] is not None]
+        parent = {key: key for key in keys}
+
+        def root(key):
+            while parent[key] != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        rows = len(self._a) // self.bands
+        for band in range(self.bands):
+            buckets = defaultdict(list)
+            for key in keys:
+                buckets[signatures[key][band * rows:(band + 1) * rows].tobytes()].append(key)
+            for bucket in buckets.values():
+                # Checking against the bucket's first file keeps a bucket of n identical files linear
+                for key in bucket[1:]:
+                    if root(key) != root(bucket[0]) and \
+                            self.similarity(signatures[key], signatures[bucket[0]]) >= self.threshold:
+                        parent[root(key)] = root(bucket[0])
+
+        groups = defaultdict(list)
+        for key in keys:
+            groups[root(key)].append(key)
+        clusters = []
+        for group in groups.values():
+            if len(group) < 2:
+                continue
+            stacked = np.stack([signatures[key] for key in group])
+            # Compared with an evenly spaced sample, so memory stays linear in the cluster size
+            sample = stacked[np.linspace(0, len(group) - 1, min(len(group), self.medoid_sample)).astype(int)]
+            agreement = (stacked[:, None, :] == sample[None, :, :]).mean(axis=2)
+            index = int(np.argmax(agreement.sum(axis=1)))  # First of equals: group is sorted
+            representative = group[index]
+            row = (stacked == stacked[index]).mean(axis=1)
+            members = {key: round(float(row[index]), 3) for index, key in enumerate(group)
+                       if key != representative and row[index] >= self.threshold}
+            if members:
+                clusters.append(DuplicateCluster(representative, members))
+        clusters.sort(key=lambda cluster: (-len(cluster.members), cluster.representative))
+        self.files = len(sources)
+        self.clusters = clusters
+        return clusters
+
+    def report(self) -> str:
+        derived = sum(len(cluster.members) for cluster in self.clusters)
+        return (f"Near-duplicates: {derived} of {self.files} files derive their summary from one of "
+                f"{len(self.clusters)} representatives instead of an LLM call")
+
+
+def summary_diff(representative_path: str, representative_code: str, path: str, code: str,
+                 max_lines: int = MAX_DIFF_LINES) -> List[str]:
+    """
+    Unified diff (without context lines) from a representative to a near-duplicate, truncated to max_lines.
+    """
+    lines = list(difflib.unified_diff(representative_code.splitlines(), code.splitlines(),
+                                      fromfile=representative_path, tofile=path, n=0, lineterm=''))
+    if len(lines) > max_lines:
+        lines = lines[:max_lines] + [f"... {len(lines) - max_lines} more diff lines"]
+    return lines
@@ -0,0 +1,325 @@
+# utils/parse_cache.py
+
+import ast
+import hashlib
+import io
+import os
+import pickle
+import sys
+import threading
+import tokenize
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Rough in-memory footprint of an AST / token list relative to the source size.
+# Used only for eviction accounting, so it does not need to be exact.
+AST_BYTES_PER_SOURCE_BYTE = 12
+TOKEN_BYTES_PER_SOURCE_BYTE = 8
+
+
+def hash_source(source: str) -> str:
+    """
+    Return the content hash used to key parsed modules.
+
+    Args:
+        source (str): Python source text.
+
+    Returns:
+        str: Hex digest of the UTF-8 encoded source.
+    """
+    return hashlib.blake2b(source.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def decode_source(raw: bytes) -> Tuple[str, str]:
+    """
+    Decode file contents the same way the summarizer always has: UTF-8 first,
+    falling back to latin-1.
+
+    Returns:
+        tuple: (source, encoding)
+    """
+    try:
+        return raw.decode('utf-8'), 'utf-8'
+    except UnicodeDecodeError:
+        return raw.decode('latin-1'), 'latin-1'
+
+
+class ParsedModule:
+    """
+    Source text of one Python module together with its AST and token stream.
+
+    The AST and tokens are built on first access and kept for later callers.
+    Parse and tokenize errors are cached as well and re-raised on every access.
+    Callers must treat the shared tree and token list as read-only.
+    """
+
+    def __init__(self, source: str, content_hash: str, path: Optional[Path] = None,
+                 encoding: str = 'utf-8', cache_dir: Optional[Path] = None):
+        self.source = source
+        self._source_bytes = len(source.encode('utf-8'))
+        self.content_hash = content_hash
+        self.path = path
+        self.encoding = encoding
+        self.cache_dir = cache_dir
+        self._tree = None
+        self._tree_error = None
+        self._tokens = None
+        self._tokens_error = None
+        self._on_resize: Optional[Callable[['ParsedModule'], None]] = None
+
+    @property
+    def source_bytes(self) -> int:
+        """
+        Size of the source in bytes, UTF-8 encoded.
+        """
+        return self._source_bytes
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Estimated memory held by this entry.
+        """
+        size = self.source_bytes
+        if self._tree is not None:
+            size += self.source_bytes * AST_BYTES_PER_SOURCE_BYTE
+        if self._tokens is not None:
+            size += self.source_bytes * TOKEN_BYTES_PER_SOURCE_BYTE
+        return size
+
+    @property
+    def tree(self) -> ast.Module:
+        """
+        The parsed AST. Raises SyntaxError if the source does not parse.
+        """
+        if self._tree_error is not None:
+            raise self._tree_error
+        if self._tree is None:
+            try:
+                self._tree = self._load_tree()
+            except (SyntaxError, ValueError) as e:
+                self._tree_error = e
+                raise
+            self._resized()
+        return self._tree
+
+    @property
+    def tokens(self) -> List[tokenize.TokenInfo]:
+        """
+        The token stream. Raises tokenize.TokenError or IndentationError on bad input.
+        """
+        if self._tokens_error is not None:
+            raise self._tokens_error
+        if self._tokens is None:
+            try:
+                self._tokens = list(tokenize.generate_tokens(io.StringIO(self.source).readline))
+            except (tokenize.TokenError, SyntaxError) as e:
+                self._tokens_error = e
+                raise
+            self._resized()
+        return self._tokens
+
+    def _pickle_path(self) -> Path:
+        # AST pickles are only valid for the interpreter version that produced them
+        version = f"py{sys.version_info.major}{sys.version_info.minor}"
+        return self.cache_dir / f"{self.content_hash}.{version}.ast.pickle"
+
+    def _load_tree(self) -> ast.Module:
+        filename = str(self.path) if self.path else '<unknown>'
+        if self.cache_dir is None:
+            return ast.parse(self.source, filename=filename)
+
+        pickle_path = self._pickle_path()
+        try:
+            with open(pickle_path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            pass
+
+        tree = ast.parse(self.source, filename=filename)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = pickle_path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(tree, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, pickle_path)
+        except OSError:
+            pass  # The disk cache is best-effort
+        return tree
+
+    def _resized(self):
+        if self._on_resize is not None:
+            self._on_resize(self)
+
+
+class ParseCache:
+    """
+    Per-process cache of ParsedModule entries keyed by content hash, with a
+    path index so unchanged files are not even re-read.
+
+    Entries are evicted least-recently-used first once the estimated size of
+    all entries exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, cache_dir: Optional[Path] = None):
+        self.max_bytes = max_bytes
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._entries: 'OrderedDict[str, ParsedModule]' = OrderedDict()
+        self._entry_sizes: Dict[str, int] = {}
+        # path -> (mtime_ns, size, content_hash)
+        self._path_index: Dict[str, Tuple[int, int, str]] = {}
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: Path) -> ParsedModule:
+        """
+        Return the parsed module for a file, reading it only if it changed on disk.
+
+        Args:
+            path (Path): Path of the Python file.
+
+        Returns:
+            ParsedModule: The cached or newly created entry.
+
+        Raises:
+            OSError: If the file cannot be read.
+        """
+        path = Path(path)
+        key = str(path.resolve())
+        stat = path.stat()
+        with self._lock:
+            indexed = self._path_index.get(key)
+            if indexed and indexed[:2] == (stat.st_mtime_ns, stat.st_size):
+                entry = self._entries.get(indexed[2])
+                if entry is not None:
+                    self.hits += 1
+                    self._entries.move_to_end(indexed[2])
+                    return entry
+
+        source, encoding = decode_source(path.read_bytes())
+        entry = self.get_source(source, path=path, encoding=encoding)
+        with self._lock:
+            self._path_index[key] = (stat.st_mtime_ns, stat.st_size, entry.content_hash)
+        return entry
+
+    def get_source(self, source: str, path: Optional[Path] = None, encoding: str = 'utf-8') -> ParsedModule:
+        """
+        Return the parsed module for source text that is already in memory.
+
+        Args:
+            source (str): Python source text.
+            path (Path, optional): Originating file, used for error messages and invalidate().
+                Recorded on an existing entry that has no path yet.
+            encoding (str): Encoding the source was decoded with.
+
+        Returns:
+            ParsedModule: The cached or newly created entry.
+        """
+        content_hash = hash_source(source)
+        with self._lock:
+            entry = self._entries.get(content_hash)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(content_hash)
+                if entry.path is None and path is not None:
+                    entry.path = Path(path)
+                return entry
+
+            self.misses += 1
+            entry = ParsedModule(source, content_hash, path=path, encoding=encoding, cache_dir=self.cache_dir)
+            entry._on_resize = self._resize
+            self._entries[content_hash] = entry
+            self._entry_sizes[content_hash] = entry.nbytes
+            self._total_bytes += entry.nbytes
+            self._evict()
+            return entry
+
+    def invalidate(self, path: Path) -> int:
+        """
+        Drop the entries of a file, e.g. once it was deleted.
+
+        Args:
+            path (Path): Path of the Python file.
+
+        Returns:
+            int: Number of entries dropped.
+        """
+        key = str(Path(path).resolve())
+        with self._lock:
+            self._path_index.pop(key, None)
+            stale = [content_hash for content_hash, entry in self._entries.items()
+                     if entry.path is not None and str(entry.path.resolve()) == key]
+            for content_hash in stale:
+                self._entries.pop(content_hash)._on_resize = None
+                self._total_bytes -= self._entry_sizes.pop(content_hash)
+            return len(stale)
+
+    def _resize(self, entry: ParsedModule):
+        with self._lock:
+            if self._entries.get(entry.content_hash) is not entry:
+                return  # Already evicted; the caller still holds its own reference
+            self._total_bytes += entry.nbytes - self._entry_sizes[entry.content_hash]
+            self._entry_sizes[entry.content_hash] = entry.nbytes
+            self._evict()
+
+    def _evict(self):
+        # Always keep the most recently used entry, even if it alone exceeds the budget
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            content_hash, entry = self._entries.popitem(last=False)
+            entry._on_resize = None
+            self._total_bytes -= self._entry_sizes.pop(content_hash)
+            self.evictions += 1
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        """
+        Drop all in-memory entries. Pickled ASTs on disk are kept.
+        """
+        with self._lock:
+            for entry in self._entries.values():
+                entry._on_resize = None
+            self._entries.clear()
+            self._entry_sizes.clear()
+            self._path_index.clear()
+            self._total_bytes = 0
+
+
+_default_cache: Optional[ParseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_parse_cache() -> ParseCache:
+    """
+    Return the process-wide parse cache, creating it with default settings on first use.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ParseCache()
+        return _default_cache
+
+
+def configure_parse_cache(max_bytes: int = 256 * 1024 * 1024, cache_dir: Optional[Path] = None) -> ParseCache:
+    """
+    Replace the process-wide parse cache, e.g. to enable on-disk AST pickles.
+
+    Args:
+        max_bytes (int): Eviction budget for the in-memory cache.
+        cache_dir (Path, optional): Directory for pickled ASTs; disabled when None.
+
+    Returns:
+        ParseCache: The new process-wide cache.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        _default_cache = ParseCache(max_bytes=max_bytes, cache_dir=cache_dir)
+        return _default_cache
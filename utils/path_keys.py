@@ -0,0 +1,53 @@
+# utils/path_keys.py
+
+import os
+from pathlib import Path, PurePath, PurePosixPath, PureWindowsPath
+from typing import Optional, Union
+
+# Bumped whenever the key format changes, so stores know to migrate their keys
+PATH_KEY_VERSION = 1
+
+
+def path_key(path: Union[str, PurePath], windows: Optional[bool] = None) -> str:
+    """
+    Canonical key of a project-relative path, the same on every host.
+
+    Windows paths have their backslash separators turned into '/', '.' and
+    empty parts are dropped, and the project root is '.'. Every store, cache
+    and index keys files and folders this way, so a workspace built on Windows
+    is reused as-is on Linux and the other way round. On POSIX a backslash is
+    an ordinary filename character and is kept.
+
+    Args:
+        path (str | PurePath): Project-relative path.
+        windows (bool, optional): Whether the path uses Windows separators. By default
+            true for PureWindowsPath objects, and for strings on a Windows host.
+
+    Returns:
+        str: e.g. 'pkg/module.py'.
+    """
+    if windows is None:
+        windows = isinstance(path, PureWindowsPath) or (not isinstance(path, PurePosixPath) and os.sep == '\\')
+    text = PureWindowsPath(path).as_posix() if windows else str(path)
+    parts = [part for part in text.split('/') if part not in ('', '.')]
+    return '/'.join(parts) or '.'
+
+
+def parent_key(key: Union[str, PurePath]) -> str:
+    """
+    Key of the folder containing a path, '.' for the project root.
+    """
+    key = path_key(key)
+    return key.rsplit('/', 1)[0] if '/' in key else '.'
+
+
+def key_to_path(key: str) -> Path:
+    """
+    Local relative Path of a key, for joining onto the project folder.
+    """
+    key = path_key(key)
+    return Path(*key.split('/')) if key != '.' else Path('.')
+
+
+def is_canonical(key: str) -> bool:
+    return isinstance(key, str) and path_key(key) == key
@@ -0,0 +1,273 @@
+# utils/pipeline.py
+
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from utils.async_io import get_async_io
+
+PENDING = 'pending'
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+FAILED = 'failed'
+
+# Journal entries with no item describe the stage as a whole
+STAGE_ITEM = None
+
+
+class RunJournal:
+    """
+    Durable, append-only record of a pipeline run.
+
+    Every state change of a stage or work item is appended to a JSON-lines file
+    and fsynced before the work it describes starts or is reported finished, so a
+    crash leaves an accurate record of what was done, what failed and what was in
+    flight. Replaying the file restores the latest state of every item.
+
+    Inside a running event loop, amark and amark_many group-commit: entries from
+    every coroutine that marks while an fsync is in progress are written and
+    fsynced together by the next one, in the async I/O pool.
+    """
+
+    def __init__(self, journal_file: Path):
+        self.journal_file = Path(journal_file)
+        self.states: Dict[str, Dict[Optional[str], str]] = {}
+        self._handle = None
+        # Entries waiting for the next group commit, each with the future its caller awaits
+        self._pending: List[Tuple[List[str], asyncio.Future]] = []
+        self._committer: Optional[asyncio.Task] = None
+
+    def open(self, resume: bool = False):
+        """
+        Open the journal for appending.
+
+        Args:
+            resume (bool): Replay and continue the existing journal instead of starting a new one.
+        """
+        self.journal_file.parent.mkdir(parents=True, exist_ok=True)
+        if resume:
+            self._replay()
+        else:
+            self.states = {}
+        self._handle = open(self.journal_file, 'a' if resume else 'w', encoding='utf-8')
+        if resume and self._handle.tell() > 0:
+            with open(self.journal_file, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    # Terminate a torn final line so the next entry starts on its own line
+                    self._handle.write('\n')
+
+    def close(self):
+        if self._handle:
+            self._handle.close()
+            self._handle = None
+
+    def _replay(self):
+        self.states = {}
+        if not self.journal_file.exists():
+            return
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A torn final line from a crash mid-write
+                self.states.setdefault(entry["stage"], {})[entry.get("item")] = entry["state"]
+
+    def mark(self, stage: str, item: Optional[str], state: str, error: str = None):
+        """
+        Durably record a state change.
+
+        Args:
+            stage (str): Stage name.
+            item (str, optional): Work item key, or None for the stage itself.
+            state (str): One of pending, in_flight, done or failed.
+            error (str, optional): Failure description.
+        """
+        self.mark_many(stage, [item], state, error=error)
+
+    def mark_many(self, stage: str, items: List[Optional[str]], state: str, error: str = None):
+        """
+        Durably record the same state change for several items with a single fsync.
+        """
+        self._append(self._entries(stage, items, state, error))
+
+    async def amark(self, stage: str, item: Optional[str], state: str, error: str = None):
+        """
+        Like mark, but the write and fsync run in the async I/O pool, grouped with
+        those of other coroutines. Returns once the entry is fsynced.
+        """
+        await self.amark_many(stage, [item], state, error=error)
+
+    async def amark_many(self, stage: str, items: List[Optional[str]], state: str, error: str = None):
+        """
+        Like mark_many, but group-committed in the async I/O pool. Returns once the entries are fsynced.
+        """
+        committed = asyncio.get_running_loop().create_future()
+        self._pending.append((self._entries(stage, items, state, error), committed))
+        if self._committer is None or self._committer.done():
+            self._committer = asyncio.create_task(self._group_commit())
+        await committed
+
+    async def drain(self):
+        """
+        Wait for entries still being committed, e.g. those of a cancelled amark, before closing.
+        """
+        if self._committer is not None:
+            await asyncio.gather(self._committer, return_exceptions=True)
+
+    async def _group_commit(self):
+        while self._pending:
+            batch, self._pending = self._pending, []
+            try:
+                await get_async_io().run(self._append, [line for lines, _ in batch for line in lines])
+            except Exception as e:
+                for _, committed in batch:
+                    if not committed.done():
+                        committed.set_exception(e)
+                continue
+            for _, committed in batch:
+                if not committed.done():
+                    committed.set_result(None)
+
+    def _entries(self, stage: str, items: List[Optional[str]], state: str, error: Optional[str]) -> List[str]:
+        timestamp = datetime.now().isoformat()
+        lines = []
+        for item in items:
+            entry = {"time": timestamp, "stage": stage, "item": item, "state": state}
+            if error:
+                entry["error"] = error
+            lines.append(json.dumps(entry) + "\n")
+            self.states.setdefault(stage, {})[item] = state
+        return lines
+
+    def _append(self, lines: List[str]):
+        self._handle.writelines(lines)
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+
+    def state(self, stage: str, item: Optional[str] = STAGE_ITEM) -> str:
+        return self.states.get(stage, {}).get(item, PENDING)
+
+    def items_in_state(self, stage: str, state: str) -> List[str]:
+        return [item for item, s in self.states.get(stage, {}).items() if item is not None and s == state]
+
+
+@dataclass
+class Stage:
+    """
+    A named pipeline step. `run` receives the PipelineRunner so it can schedule
+    journaled work items with run_items.
+    """
+    name: str
+    run: Callable[['PipelineRunner'], Awaitable[None]]
+
+
+class PipelineRunner:
+    def __init__(self, stages: List[Stage], journal: RunJournal, logger: logging.Logger,
+                 resume: bool = False, max_concurrency: Optional[int] = None):
+        """
+        Run pipeline stages in order while journaling every stage and work item.
+
+        Args:
+            stages (list): Stages to run, in order.
+            journal (RunJournal): Journal used to record progress.
+            logger (logging.Logger): Logger for progress messages.
+            resume (bool): Skip stages and items the journal already records as done.
+            max_concurrency (int, optional): Limit on concurrently running work items.
+        """
+        self.stages = stages
+        self.journal = journal
+        self.logger = logger
+        self.resume = resume
+        self.max_concurrency = max_concurrency
+
+    async def run(self):
+        """
+        Run every stage. Stops at the first stage that raises, leaving it marked failed.
+        """
+        self.journal.open(resume=self.resume)
+        if self.resume:
+            interrupted = {s.name: self.journal.items_in_state(s.name, IN_FLIGHT) for s in self.stages}
+            for stage_name, items in interrupted.items():
+                if items:
+                    self.logger.warning(f"Resuming {len(items)} interrupted item(s) in stage '{stage_name}'.")
+        try:
+            for stage in self.stages:
+                if self.resume and self.journal.state(stage.name) == DONE:
+                    self.logger.info(f"Stage '{stage.name}' already completed; skipping.")
+                    continue
+                self.logger.info(f"Stage '{stage.name}' started.")
+                await self.journal.amark(stage.name, STAGE_ITEM, IN_FLIGHT)
+                try:
+                    await stage.run(self)
+                except Exception as e:
+                    await self.journal.amark(stage.name, STAGE_ITEM, FAILED, error=str(e))
+                    self.logger.error(f"Stage '{stage.name}' failed: {e}")
+                    raise
+                failed = self.journal.items_in_state(stage.name, FAILED)
+                if failed:
+                    # Later stages still run on what succeeded; --resume retries the failures
+                    await self.journal.amark(stage.name, STAGE_ITEM, FAILED, error=f"{len(failed)} item(s) failed")
+                    self.logger.warning(f"Stage '{stage.name}' completed with {len(failed)} failed item(s).")
+                else:
+                    await self.journal.amark(stage.name, STAGE_ITEM, DONE)
+                    self.logger.info(f"Stage '{stage.name}' completed.")
+        finally:
+            await self.journal.drain()
+            self.journal.close()
+
+    async def run_items(self, stage_name: str, items: Dict[str, Callable[[], Awaitable[None]]]) -> Dict[str, str]:
+        """
+        Run a stage's work items concurrently, journaling each one.
+
+        Items already done in a resumed run are skipped; failed and interrupted items
+        are retried. An item fails if its coroutine raises.
+
+        Args:
+            stage_name (str): Stage the items belong to.
+            items (dict): Mapping of item key to a zero-argument coroutine function.
+
+        Returns:
+            dict: Final state of every item.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+        results: Dict[str, str] = {}
+
+        to_run = {}
+        for key, work in items.items():
+            if self.resume and self.journal.state(stage_name, key) == DONE:
+                results[key] = DONE
+            else:
+                to_run[key] = work
+        await self.journal.amark_many(stage_name, list(to_run), PENDING)
+        if results:
+            self.logger.info(f"Stage '{stage_name}': {len(results)} item(s) already done, {len(to_run)} to run.")
+
+        async def run_one(key, work):
+            if semaphore:
+                await semaphore.acquire()
+            try:
+                await self.journal.amark(stage_name, key, IN_FLIGHT)
+                await work()
+                await self.journal.amark(stage_name, key, DONE)
+                results[key] = DONE
+            except Exception as e:
+                await self.journal.amark(stage_name, key, FAILED, error=str(e))
+                self.logger.error(f"Stage '{stage_name}': item {key} failed: {e}")
+                results[key] = FAILED
+            finally:
+                if semaphore:
+                    semaphore.release()
+
+        await asyncio.gather(*(run_one(key, work) for key, work in to_run.items()))
+
+        failed = [key for key, state in results.items() if state == FAILED]
+        if failed:
+            self.logger.warning(f"Stage '{stage_name}': {len(failed)} item(s) failed; rerun with --resume to retry them.")
+        return results
@@ -5,6 +5,7 @@ import shutil
 import os
 import logging
 from datetime import datetime
+from utils.summary_store import SummaryStore
 
 def setup_logger(log_folder: Path) -> logging.Logger:
     """
@@ -80,18 +81,23 @@ class ProjectManager:
         project_path: Path,
         ignored_dirs: list = None,
         ignored_files: list = None,
-        ignored_path_substrings: list = None
+        ignored_path_substrings: list = None,
+        export_summary_json: bool = False
     ):
         """
         Initialize the ProjectManager with the given project path.
 
         Args:
             project_path (Path): The root path of the project to analyze.
+            export_summary_json (bool): Also write each file summary to code_summaries/<path>.json.
         """
         self.project_path = project_path.resolve()
         self.workspace_folder = Path('./workspace').resolve()
         self.analysis_folder = self.workspace_folder / self.project_path.name
         self.code_summary_folder = self.analysis_folder / "code_summaries"
+        self.summary_store_file = self.analysis_folder / "code_summaries.sqlite"
+        self.export_summary_json = export_summary_json
+        self._summary_store = None
         # Remove logger initialization from here
         # self.logger = setup_logger(self.analysis_folder)
         # self.logger.info(f"ProjectManager initialized for project: {self.project_path}")
@@ -133,6 +139,7 @@ class ProjectManager:
                 # Close the logger before deleting
                 self.close_logger()
                 shutil.rmtree(self.analysis_folder)
+                self._summary_store = None
                 self.logger.info(f"Removed existing analysis folder at {self.analysis_folder}")
         else:
             self.logger.info(f"Creating workspace folder at {self.workspace_folder}")
@@ -180,27 +187,55 @@ class ProjectManager:
         filtered_py_files = []
 
         for py_file in all_py_files:
-            relative_path = py_file.relative_to(self.project_path)
-
-            # Check for ignored directories
-            if any(part in ignored_dirs for part in py_file.parts):
-                self.logger.debug(f"Ignoring {py_file} because it is in an ignored directory.")
-                continue
-
-            # Check for ignored file names
-            if py_file.name in ignored_files:
-                self.logger.debug(f"Ignoring {py_file} because it is an ignored file.")
-                continue
-
-            # Check for ignored path substrings
-            if any(substring in str(relative_path) for substring in ignored_path_substrings):
-                self.logger.debug(f"Ignoring {py_file} because its path contains an ignored substring.")
+            if self.is_ignored(py_file, ignored_dirs, ignored_files, ignored_path_substrings):
                 continue
 
             filtered_py_files.append(py_file)
 
         # self.logger.info(f"Found {len(filtered_py_files)} Python files after applying ignore filters.")
         return filtered_py_files
+
+    def is_ignored(
+        self,
+        py_file: Path,
+        ignored_dirs: list = None,
+        ignored_files: list = None,
+        ignored_path_substrings: list = None
+    ) -> bool:
+        """
+        Check a single file against the ignore patterns used by get_all_python_files.
+
+        Args:
+            py_file (Path): Absolute path of the file inside the project folder.
+            ignored_dirs (list, optional): Directory names to ignore. Defaults to the project's list.
+            ignored_files (list, optional): File names to ignore. Defaults to the project's list.
+            ignored_path_substrings (list, optional): Path substrings to ignore. Defaults to the project's list.
+
+        Returns:
+            bool: True if the file should be skipped.
+        """
+        ignored_dirs = ignored_dirs if ignored_dirs else self.ignored_dirs
+        ignored_files = ignored_files if ignored_files else self.ignored_files
+        ignored_path_substrings = ignored_path_substrings if ignored_path_substrings else self.ignored_path_substrings
+
+        relative_path = py_file.relative_to(self.project_path)
+
+        # Check for ignored directories
+        if any(part in ignored_dirs for part in py_file.parts):
+            self.logger.debug(f"Ignoring {py_file} because it is in an ignored directory.")
+            return True
+
+        # Check for ignored file names
+        if py_file.name in ignored_files:
+            self.logger.debug(f"Ignoring {py_file} because it is an ignored file.")
+            return True
+
+        # Check for ignored path substrings
+        if any(substring in str(relative_path) for substring in ignored_path_substrings):
+            self.logger.debug(f"Ignoring {py_file} because its path contains an ignored substring.")
+            return True
+
+        return False
     def get_project_folder(self) -> Path:
         """
         Return the path to the project folder.
@@ -228,11 +263,27 @@ class ProjectManager:
         """
         return self.code_summary_folder
 
-    
+    @property
+    def summary_store(self) -> SummaryStore:
+        """
+        The store holding every file summary, opened on first use.
+
+        Per-file JSON summaries left in the code summaries folder by earlier
+        versions are imported when the store is first created.
+        """
+        if self._summary_store is None:
+            self._summary_store = SummaryStore(
+                self.summary_store_file,
+                export_folder=self.code_summary_folder if self.export_summary_json else None,
+                import_folder=self.code_summary_folder,
+            )
+        return self._summary_store
+
 
     def get_code_summary_file_path(self, relative_path: Path) -> Path:
         """
-        Given a file's relative path, return the corresponding code summary file path.
+        Given a file's relative path, return the path its summary is exported to
+        when export_summary_json is set.
 
         Args:
             relative_path (Path): Relative path of the original Python file from the project root.
@@ -263,6 +314,7 @@ class ProjectManager:
         if self.analysis_folder.exists():
             self.logger.info(f"Cleaning analysis folder at {self.analysis_folder}")
             shutil.rmtree(self.analysis_folder)
+            self._summary_store = None
             self.logger.info(f"Removed analysis folder at {self.analysis_folder}")
         else:
             self.logger.info(f"No analysis folder found at {self.analysis_folder} to clean.")
@@ -286,11 +338,11 @@ class ProjectManager:
 
     def get_all_code_summary_files(self) -> list:
         """
-        Recursively retrieve all code summary JSON files in the code summaries folder.
+        Retrieve the files that have a summary in the summary store.
 
         Returns:
-            list: List of Path objects representing code summary JSON files.
+            list: Project-relative POSIX paths of the summarized files, sorted.
         """
-        summary_files = list(self.code_summary_folder.rglob('*.json'))
-        self.logger.info(f"Found {len(summary_files)} code summary JSON files.")
+        summary_files = self.summary_store.paths()
+        self.logger.info(f"Found {len(summary_files)} code summaries.")
         return summary_files
@@ -0,0 +1,264 @@
+# utils/project_watcher.py
+
+import asyncio
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Set
+
+from utils.project_manager import ProjectManager
+from utils.dependency_analyzer import DependencyAnalyzer
+from utils.parse_cache import get_parse_cache
+from utils.artifact_graph import file_node
+from utils.async_io import get_async_io
+from utils.path_keys import path_key
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:  # Optional dependency; polling is used instead
+    INotify = None
+    inotify_flags = None
+
+
+class ProjectWatcher:
+    def __init__(
+        self,
+        project_manager: ProjectManager,
+        document_generator,
+        dependency_analyzer: DependencyAnalyzer,
+        preprocess: Optional[Callable[[str], str]] = None,
+        debounce_seconds: float = 1.0,
+        poll_interval: float = 2.0,
+        use_inotify: bool = True,
+    ):
+        """
+        Keep code summaries, folder summaries and project_structure.json in sync
+        with the working tree.
+
+        Args:
+            project_manager (ProjectManager): Manager for project-related operations.
+            document_generator (DocumentGenerator): Generator used to re-summarize files and folders.
+            dependency_analyzer (DependencyAnalyzer): Analyzer whose project_data is updated per file.
+            preprocess (callable, optional): Applied to the source before summarizing, e.g. remove_comments.
+            debounce_seconds (float): Quiet period to wait for before processing a batch of changes.
+            poll_interval (float): Scan interval when inotify is unavailable.
+            use_inotify (bool): Set to False to force polling.
+        """
+        self.project_manager = project_manager
+        self.document_generator = document_generator
+        self.dependency_analyzer = dependency_analyzer
+        self.preprocess = preprocess or (lambda code: code)
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify and INotify is not None
+        self.logger = project_manager.logger
+        self.project_path = project_manager.get_project_folder()
+        self.structure_file = project_manager.get_analysis_folder() / "project_structure.json"
+        self.folder_summaries_file = project_manager.get_analysis_folder() / "folder_summaries.json"
+        self.parse_cache = get_parse_cache()
+        # Analysis, reads and writes run here so LLM requests in flight are not stalled
+        self.async_io = get_async_io()
+
+        self._pending: Set[Path] = set()
+        self._changed = asyncio.Event()
+        self._stopped = False
+        self._inotify = None
+        self._watch_dirs: Dict[int, Path] = {}
+
+    async def run(self):
+        """
+        Watch the project until stop() is called, processing debounced batches of changes.
+        """
+        await self.async_io.run(self._load_project_structure)
+        if self.use_inotify:
+            self._start_inotify()
+            self.logger.info(f"Watching {self.project_path} with inotify ({len(self._watch_dirs)} directories).")
+            watcher_task = None
+        else:
+            self.logger.info(f"Watching {self.project_path} by polling every {self.poll_interval}s.")
+            watcher_task = asyncio.create_task(self._poll())
+
+        try:
+            while not self._stopped:
+                await self._changed.wait()
+                # Wait until the tree has been quiet for debounce_seconds
+                while True:
+                    self._changed.clear()
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), timeout=self.debounce_seconds)
+                    except asyncio.TimeoutError:
+                        break
+                if self._stopped:
+                    break
+                batch, self._pending = self._pending, set()
+                await self.process_changes(batch)
+        finally:
+            if watcher_task:
+                watcher_task.cancel()
+            self._stop_inotify()
+
+    def stop(self):
+        """
+        Ask run() to return after the batch it is currently processing.
+        """
+        self._stopped = True
+        self._changed.set()
+
+    def notify(self, path: Path):
+        """
+        Queue a changed path for the next batch.
+        """
+        self._pending.add(Path(path))
+        self._changed.set()
+
+    async def process_changes(self, paths: Iterable[Path]):
+        """
+        Re-analyze and re-summarize the given files, then refresh their folders.
+
+        Args:
+            paths (iterable): Changed, created or deleted file paths.
+        """
+        start_time = datetime.now()
+        touched_folders = set()
+        summary_tasks = []
+
+        for path in sorted(set(paths)):
+            if path.suffix != '.py' or self.project_manager.is_ignored(path):
+                continue
+            relative_path = self.project_manager.get_relative_path(path)
+            touched_folders.add(relative_path.parent)
+
+            if path.exists():
+                self.logger.info(f"Change detected: {relative_path}")
+                await self.async_io.run(self.dependency_analyzer.analyze_file, path)
+                try:
+                    code = await self.async_io.run(self._load_code, path)
+                except OSError as e:
+                    self.logger.error(f"Failed to read {path}: {e}")
+                    continue
+                if code.strip():
+                    summary_tasks.append(
+                        self.document_generator.generate_summary(relative_path, code, overwrite=True)
+                    )
+            else:
+                self.logger.info(f"Deletion detected: {relative_path}")
+                self.dependency_analyzer.project_data.pop(path_key(relative_path), None)
+                self.parse_cache.invalidate(path)
+                await self.async_io.run(self.project_manager.summary_store.delete, relative_path)
+                self.document_generator.artifact_graph.remove(file_node(relative_path))
+
+        if not touched_folders:
+            return
+
+        await self.async_io.run(self.dependency_analyzer.write_to_json, self.structure_file)
+        if summary_tasks:
+            await asyncio.gather(*summary_tasks)
+            await self.async_io.run(self.document_generator.artifact_graph.save)
+        await self._refresh_folder_summaries(touched_folders)
+
+        duration = (datetime.now() - start_time).total_seconds()
+        self.logger.info(f"Processed {len(touched_folders)} folder(s) in {duration:.2f} seconds.")
+
+    async def _refresh_folder_summaries(self, folders: Set[Path]):
+        if not self.folder_summaries_file.exists():
+            self.logger.info("No folder_summaries.json yet; skipping folder refresh.")
+            return
+        folder_summaries = await self.async_io.read_json(self.folder_summaries_file)
+
+        for folder in sorted(folders, key=lambda p: len(p.parts), reverse=True):
+            await self.document_generator.refresh_folder_summary(folder_summaries, folder)
+
+        await self.async_io.write_json(self.folder_summaries_file, folder_summaries)
+        self.logger.info(f"Folder summaries updated in {self.folder_summaries_file}")
+
+    def _load_code(self, path: Path) -> str:
+        return self.preprocess(self.parse_cache.get(path).source)
+
+    def _load_project_structure(self):
+        if self.structure_file.exists():
+            with open(self.structure_file, 'r', encoding='utf-8') as f:
+                # Keys are re-canonicalized so a structure file written on another OS still matches
+                self.dependency_analyzer.project_data = {self._structure_key(key): value
+                                                         for key, value in json.load(f).items()}
+        else:
+            self.dependency_analyzer.analyze_project()
+            self.dependency_analyzer.write_to_json(self.structure_file)
+
+    def _structure_key(self, key: str) -> str:
+        """
+        Path key of a structure file entry. Backslashes are Windows separators unless
+        they belong to the name of an existing file.
+        """
+        windows = '\\' in key and not (self.project_path / key).exists()
+        return path_key(key, windows or None)
+
+    # ---- Polling ---------------------------------------------------------------
+
+    def _snapshot(self) -> Dict[Path, int]:
+        snapshot = {}
+        for py_file in self.project_manager.get_all_python_files():
+            try:
+                snapshot[py_file] = py_file.stat().st_mtime_ns
+            except OSError:
+                continue  # Removed between listing and stat
+        return snapshot
+
+    async def _poll(self):
+        previous = await asyncio.to_thread(self._snapshot)
+        while not self._stopped:
+            await asyncio.sleep(self.poll_interval)
+            current = await asyncio.to_thread(self._snapshot)
+            for path in current.keys() | previous.keys():
+                if current.get(path) != previous.get(path):
+                    self.notify(path)
+            previous = current
+
+    # ---- inotify ---------------------------------------------------------------
+
+    def _watch_mask(self):
+        return (inotify_flags.CLOSE_WRITE | inotify_flags.CREATE | inotify_flags.DELETE |
+                inotify_flags.MOVED_FROM | inotify_flags.MOVED_TO)
+
+    def _start_inotify(self):
+        self._inotify = INotify()
+        self._add_watches(self.project_path)
+        asyncio.get_running_loop().add_reader(self._inotify.fileno(), self._read_inotify_events)
+
+    def _stop_inotify(self):
+        if self._inotify is not None:
+            asyncio.get_running_loop().remove_reader(self._inotify.fileno())
+            self._inotify.close()
+            self._inotify = None
+
+    def _add_watches(self, directory: Path):
+        for root, dirs, _ in os.walk(directory):
+            dirs[:] = [d for d in dirs if d not in self.project_manager.ignored_dirs]
+            try:
+                wd = self._inotify.add_watch(root, self._watch_mask())
+            except OSError as e:
+                self.logger.warning(f"Cannot watch {root}: {e}")
+                continue
+            self._watch_dirs[wd] = Path(root)
+
+    def _read_inotify_events(self):
+        for event in self._inotify.read(timeout=0):
+            directory = self._watch_dirs.get(event.wd)
+            if directory is None or not event.name:
+                continue
+            path = directory / event.name
+            if event.mask & inotify_flags.ISDIR:
+                if event.mask & (inotify_flags.CREATE | inotify_flags.MOVED_TO):
+                    # New directories need their own watches; files may already be inside
+                    self._add_watches(path)
+                    for py_file in path.rglob('*.py'):
+                        self.notify(py_file)
+                elif event.mask & (inotify_flags.DELETE | inotify_flags.MOVED_FROM):
+                    # Files under a removed directory produce no events of their own
+                    for relative_path in list(self.dependency_analyzer.project_data):
+                        file_path = self.project_path / relative_path
+                        if path in file_path.parents:
+                            self.notify(file_path)
+                continue
+            if path.suffix == '.py':
+                self.notify(path)
@@ -0,0 +1,127 @@
+# utils/prompt_builder.py
+
+from dataclasses import dataclass
+from typing import Dict, List
+
+from utils.prompts import file_summary_instructions, file_summary_code_template
+
+
+@dataclass
+class PromptSegment:
+    text: str
+    cacheable: bool = False
+
+
+class Prompt(str):
+    """
+    A prompt assembled from segments, static ones first.
+
+    It is a plain string to every caller, so existing clients and retries keep
+    working. Clients that support prompt caching look at the segments: the
+    leading cacheable segments form a prefix that is byte-identical across
+    requests and can be served from the provider's prefix / KV cache.
+    """
+
+    def __new__(cls, segments: List[PromptSegment]):
+        prompt = super().__new__(cls, "".join(segment.text for segment in segments))
+        prompt.segments = list(segments)
+        return prompt
+
+    def _split(self) -> int:
+        for index, segment in enumerate(self.segments):
+            if not segment.cacheable:
+                return index
+        return len(self.segments)
+
+    @property
+    def cacheable_prefix(self) -> str:
+        """
+        Text of the leading cacheable segments.
+        """
+        return "".join(segment.text for segment in self.segments[:self._split()])
+
+    @property
+    def variable_text(self) -> str:
+        """
+        Text after the cacheable prefix.
+        """
+        return "".join(segment.text for segment in self.segments[self._split():])
+
+    def to_anthropic_content(self) -> List[Dict]:
+        """
+        Message content blocks with a cache breakpoint after the cacheable prefix.
+
+        Anthropic only caches prefixes above the model's minimum length (1024
+        tokens for Sonnet); shorter prefixes are simply billed as normal input.
+        """
+        split = self._split()
+        blocks = []
+        if split:
+            blocks.append({
+                "type": "text",
+                "text": self.cacheable_prefix,
+                "cache_control": {"type": "ephemeral"},
+            })
+        if self.variable_text:
+            blocks.append({"type": "text", "text": self.variable_text})
+        return blocks
+
+
+def build_file_summary_prompt(python_file_name: str, code: str) -> Prompt:
+    """
+    Build the file summary prompt with the shared instructions as a cacheable prefix.
+
+    Args:
+        python_file_name (str): Name of the file being summarized.
+        code (str): File contents.
+
+    Returns:
+        Prompt: Equal to file_summary_prompt formatted with the same arguments.
+    """
+    return Prompt([
+        PromptSegment(file_summary_instructions.format(), cacheable=True),
+        PromptSegment(file_summary_code_template.format(python_file_name=python_file_name, code=code)),
+    ])
+
+
+class PromptCacheStats:
+    """
+    Per-run totals of how much prompt input was served from provider caches.
+
+    Clients report usage with Anthropic's naming: input_tokens counts uncached
+    prompt tokens, cache_read_input_tokens the tokens read from the cache and
+    cache_creation_input_tokens the tokens written to it. Ollama does not report
+    cache hits, but its prefill time (prefill_seconds) drops when its KV cache is reused.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.input_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+        self.prefill_seconds = 0.0
+
+    def record(self, usage: Dict):
+        self.requests += 1
+        self.input_tokens += usage.get("input_tokens", 0) or 0
+        self.cache_read_tokens += usage.get("cache_read_input_tokens", 0) or 0
+        self.cache_write_tokens += usage.get("cache_creation_input_tokens", 0) or 0
+        self.prefill_seconds += usage.get("prefill_seconds", 0.0) or 0.0
+
+    @property
+    def prompt_tokens(self) -> int:
+        return self.input_tokens + self.cache_read_tokens + self.cache_write_tokens
+
+    @property
+    def cached_ratio(self) -> float:
+        return self.cache_read_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def report(self) -> str:
+        report = (
+            f"Prompt cache: {self.requests} requests, {self.prompt_tokens} prompt tokens, "
+            f"{self.cache_read_tokens} read from cache ({self.cached_ratio:.1%}), "
+            f"{self.cache_write_tokens} written to cache"
+        )
+        if self.prefill_seconds:
+            report += f", {self.prefill_seconds:.1f}s prefill"
+        return report
@@ -1,11 +1,7 @@
 # utils/promtps.py 
-file_summary_prompt = '''
-Generate a concise JSON summary of the provided Python file with the following structure:
-```python
-{code}
-```
-Translate this into following concise JSON format
- ```json
+# Static instructions come first and the file comes last, so every file summary request
+# shares the same prompt prefix and providers can reuse its cached prefill.
+file_summary_schema = ''' ```json
 {{
   "file": "filename.py",
   "purpose": "Brief description of the script's overall purpose",
@@ -41,9 +37,23 @@ Translate this into following concise JSON format
   "notes":"Additional information that was not captured by above keys"
 }}
 ```
-Ensure the JSON is properly formatted by strictly providing information for the fields desired.
-
 '''
+file_summary_instructions = '''
+Generate a concise JSON summary of the Python file given at the end of this message, using the following concise JSON format
+''' + file_summary_schema + '''Ensure the JSON is properly formatted by strictly providing information for the fields desired.
+'''
+# Several small files in one request; the reply is a JSON array with one summary per file
+packed_file_summary_instructions = '''
+Generate a concise JSON summary of each Python file given at the end of this message. Reply with a single JSON array containing one object per file, in the order the files are given. Every object must use the following concise JSON format, with "file" set to the file's path exactly as given
+''' + file_summary_schema + '''Ensure the JSON array is properly formatted by strictly providing information for the fields desired.
+'''
+file_summary_code_template = '''
+Python file `{python_file_name}`:
+```python
+{code}
+```
+'''
+file_summary_prompt = file_summary_instructions + file_summary_code_template
 # For file_summary_prompt
 # Additional Fields That Could Be Helpful:
 
@@ -163,6 +173,20 @@ Include the main interactions between classes and functions.
 Please output only the PlantUML code and nothing else.
 """
 
+annotate_sequence_diagram_prompt = """As a Software Architect, annotate the following sequence diagram, which was generated from the project's call graph.
+
+Project overview:
+{project_overview}
+
+Sequence diagram:
+{diagram}
+
+For each of these functions, write a short note (at most 12 words) on what it does in this flow:
+{function_ids}
+
+Respond with a JSON object inside ```json code fences mapping function ids to notes, e.g. {{"module.function": "Loads the configuration"}}. Omit functions you cannot describe.
+"""
+
 
 
 
@@ -0,0 +1,275 @@
+# utils/sequence_diagram.py
+
+import builtins
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils.path_keys import path_key
+
+# Entry points used when none is requested
+DEFAULT_ENTRY_NAME = 'main'
+# Calls on these names never reach project code
+BUILTIN_NAMES = set(dir(builtins))
+STDLIB_MODULES = set(getattr(sys, 'stdlib_module_names', ())) | set(sys.builtin_module_names)
+# Methods of builtin types and paths; a call like x.get() or x.resolve() on an object of unknown
+# type is more likely one of these than the project method that happens to share the name
+COMMON_METHODS = {name for kind in (str, bytes, list, dict, set, tuple, Path) for name in dir(kind)}
+
+
+class CallGraph:
+    """
+    Function-level call graph built from DependencyVisitor output.
+
+    Call names are recorded as written (`helper`, `self.load`, `json.dumps`,
+    `generator.generate_summary`); resolve() maps them to project functions
+    using the caller's class and its bases, the caller's module, its imports
+    and, as a last resort, a project-wide unique name. Calls that do not
+    resolve (standard library, third-party packages, ambiguous names) are
+    left out of the graph.
+    """
+
+    def __init__(self, project_data: Dict):
+        """
+        Args:
+            project_data (dict): Relative file path -> file info, as written by
+                DependencyAnalyzer with a profile that collects calls.
+        """
+        self.functions: Dict[str, Dict] = {}
+        self.by_name = defaultdict(list)
+        self.classes = defaultdict(list)  # Class name -> modules defining it
+        self.class_bases: Dict[tuple, List[str]] = {}
+        self.imports: Dict[str, List[str]] = {}
+        for file_path, file_info in project_data.items():
+            if not isinstance(file_info, dict):
+                continue
+            module = self.module_name(file_path)
+            self.imports[module] = file_info.get('imports', [])
+            for name, info in file_info.get('functions', {}).items():
+                self._add(module, None, name, info)
+            for class_name, class_info in file_info.get('classes', {}).items():
+                self.classes[class_name].append(module)
+                self.class_bases[(module, class_name)] = class_info.get('bases', [])
+                for name, info in class_info.get('methods', {}).items():
+                    self._add(module, class_name, name, info)
+
+    @staticmethod
+    def module_name(file_path: str) -> str:
+        posix_path = path_key(file_path)
+        if posix_path.endswith('.py'):
+            posix_path = posix_path[:-3]
+        module = posix_path.replace('/', '.')
+        return module[:-len('.__init__')] if module.endswith('.__init__') else module
+
+    def _add(self, module: str, class_name: Optional[str], name: str, info: Dict):
+        function_id = '.'.join(part for part in (module, class_name, name) if part)
+        self.functions[function_id] = {
+            "id": function_id,
+            "module": module,
+            "class": class_name,
+            "name": name,
+            "calls": list(dict.fromkeys(info.get('calls', []))),
+        }
+        self.by_name[name].append(function_id)
+
+    def _modules_matching(self, dotted: str) -> List[str]:
+        # Relative imports are recorded without their leading dots, so match by suffix
+        return [module for module in self.imports if module == dotted or module.endswith('.' + dotted)]
+
+    def _class_module(self, class_name: str, near: str) -> Optional[str]:
+        modules = self.classes.get(class_name, [])
+        if near in modules:
+            return near
+        return modules[0] if len(modules) == 1 else None
+
+    def _method(self, module: str, class_name: str, name: str, depth: int = 0) -> Optional[str]:
+        function_id = f"{module}.{class_name}.{name}"
+        if function_id in self.functions:
+            return function_id
+        if depth >= 5:
+            return None
+        for base in self.class_bases.get((module, class_name), []):
+            base_name = base.split('.')[-1]
+            base_module = self._class_module(base_name, module)
+            if base_module:
+                found = self._method(base_module, base_name, name, depth + 1)
+                if found:
+                    return found
+        return None
+
+    def _in_module(self, module: str, name: str) -> Optional[str]:
+        if f"{module}.{name}" in self.functions:
+            return f"{module}.{name}"
+        if module in self.classes.get(name, []):
+            return self._method(module, name, '__init__')
+        return None
+
+    def _unique(self, name: str) -> Optional[str]:
+        candidates = self.by_name.get(name, [])
+        return candidates[0] if len(candidates) == 1 else None
+
+    def _unique_method(self, name: str) -> Optional[str]:
+        # Called on an object whose type is unknown
+        return None if name in COMMON_METHODS else self._unique(name)
+
+    def resolve(self, caller: Dict, call: str) -> Optional[str]:
+        """
+        The id of the project function a call made by `caller` reaches, or None.
+        """
+        parts = call.split('.')
+        name = parts[-1]
+        module = caller["module"]
+        if parts[0] in STDLIB_MODULES or (len(parts) == 1 and name in BUILTIN_NAMES):
+            return None
+        if parts[0] in ('self', 'cls') and caller["class"]:
+            if len(parts) == 2:
+                return self._method(module, caller["class"], name)
+            return self._unique_method(name)  # self.<attribute>.<method>(): the attribute's type is unknown
+        if len(parts) == 1:
+            found = self._in_module(module, name)
+            if found:
+                return found
+            for imported in self.imports.get(module, []):
+                if imported.split('.')[-1] == name and '.' in imported:
+                    for imported_module in self._modules_matching(imported.rsplit('.', 1)[0]):
+                        found = self._in_module(imported_module, name)
+                        if found:
+                            return found
+            return self._unique(name)
+        receiver = parts[-2]
+        class_module = self._class_module(receiver, module)
+        if class_module:
+            return self._method(class_module, receiver, name)
+        for imported in self.imports.get(module, []):
+            if imported == receiver or imported.endswith('.' + receiver):
+                for imported_module in self._modules_matching(imported):
+                    found = self._in_module(imported_module, name)
+                    if found:
+                        return found
+        if receiver[:1].isupper():
+            return None  # A class from outside the project
+        return self._unique_method(name)
+
+    def find(self, spec: str) -> Optional[str]:
+        """
+        The function named by an entry point spec: 'module:function', 'module:Class.method',
+        a function id, or a name that is unique in the project.
+        """
+        if ':' in spec:
+            module_part, name = spec.split(':', 1)
+            function_id = f"{self.module_name(module_part)}.{name}"
+            return function_id if function_id in self.functions else None
+        if spec in self.functions:
+            return spec
+        return self._unique(spec.split('.')[-1]) if '.' not in spec else \
+            next((fid for fid in self.functions if fid.endswith('.' + spec)), None)
+
+    def entry_points(self, limit: int = 5) -> List[str]:
+        """
+        Module-level functions named main; failing that, the uncalled function making the most calls.
+        """
+        mains = sorted(fid for fid, function in self.functions.items()
+                       if function["name"] == DEFAULT_ENTRY_NAME and function["class"] is None)
+        if mains:
+            return mains[:limit]
+        called = {self.resolve(function, call) for function in self.functions.values() for call in function["calls"]}
+        roots = [fid for fid, function in self.functions.items() if fid not in called and function["calls"]]
+        return sorted(roots, key=lambda fid: (-len(self.functions[fid]["calls"]), fid))[:1]
+
+
+class SequenceDiagramBuilder:
+    """
+    Renders PlantUML sequence diagrams by walking a CallGraph from an entry point.
+
+    Each function is expanded once per diagram; later calls to it, and
+    recursive calls, appear as messages without their sub-calls. Depth,
+    per-function breadth and the total number of messages are capped so
+    diagrams of large projects stay readable and renderable.
+    """
+
+    def __init__(self, graph: CallGraph, max_depth: int = 4, max_calls_per_function: int = 8,
+                 max_messages: int = 150):
+        self.graph = graph
+        self.max_depth = max_depth
+        self.max_calls_per_function = max_calls_per_function
+        self.max_messages = max_messages
+
+    def build(self, entry_id: str, notes: Dict[str, str] = None) -> str:
+        """
+        Sequence diagram starting at a function.
+
+        Args:
+            entry_id (str): Id of the entry function (see CallGraph.find).
+            notes (dict, optional): Function id -> note shown where the function is first called.
+
+        Returns:
+            str: A complete @startuml ... @enduml script.
+        """
+        self._participants: Dict[str, str] = {}
+        self._classes = set()
+        self._lines: List[str] = []
+        self._expanded = {entry_id}
+        self.functions_shown = [entry_id]
+        self._messages = 0
+        self._notes = notes or {}
+        entry = self.graph.functions[entry_id]
+        participant = self._participant(entry)
+        self._lines.append(f"[-> {participant} : {entry['name']}()")
+        self._note(entry_id, participant)
+        self._lines.append(f"activate {participant}")
+        self._walk(entry_id, 1, (entry_id,))
+        self._lines.append(f"deactivate {participant}")
+
+        header = ["@startuml", f"title Call sequence from {entry_id}", "autoactivate off"]
+        labels = {key: key.rpartition('.')[2] if key in self._classes else key for key in self._participants}
+        shared = {label for label in labels.values() if list(labels.values()).count(label) > 1}
+        header += [f'participant "{key if labels[key] in shared else labels[key]}" as {alias}'
+                   for key, alias in self._participants.items()]
+        return "\n".join(header + self._lines + ["@enduml"]) + "\n"
+
+    def _participant(self, function: Dict) -> str:
+        # Same-named classes in different modules are different participants
+        key = function["module"]
+        if function["class"]:
+            key = f"{key}.{function['class']}"
+            self._classes.add(key)
+        if key not in self._participants:
+            self._participants[key] = f"P{len(self._participants)}"
+        return self._participants[key]
+
+    def _note(self, function_id: str, participant: str):
+        if function_id in self._notes:
+            self._lines.append(f"note right of {participant} : {self._notes.pop(function_id)}")
+
+    def _walk(self, function_id: str, depth: int, stack: tuple):
+        caller = self.graph.functions[function_id]
+        source = self._participant(caller)
+        targets = list(dict.fromkeys(
+            target for target in (self.graph.resolve(caller, call) for call in caller["calls"]) if target
+        ))
+        if depth > self.max_depth:
+            if targets:
+                self._lines.append(f"note over {source} : {len(targets)} calls below the depth limit")
+            return
+        for index, target in enumerate(targets):
+            if index >= self.max_calls_per_function or self._messages >= self.max_messages:
+                self._lines.append(f"note over {source} : {len(targets) - index} more calls not shown")
+                return
+            callee = self.graph.functions[target]
+            destination = self._participant(callee)
+            self._messages += 1
+            label = "<<create>>" if callee["name"] == '__init__' else f"{callee['name']}()"
+            self._lines.append(f"{source} -> {destination} : {label}")
+            if target not in self.functions_shown:
+                self.functions_shown.append(target)
+            self._note(target, destination)
+            if target in stack:
+                self._lines.append(f"note right of {destination} : recursive")
+                continue
+            if target in self._expanded:
+                continue
+            self._expanded.add(target)
+            self._lines.append(f"activate {destination}")
+            self._walk(target, depth + 1, stack + (target,))
+            self._lines.append(f"deactivate {destination}")
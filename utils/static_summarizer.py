@@ -0,0 +1,322 @@
+# utils/static_summarizer.py
+
+import ast
+import logging
+import sys
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils.dependency_analyzer import AnalysisProfile, DependencyVisitor
+from utils.parse_cache import get_parse_cache
+
+# Decorators and base classes that mark a class as a plain data container
+DATA_CLASS_DECORATORS = {'dataclass', 'dataclasses.dataclass', 'attr.s', 'attrs.define', 'attr.define', 'define', 'frozen'}
+DATA_CLASS_BASES = {'Enum', 'IntEnum', 'StrEnum', 'Flag', 'NamedTuple', 'TypedDict', 'BaseModel', 'BaseSettings',
+                    'enum.Enum', 'typing.NamedTuple', 'typing.TypedDict', 'pydantic.BaseModel'}
+
+# Confidence of each kind of module-level statement, lowest wins
+CONFIDENCE = {
+    'empty': 1.0,
+    'import': 0.95,
+    'all': 0.95,
+    'literal': 0.9,
+    'reference': 0.85,
+    'call': 0.8,
+    'documented_data_class': 0.85,
+    'undocumented_data_class': 0.7,
+}
+
+SIMPLE_CALL_NAMES = {'os.getenv', 'os.environ.get', 'getenv', 'Path', 'pathlib.Path', 'int', 'float', 'str',
+                     'bool', 'frozenset', 'set', 'tuple', 'list', 'dict', 'field', 'TypeVar', 'namedtuple',
+                     'logging.getLogger', 're.compile'}
+
+
+@dataclass
+class StaticClassification:
+    kind: str  # 'empty', 're_export', 'constants', 'data_classes' or 'complex'
+    confidence: float
+    reasons: List[str] = field(default_factory=list)
+
+
+def _full_name(node) -> str:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        value = _full_name(node.value)
+        return f"{value}.{node.attr}" if value else node.attr
+    if isinstance(node, ast.Call):
+        return _full_name(node.func)
+    return ""
+
+
+def _value_kind(node) -> Optional[str]:
+    """
+    Classify the right-hand side of a module or class level assignment.
+    """
+    if node is None:
+        return 'literal'
+    try:
+        ast.literal_eval(node)
+        return 'literal'
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        pass
+    if isinstance(node, (ast.Name, ast.Attribute)):
+        return 'reference'
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        kinds = [_value_kind(element) for element in node.elts]
+        return None if None in kinds else max(kinds, key=lambda kind: -CONFIDENCE[kind])
+    if isinstance(node, ast.Dict):
+        if None in node.keys:
+            return None  # {**other}: the contents depend on another value
+        kinds = [_value_kind(element) for element in [*node.keys, *node.values]]
+        return None if None in kinds else max(kinds, key=lambda kind: -CONFIDENCE[kind])
+    if isinstance(node, ast.Call) and _full_name(node.func) in SIMPLE_CALL_NAMES:
+        kinds = [_value_kind(arg) for arg in [*node.args, *(kw.value for kw in node.keywords)]]
+        return None if None in kinds else 'call'
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Div):
+        # Path arithmetic such as BASE_DIR / "data"
+        kinds = [_value_kind(node.left), _value_kind(node.right)]
+        return None if None in kinds else 'call'
+    return None
+
+
+def _is_data_class(node: ast.ClassDef) -> bool:
+    decorators = {_full_name(decorator) for decorator in node.decorator_list}
+    bases = {_full_name(base) for base in node.bases}
+    return bool(decorators & DATA_CLASS_DECORATORS or bases & DATA_CLASS_BASES)
+
+
+def _data_class_body_is_plain(node: ast.ClassDef) -> bool:
+    for statement in node.body:
+        if isinstance(statement, ast.Expr) and isinstance(statement.value, ast.Constant):
+            continue  # Docstring
+        if isinstance(statement, ast.Pass):
+            continue
+        if isinstance(statement, ast.AnnAssign) and _value_kind(statement.value) is not None:
+            continue
+        if isinstance(statement, ast.Assign) and _value_kind(statement.value) is not None:
+            continue
+        return False
+    return True
+
+
+class StaticSummarizer:
+    """
+    Synthesizes file summaries without an LLM for modules that are cheap to
+    describe: empty files, re-export __init__ modules, constant-only
+    configuration and modules of plain data classes (dataclasses, enums,
+    named tuples, typed dicts, pydantic models) whose bodies hold only fields.
+
+    Each module-level statement carries a confidence; the file's confidence is
+    the lowest one, and only files at or above confidence_threshold are
+    summarized statically. Everything else goes to the LLM as before.
+    """
+
+    def __init__(self, project_path: Path, confidence_threshold: float = 0.8,
+                 max_lines: int = 400, logger: Optional[logging.Logger] = None):
+        """
+        Args:
+            project_path (Path): Project root; files are read through the shared parse cache.
+            confidence_threshold (float): Minimum confidence for a static summary.
+            max_lines (int): Files longer than this always go to the LLM.
+            logger (logging.Logger, optional): Logger for decisions.
+        """
+        self.project_path = Path(project_path)
+        self.confidence_threshold = confidence_threshold
+        self.max_lines = max_lines
+        self.logger = logger or logging.getLogger(__name__)
+        self.standard_modules = set(sys.builtin_module_names) | set(getattr(sys, 'stdlib_module_names', ()))
+        self.profile = AnalysisProfile.get('structure')
+        self.metrics = Counter()
+
+    def classify(self, tree: ast.Module, line_count: int = 0) -> StaticClassification:
+        """
+        Decide whether a module can be described from its structure alone.
+
+        Args:
+            tree (ast.Module): Parsed module.
+            line_count (int): Number of source lines.
+
+        Returns:
+            StaticClassification: Kind, confidence and the reasons for it.
+        """
+        if line_count > self.max_lines:
+            return StaticClassification('complex', 0.0, [f"{line_count} lines"])
+
+        body = list(tree.body)
+        if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+                and isinstance(body[0].value.value, str):
+            body = body[1:]  # Module docstring
+
+        kinds = Counter()
+        confidence = CONFIDENCE['empty']
+        reasons = []
+        for statement in body:
+            kind = self._statement_kind(statement)
+            if kind is None:
+                return StaticClassification('complex', 0.0, [f"line {statement.lineno}: {type(statement).__name__}"])
+            kinds[kind] += 1
+            if CONFIDENCE[kind] < confidence:
+                confidence = CONFIDENCE[kind]
+                reasons = [f"line {statement.lineno}: {kind}"]
+
+        if not set(kinds) - {'empty'}:
+            kind = 'empty'
+        elif kinds['documented_data_class'] or kinds['undocumented_data_class']:
+            kind = 'data_classes'
+        elif kinds['literal'] or kinds['reference'] or kinds['call']:
+            kind = 'constants'
+        else:
+            kind = 're_export'
+        return StaticClassification(kind, confidence, reasons)
+
+    def _statement_kind(self, statement) -> Optional[str]:
+        if isinstance(statement, (ast.Import, ast.ImportFrom)):
+            return 'import'
+        if isinstance(statement, ast.Pass):
+            return 'empty'
+        if isinstance(statement, (ast.Assign, ast.AnnAssign)):
+            targets = statement.targets if isinstance(statement, ast.Assign) else [statement.target]
+            if any(isinstance(target, ast.Name) and target.id == '__all__' for target in targets):
+                return 'all'
+            if not all(isinstance(target, ast.Name) for target in targets):
+                return None
+            return _value_kind(statement.value)
+        if isinstance(statement, ast.ClassDef):
+            if not _is_data_class(statement) or not _data_class_body_is_plain(statement):
+                return None
+            return 'documented_data_class' if ast.get_docstring(statement) else 'undocumented_data_class'
+        if isinstance(statement, ast.If) and _full_name(statement.test) in ('TYPE_CHECKING', 'typing.TYPE_CHECKING'):
+            kinds = [self._statement_kind(child) for child in [*statement.body, *statement.orelse]]
+            return None if any(kind not in ('import', 'empty') for kind in kinds) else 'import'
+        if isinstance(statement, ast.Try):
+            # Optional imports: try: import x / except ImportError: x = None
+            children = [*statement.body, *statement.orelse, *(c for h in statement.handlers for c in h.body)]
+            kinds = [self._statement_kind(child) for child in children]
+            return None if None in kinds else 'import'
+        return None
+
+    def summarize(self, relative_path: Path, code: Optional[str] = None) -> Optional[dict]:
+        """
+        Return a schema-conformant summary of a trivial file, or None if the LLM is needed.
+
+        Args:
+            relative_path (Path): File's path relative to the project root.
+            code (str, optional): The file's source as the caller has it; read from disk when None.
+
+        Returns:
+            dict: Summary with the same keys as an LLM-generated one, or None.
+        """
+        relative_path = Path(relative_path)
+        self.metrics['checked'] += 1
+        try:
+            if code is None:
+                parsed = get_parse_cache().get(self.project_path / relative_path)
+            else:
+                parsed = get_parse_cache().get_source(code, path=self.project_path / relative_path)
+            tree = parsed.tree
+        except (OSError, SyntaxError, ValueError):
+            self.metrics['unparseable'] += 1
+            return None
+
+        classification = self.classify(tree, parsed.source.count('\n') + 1)
+        if classification.kind == 'complex':
+            self.metrics['complex'] += 1
+            return None
+        if classification.confidence < self.confidence_threshold:
+            self.metrics['below_threshold'] += 1
+            self.logger.debug(f"Static summary of {relative_path} skipped: confidence {classification.confidence:.2f} "
+                              f"({', '.join(classification.reasons)})")
+            return None
+
+        visitor = DependencyVisitor(self.project_path / relative_path, self.standard_modules,
+                                    self.project_path, profile=self.profile)
+        visitor.analyze_source_code(parsed.source, tree=tree)
+        summary = self._build_summary(relative_path, tree, visitor.file_info, classification)
+        self.metrics['synthesized'] += 1
+        self.metrics[classification.kind] += 1
+        self.logger.info(f"Summarized {relative_path} statically as {classification.kind} "
+                         f"(confidence {classification.confidence:.2f}).")
+        return summary
+
+    def _is_project_import(self, name: str, package_dir: Path) -> bool:
+        # Relative imports reach the visitor without their leading dots, so sibling modules count too
+        top = name.lstrip('.').split('.')[0]
+        return name.startswith('.') or any(
+            (base / top).is_dir() or (base / f"{top}.py").exists() for base in (self.project_path, package_dir)
+        )
+
+    def _build_summary(self, relative_path: Path, tree: ast.Module, file_info: dict,
+                       classification: StaticClassification) -> dict:
+        imports = file_info.get("imports", [])
+        package_dir = (self.project_path / relative_path).parent
+        dependencies = [name for name in imports if self._is_project_import(name, package_dir)]
+        external = [name for name in imports if name not in dependencies]
+        module_docstring = ast.get_docstring(tree)
+
+        constants = []
+        for statement in tree.body:
+            if isinstance(statement, ast.Assign):
+                constants += [target.id for target in statement.targets if isinstance(target, ast.Name)]
+            elif isinstance(statement, ast.AnnAssign) and isinstance(statement.target, ast.Name):
+                constants.append(statement.target.id)
+        exported = [name for name in constants if name != '__all__']
+
+        classes = []
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                docstring = ast.get_docstring(node)
+                classes.append({
+                    "name": node.name,
+                    "class_summary": docstring.splitlines()[0] if docstring else f"Data container {node.name}.",
+                    "attributes": self._class_attributes(node),
+                    "methods": [],
+                })
+
+        names = ', '.join([c["name"] for c in classes] + exported[:10]) or 'nothing'
+        if classification.kind == 'empty':
+            description = "Empty module; marks the directory as a package." if relative_path.name == '__init__.py' \
+                else "Empty module."
+        elif classification.kind == 're_export':
+            exported_names = ', '.join(name.split('.')[-1] for name in imports[:10])
+            description = f"Re-exports {exported_names} for convenient imports."
+        elif classification.kind == 'constants':
+            description = f"Defines module-level constants and configuration values: {names}."
+        else:
+            description = f"Defines data classes: {', '.join(c['name'] for c in classes)}."
+
+        return {
+            "file": relative_path.name,
+            "purpose": module_docstring.splitlines()[0] if module_docstring else description,
+            "main_functionality": description if not module_docstring else f"{module_docstring.strip()}\n{description}",
+            "dependencies": dependencies,
+            "imports": external,
+            "functions": [],
+            "classes": classes,
+            "main": "No main block",
+            "notes": f"Summarized by static analysis ({classification.kind}, confidence {classification.confidence:.2f}); no LLM call was made.",
+        }
+
+    @staticmethod
+    def _class_attributes(node: ast.ClassDef) -> Dict[str, dict]:
+        attributes = {}
+        for statement in node.body:
+            if isinstance(statement, ast.AnnAssign) and isinstance(statement.target, ast.Name):
+                attributes[statement.target.id] = {"type": ast.unparse(statement.annotation), "description": ""}
+            elif isinstance(statement, ast.Assign):
+                for target in statement.targets:
+                    if isinstance(target, ast.Name):
+                        value_type = type(statement.value.value).__name__ \
+                            if isinstance(statement.value, ast.Constant) else ""
+                        attributes[target.id] = {"type": value_type, "description": ""}
+        return attributes
+
+    def report(self) -> str:
+        synthesized = self.metrics['synthesized']
+        checked = self.metrics['checked']
+        kinds = ', '.join(f"{kind}: {self.metrics[kind]}" for kind in ('empty', 're_export', 'constants', 'data_classes')
+                          if self.metrics[kind])
+        return (f"Static summaries: {synthesized} of {checked} files without an LLM call"
+                f"{f' ({kinds})' if kinds else ''}; {self.metrics['below_threshold']} below the confidence threshold")
@@ -0,0 +1,346 @@
+# utils/summary_index.py
+
+import hashlib
+import io
+import json
+import logging
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from utils.artifact_graph import hash_value
+from utils.atomic_io import atomic_write_bytes, atomic_write_json
+
+# Bumped whenever document texts change, so every summary is re-embedded
+INDEX_VERSION = 1
+MATRIX_FILE = "summary_index.npy"
+DOCUMENTS_FILE = "summary_index.json"
+DEFAULT_OLLAMA_URL = "http://localhost:11434/api"
+DEFAULT_OLLAMA_MODEL = "nomic-embed-text"
+# Longest document text embedded; embedding models truncate far below this anyway
+MAX_DOCUMENT_CHARS = 6000
+# Below this many documents a brute-force scan is faster than building an IVF index
+DEFAULT_IVF_THRESHOLD = 50000
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'does', 'for', 'from', 'how', 'in', 'is', 'it', 'of',
+    'on', 'or', 'that', 'the', 'this', 'to', 'what', 'where', 'which', 'with',
+}
+
+
+def _stem(word: str) -> str:
+    # Just enough stemming for retry/retries/retrying/retried to meet
+    for suffix, replacement in (('ies', 'y'), ('ied', 'y'), ('ing', ''), ('ed', ''), ('s', '')):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)] + replacement
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lower-cased, lightly stemmed words of text, with identifiers split at underscores and camel case.
+    """
+    words = re.findall(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+', text)
+    return [_stem(word.lower()) for word in words if word.lower() not in STOPWORDS]
+
+
+class HashingEmbedder:
+    """
+    Embeds text locally by feature hashing its words and word pairs.
+
+    Needs no model or server and gives the same vector for the same text on
+    every machine, which makes it the default. Matches are lexical: "retry
+    logic" finds summaries that talk about retries, not ones that only say
+    "backoff"; OllamaEmbedder gives semantic matches.
+    """
+
+    def __init__(self, dimensions: int = 1024):
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}"
+
+    def _bucket(self, feature: str) -> tuple:
+        digest = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+        return digest % self.dimensions, 1.0 if (digest >> 63) & 1 else -1.0
+
+    def embed_one(self, text: str) -> np.ndarray:
+        words = tokenize(text)
+        features = Counter(words)
+        features.update(f"{first} {second}" for first, second in zip(words, words[1:]))
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature, count in features.items():
+            index, sign = self._bucket(feature)
+            vector[index] += sign * (1.0 + math.log(count))
+        return vector
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        return np.stack([self.embed_one(text) for text in texts]) if texts else \
+            np.zeros((0, self.dimensions), dtype=np.float32)
+
+
+class OllamaEmbedder:
+    """
+    Embeds text with an embedding model served by Ollama (POST /api/embed).
+    """
+
+    def __init__(self, base_url: str = DEFAULT_OLLAMA_URL, model: str = DEFAULT_OLLAMA_MODEL, batch_size: int = 32):
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.batch_size = batch_size
+        self.name = f"ollama-{model}"
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        import aiohttp  # Only needed when embeddings come from a server
+        vectors = []
+        async with aiohttp.ClientSession() as session:
+            for start in range(0, len(texts), self.batch_size):
+                payload = {"model": self.model, "input": texts[start:start + self.batch_size]}
+                async with session.post(f"{self.base_url}/embed", json=payload) as response:
+                    if response.status != 200:
+                        raise RuntimeError(f"Ollama embeddings error: {response.status} - {await response.text()}")
+                    data = await response.json()
+                vectors.extend(data["embeddings"])
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def summary_text(summary: Dict, limit: int = MAX_DOCUMENT_CHARS) -> str:
+    """
+    The strings of a file or folder summary, in order, as one line of text.
+
+    Subfolders are left out; each is a document of its own.
+    """
+    parts = []
+
+    def collect(value):
+        if isinstance(value, str):
+            parts.append(value)
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                if key != 'subfolders':
+                    collect(item)
+        elif isinstance(value, list):
+            for item in value:
+                collect(item)
+
+    collect(summary)
+    return " ".join(" ".join(parts).split())[:limit]
+
+
+def collect_documents(summary_store, folder_summary: Dict = None) -> List[Dict]:
+    """
+    One document per file summary in a SummaryStore and per folder in a folder summary tree.
+
+    Returns:
+        list: Documents with an id, kind ('file' or 'folder'), project-relative
+        POSIX path, the text to embed and the summary itself.
+    """
+    documents = []
+    for path, summary in summary_store.iter_all():
+        documents.append({"id": f"file:{path}", "kind": "file", "path": path,
+                          "text": f"{path} {summary_text(summary)}", "summary": summary})
+
+    def walk(node: Dict, path: str):
+        summary = {key: value for key, value in node.items() if key != 'subfolders'}
+        documents.append({"id": f"folder:{path}", "kind": "folder", "path": path,
+                          "text": f"{path} {summary_text(summary)}", "summary": summary})
+        for subfolder in node.get('subfolders', []):
+            if isinstance(subfolder, dict) and subfolder.get('name'):
+                walk(subfolder, subfolder['name'] if path == '.' else f"{path}/{subfolder['name']}")
+
+    if isinstance(folder_summary, dict):
+        walk(folder_summary, '.')
+    return documents
+
+
+class IVFIndex:
+    """
+    Inverted-file index over unit vectors: rows are bucketed by their nearest
+    spherical k-means centroid, and a query scans only its nprobe nearest buckets.
+    """
+
+    def __init__(self, matrix: np.ndarray, n_lists: int = None, iterations: int = 8, seed: int = 0,
+                 chunk_rows: int = 8192):
+        rows = len(matrix)
+        n_lists = min(rows, n_lists or max(1, int(math.sqrt(rows))))
+        rng = np.random.default_rng(seed)
+        centroids = matrix[rng.choice(rows, n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = self._assign(matrix, centroids, chunk_rows)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, matrix)
+            filled = np.bincount(assignment, minlength=n_lists) > 0
+            centroids[filled] = _normalize(sums[filled])
+        assignment = self._assign(matrix, centroids, chunk_rows)
+        self.centroids = centroids
+        self.lists = [np.flatnonzero(assignment == index) for index in range(n_lists)]
+
+    @staticmethod
+    def _assign(matrix: np.ndarray, centroids: np.ndarray, chunk_rows: int) -> np.ndarray:
+        return np.concatenate([np.argmax(matrix[start:start + chunk_rows] @ centroids.T, axis=1)
+                               for start in range(0, len(matrix), chunk_rows)])
+
+    def candidates(self, vector: np.ndarray, nprobe: int) -> np.ndarray:
+        nearest = np.argsort(-(self.centroids @ vector))[:nprobe]
+        return np.concatenate([self.lists[index] for index in nearest])
+
+
+class SummaryIndex:
+    """
+    Vector index over file and folder summaries, stored in index_folder as a
+    NumPy matrix of unit vectors (one row per document) and a JSON list of
+    the documents.
+
+    build() re-embeds only documents whose text changed since the last build.
+    Search is a brute-force dot product; from ivf_threshold documents on, an
+    IVF index built on first use limits the scan to the nearest clusters.
+    """
+
+    def __init__(self, index_folder: Path, embedder=None, ivf_threshold: int = DEFAULT_IVF_THRESHOLD,
+                 nprobe: int = 8, logger: Optional[logging.Logger] = None):
+        """
+        Args:
+            index_folder (Path): Folder holding the matrix and document files.
+            embedder (optional): Object with a `name` and an async `embed(texts)`
+                returning one row per text; defaults to HashingEmbedder.
+            ivf_threshold (int): Fewest documents searched through an IVF index.
+            nprobe (int): Clusters scanned per IVF query.
+            logger (logging.Logger, optional): Logger for build statistics.
+        """
+        self.index_folder = Path(index_folder)
+        self.embedder = embedder or HashingEmbedder()
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.logger = logger or logging.getLogger(__name__)
+        self.documents: List[Dict] = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self._ivf: Optional[IVFIndex] = None
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def load(self):
+        """
+        Read the stored index; one built by another embedder or index version is ignored.
+        """
+        documents_path = self.index_folder / DOCUMENTS_FILE
+        matrix_path = self.index_folder / MATRIX_FILE
+        if not documents_path.exists() or not matrix_path.exists():
+            return
+        try:
+            with open(documents_path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            matrix = np.load(matrix_path)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable summary index in {self.index_folder}: {e}")
+            return
+        if stored.get("version") != INDEX_VERSION or stored.get("embedder") != self.embedder.name \
+                or len(stored.get("documents", [])) != len(matrix):
+            return
+        self.documents = stored["documents"]
+        self.matrix = matrix.astype(np.float32, copy=False)
+        self._ivf = None
+
+    def save(self):
+        buffer = io.BytesIO()
+        np.save(buffer, self.matrix)
+        atomic_write_bytes(self.index_folder / MATRIX_FILE, buffer.getvalue())
+        atomic_write_json(self.index_folder / DOCUMENTS_FILE, {
+            "version": INDEX_VERSION,
+            "embedder": self.embedder.name,
+            "documents": self.documents,
+        })
+
+    async def build(self, summary_store, folder_summary: Dict = None) -> Dict[str, int]:
+        """
+        Bring the index up to date with the summaries on disk and save it.
+
+        Args:
+            summary_store (SummaryStore): The file summaries.
+            folder_summary (dict, optional): Folder summary tree, as written by summarize_folders.
+
+        Returns:
+            dict: Counts of documents 'indexed', 'embedded', 'reused' and 'removed'.
+        """
+        documents = collect_documents(summary_store, folder_summary)
+        previous = {document["id"]: (document["hash"], row) for row, document in enumerate(self.documents)}
+        rows, stale = [], []
+        for document in documents:
+            document["hash"] = hash_value(document["text"])
+            cached = previous.get(document["id"])
+            rows.append(cached[1] if cached and cached[0] == document["hash"] else None)
+            if rows[-1] is None:
+                stale.append(len(rows) - 1)
+
+        texts = [documents[index].pop("text") for index in stale]
+        for document in documents:
+            document.pop("text", None)
+        embedded = _normalize(np.asarray(await self.embedder.embed(texts), dtype=np.float32)) if texts else None
+        dimensions = embedded.shape[1] if embedded is not None else self.matrix.shape[1] if len(self.matrix) else 0
+        matrix = np.zeros((len(documents), dimensions), dtype=np.float32)
+        for index, row in enumerate(rows):
+            if row is not None:
+                matrix[index] = self.matrix[row]
+        for position, index in enumerate(stale):
+            matrix[index] = embedded[position]
+
+        current = {document["id"] for document in documents}
+        counts = {
+            "indexed": len(documents),
+            "embedded": len(stale),
+            "reused": len(documents) - len(stale),
+            "removed": sum(1 for document_id in previous if document_id not in current),
+        }
+        self.documents, self.matrix, self._ivf = documents, matrix, None
+        self.save()
+        self.logger.info(f"Summary index: {counts['indexed']} documents ({counts['embedded']} embedded, "
+                         f"{counts['reused']} reused, {counts['removed']} removed) with {self.embedder.name}")
+        return counts
+
+    async def search(self, query: str, k: int = 8, kind: str = None) -> List[Dict]:
+        """
+        The k documents most similar to a query.
+
+        Args:
+            query (str): A question or topic, e.g. "where is retry logic".
+            k (int): Most results returned.
+            kind (str, optional): Only 'file' or only 'folder' documents.
+
+        Returns:
+            list: Dicts with the document's id, kind, path, summary and cosine
+            similarity 'score', best first.
+        """
+        if not self.documents:
+            return []
+        vector = _normalize(np.asarray(await self.embedder.embed([query]), dtype=np.float32))[0]
+        if len(self.documents) >= self.ivf_threshold:
+            if self._ivf is None:
+                self._ivf = IVFIndex(self.matrix)
+            rows = self._ivf.candidates(vector, self.nprobe)
+        else:
+            rows = np.arange(len(self.documents))
+        if kind is not None:
+            rows = np.asarray([row for row in rows if self.documents[row]["kind"] == kind], dtype=np.int64)
+        if len(rows) == 0:
+            return []
+        scores = self.matrix[rows] @ vector
+        top = np.argsort(-scores, kind='stable')[:k]
+        return [{**{key: self.documents[rows[i]][key] for key in ("id", "kind", "path", "summary")},
+                 "score": float(scores[i])} for i in top]
+
+    async def search_many(self, queries: Iterable[str], k: int = 8, kind: str = None) -> Dict[str, Dict]:
+        """
+        Union of the top-k documents of several queries, keyed by id in first-seen order.
+        """
+        found = {}
+        for query in queries:
+            for hit in await self.search(query, k=k, kind=kind):
+                found.setdefault(hit["id"], hit)
+        return found
@@ -0,0 +1,231 @@
+# utils/summary_packer.py
+
+import asyncio
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from utils.prompts import packed_file_summary_instructions, file_summary_code_template
+from utils.path_keys import path_key
+from utils.prompt_builder import Prompt, PromptSegment
+
+# Packing only needs a rough size, so a characters-per-token ratio is enough
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count of text.
+    """
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+@dataclass
+class PackItem:
+    relative_path: Path
+    code: str
+    tokens: int
+    future: asyncio.Future = field(repr=False, default=None)
+
+    @property
+    def key(self) -> str:
+        return path_key(self.relative_path)
+
+
+def build_packed_file_summary_prompt(items: List[PackItem]) -> Prompt:
+    """
+    Build one prompt asking for a JSON array of summaries, one per file.
+    """
+    segments = [PromptSegment(packed_file_summary_instructions.format(), cacheable=True)]
+    for item in items:
+        segments.append(PromptSegment(file_summary_code_template.format(python_file_name=item.key, code=item.code)))
+    return Prompt(segments)
+
+
+def parse_summary_array(text: str) -> List[Any]:
+    """
+    Parse the JSON array from a packed response.
+
+    A response cut off by the output token limit still yields every element
+    that was completed before the cut.
+
+    Args:
+        text (str): Raw LLM response, optionally inside a ```json fence.
+
+    Returns:
+        list: Parsed elements; empty if no array was found.
+    """
+    fenced = re.search(r"```(?:json)?\s*(\[.*?)(?:```|$)", text, re.DOTALL)
+    body = fenced.group(1) if fenced else text[text.find('['):] if '[' in text else ''
+    if not body:
+        return []
+    try:
+        parsed = json.loads(body)
+        return parsed if isinstance(parsed, list) else []
+    except json.JSONDecodeError:
+        pass
+
+    decoder = json.JSONDecoder()
+    elements = []
+    position = body.index('[') + 1
+    while True:
+        while position < len(body) and body[position] in " \t\r\n,":
+            position += 1
+        if position >= len(body) or body[position] == ']':
+            break
+        try:
+            element, position = decoder.raw_decode(body, position)
+        except json.JSONDecodeError:
+            break  # Truncated element
+        elements.append(element)
+    return elements
+
+
+def split_packed_summaries(elements: List[Any], items: List[PackItem], required_keys: List[str]) -> Dict[str, dict]:
+    """
+    Match parsed summaries to the files they describe and drop invalid ones.
+
+    Summaries are matched by their "file" value; if none of the names match
+    but the model returned exactly one summary per file, they are matched by
+    position. Each summary's "file" is then set to the key of its file, however
+    the model wrote the name.
+
+    Returns:
+        dict: File key -> summary, for the files that got a valid summary.
+    """
+    summaries = [element for element in elements if isinstance(element, dict)]
+    keys = {item.key: item for item in items}
+    by_name = {Path(item.key).name: item for item in items}
+    if len(by_name) != len(items):
+        by_name = {}  # Ambiguous bare names, e.g. two __init__.py files
+
+    matched: Dict[str, dict] = {}
+    for summary in summaries:
+        name = path_key(summary.get("file") or summary.get("file_path") or "")
+        item = keys.get(name) or by_name.get(name.rsplit('/', 1)[-1] if name != '.' else None)
+        if item is not None and item.key not in matched:
+            matched[item.key] = summary
+    if not matched and len(summaries) == len(items):
+        matched = {item.key: summary for item, summary in zip(items, summaries)}
+
+    # Require some actual content besides the file name
+    content_keys = [key for key in required_keys if key != 'file']
+    return {
+        key: {**summary, "file": key} for key, summary in matched.items()
+        if any(summary.get(content_key) for content_key in content_keys)
+    }
+
+
+class SummaryPacker:
+    """
+    Groups concurrent requests for small file summaries into packed requests.
+
+    generate_summary submits each small file and awaits its own summary. Files
+    that arrive within linger_seconds of each other are packed until the input
+    token budget, the file limit or the output budget is reached. A file that
+    ends up alone in its pack, or whose summary is missing from the packed
+    reply, resolves to None and is summarized on its own by the caller.
+
+    With at most max_concurrency summaries in flight, a pack cannot grow past
+    that many files, so it is sent as soon as it has them instead of lingering;
+    with max_concurrency 1 nothing is packed.
+    """
+
+    def __init__(self, summarize_pack: Callable[[List[PackItem]], Awaitable[Dict[str, dict]]],
+                 small_file_tokens: int = 800, token_budget: int = 3000, max_files: int = 8,
+                 max_output_tokens: int = 1024, output_tokens_per_file: int = 250,
+                 linger_seconds: float = 0.05, max_concurrency: Optional[int] = None,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Args:
+            summarize_pack (callable): Sends one packed request; returns file key -> summary.
+            small_file_tokens (int): Files up to this many tokens are packed.
+            token_budget (int): Maximum code tokens per packed request.
+            max_files (int): Maximum files per packed request.
+            max_output_tokens (int): The model's output limit; caps files per pack.
+            output_tokens_per_file (int): Expected summary length used with max_output_tokens.
+            linger_seconds (float): How long an open pack waits for more files.
+            max_concurrency (int, optional): Limit on summaries requested at the same time.
+            logger (logging.Logger, optional): Logger for pack results.
+        """
+        self.summarize_pack = summarize_pack
+        self.small_file_tokens = small_file_tokens
+        self.token_budget = token_budget
+        self.max_files = max(1, min(max_files, max_output_tokens // output_tokens_per_file))
+        self.linger_seconds = linger_seconds
+        self.max_concurrency = max_concurrency
+        self.logger = logger or logging.getLogger(__name__)
+        self._open: List[PackItem] = []
+        self._open_tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.packed_requests = 0
+        self.packed_files = 0
+        self.fallback_files = 0
+
+    @property
+    def pack_limit(self) -> int:
+        """
+        Most files one pack can get: the file limit, or fewer when fewer summaries run at once.
+        """
+        return min(self.max_files, self.max_concurrency) if self.max_concurrency else self.max_files
+
+    @property
+    def enabled(self) -> bool:
+        return self.pack_limit > 1
+
+    def is_small(self, code: str) -> bool:
+        return self.enabled and estimate_tokens(code) <= self.small_file_tokens
+
+    async def submit(self, relative_path: Path, code: str) -> Optional[dict]:
+        """
+        Add a small file to the open pack and wait for its summary.
+
+        Returns:
+            dict: The file's summary, or None if it must be summarized on its own.
+        """
+        item = PackItem(relative_path, code, estimate_tokens(code), asyncio.get_running_loop().create_future())
+        if self._open and self._open_tokens + item.tokens > self.token_budget:
+            self._flush()
+        self._open.append(item)
+        self._open_tokens += item.tokens
+        if len(self._open) >= self.pack_limit:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.linger_seconds, self._flush)
+        return await item.future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items, self._open, self._open_tokens = self._open, [], 0
+        if len(items) == 1:
+            items[0].future.set_result(None)
+        elif items:
+            task = asyncio.ensure_future(self._run_pack(items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_pack(self, items: List[PackItem]):
+        try:
+            summaries = await self.summarize_pack(items)
+        except Exception as e:
+            self.logger.error(f"Packed summary request for {len(items)} files failed: {e}")
+            summaries = {}
+        self.packed_requests += 1
+        self.packed_files += len(summaries)
+        self.fallback_files += len(items) - len(summaries)
+        if len(summaries) < len(items):
+            self.logger.info(f"Packed request returned {len(summaries)} of {len(items)} summaries; "
+                             f"the rest are summarized individually.")
+        for item in items:
+            if not item.future.done():
+                item.future.set_result(summaries.get(item.key))
+
+    def report(self) -> str:
+        return (f"Packing: {self.packed_files} files summarized in {self.packed_requests} packed requests, "
+                f"{self.fallback_files} fell back to single-file requests")
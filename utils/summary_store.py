@@ -0,0 +1,313 @@
+# utils/summary_store.py
+
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from utils.atomic_io import atomic_write_json
+from utils.path_keys import PATH_KEY_VERSION, parent_key, path_key
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    path TEXT PRIMARY KEY,
+    folder TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS summaries_folder ON summaries (folder, path);
+"""
+
+# Reads are served from a memory map of the database file up to this size
+DEFAULT_MMAP_BYTES = 256 * 1024 * 1024
+
+
+def summary_key(relative_path: Union[str, Path]) -> str:
+    """
+    Store key of a source file: its path key, the same on every host.
+    """
+    return path_key(relative_path)
+
+
+def folder_of(key: str) -> str:
+    """
+    The folder of a store key, '.' for files in the project root.
+    """
+    return parent_key(key)
+
+
+def canonical_summary(summary: dict, windows: Optional[bool] = None) -> dict:
+    """
+    A summary with the paths it records (its own and its representative's) as path keys.
+
+    Args:
+        summary (dict): The summary.
+        windows (bool, optional): Whether the recorded paths use Windows separators (see path_key).
+    """
+    summary = dict(summary)
+    if isinstance(summary.get("file_path"), str):
+        summary["file_path"] = path_key(summary["file_path"], windows)
+    if isinstance(summary.get("derived_from"), dict) and isinstance(summary["derived_from"].get("file_path"), str):
+        summary["derived_from"] = {**summary["derived_from"],
+                                   "file_path": path_key(summary["derived_from"]["file_path"], windows)}
+    return summary
+
+
+class SummaryStore:
+    """
+    File summaries of a project in a single SQLite file.
+
+    Summaries are keyed by project-relative POSIX path and indexed by folder,
+    so a folder's summaries are read on their own and iterated lazily rather
+    than every summary being loaded up front. Writes can be batched in one
+    transaction. Per-file JSON is only written when an export folder is set.
+    """
+
+    def __init__(self, db_file: Path, export_folder: Optional[Path] = None, import_folder: Optional[Path] = None,
+                 mmap_bytes: int = DEFAULT_MMAP_BYTES):
+        """
+        Stores written before the current path-key format are migrated on open (see migrate_keys).
+
+        Args:
+            db_file (Path): SQLite database file; created if missing.
+            export_folder (Path, optional): Mirror every summary to <export_folder>/<path>.json.
+            import_folder (Path, optional): Per-file JSON summaries from before the store existed;
+                imported once, when the database is created.
+            mmap_bytes (int): Bytes of the database file memory-mapped for reads; 0 disables.
+        """
+        self.db_file = Path(db_file)
+        self.export_folder = Path(export_folder) if export_folder else None
+        self.mmap_bytes = mmap_bytes
+        created = not self.db_file.exists()
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            key_version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if created and import_folder and Path(import_folder).is_dir():
+            self.import_json(import_folder)
+        if key_version < PATH_KEY_VERSION:
+            self.migrate_keys()
+            with self._connect() as conn:
+                conn.execute(f"PRAGMA user_version = {PATH_KEY_VERSION}")
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation keeps the store safe to use from threads
+        conn = sqlite3.connect(self.db_file, timeout=30.0, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_bytes)}")
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _export(self, key: str, summary: Optional[dict]):
+        if self.export_folder is None:
+            return
+        export_file = self.export_folder / Path(key).with_suffix('.json')
+        if summary is not None:
+            atomic_write_json(export_file, summary)
+        elif export_file.exists():
+            export_file.unlink()
+
+    def put(self, relative_path: Union[str, Path], summary: dict):
+        """
+        Store (or replace) the summary of a file.
+        """
+        self.put_many({relative_path: summary})
+
+    def put_many(self, summaries: Dict[Union[str, Path], dict]) -> int:
+        """
+        Store several summaries in one transaction.
+
+        Returns:
+            int: Number of summaries written.
+        """
+        now = time.time()
+        rows = [(summary_key(path), folder_of(summary_key(path)), json.dumps(summary, ensure_ascii=False), now)
+                for path, summary in summaries.items()]
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO summaries (path, folder, summary, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET folder = excluded.folder, summary = excluded.summary, "
+                "updated = excluded.updated",
+                rows,
+            )
+        for path, summary in summaries.items():
+            self._export(summary_key(path), summary)
+        return len(rows)
+
+    def get(self, relative_path: Union[str, Path]) -> Optional[dict]:
+        """
+        The stored summary of a file, or None.
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT summary FROM summaries WHERE path = ?", (summary_key(relative_path),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def has(self, relative_path: Union[str, Path]) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM summaries WHERE path = ?",
+                                (summary_key(relative_path),)).fetchone() is not None
+
+    def delete(self, relative_path: Union[str, Path]) -> bool:
+        """
+        Remove the summary of a file.
+
+        Returns:
+            bool: True if there was one.
+        """
+        key = summary_key(relative_path)
+        with self._connect() as conn:
+            deleted = conn.execute("DELETE FROM summaries WHERE path = ?", (key,)).rowcount > 0
+        self._export(key, None)
+        return deleted
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+    def paths(self, folder: Optional[str] = None) -> List[str]:
+        """
+        Keys of the stored summaries, sorted, optionally only those directly in one folder.
+        """
+        with self._connect() as conn:
+            if folder is None:
+                rows = conn.execute("SELECT path FROM summaries ORDER BY path")
+            else:
+                rows = conn.execute("SELECT path FROM summaries WHERE folder = ? ORDER BY path", (folder,))
+            return [row[0] for row in rows]
+
+    def folders(self) -> List[str]:
+        """
+        Folders that directly contain summarized files, sorted.
+        """
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT folder FROM summaries ORDER BY folder")]
+
+    def sizes(self) -> Dict[str, int]:
+        """
+        Length in characters of every stored summary, by key, without decoding the summaries.
+        """
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT path, length(summary) FROM summaries ORDER BY path"))
+
+    def iter_folder(self, folder: str) -> Iterator[Tuple[str, dict]]:
+        """
+        Lazily yield (key, summary) for the files directly in a folder ('.' for the root), by key.
+        """
+        yield from self._iter("SELECT path, summary FROM summaries WHERE folder = ? ORDER BY path", (folder,))
+
+    def iter_all(self) -> Iterator[Tuple[str, dict]]:
+        """
+        Lazily yield (key, summary) for every stored file, by key.
+        """
+        yield from self._iter("SELECT path, summary FROM summaries ORDER BY path", ())
+
+    def _iter(self, query: str, parameters: tuple) -> Iterator[Tuple[str, dict]]:
+        with self._connect() as conn:
+            for path, summary in conn.execute(query, parameters):
+                yield path, json.loads(summary)
+
+    def migrate_keys(self) -> int:
+        """
+        Re-key summaries stored under non-canonical paths (e.g. 'pkg\\a.py' from a
+        Windows host) and canonicalize the paths recorded inside them. Where two
+        rows end up with the same key, the most recently updated one is kept.
+
+        Stores from before path keys were canonical may have been written on
+        Windows, so backslashes in their paths are read as separators.
+
+        Returns:
+            int: Number of summaries rewritten.
+        """
+        migrated = set()
+        with self._transaction() as conn:
+            for path, text, updated in conn.execute("SELECT path, summary, updated FROM summaries").fetchall():
+                key = path_key(path, windows=True)
+                summary = json.loads(text)
+                canonical = canonical_summary(summary, windows=True) if isinstance(summary, dict) else summary
+                if key == path and canonical == summary:
+                    continue
+                if key != path:
+                    conn.execute("DELETE FROM summaries WHERE path = ?", (path,))
+                conn.execute(
+                    "INSERT INTO summaries (path, folder, summary, updated) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(path) DO UPDATE SET folder = excluded.folder, summary = excluded.summary, "
+                    "updated = excluded.updated WHERE excluded.updated >= summaries.updated",
+                    (key, parent_key(key), json.dumps(canonical, ensure_ascii=False), updated),
+                )
+                migrated.add(key)
+        if self.export_folder is not None:
+            for key in migrated:
+                self._export(key, self.get(key))
+        return len(migrated)
+
+    def compact(self, min_free_ratio: float = 0.25) -> bool:
+        """
+        Reclaim the space of deleted and replaced summaries once enough of the file is free.
+
+        Args:
+            min_free_ratio (float): Smallest share of free pages worth a rewrite; 0 always compacts.
+
+        Returns:
+            bool: True if the database was rewritten.
+        """
+        with self._connect() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            pages = conn.execute("PRAGMA page_count").fetchone()[0]
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if pages == 0 or (free / pages < min_free_ratio and min_free_ratio > 0):
+                return False
+            conn.execute("VACUUM")
+            return True
+
+    def import_json(self, folder: Path) -> int:
+        """
+        Bulk-load per-file JSON summaries (<folder>/<path>.json) into the store.
+
+        Returns:
+            int: Number of summaries imported.
+        """
+        folder = Path(folder)
+        summaries = {}
+        for summary_file in sorted(folder.rglob('*.json')):
+            try:
+                with open(summary_file, 'r', encoding='utf-8') as f:
+                    summary = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if isinstance(summary, dict):
+                summaries[summary_file.relative_to(folder).with_suffix('.py').as_posix()] = summary
+        export_folder, self.export_folder = self.export_folder, None  # They are already on disk
+        try:
+            return self.put_many(summaries) if summaries else 0
+        finally:
+            self.export_folder = export_folder
+
+    def export_json(self, folder: Path) -> int:
+        """
+        Write every stored summary to <folder>/<path>.json.
+
+        Returns:
+            int: Number of files written.
+        """
+        count = 0
+        for key, summary in self.iter_all():
+            atomic_write_json(Path(folder) / Path(key).with_suffix('.json'), summary)
+            count += 1
+        return count
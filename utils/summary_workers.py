@@ -0,0 +1,195 @@
+# utils/summary_workers.py
+
+import asyncio
+import os
+import socket
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from utils.project_manager import ProjectManager
+from utils.artifact_graph import file_node
+from utils.parse_cache import get_parse_cache
+from utils.path_keys import key_to_path, path_key
+from utils.work_queue import WorkQueue, Job
+
+
+def default_queue_file(project_manager: ProjectManager) -> Path:
+    return project_manager.get_analysis_folder() / "work_queue.sqlite"
+
+
+class SummaryCoordinator:
+    def __init__(self, project_manager: ProjectManager, document_generator, queue: WorkQueue,
+                 preprocess: Optional[Callable[[str], str]] = None):
+        """
+        Enqueue file summaries for workers and fold their results back into the artifact graph.
+
+        Args:
+            project_manager (ProjectManager): Manager for project-related operations.
+            document_generator (DocumentGenerator): Generator whose artifact graph decides what is stale.
+            queue (WorkQueue): Queue shared with the workers.
+            preprocess (callable, optional): Applied to the source before summarizing, e.g. remove_comments.
+        """
+        self.project_manager = project_manager
+        self.document_generator = document_generator
+        self.queue = queue
+        self.preprocess = preprocess or (lambda code: code)
+        self.logger = project_manager.logger
+
+    def enqueue_project(self, **ignore_patterns) -> int:
+        """
+        Enqueue every Python file whose summary is missing or stale.
+
+        Args:
+            **ignore_patterns: Passed to ProjectManager.get_all_python_files.
+
+        Returns:
+            int: Number of jobs added or reset.
+        """
+        parse_cache = get_parse_cache()
+        jobs, inputs = {}, {}
+        for py_file in self.project_manager.get_all_python_files(**ignore_patterns):
+            try:
+                code = self.preprocess(parse_cache.get(py_file).source)
+            except OSError as e:
+                self.logger.error(f"Failed to read {py_file}: {e}")
+                continue
+            if not code:
+                continue
+            relative_path = self.project_manager.get_relative_path(py_file)
+            if self.document_generator.summary_is_current(relative_path, code):
+                continue
+            key = path_key(relative_path)
+            jobs[key] = {"relative_path": key}
+            inputs[key] = self.document_generator.summary_inputs_hash(code)
+
+        # Adopted legacy summaries are recorded by summary_is_current
+        self.document_generator.artifact_graph.save()
+        added = self.queue.enqueue(jobs, inputs)
+        self.logger.info(f"{len(jobs)} file(s) need summaries; {added} job(s) added or reset in {self.queue.db_file}.")
+        return added
+
+    def collect(self) -> int:
+        """
+        Record completed jobs in the artifact graph. Only the coordinator writes the
+        graph, so workers never overwrite each other's records.
+
+        Returns:
+            int: Number of results collected.
+        """
+        results = self.queue.collect()
+        graph = self.document_generator.artifact_graph
+        for key, result in results.items():
+            graph.record(file_node(key), result["inputs"], result["summary"])
+        if results:
+            graph.save()
+        return len(results)
+
+    async def wait(self, poll_interval: float = 5.0):
+        """
+        Collect results as workers complete them until no job is pending or leased.
+        """
+        while True:
+            collected = await asyncio.to_thread(self.collect)
+            counts = await asyncio.to_thread(self.queue.counts)
+            if collected:
+                self.logger.info(f"Collected {collected} result(s); queue: {counts}")
+            if counts['pending'] + counts['leased'] == 0:
+                break
+            await asyncio.sleep(poll_interval)
+
+        for failed in self.queue.failed_jobs():
+            self.logger.error(f"Summary job {failed['key']} failed after {failed['attempts']} attempt(s): {failed['error']}")
+
+
+class SummaryWorker:
+    def __init__(self, project_manager: ProjectManager, document_generator, queue: WorkQueue,
+                 preprocess: Optional[Callable[[str], str]] = None, worker_id: Optional[str] = None,
+                 concurrency: int = 1, poll_interval: float = 2.0, exit_when_idle: bool = True):
+        """
+        Pull summary jobs from the queue and summarize them with this worker's LLM client.
+
+        Args:
+            project_manager (ProjectManager): Manager for project-related operations.
+            document_generator (DocumentGenerator): Generator wrapping this worker's LLM clients.
+            queue (WorkQueue): Queue shared with the coordinator.
+            preprocess (callable, optional): Applied to the source before summarizing, e.g. remove_comments.
+            worker_id (str, optional): Name used in the queue; defaults to host:pid.
+            concurrency (int): Jobs summarized at once, e.g. the number of parallel requests the host serves.
+            poll_interval (float): Wait between claims when the queue is empty.
+            exit_when_idle (bool): Return once no job is pending or leased.
+        """
+        self.project_manager = project_manager
+        self.document_generator = document_generator
+        self.queue = queue
+        self.preprocess = preprocess or (lambda code: code)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.exit_when_idle = exit_when_idle
+        self.logger = project_manager.logger
+        self.completed = 0
+        self.lost = 0
+        self.failed = 0
+
+    async def run(self):
+        """
+        Process jobs until the queue is drained (or forever if exit_when_idle is False).
+        """
+        self.logger.info(f"Worker {self.worker_id} started with concurrency {self.concurrency}.")
+        await asyncio.gather(*(self._loop() for _ in range(self.concurrency)))
+        self.logger.info(
+            f"Worker {self.worker_id} finished: {self.completed} completed, {self.failed} failed, {self.lost} lease(s) lost."
+        )
+        self.logger.info(self.document_generator.prompt_cache_stats.report())
+        self.logger.info(self.document_generator.static_summarizer.report())
+
+    async def _loop(self):
+        while True:
+            job = await asyncio.to_thread(self.queue.claim, self.worker_id)
+            if job is None:
+                if self.exit_when_idle and await asyncio.to_thread(self.queue.unfinished) == 0:
+                    return
+                await asyncio.sleep(self.poll_interval)
+                continue
+            await self.process(job)
+
+    def _load_code(self, relative_path: Path) -> str:
+        # Reading, decoding and preprocessing block, so process runs this in a thread
+        parsed = get_parse_cache().get(self.project_manager.get_project_folder() / relative_path)
+        return self.preprocess(parsed.source)
+
+    async def process(self, job: Job):
+        """
+        Summarize one job while keeping its lease alive, then commit it.
+        """
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            relative_path = key_to_path(job.payload["relative_path"])
+            code = await asyncio.to_thread(self._load_code, relative_path)
+            summary = await self.document_generator.build_summary(relative_path, code)
+            if not summary:
+                raise RuntimeError("LLM returned no usable summary")
+        except Exception as e:
+            heartbeat.cancel()
+            self.failed += 1
+            self.logger.error(f"Worker {self.worker_id}: job {job.key} failed: {e}")
+            await asyncio.to_thread(self.queue.fail, job, str(e))
+            return
+        heartbeat.cancel()
+
+        def commit():
+            self.project_manager.summary_store.put(relative_path, summary)
+
+        result = {"inputs": self.document_generator.summary_inputs_hash(code), "summary": summary}
+        if await asyncio.to_thread(self.queue.complete, job, result, commit):
+            self.completed += 1
+            self.logger.info(f"Worker {self.worker_id}: summary of {relative_path} saved")
+        else:
+            self.lost += 1
+            self.logger.warning(f"Worker {self.worker_id}: lease on {job.key} was lost; result discarded.")
+
+    async def _heartbeat(self, job: Job):
+        while True:
+            await asyncio.sleep(self.queue.lease_seconds / 3)
+            if not await asyncio.to_thread(self.queue.renew, job):
+                return
@@ -0,0 +1,242 @@
+# utils/work_queue.py
+
+import json
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    key TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    inputs TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_token TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    collected INTEGER NOT NULL DEFAULT 0,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, lease_expires);
+"""
+
+
+@dataclass
+class Job:
+    key: str
+    payload: Dict[str, Any]
+    lease_token: str
+    attempts: int
+
+
+class WorkQueue:
+    """
+    Durable job queue shared by one coordinator and any number of worker
+    processes on the same machine, backed by a single SQLite file.
+
+    Workers claim jobs under a time-limited lease. A job whose lease expires
+    (worker crashed or stalled) is handed to the next worker that asks. Only the
+    current lease holder can complete a job, and completion runs the caller's
+    commit step inside the same write transaction, so a job's output is committed
+    exactly once even if two workers end up computing it.
+    """
+
+    def __init__(self, db_file: Path, lease_seconds: float = 600.0, max_attempts: int = 3):
+        """
+        Args:
+            db_file (Path): SQLite database file; created if missing.
+            lease_seconds (float): How long a claimed job stays reserved without a renewal.
+            max_attempts (int): Claims allowed per job before it is marked failed.
+        """
+        self.db_file = Path(db_file)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation keeps the queue safe to use from threads
+        conn = sqlite3.connect(self.db_file, timeout=30.0, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._connect() as conn:
+            # BEGIN IMMEDIATE takes the write lock up front so concurrent claims serialize
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def enqueue(self, jobs: Dict[str, Dict[str, Any]], inputs: Dict[str, str]) -> int:
+        """
+        Add jobs, or reset existing ones whose inputs changed.
+
+        Args:
+            jobs (dict): Job key -> JSON-serializable payload.
+            inputs (dict): Job key -> hash of the job's inputs.
+
+        Returns:
+            int: Number of jobs added or reset.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                """
+                INSERT INTO jobs (key, payload, inputs, state, updated) VALUES (?, ?, ?, 'pending', ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    payload = excluded.payload, inputs = excluded.inputs, state = 'pending',
+                    attempts = 0, worker = NULL, lease_token = NULL, lease_expires = NULL,
+                    result = NULL, error = NULL, collected = 0, updated = excluded.updated
+                WHERE jobs.inputs != excluded.inputs OR jobs.state = 'failed'
+                """,
+                [(key, json.dumps(payload), inputs[key], now) for key, payload in jobs.items()],
+            )
+            return conn.total_changes - before
+
+    def claim(self, worker_id: str) -> Optional[Job]:
+        """
+        Lease the next available job: a pending one, or one whose lease expired.
+
+        Args:
+            worker_id (str): Name of the claiming worker, for diagnostics.
+
+        Returns:
+            Job: The leased job, or None if nothing is available right now.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            # Jobs that keep losing their lease are given up on rather than retried forever
+            conn.execute(
+                "UPDATE jobs SET state = 'failed', error = 'lease expired too many times', updated = ? "
+                "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            row = conn.execute(
+                "SELECT key, payload, attempts FROM jobs "
+                "WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?) "
+                "ORDER BY attempts, updated LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            key, payload, attempts = row
+            token = uuid.uuid4().hex
+            conn.execute(
+                "UPDATE jobs SET state = 'leased', worker = ?, lease_token = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated = ? WHERE key = ?",
+                (worker_id, token, now + self.lease_seconds, now, key),
+            )
+        return Job(key=key, payload=json.loads(payload), lease_token=token, attempts=attempts + 1)
+
+    def renew(self, job: Job) -> bool:
+        """
+        Extend a job's lease. Returns False if the lease was lost to another worker.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated = ? "
+                "WHERE key = ? AND lease_token = ? AND state = 'leased'",
+                (now + self.lease_seconds, now, job.key, job.lease_token),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job: Job, result: Any = None, commit: Optional[Callable[[], None]] = None) -> bool:
+        """
+        Mark a job done if the caller still holds its lease.
+
+        Args:
+            job (Job): The claimed job.
+            result (Any): JSON-serializable result stored with the job.
+            commit (callable, optional): Publishes the job's output. Runs while the
+                queue's write lock is held and only if the lease is still valid, so
+                it runs exactly once per job across all workers.
+
+        Returns:
+            bool: False if the lease was lost and nothing was committed.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM jobs WHERE key = ? AND lease_token = ? AND state = 'leased'",
+                (job.key, job.lease_token),
+            ).fetchone()
+            if row is None:
+                return False
+            if commit is not None:
+                commit()
+            conn.execute(
+                "UPDATE jobs SET state = 'done', result = ?, error = NULL, lease_token = NULL, "
+                "lease_expires = NULL, updated = ? WHERE key = ?",
+                (json.dumps(result), now, job.key),
+            )
+        return True
+
+    def fail(self, job: Job, error: str) -> bool:
+        """
+        Release a job after an error. It is retried until max_attempts claims have been used.
+
+        Returns:
+            bool: False if the lease was already lost.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, lease_token = NULL, lease_expires = NULL, updated = ? "
+                "WHERE key = ? AND lease_token = ? AND state = 'leased'",
+                (self.max_attempts, error, now, job.key, job.lease_token),
+            )
+            return cursor.rowcount == 1
+
+    def collect(self) -> Dict[str, Any]:
+        """
+        Return results of completed jobs not collected before, and mark them collected.
+        """
+        with self._transaction() as conn:
+            rows = conn.execute("SELECT key, result FROM jobs WHERE state = 'done' AND collected = 0").fetchall()
+            conn.execute("UPDATE jobs SET collected = 1 WHERE state = 'done' AND collected = 0")
+        return {key: json.loads(result) if result else None for key, result in rows}
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Number of jobs in each state.
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def unfinished(self) -> int:
+        counts = self.counts()
+        return counts[PENDING] + counts[LEASED]
+
+    def failed_jobs(self) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT key, attempts, error FROM jobs WHERE state = 'failed' ORDER BY key").fetchall()
+        return [{"key": key, "attempts": attempts, "error": error} for key, attempts, error in rows]
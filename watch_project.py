@@ -0,0 +1,51 @@
+# watch_project.py
+
+import asyncio
+from utils.project_manager import ProjectManager
+from utils.dependency_analyzer import DependencyAnalyzer
+from utils.document_generator import DocumentGenerator
+from utils.project_watcher import ProjectWatcher
+from utils.llm_client import LLMClient
+from utils.config import PROJECT_PATH
+from configs.llm_config import LLMConfig
+from code_llm_summarizer import remove_comments
+
+async def main():
+    project_path = PROJECT_PATH
+    ignored_dirs = ['tests', '__pycache__', 'migrations', 'dist','build','.ipynb_checkpoints','assets','unused' ]  # Example directories to ignore
+    ignored_files = ['setup.py', 'manage.py']             # Example files to ignore
+    ignored_path_substrings = ['legacy', 'third_party','__pycache__']   # Example path substrings to ignore
+
+    project_manager = ProjectManager(
+            project_path=project_path,
+            ignored_dirs=ignored_dirs,
+            ignored_files=ignored_files,
+            ignored_path_substrings=ignored_path_substrings
+        )
+
+    project_manager.initialize_logger()  # Initialize logger before workspace setup
+
+    project_manager.setup_workspace(clean_existing=False)  # Now it's safe to use self.logger in setup_workspace
+
+    primary_llm_config = LLMConfig.get('ollama')       # Primary LLM configuration
+    fallback_llm_config = LLMConfig.get('anthropic')  # Fallback LLM configuration
+
+    async with LLMClient(primary_llm_config) as primary_llm_client, \
+               LLMClient(fallback_llm_config) as fallback_llm_client:
+        generator = DocumentGenerator(primary_llm_client, fallback_llm_client, project_manager)
+        analyzer = DependencyAnalyzer(project_manager=project_manager, excluded_dirs=set(ignored_dirs))
+
+        watcher = ProjectWatcher(project_manager, generator, analyzer, preprocess=remove_comments)
+        try:
+            await watcher.run()
+        except asyncio.CancelledError:
+            watcher.stop()
+
+    # Close the logger to release the log file
+    project_manager.close_logger()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass